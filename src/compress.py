@@ -0,0 +1,55 @@
+# src/compress.py
+import argparse
+import glob
+import os
+import sys
+from typing import List, Optional
+
+from data_handlers.take_codec import (COMPRESSORS, DEFAULT_BLOCK_FRAMES, DEFAULT_COMPRESSOR,
+                                      DEFAULT_POSITION_STEP, compress_take, decompress_take,
+                                      is_compressed)
+from data_handlers.take_file import TAKE_SUFFIX
+
+def main(argv: Optional[List[str]] = None) -> int:
+   parser = argparse.ArgumentParser(
+       description="Compress a directory of recorded takes, or restore raw takes")
+   parser.add_argument("input", help="Directory containing recorded takes")
+   parser.add_argument("-o", "--output", required=True, help="Output directory")
+   parser.add_argument("-c", "--compressor", choices=sorted(COMPRESSORS),
+                       default=DEFAULT_COMPRESSOR, help="Block compressor")
+   parser.add_argument("--block-frames", type=int, default=DEFAULT_BLOCK_FRAMES,
+                       help="Frames per independently decodable block")
+   parser.add_argument("--position-step", type=float, default=DEFAULT_POSITION_STEP,
+                       help="Position quantization step in metres")
+   parser.add_argument("-d", "--decompress", action="store_true",
+                       help="Write raw takes from compressed ones instead")
+   args = parser.parse_args(argv)
+   
+   if os.path.abspath(args.input) == os.path.abspath(args.output):
+       parser.error("output directory must differ from the input directory")
+   os.makedirs(args.output, exist_ok=True)
+   failed = 0
+   paths = sorted(glob.glob(os.path.join(args.input, "*" + TAKE_SUFFIX)))
+   for path in paths:
+       output = os.path.join(args.output, os.path.basename(path))
+       try:
+           if args.decompress:
+               if not is_compressed(path):
+                   print(f"{path}: not compressed, skipped")
+                   continue
+               frames = decompress_take(path, output)
+           else:
+               frames, _ = compress_take(path, output, args.compressor, args.block_frames,
+                                         args.position_step)
+       except (OSError, ValueError) as e:
+           failed += 1
+           print(f"FAILED {path}: {e}")
+           continue
+       sizes = sorted((os.path.getsize(path), os.path.getsize(output)))
+       ratio = sizes[1] / max(1, sizes[0])
+       print(f"{path}: {frames} frames -> {output} ({ratio:.1f}x)")
+   print(f"Converted {len(paths) - failed}/{len(paths)} takes")
+   return 1 if failed else 0
+
+if __name__ == "__main__":
+   sys.exit(main())
@@ -0,0 +1,182 @@
+# src/data_handlers/async_mvn_handler.py
+import asyncio
+import socket
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+from .mvn_data_handler import XSensConfig
+from .mvn_protocol import MVNFrame, decode_datagram
+from .stream_framer import MVNStreamFramer
+
+
+class AsyncMVNDataHandler:
+    """asyncio counterpart of MVNDataHandler.
+
+    Datagrams (UDP) and stream chunks (TCP) are decoded in the protocol
+    callbacks on the event loop thread and queued for `async for frame in
+    handler.frames()`. The consumer is only woken when it is actually
+    waiting, so a burst of frames costs one wakeup, not one per frame.
+
+    Backpressure: when config.frame_buffer_size frames are queued, TCP
+    reading is paused until the consumer has drained half of them; UDP cannot
+    push back on the sender, so the oldest queued frame is dropped and
+    counted instead. close() ends iteration immediately.
+    """
+    def __init__(self, config: XSensConfig = None):
+        self.config = config or XSensConfig()
+        self.is_connected = False
+        self.transport: Optional[asyncio.BaseTransport] = None
+        self.frames_received = 0
+        self.dropped_frames = 0
+        self.parse_errors = 0
+        self.read_pauses = 0
+        self._queue: Deque[MVNFrame] = deque()
+        self._waiter: Optional[asyncio.Future] = None
+        self._paused = False
+        self._closed = False
+        self._framer: Optional[MVNStreamFramer] = None
+
+    async def connect(self) -> Tuple[bool, str]:
+        loop = asyncio.get_running_loop()
+        self._closed = False
+        try:
+            if self.config.protocol == "UDP":
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._apply_receive_buffer_size(sock)
+                sock.bind((self.config.host, self.config.port))
+                sock.setblocking(False)
+                self.transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _DatagramProtocol(self), sock=sock)
+            else:
+                self._framer = MVNStreamFramer(self.config.stream_buffer_size)
+                self.transport, _ = await asyncio.wait_for(
+                    loop.create_connection(lambda: _StreamProtocol(self),
+                                           self.config.host, self.config.port),
+                    self.config.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            return False, f"Failed to connect: {str(e) or type(e).__name__}"
+        self.is_connected = True
+        return True, "Connected successfully"
+
+    def _apply_receive_buffer_size(self, sock: socket.socket):
+        if self.config.receive_buffer_size > 0:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                            self.config.receive_buffer_size)
+
+    def close(self):
+        """Close the transport and end any running frames() iteration now"""
+        self._closed = True
+        self.is_connected = False
+        self._queue.clear()
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        self._wake()
+
+    async def __aenter__(self) -> "AsyncMVNDataHandler":
+        success, message = await self.connect()
+        if not success:
+            raise ConnectionError(message)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    async def frames(self) -> AsyncIterator[MVNFrame]:
+        """Yield decoded frames until close() or the peer closes the stream"""
+        loop = asyncio.get_running_loop()
+        low_water = self.config.frame_buffer_size // 2
+        while True:
+            while self._queue:
+                frame = self._queue.popleft()
+                if self._paused and len(self._queue) <= low_water:
+                    self._paused = False
+                    if self.transport is not None:
+                        self.transport.resume_reading()
+                yield frame
+            if self._closed:
+                return
+            self._waiter = loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+    def _wake(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _deliver(self, data, stream: bool, receive_time: Optional[float] = None):
+        try:
+            frame = decode_datagram(data, receive_time=receive_time)
+        except ValueError as e:
+            self.parse_errors += 1
+            print(f"Error parsing packet: {e}")
+            return
+        self.frames_received += 1
+        if len(self._queue) >= self.config.frame_buffer_size:
+            if not stream:
+                self._queue.popleft()
+                self.dropped_frames += 1
+            elif not self._paused:
+                self._paused = True
+                self.read_pauses += 1
+                self.transport.pause_reading()
+        self._queue.append(frame)
+
+    def _connection_lost(self):
+        self._closed = True
+        self.is_connected = False
+        self._wake()
+
+    def get_status(self) -> Dict:
+        return {
+            "connected": self.is_connected,
+            "config": {
+                "host": self.config.host,
+                "port": self.config.port,
+                "protocol": self.config.protocol
+            },
+            "queued": len(self._queue),
+            "frames_received": self.frames_received,
+            "dropped_frames": self.dropped_frames,
+            "parse_errors": self.parse_errors,
+            "read_pauses": self.read_pauses,
+        }
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, handler: AsyncMVNDataHandler):
+        self.handler = handler
+
+    def datagram_received(self, data: bytes, addr):
+        self.handler._deliver(data, stream=False, receive_time=time.monotonic())
+        self.handler._wake()
+
+    def error_received(self, exc: Exception):
+        print(f"Error in data stream: {exc}")
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.handler._connection_lost()
+
+
+class _StreamProtocol(asyncio.Protocol):
+    def __init__(self, handler: AsyncMVNDataHandler):
+        self.handler = handler
+
+    def connection_made(self, transport: asyncio.BaseTransport):
+        # Data can arrive before create_connection() returns the transport
+        self.handler.transport = transport
+
+    def data_received(self, data: bytes):
+        received = time.monotonic()
+        framer = self.handler._framer
+        framer.feed(data)
+        for view in framer.frames():
+            self.handler._deliver(view, stream=True, receive_time=received)
+        self.handler._wake()
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self.handler._connection_lost()
@@ -0,0 +1,63 @@
+# src/data_handlers/capture_session.py
+import os
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+from .ingest_hub import IngestHub
+from .session_config import SessionProfile
+from .take_file import TAKE_SUFFIX
+from .take_recorder import TakeRecorder
+
+def new_take_path(directory: str, device: Optional[str] = None) -> str:
+    """Timestamped take path in directory, tagged with the device name when given"""
+    name = time.strftime("take_%Y%m%d_%H%M%S")
+    if device:
+        name += "_" + re.sub(r"\W+", "_", device).strip("_")
+    return os.path.join(directory, name + TAKE_SUFFIX)
+
+class CaptureSession:
+    """Records every XSens device of a profile without a user interface.
+
+    Each device becomes one source of a shared IngestHub and gets its own
+    TakeRecorder, writing to a timestamped take in the profile's takes
+    directory. Devices that fail to connect are reported by start() and
+    skipped; the others keep recording.
+    """
+    def __init__(self, profile: SessionProfile, hub: Optional[IngestHub] = None,
+                 fsync: bool = True):
+        self.profile = profile
+        self.hub = hub or IngestHub()
+        self.fsync = fsync
+        self.recorders: Dict[str, TakeRecorder] = {}
+
+    def start(self) -> Dict[str, Tuple[bool, str]]:
+        """Connect and start recording each XSens device, returning (success, message) per device"""
+        results = {}
+        os.makedirs(self.profile.takes_directory, exist_ok=True)
+        for device in self.profile.devices:
+            if not device.is_xsens:
+                continue
+            success, message = self.hub.add_source(device.name, device.xsens_config())
+            results[device.name] = (success, message)
+            if not success:
+                continue
+            recorder = TakeRecorder(new_take_path(self.profile.takes_directory, device.name),
+                                    fsync=self.fsync, codec=self.profile.take_codec)
+            recorder.metrics.enabled = self.hub.metrics.enabled
+            recorder.attach(self.hub.source(device.name))
+            recorder.start()
+            self.recorders[device.name] = recorder
+        if self.recorders:
+            self.hub.start_streaming()
+        return results
+
+    def stop(self) -> Dict[str, Dict]:
+        """Stop recording and close the hub, returning each recorder's final status"""
+        for recorder in self.recorders.values():
+            recorder.stop()
+        self.hub.close()
+        return self.get_status()
+
+    def get_status(self) -> Dict[str, Dict]:
+        return {name: recorder.get_status() for name, recorder in self.recorders.items()}
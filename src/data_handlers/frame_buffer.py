@@ -0,0 +1,159 @@
+# src/data_handlers/frame_buffer.py
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Consumer overflow policies
+DROP_OLDEST = "drop_oldest"     # A lagging consumer skips ahead, the producer never waits
+BLOCK = "block"                 # The producer waits until the consumer has room
+POLICIES = (DROP_OLDEST, BLOCK)
+
+
+class FrameRingBuffer:
+    """Bounded single-producer frame ring with an independent cursor per consumer.
+
+    The producer writes into a preallocated slot list and then advances a
+    sequence number; consumers read by comparing their cursor with it. The
+    data path takes no locks: slot and sequence writes are single reference
+    assignments, and Events are only touched when a reader or a blocked
+    producer is actually parked.
+    """
+    def __init__(self, capacity: int = 256):
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._write_seq = 0
+        self._consumers: Tuple["FrameConsumer", ...] = ()
+        self._producer_waiting = False
+        self._space = threading.Event()
+
+    @property
+    def published(self) -> int:
+        return self._write_seq
+
+    def add_consumer(self, policy: str = DROP_OLDEST, name: str = "") -> "FrameConsumer":
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown consumer policy: {policy}")
+        consumer = FrameConsumer(self, policy, name)
+        self._consumers = self._consumers + (consumer,)
+        return consumer
+
+    def remove_consumer(self, consumer: "FrameConsumer"):
+        consumer.close()
+        self._consumers = tuple(c for c in self._consumers if c is not consumer)
+
+    def publish(self, frame: Any):
+        seq = self._write_seq
+        for consumer in self._consumers:
+            if consumer.policy == BLOCK:
+                self._wait_for_space(consumer, seq)
+        self._slots[seq % self.capacity] = frame
+        self._write_seq = seq + 1
+        for consumer in self._consumers:
+            if consumer._waiting:
+                consumer._ready.set()
+
+    def latest(self) -> Optional[Any]:
+        seq = self._write_seq
+        if seq == 0:
+            return None
+        return self._slots[(seq - 1) % self.capacity]
+
+    def _wait_for_space(self, consumer: "FrameConsumer", seq: int):
+        while seq - consumer._cursor >= self.capacity and not consumer.closed:
+            self._space.clear()
+            self._producer_waiting = True
+            if seq - consumer._cursor >= self.capacity and not consumer.closed:
+                consumer.blocked += 1
+                self._space.wait(0.1)
+            self._producer_waiting = False
+
+    def _notify_space(self):
+        if self._producer_waiting:
+            self._space.set()
+
+    def get_stats(self) -> Dict:
+        return {
+            "capacity": self.capacity,
+            "published": self._write_seq,
+            "consumers": [consumer.get_stats() for consumer in self._consumers],
+        }
+
+
+class FrameConsumer:
+    """Read cursor into a FrameRingBuffer"""
+    def __init__(self, ring: FrameRingBuffer, policy: str, name: str = ""):
+        self.ring = ring
+        self.policy = policy
+        self.name = name
+        self.closed = False
+        self.overflows = 0      # Frames skipped because this consumer fell behind
+        self.blocked = 0        # Times the producer had to wait for this consumer
+        self.max_lag = 0
+        self._cursor = ring._write_seq
+        self._waiting = False
+        self._ready = threading.Event()
+
+    @property
+    def lag(self) -> int:
+        return self.ring._write_seq - self._cursor
+
+    def poll(self) -> Optional[Any]:
+        """Next unread frame, or None without waiting"""
+        ring = self.ring
+        while True:
+            write_seq = ring._write_seq
+            cursor = self._cursor
+            if cursor >= write_seq:
+                return None
+            lag = write_seq - cursor
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag > ring.capacity:
+                self.overflows += lag - ring.capacity
+                cursor = write_seq - ring.capacity
+            frame = ring._slots[cursor % ring.capacity]
+            # The producer may have lapped the slot while it was being read
+            if ring._write_seq - cursor > ring.capacity:
+                self._cursor = cursor
+                continue
+            self._cursor = cursor + 1
+            ring._notify_space()
+            return frame
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Next unread frame, waiting up to timeout; None on timeout or close"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.closed:
+            frame = self.poll()
+            if frame is not None:
+                return frame
+            self._ready.clear()
+            self._waiting = True
+            frame = self.poll()
+            if frame is None and not self.closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiting = False
+                    return None
+                self._ready.wait(remaining)
+            self._waiting = False
+            if frame is not None:
+                return frame
+        return None
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+        self.ring._notify_space()
+
+    def get_stats(self) -> Dict:
+        return {
+            "name": self.name,
+            "policy": self.policy,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+            "overflows": self.overflows,
+            "blocked": self.blocked,
+        }
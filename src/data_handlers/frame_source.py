@@ -0,0 +1,106 @@
+# src/data_handlers/frame_source.py
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from .frame_buffer import DROP_OLDEST, FrameConsumer, FrameRingBuffer
+from .instrumentation import Instrumentation
+
+
+class FrameSource:
+    """Callback registration and ring-buffer dispatch shared by frame producers.
+
+    Subclasses publish frames with _dispatch() from their producer thread.
+    Every registered callback runs on its own dispatcher thread that reads
+    the shared FrameRingBuffer through its own cursor. `metrics` holds the
+    source's stage histograms and is disabled until a caller enables it.
+    """
+    def __init__(self, frame_buffer_size: int = 256, consumer_policy: str = DROP_OLDEST,
+                 poll_timeout: float = 1.0):
+        self.is_streaming = False
+        self.data_callbacks: List[Callable] = []
+        self._callback_policies: List[str] = []
+        self._dispatchers: List[Tuple[Callable, FrameConsumer, threading.Thread]] = []
+        self.frame_buffer = FrameRingBuffer(frame_buffer_size)
+        self.consumer_policy = consumer_policy
+        self._poll_timeout = poll_timeout
+        self.connection_status_callback: Optional[Callable] = None
+        self.metrics = Instrumentation()
+
+    def set_connection_callback(self, callback: Callable[[bool, str], None]):
+        self.connection_status_callback = callback
+
+    def _notify_connection(self, connected: bool, message: str):
+        if self.connection_status_callback:
+            self.connection_status_callback(connected, message)
+
+    def add_data_callback(self, callback: Callable, policy: Optional[str] = None):
+        """Register a frame callback, run on its own thread with its own read cursor"""
+        policy = policy or self.consumer_policy
+        self.data_callbacks.append(callback)
+        self._callback_policies.append(policy)
+        if self.is_streaming:
+            self._start_dispatcher(callback, policy)
+
+    def remove_data_callback(self, callback: Callable):
+        if callback not in self.data_callbacks:
+            return
+        index = self.data_callbacks.index(callback)
+        del self.data_callbacks[index]
+        del self._callback_policies[index]
+        self._stop_dispatcher(callback, self.frame_buffer)
+
+    def get_latest_data(self) -> Optional[Any]:
+        return self.frame_buffer.latest()
+
+    def _dispatch(self, frame: Any):
+        if self.metrics.enabled:
+            start = time.perf_counter()
+            self.frame_buffer.publish(frame)
+            self.metrics.record("dispatch", time.perf_counter() - start)
+        else:
+            self.frame_buffer.publish(frame)
+
+    def _start_dispatchers(self):
+        for callback, policy in zip(self.data_callbacks, self._callback_policies):
+            self._start_dispatcher(callback, policy)
+
+    def _close_dispatchers(self):
+        # Closing the consumers also releases a producer waiting on a blocking one
+        for _, consumer, _ in self._dispatchers:
+            consumer.ring.remove_consumer(consumer)
+
+    def _join_dispatchers(self):
+        for _, _, thread in self._dispatchers:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+        self._dispatchers = []
+
+    def _start_dispatcher(self, callback: Callable, policy: str,
+                          ring: Optional[FrameRingBuffer] = None):
+        """Run callback on its own thread, reading `ring` (the shared frame_buffer by default)"""
+        name = getattr(callback, "__qualname__", repr(callback))
+        consumer = (ring or self.frame_buffer).add_consumer(policy, name)
+        thread = threading.Thread(target=self._dispatch_frames, args=(consumer, callback))
+        thread.daemon = True
+        self._dispatchers.append((callback, consumer, thread))
+        thread.start()
+
+    def _stop_dispatcher(self, callback: Callable, ring: FrameRingBuffer):
+        for entry in list(self._dispatchers):
+            registered, consumer, thread = entry
+            if registered == callback and consumer.ring is ring:
+                ring.remove_consumer(consumer)
+                if thread is not threading.current_thread():
+                    thread.join(timeout=2.0)
+                self._dispatchers.remove(entry)
+
+    def _dispatch_frames(self, consumer: FrameConsumer, callback: Callable):
+        while not consumer.closed:
+            frame = consumer.get(timeout=self._poll_timeout)
+            if frame is None:
+                continue
+            try:
+                callback(frame)
+            except Exception as e:
+                print(f"Error in data callback: {e}")
@@ -0,0 +1,376 @@
+# src/data_handlers/ingest_hub.py
+import selectors
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .frame_buffer import FrameRingBuffer
+from .frame_source import FrameSource
+from .mvn_data_handler import XSensConfig
+from .mvn_protocol import MVNFrame, decode_datagram
+from .receive_ring import DatagramRing
+from .sequence_tracker import COUNTERS, SequenceTracker
+from .stream_framer import MVNStreamFramer
+
+
+@dataclass
+class _Source:
+    source_id: str
+    config: XSensConfig
+    sock: socket.socket
+    decode: Callable
+    frames_out: Optional[FrameRingBuffer] = None    # Decoded frames of this source only
+    ring: Optional[DatagramRing] = None
+    framer: Optional[MVNStreamFramer] = None
+    sequencer: Optional[SequenceTracker] = None
+    frames: int = 0
+    errors: int = 0
+    latest: Optional[MVNFrame] = field(default=None, repr=False)
+
+
+class IngestHub(FrameSource):
+    """Receives many MVN streams on one selector thread.
+
+    Each source is a UDP or TCP socket described by an XSensConfig and named
+    by a source ID. All sockets are non-blocking and multiplexed on a single
+    selectors loop, so a session with a dozen actors costs one receive thread
+    instead of one per device. Decoded frames are tagged with their
+    source_id and published to the shared frame ring and to a ring of their
+    source. Callbacks subscribe to every frame through the shared ring, or to
+    a single source through its ring, so a per-source consumer only wakes
+    for, and only falls behind on, the frames of its own source.
+    """
+    def __init__(self, frame_buffer_size: int = 1024, poll_timeout: float = 1.0):
+        super().__init__(frame_buffer_size, poll_timeout=poll_timeout)
+        self.poll_timeout = poll_timeout
+        self._sources: Dict[str, _Source] = {}
+        self._pending: List[Tuple[str, object]] = []
+        self._lock = threading.Lock()
+        self._source_buffers: Dict[str, FrameRingBuffer] = {}
+        self._source_callbacks: List[Tuple[Callable, str, str]] = []    # callback, policy, source
+        self._loop_running = False
+        self._wake_receive, self._wake_send = socket.socketpair()
+        self._wake_receive.setblocking(False)
+        self._stop_streaming = False
+        self.stream_thread: Optional[threading.Thread] = None
+
+    def add_source(self, source_id: str, config: XSensConfig,
+                   decode: Callable = decode_datagram) -> Tuple[bool, str]:
+        """Open a source socket and hand it to the receive loop.
+
+        decode(data, receive_time=...) turns one datagram or message into an
+        MVNFrame; it defaults to the MVN decoder.
+        """
+        if source_id in self._sources:
+            return False, f"Source {source_id} already exists"
+        try:
+            if config.protocol == "UDP":
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._apply_receive_buffer_size(sock, config)
+                sock.bind((config.host, config.port))
+            else:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self._apply_receive_buffer_size(sock, config)
+                sock.settimeout(config.timeout)
+                sock.connect((config.host, config.port))
+            sock.setblocking(False)
+        except socket.error as e:
+            error_msg = f"{source_id}: Failed to connect: {str(e)}"
+            self._notify_connection(False, error_msg)
+            return False, error_msg
+
+        source = _Source(source_id, config, sock, decode, self.source_buffer(source_id),
+                         sequencer=SequenceTracker(config.reorder_window, config.reorder_timeout))
+        if config.protocol == "UDP":
+            source.ring = DatagramRing(config.receive_slots, config.buffer_size)
+        else:
+            source.framer = MVNStreamFramer(config.stream_buffer_size)
+        self._sources[source_id] = source
+        self._request("add", source)
+        self._notify_connection(True, f"{source_id}: Connected successfully")
+        return True, "Connected successfully"
+
+    def remove_source(self, source_id: str) -> Tuple[bool, str]:
+        source = self._sources.pop(source_id, None)
+        if source is None:
+            return False, f"Unknown source {source_id}"
+        self._request("remove", source)
+        self._notify_connection(False, f"{source_id}: Disconnected")
+        return True, "Disconnected successfully"
+
+    def source(self, source_id: str) -> "HubSource":
+        """Handler-like view of one source, usable wherever an MVNDataHandler is"""
+        return HubSource(self, source_id)
+
+    def source_buffer(self, source_id: str) -> FrameRingBuffer:
+        """Frame ring of one source; kept when the source is removed and added again"""
+        ring = self._source_buffers.get(source_id)
+        if ring is None:
+            ring = self._source_buffers[source_id] = FrameRingBuffer(self.frame_buffer.capacity)
+        return ring
+
+    @property
+    def source_ids(self) -> List[str]:
+        return list(self._sources)
+
+    def add_data_callback(self, callback: Callable, policy: Optional[str] = None,
+                          source_id: Optional[str] = None):
+        """Register a callback for all frames, or only for frames of source_id"""
+        if source_id is None:
+            super().add_data_callback(callback, policy)
+            return
+        policy = policy or self.consumer_policy
+        self._source_callbacks.append((callback, policy, source_id))
+        if self.is_streaming:
+            self._start_dispatcher(callback, policy, self.source_buffer(source_id))
+
+    def remove_data_callback(self, callback: Callable, source_id: Optional[str] = None):
+        if source_id is None:
+            super().remove_data_callback(callback)
+            return
+        entry = next((entry for entry in self._source_callbacks
+                      if entry[0] == callback and entry[2] == source_id), None)
+        if entry is not None:
+            self._source_callbacks.remove(entry)
+            self._stop_dispatcher(callback, self.source_buffer(source_id))
+
+    def get_latest_data(self, source_id: Optional[str] = None) -> Optional[MVNFrame]:
+        if source_id is None:
+            return super().get_latest_data()
+        source = self._sources.get(source_id)
+        return source.latest if source else None
+
+    def start_streaming(self) -> bool:
+        if self.is_streaming:
+            return False
+        self.is_streaming = True
+        self._stop_streaming = False
+        self._start_dispatchers()
+        for callback, policy, source_id in self._source_callbacks:
+            self._start_dispatcher(callback, policy, self.source_buffer(source_id))
+        self.stream_thread = threading.Thread(target=self._stream_data)
+        self.stream_thread.daemon = True
+        self.stream_thread.start()
+        return True
+
+    def stop_streaming(self):
+        self._stop_streaming = True
+        self.is_streaming = False
+        self._wake()
+        self._close_dispatchers()
+        if self.stream_thread:
+            self.stream_thread.join(timeout=2.0)
+            self.stream_thread = None
+        self._join_dispatchers()
+
+    def close(self):
+        """Stop streaming and close every source"""
+        self.stop_streaming()
+        for source_id in list(self._sources):
+            self.remove_source(source_id)
+        self._wake_receive.close()
+        self._wake_send.close()
+
+    def _apply_receive_buffer_size(self, sock: socket.socket, config: XSensConfig):
+        if config.receive_buffer_size > 0:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, config.receive_buffer_size)
+
+    def _request(self, action: str, source: _Source):
+        # The selector is only touched by the loop thread; others queue changes
+        with self._lock:
+            if not self._loop_running:
+                if action == "remove":
+                    source.sock.close()
+                return
+            self._pending.append((action, source))
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_send.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _apply_pending(self, selector: selectors.BaseSelector):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for action, source in pending:
+            if action == "add":
+                try:
+                    selector.register(source.sock, selectors.EVENT_READ, source)
+                except KeyError:
+                    pass    # Already picked up when the loop started
+            else:
+                try:
+                    selector.unregister(source.sock)
+                except (KeyError, ValueError):
+                    pass
+                source.sock.close()
+
+    def _stream_data(self):
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._wake_receive, selectors.EVENT_READ, None)
+            with self._lock:
+                self._loop_running = True
+                for source in self._sources.values():
+                    selector.register(source.sock, selectors.EVENT_READ, source)
+            while not self._stop_streaming:
+                self._apply_pending(selector)
+                try:
+                    events = selector.select(self.poll_timeout)
+                except OSError as e:
+                    print(f"Error in ingest loop: {e}")
+                    break
+                for key, _ in events:
+                    if key.data is None:
+                        self._drain_wake()
+                    elif key.data.ring is not None:
+                        self._receive_datagrams(key.data)
+                    else:
+                        self._receive_messages(key.data)
+                self._expire()
+            with self._lock:
+                self._loop_running = False
+            self._apply_pending(selector)
+            # Sources stay open across stop/start; only the selector goes away
+
+    def _drain_wake(self):
+        try:
+            while self._wake_receive.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _receive_datagrams(self, source: _Source):
+        metrics = self.metrics
+        if metrics.enabled:
+            start = time.perf_counter()
+        try:
+            count = source.ring.drain(source.sock)
+        except OSError as e:
+            source.errors += 1
+            print(f"Error receiving from {source.source_id}: {e}")
+            return
+        received = time.monotonic()
+        if metrics.enabled:
+            metrics.record("receive", time.perf_counter() - start)
+        for view in source.ring.batch(count):
+            self._publish(source, view, received)
+
+    def _receive_messages(self, source: _Source):
+        metrics = self.metrics
+        if metrics.enabled:
+            start = time.perf_counter()
+        try:
+            received = source.framer.recv_into(source.sock)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            received = 0
+            print(f"Error receiving from {source.source_id}: {e}")
+        if received == 0:
+            # Peer closed the stream; drop the source and tell the application
+            if self._sources.pop(source.source_id, None) is not None:
+                self._request("remove", source)
+                self._notify_connection(False, f"{source.source_id}: Connection closed by peer")
+            return
+        received = time.monotonic()
+        if metrics.enabled:
+            metrics.record("receive", time.perf_counter() - start)
+        for view in source.framer.frames():
+            self._publish(source, view, received)
+
+    def _publish(self, source: _Source, view: memoryview, receive_time: float):
+        metrics = self.metrics
+        if metrics.enabled:
+            start = time.perf_counter()
+        try:
+            frame = source.decode(view, receive_time=receive_time)
+        except Exception as e:
+            source.errors += 1
+            metrics.count("parse_errors")
+            print(f"Error parsing packet from {source.source_id}: {e}")
+            return
+        if metrics.enabled:
+            metrics.record("parse", time.perf_counter() - start)
+        frame.source_id = source.source_id
+        for ready in source.sequencer.push(frame):
+            self._deliver(source, ready)
+
+    def _expire(self):
+        """Release frames held behind a sequence gap for too long"""
+        for source in list(self._sources.values()):
+            if source.sequencer.holding:
+                for ready in source.sequencer.expire():
+                    self._deliver(source, ready)
+
+    def _deliver(self, source: _Source, frame: MVNFrame):
+        source.frames += 1
+        source.latest = frame
+        metrics = self.metrics
+        if metrics.enabled:
+            start = time.perf_counter()
+        self.frame_buffer.publish(frame)
+        source.frames_out.publish(frame)
+        if metrics.enabled:
+            metrics.record("dispatch", time.perf_counter() - start)
+
+    def get_status(self) -> Dict:
+        sources = list(self._sources.items())
+        sequence = dict.fromkeys(COUNTERS, 0)
+        for _, source in sources:
+            for counter, value in source.sequencer.totals().items():
+                sequence[counter] += value
+        return {
+            "streaming": self.is_streaming,
+            "sources": {
+                source_id: {
+                    "host": source.config.host,
+                    "port": source.config.port,
+                    "protocol": source.config.protocol,
+                    "frames": source.frames,
+                    "errors": source.errors,
+                    "sequence": source.sequencer.get_status(),
+                    "frame_buffer": source.frames_out.get_stats(),
+                }
+                for source_id, source in sources
+            },
+            "sequence": sequence,
+            "frame_buffer": self.frame_buffer.get_stats(),
+            "metrics": self.metrics.get_status(),
+        }
+
+
+class HubSource:
+    """One hub source behind the MVNDataHandler callback API"""
+    def __init__(self, hub: IngestHub, source_id: str):
+        self.hub = hub
+        self.source_id = source_id
+
+    @property
+    def is_connected(self) -> bool:
+        return self.source_id in self.hub.source_ids
+
+    @property
+    def is_streaming(self) -> bool:
+        return self.is_connected and self.hub.is_streaming
+
+    def add_data_callback(self, callback: Callable, policy: Optional[str] = None):
+        self.hub.add_data_callback(callback, policy, source_id=self.source_id)
+
+    def remove_data_callback(self, callback: Callable):
+        self.hub.remove_data_callback(callback, source_id=self.source_id)
+
+    def get_latest_data(self) -> Optional[MVNFrame]:
+        return self.hub.get_latest_data(self.source_id)
+
+    def get_status(self) -> Dict:
+        status = self.hub.get_status()
+        return {
+            "connected": self.is_connected,
+            "streaming": self.is_streaming,
+            "source": status["sources"].get(self.source_id),
+            "frame_buffer": self.hub.source_buffer(self.source_id).get_stats(),
+        }
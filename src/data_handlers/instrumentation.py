@@ -0,0 +1,178 @@
+# src/data_handlers/instrumentation.py
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional
+
+STAGES = ("receive", "parse", "dispatch", "filter", "retarget", "record", "render", "render_lag")
+
+# Histogram bucket upper bounds: 1 us doubling up to about 1 s, plus overflow
+BUCKET_BOUNDS = [1e-6 * 2 ** i for i in range(21)]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; recording never allocates"""
+    def __init__(self, bounds: List[float] = BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile, in seconds"""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def get_stats(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000.0 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000.0,
+            "p99_ms": self.percentile(99) * 1000.0,
+            "max_ms": self.max * 1000.0,
+        }
+
+
+class Instrumentation:
+    """Per-stage latency histograms and counters for one component.
+
+    Disabled by default. Call sites test `enabled` before taking any
+    timestamp, so a disabled instance costs one attribute check per frame:
+
+        if metrics.enabled:
+            start = time.perf_counter()
+        ...
+        if metrics.enabled:
+            metrics.record("parse", time.perf_counter() - start)
+
+    Histograms are only written from their stage's own thread and read
+    without locking; a status read may be off by the frame in flight.
+    """
+    def __init__(self, enabled: bool = False, stages=STAGES):
+        self.enabled = enabled
+        self.stages: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in stages}
+        self.counters: Dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage].record(seconds)
+
+    def count(self, counter: str, amount: int = 1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def reset(self):
+        for histogram in self.stages.values():
+            histogram.reset()
+        self.counters = {}
+
+    def get_status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "stages": {stage: histogram.get_stats()
+                       for stage, histogram in self.stages.items() if histogram.count},
+            "counters": dict(self.counters),
+        }
+
+
+def to_prometheus(metrics: Dict[str, Instrumentation], prefix: str = "mocap") -> str:
+    """Prometheus text exposition of several components' instrumentation"""
+    lines = [
+        f"# TYPE {prefix}_stage_seconds histogram",
+    ]
+    for component, instrumentation in metrics.items():
+        for stage, histogram in instrumentation.stages.items():
+            if not histogram.count:
+                continue
+            labels = f'component="{component}",stage="{stage}"'
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{prefix}_stage_seconds_sum{{{labels}}} {histogram.total:.9f}")
+            lines.append(f"{prefix}_stage_seconds_count{{{labels}}} {histogram.count}")
+    lines.append(f"# TYPE {prefix}_events_total counter")
+    for component, instrumentation in metrics.items():
+        for counter, value in sorted(instrumentation.counters.items()):
+            lines.append(f'{prefix}_events_total{{component="{component}",event="{counter}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+class MetricsDumper:
+    """Periodically writes instrumentation to a local file.
+
+    `sources` maps a component name to a callable returning its
+    Instrumentation, so components created later (a new recorder per take)
+    are picked up. The format is "json" or "prometheus"; the file is
+    replaced atomically so readers never see a partial dump.
+    """
+    def __init__(self, path: str, sources: Dict[str, Callable[[], Optional[Instrumentation]]],
+                 interval: float = 1.0, format: str = "json"):
+        if format not in ("json", "prometheus"):
+            raise ValueError(f"Unknown metrics format: {format}")
+        self.path = path
+        self.sources = sources
+        self.interval = interval
+        self.format = format
+        self.dumps = 0
+        self._stop = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        self.dump()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except OSError as e:
+                print(f"Error writing metrics: {e}")
+
+    def dump(self):
+        metrics = {name: source() for name, source in self.sources.items()}
+        metrics = {name: instrumentation for name, instrumentation in metrics.items()
+                   if instrumentation is not None}
+        if self.format == "json":
+            text = json.dumps({"time": time.time(),
+                               "components": {name: instrumentation.get_status()
+                                              for name, instrumentation in metrics.items()}},
+                              indent=2)
+        else:
+            text = to_prometheus(metrics)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as handle:
+            handle.write(text)
+        os.replace(temporary, self.path)
+        self.dumps += 1
@@ -0,0 +1,127 @@
+# src/data_handlers/kinematics.py
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import quaternions
+
+
+def hierarchy_levels(parents: Sequence[int]) -> List[np.ndarray]:
+    """Non-root segments grouped by depth, so each level is one vectorized step.
+
+    parents[s] is the index of segment s's parent, -1 for roots; parents may
+    be listed in any order.
+    """
+    parents = np.asarray(parents)
+    if (parents >= len(parents)).any():
+        raise ValueError("Segment hierarchy has an invalid parent index")
+    depth = np.full(len(parents), -1)
+    depth[parents < 0] = 0
+    for level in range(1, len(parents) + 1):
+        known = depth >= 0
+        if known.all():
+            break
+        ready = ~known & (parents >= 0)
+        ready[ready] = known[parents[ready]]
+        if not ready.any():
+            break
+        depth[ready] = level
+    if (depth < 0).any():
+        raise ValueError("Segment hierarchy has a cycle")
+    return [np.flatnonzero(depth == d) for d in range(1, depth.max() + 1)]
+
+
+def bone_offsets(positions: np.ndarray, rotations: np.ndarray, parents: Sequence[int]) -> np.ndarray:
+    """Bone vectors in each parent's frame, (..., S, 3), from a global pose.
+
+    Inverse of forward kinematics for the offsets: each segment's position
+    relative to its parent, rotated into the parent's frame. Roots get zero
+    offsets, their positions are the root positions.
+    """
+    parents = np.asarray(parents)
+    safe = np.where(parents < 0, 0, parents)
+    offsets = quaternions.rotate(quaternions.conjugate(rotations[..., safe, :]),
+                                 positions - positions[..., safe, :])
+    offsets[..., parents < 0, :] = 0.0
+    return offsets
+
+
+class ForwardKinematics:
+    """World transforms of a segment hierarchy from parent-relative rotations.
+
+    Segments are solved in topological order, one depth level at a time.
+    Internally transforms are (S, ..., 4, 4) homogeneous matrices, segment
+    major and permuted so every level is one contiguous block; a level is
+    then a single matmul written in place, over all its segments and all
+    frames at once. solve() is the batch mode for offline processing of
+    (N, S, 4) blocks; solve_frame() handles one live frame using arrays
+    preallocated at construction.
+
+    offsets[s] is segment s's origin in its parent's frame, (S, 3). Root
+    segments are placed at root_positions, or at their offsets by default.
+    """
+    def __init__(self, parents: Sequence[int], offsets: np.ndarray):
+        self.parents = np.asarray(parents, dtype=np.intp)
+        self.offsets = np.asarray(offsets, dtype=np.float64)
+        if self.offsets.shape != (len(self.parents), 3):
+            raise ValueError(f"Expected offsets of shape ({len(self.parents)}, 3), "
+                             f"got {self.offsets.shape}")
+        self.segment_count = len(self.parents)
+        self.levels = hierarchy_levels(self.parents)
+        roots = np.flatnonzero(self.parents < 0)
+        # Topological order and its inverse; sorted index i is segment order[i]
+        self.order = np.concatenate([roots] + self.levels)
+        self.inverse = np.argsort(self.order)
+        self._roots = slice(0, len(roots))
+        self._steps = []
+        start = len(roots)
+        for level in self.levels:
+            stop = start + len(level)
+            self._steps.append((slice(start, stop), self.inverse[self.parents[level]]))
+            start = stop
+        self._frame_local = self._local_transforms(())
+        self._frame_world = np.empty_like(self._frame_local)
+        self.positions = np.zeros((self.segment_count, 3))
+        self.rotations = np.zeros((self.segment_count, 4))
+
+    def _local_transforms(self, shape: Tuple[int, ...]) -> np.ndarray:
+        """Parent-relative transforms (S, *shape, 4, 4), offsets filled in"""
+        local = np.zeros((self.segment_count,) + shape + (4, 4))
+        offsets = self.offsets[self.order]
+        local[..., :3, 3] = offsets.reshape((self.segment_count,) + (1,) * len(shape) + (3,))
+        local[..., 3, 3] = 1.0
+        return local
+
+    def solve(self, local_rotations: np.ndarray,
+              root_positions: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """World positions (N, S, 3) and rotations (N, S, 4) for N frames"""
+        local_rotations = np.asarray(local_rotations)
+        local = self._local_transforms(local_rotations.shape[:-2])
+        world = self._solve(local_rotations, root_positions, local, np.empty_like(local))
+        world = np.moveaxis(world[self.inverse], 0, -3)
+        return np.ascontiguousarray(world[..., :3, 3]), quaternions.from_matrix(world[..., :3, :3])
+
+    def solve_frame(self, local_rotations: np.ndarray,
+                    root_position: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """World positions (S, 3) and rotations (S, 4) of one frame.
+
+        The results are the preallocated `positions` and `rotations` arrays,
+        overwritten by the next call.
+        """
+        world = self._solve(local_rotations, root_position, self._frame_local, self._frame_world)
+        np.take(world[:, :3, 3], self.inverse, axis=0, out=self.positions)
+        self.rotations[:] = quaternions.from_matrix(world[self.inverse, :3, :3])
+        return self.positions, self.rotations
+
+    def _solve(self, local_rotations: np.ndarray, root_positions: Optional[np.ndarray],
+               local: np.ndarray, world: np.ndarray) -> np.ndarray:
+        """FK into world; local and world are (S, ..., 4, 4) in topological order"""
+        rotations = np.moveaxis(np.asarray(local_rotations), -2, 0)[self.order]
+        local[..., :3, :3] = quaternions.to_matrix(rotations)
+        roots = self._roots
+        if root_positions is not None:
+            local[roots, ..., :3, 3] = np.asarray(root_positions)[None]
+        world[roots] = local[roots]
+        for segments, parents in self._steps:
+            np.matmul(world[parents], local[segments], out=world[segments])
+        return world
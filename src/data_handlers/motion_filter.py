@@ -0,0 +1,543 @@
+# src/data_handlers/motion_filter.py
+import dataclasses
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import quaternions
+from .frame_source import FrameSource
+from .mvn_protocol import POSE_QUATERNION, MVNFrame
+from .take_codec import decompress_take, is_compressed
+from .take_file import TakeReader, index_path
+
+
+def smoothing_factor(cutoff, dt):
+    """Exponential smoothing factor of a first-order low-pass at `cutoff` Hz"""
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+def butterworth_coefficients(cutoff: float, rate: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Second-order Butterworth low-pass (b, a) by the bilinear transform"""
+    if not 0.0 < cutoff < rate / 2.0:
+        raise ValueError(f"Cutoff must be between 0 and {rate / 2.0} Hz")
+    k = math.tan(math.pi * cutoff / rate)
+    norm = 1.0 / (1.0 + math.sqrt(2.0) * k + k * k)
+    b0 = k * k * norm
+    b = np.array([b0, 2.0 * b0, b0])
+    a = np.array([1.0, 2.0 * (k * k - 1.0) * norm, (1.0 - math.sqrt(2.0) * k + k * k) * norm])
+    return b, a
+
+
+class StatefulFilter:
+    """Base class of the real-time filters.
+
+    State is allocated once for (actors, segments, channels) by allocate().
+    apply() filters a block of k actors at once: values (k, S, C), their
+    state slots (k,), the time since each slot's previous sample dt
+    (k, 1, 1), and `fresh` (k, 1, 1), true where a slot starts over and
+    the filter must pass the input through and take it as its state.
+    """
+    def allocate(self, shape: Tuple[int, int, int]):
+        raise NotImplementedError
+
+    def apply(self, values: np.ndarray, slots: np.ndarray, dt: np.ndarray,
+              fresh: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def get_status(self) -> Dict:
+        return {}
+
+
+class SpikeRejector(StatefulFilter):
+    """Holds the previous value when a sample moves faster than max_speed.
+
+    Speed is distance per second for positions and angle in radians per
+    second for quaternions. After max_hold held samples in a row the new
+    value is accepted, so a real jump is followed after a short delay.
+    """
+    def __init__(self, max_speed: float, max_hold: int = 3):
+        self.max_speed = max_speed
+        self.max_hold = max_hold
+        self.rejected = 0
+
+    def allocate(self, shape):
+        self.value = np.zeros(shape)
+        self.held = np.zeros(shape[:2], dtype=np.int32)
+
+    def apply(self, values, slots, dt, fresh):
+        previous = self.value[slots]
+        held = self.held[slots]
+        if values.shape[-1] == 4:
+            dot = np.abs(np.sum(previous * values, axis=-1))
+            step = 2.0 * np.arccos(np.minimum(dot, 1.0))
+        else:
+            step = np.linalg.norm(values - previous, axis=-1)
+        spikes = (step > self.max_speed * dt[..., 0]) & (held < self.max_hold) & ~fresh[..., 0]
+        result = np.where(spikes[..., None], previous, values)
+        self.value[slots] = result
+        self.held[slots] = np.where(spikes, held + 1, 0)
+        self.rejected += int(np.count_nonzero(spikes))
+        return result
+
+    def get_status(self) -> Dict:
+        return {"rejected": self.rejected}
+
+
+class OneEuroFilter(StatefulFilter):
+    """One-Euro filter: a low-pass whose cutoff rises with speed.
+
+    Slow motion is smoothed at min_cutoff Hz to remove jitter, fast motion
+    follows with little lag as the cutoff grows by beta per unit of speed.
+    Speed is the norm over the channels of a segment, so a position is
+    filtered as one vector rather than three independent axes.
+    """
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.5, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+
+    def allocate(self, shape):
+        self.value = np.zeros(shape)
+        self.derivative = np.zeros(shape)
+
+    def apply(self, values, slots, dt, fresh):
+        previous = self.value[slots]
+        derivative = self.derivative[slots]
+        derivative = derivative + smoothing_factor(self.d_cutoff, dt) * (
+            (values - previous) / dt - derivative)
+        speed = np.linalg.norm(derivative, axis=-1, keepdims=True)
+        alpha = smoothing_factor(self.min_cutoff + self.beta * speed, dt)
+        result = np.where(fresh, values, previous + alpha * (values - previous))
+        self.value[slots] = result
+        self.derivative[slots] = np.where(fresh, 0.0, derivative)
+        return result
+
+
+class ButterworthLowPass(StatefulFilter):
+    """Second-order Butterworth low-pass for a stream sampled at `rate` Hz.
+
+    Runs as a transposed direct form II biquad; a fresh slot starts in the
+    steady state of its first sample, so there is no start-up transient.
+    """
+    def __init__(self, cutoff: float, rate: float):
+        self.cutoff = cutoff
+        self.rate = rate
+        self.b, self.a = butterworth_coefficients(cutoff, rate)
+
+    def allocate(self, shape):
+        self.z1 = np.zeros(shape)
+        self.z2 = np.zeros(shape)
+
+    def apply(self, values, slots, dt, fresh):
+        (b0, b1, b2), (_, a1, a2) = self.b, self.a
+        z1 = np.where(fresh, values * (1.0 - b0), self.z1[slots])
+        z2 = np.where(fresh, values * (b2 - a2), self.z2[slots])
+        result = b0 * values + z1
+        self.z1[slots] = b1 * values - a1 * result + z2
+        self.z2[slots] = b2 * values - a2 * result
+        return result
+
+
+class HemisphereContinuity(StatefulFilter):
+    """Flips quaternions onto the hemisphere of the previous sample.
+
+    q and -q are the same rotation; keeping consecutive samples on the same
+    side makes component-wise filters and interpolation take the short way.
+    """
+    def allocate(self, shape):
+        self.value = np.zeros(shape)
+
+    def apply(self, values, slots, dt, fresh):
+        flip = (np.sum(self.value[slots] * values, axis=-1, keepdims=True) < 0.0) & ~fresh
+        result = np.where(flip, -values, values)
+        self.value[slots] = result
+        return result
+
+
+class QuaternionSmoother(StatefulFilter):
+    """Exponential smoothing of rotations towards each new sample at `cutoff` Hz.
+
+    Each step is a normalized lerp from the previous output on the same
+    hemisphere, which for per-frame steps matches slerp closely.
+    """
+    def __init__(self, cutoff: float = 8.0):
+        self.cutoff = cutoff
+
+    def allocate(self, shape):
+        self.value = np.zeros(shape)
+
+    def apply(self, values, slots, dt, fresh):
+        previous = self.value[slots]
+        values = np.where(np.sum(previous * values, axis=-1, keepdims=True) < 0.0, -values, values)
+        alpha = smoothing_factor(self.cutoff, dt)
+        result = np.where(fresh, values, quaternions.normalize(previous + alpha * (values - previous)))
+        self.value[slots] = result
+        return result
+
+
+class FilterChain:
+    """Stateful filtering of positions and rotations for up to max_actors actors.
+
+    Filter state is preallocated on the first frame for (max_actors,
+    segments, channels); every actor stream gets a slot, and each filter
+    processes all segments of all actors in a block with one array
+    operation. filter_frames() copies the frames of several actors into
+    preallocated (max_actors, segments, channels) staging arrays and
+    filters them as one block. dt comes from the MVN sample counter at
+    `rate` Hz, so lost samples lengthen the step; a counter going
+    backwards, or a gap longer than `reset_after` seconds, restarts the
+    stream. Rotations are renormalized after the rotation filters.
+    """
+    def __init__(self, position_filters: Sequence[StatefulFilter] = (),
+                 rotation_filters: Sequence[StatefulFilter] = (), rate: float = 240.0,
+                 max_actors: int = 8, reset_after: float = 0.5):
+        self.position_filters = list(position_filters)
+        self.rotation_filters = list(rotation_filters)
+        self.rate = rate
+        self.max_actors = max_actors
+        self.reset_after = reset_after
+        self.segment_count: Optional[int] = None
+        self.slots: Dict[Hashable, int] = {}
+        self.last_sample = np.zeros(max_actors, dtype=np.int64)
+        self.started = np.zeros(max_actors, dtype=bool)
+        self.unfiltered = 0         # Frames passed through: no free slot or other layout
+        self._samples = np.zeros(max_actors, dtype=np.int64)
+
+    def _allocate(self, segment_count: int):
+        self.segment_count = segment_count
+        self._positions = np.zeros((self.max_actors, segment_count, 3))
+        self._rotations = np.zeros((self.max_actors, segment_count, 4))
+        for chain, channels in ((self.position_filters, 3), (self.rotation_filters, 4)):
+            for stage in chain:
+                stage.allocate((self.max_actors, segment_count, channels))
+
+    def slot(self, key: Hashable) -> Optional[int]:
+        slot = self.slots.get(key)
+        if slot is None and len(self.slots) < self.max_actors:
+            slot = self.slots[key] = len(self.slots)
+        return slot
+
+    def apply(self, slots: np.ndarray, samples: np.ndarray, positions: Optional[np.ndarray],
+              rotations: Optional[np.ndarray]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Filter k actors at once: positions (k, S, 3) and quaternions (k, S, 4)"""
+        steps = samples - self.last_sample[slots]
+        fresh = ~self.started[slots] | (steps <= 0) | (steps > self.reset_after * self.rate)
+        dt = (np.where(fresh, 1, steps) / self.rate)[:, None, None]
+        fresh = fresh[:, None, None]
+        self.last_sample[slots] = samples
+        self.started[slots] = True
+        if positions is not None:
+            for stage in self.position_filters:
+                positions = stage.apply(positions, slots, dt, fresh)
+        if rotations is not None and self.rotation_filters:
+            for stage in self.rotation_filters:
+                rotations = stage.apply(rotations, slots, dt, fresh)
+            rotations = quaternions.normalize(rotations)
+        return positions, rotations
+
+    def filter(self, frame: MVNFrame) -> Optional[MVNFrame]:
+        """Filtered copy of a pose frame, or None when it cannot be filtered"""
+        return self.filter_frames([frame])[0]
+
+    def filter_frames(self, frames: Sequence[MVNFrame]) -> List[Optional[MVNFrame]]:
+        """Filtered copies of pose frames of distinct actors, filtered as one block.
+
+        Entries are None for frames that cannot be filtered. Euler frames
+        have only their positions filtered.
+        """
+        results: List[Optional[MVNFrame]] = [None] * len(frames)
+        staged = {True: [], False: []}      # Indices of quaternion and other pose frames
+        for i, frame in enumerate(frames):
+            if frame.positions is None:
+                continue
+            if self.segment_count is None:
+                self._allocate(len(frame.positions))
+            slot = self.slot((frame.source_id, frame.character_id, frame.datagram_type))
+            if slot is None or len(frame.positions) != self.segment_count:
+                self.unfiltered += 1
+                continue
+            quaternion = frame.datagram_type == POSE_QUATERNION and frame.rotations is not None
+            self._positions[slot] = frame.positions
+            if quaternion:
+                self._rotations[slot] = frame.rotations
+            self._samples[slot] = frame.sample_counter
+            staged[quaternion].append((i, slot))
+        for quaternion, members in staged.items():
+            if not members:
+                continue
+            slots = np.array([slot for _, slot in members])
+            positions, rotations = self.apply(slots, self._samples[slots], self._positions[slots],
+                                              self._rotations[slots] if quaternion else None)
+            positions = positions.astype(np.float32)
+            if quaternion:
+                rotations = rotations.astype(np.float32)
+            for row, (i, _) in enumerate(members):
+                frame = frames[i]
+                results[i] = dataclasses.replace(
+                    frame, positions=positions[row],
+                    rotations=rotations[row] if quaternion else frame.rotations)
+        return results
+
+    def get_status(self) -> Dict:
+        return {
+            "actors": len(self.slots),
+            "unfiltered": self.unfiltered,
+            "filters": {f"{kind}.{type(stage).__name__}": stage.get_status()
+                        for kind, chain in (("positions", self.position_filters),
+                                            ("rotations", self.rotation_filters))
+                        for stage in chain},
+        }
+
+
+def default_chain(rate: float = 240.0, max_actors: int = 8) -> FilterChain:
+    """Spike rejection, One-Euro positions and continuous, smoothed rotations"""
+    return FilterChain(
+        position_filters=[SpikeRejector(max_speed=15.0), OneEuroFilter(min_cutoff=1.5, beta=0.5)],
+        rotation_filters=[SpikeRejector(max_speed=40.0), QuaternionSmoother(cutoff=12.0)],
+        rate=rate, max_actors=max_actors)
+
+
+class _SampleGroup:
+    """Pose frames of one source and datagram type waiting for the rest of their sample"""
+    def __init__(self):
+        self.sample: Optional[int] = None
+        self.seen = 0               # Actors of the current sample so far
+        self.expected = 1           # Actors of the previous sample
+        self.frames: List[MVNFrame] = []
+
+
+class FilterStage(FrameSource):
+    """Pipeline stage filtering the pose frames of a source for its consumers.
+
+    attach() subscribes to a handler, hub or player; pose frames are
+    filtered on the source's dispatcher thread and republished, non-pose
+    frames pass through unchanged. Consumers register on the stage with
+    add_data_callback() as they would on the source.
+
+    MVN sends the actors of a sample as back-to-back datagrams, so the
+    stage holds a sample's frames until as many actors as in the previous
+    sample have arrived, or the next sample starts, and then filters all of
+    them as one block. Non-pose frames are not held and may overtake the
+    pose frames of their sample.
+    """
+    def __init__(self, chain: Optional[FilterChain] = None, frame_buffer_size: int = 256):
+        super().__init__(frame_buffer_size)
+        self.chain = chain or default_chain()
+        self.frames_filtered = 0
+        self._lock = threading.Lock()
+        self._sources = []
+        self._groups: Dict[Tuple, _SampleGroup] = {}
+
+    def attach(self, source):
+        source.add_data_callback(self.push)
+        self._sources.append(source)
+
+    def detach(self):
+        for source in self._sources:
+            source.remove_data_callback(self.push)
+        self._sources = []
+        self.flush()
+
+    def push(self, frame: MVNFrame):
+        with self._lock:
+            if not frame.is_pose:
+                self._dispatch(frame)
+                return
+            group = self._groups.get((frame.source_id, frame.datagram_type))
+            if group is None:
+                group = self._groups[(frame.source_id, frame.datagram_type)] = _SampleGroup()
+            if frame.sample_counter != group.sample:
+                self._filter_group(group)
+                if group.sample is not None:
+                    group.expected = max(1, group.seen)
+                group.sample = frame.sample_counter
+                group.seen = 0
+            elif any(held.character_id == frame.character_id for held in group.frames):
+                self._filter_group(group)      # Repeated actor; filter what is held first
+            group.frames.append(frame)
+            group.seen += 1
+            if len(group.frames) >= group.expected:
+                self._filter_group(group)
+
+    def flush(self):
+        """Filter and publish every held frame"""
+        with self._lock:
+            for group in self._groups.values():
+                self._filter_group(group)
+
+    def _filter_group(self, group: _SampleGroup):
+        frames, group.frames = group.frames, []
+        if not frames:
+            return
+        if self.metrics.enabled:
+            start = time.perf_counter()
+        filtered = self.chain.filter_frames(frames)
+        if self.metrics.enabled:
+            self.metrics.record("filter", time.perf_counter() - start)
+        for frame, result in zip(frames, filtered):
+            if result is not None:
+                self.frames_filtered += 1
+            self._dispatch(result or frame)
+
+    def start_streaming(self) -> bool:
+        if self.is_streaming:
+            return False
+        self.is_streaming = True
+        self._start_dispatchers()
+        return True
+
+    def stop_streaming(self):
+        self.is_streaming = False
+        self._close_dispatchers()
+        self._join_dispatchers()
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            status = self.chain.get_status()
+        status.update({
+            "streaming": self.is_streaming,
+            "frames_filtered": self.frames_filtered,
+            "frame_buffer": self.frame_buffer.get_stats(),
+            "metrics": self.metrics.get_status(),
+        })
+        return status
+
+
+def zero_phase_lowpass(values: np.ndarray, rate: float, cutoff: float, order: int = 2) -> np.ndarray:
+    """Zero-phase Butterworth low-pass of (N, ...) samples along axis 0.
+
+    The response is |H|^2 of an order `order` Butterworth filter, what a
+    forward-backward pass gives, applied in the frequency domain so every
+    channel is filtered at once without a per-sample loop. The ends are
+    padded with an odd reflection to avoid edge transients.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = len(values)
+    if count < 3:
+        return values.copy()
+    pad = min(count - 1, int(math.ceil(3.0 * rate / cutoff)))
+    extended = np.concatenate((2.0 * values[0] - values[pad:0:-1], values,
+                               2.0 * values[-1] - values[-2:-pad - 2:-1]))
+    frequencies = np.fft.rfftfreq(len(extended), 1.0 / rate)
+    gain = 1.0 / (1.0 + (frequencies / cutoff) ** (2 * order))
+    spectrum = np.fft.rfft(extended, axis=0) * gain.reshape((-1,) + (1,) * (values.ndim - 1))
+    return np.fft.irfft(spectrum, n=len(extended), axis=0)[pad:pad + count]
+
+
+def continuous_rotations(rotations: np.ndarray) -> np.ndarray:
+    """Quaternions (N, ..., 4) with signs flipped so consecutive samples agree"""
+    dots = np.sum(rotations[1:] * rotations[:-1], axis=-1, keepdims=True)
+    signs = np.cumprod(np.where(dots < 0.0, -1.0, 1.0), axis=0)
+    return np.concatenate((rotations[:1], rotations[1:] * signs))
+
+
+def remove_spikes(values: np.ndarray, threshold: float) -> np.ndarray:
+    """Replace isolated one-sample outliers (N, S, C) by the mean of their neighbours.
+
+    A sample is a spike when it is more than `threshold` away from both
+    neighbours while the neighbours agree within `threshold`.
+    """
+    values = np.array(values, dtype=np.float64)
+    if len(values) < 3:
+        return values
+    before, sample, after = values[:-2], values[1:-1], values[2:]
+
+    def distance(a, b):
+        return np.linalg.norm(a - b, axis=-1)
+
+    spikes = ((distance(sample, before) > threshold) & (distance(sample, after) > threshold)
+              & (distance(before, after) <= threshold))
+    values[1:-1] = np.where(spikes[..., None], (before + after) / 2.0, sample)
+    return values
+
+
+def smooth_recording(positions: np.ndarray, rotations: Optional[np.ndarray], rate: float,
+                     position_cutoff: float = 6.0, rotation_cutoff: float = 8.0,
+                     spike_threshold: Optional[float] = 0.1) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Offline zero-phase cleanup of one stream, (N, S, 3) positions and (N, S, 4) quaternions.
+
+    Spikes are removed first, then positions and rotation components are
+    low-passed without lag; rotations are made continuous before and
+    renormalized after filtering.
+    """
+    if spike_threshold is not None:
+        positions = remove_spikes(positions, spike_threshold)
+    positions = zero_phase_lowpass(positions, rate, position_cutoff)
+    if rotations is not None:
+        rotations = continuous_rotations(quaternions.normalize(np.asarray(rotations, dtype=np.float64)))
+        rotations = quaternions.normalize(zero_phase_lowpass(rotations, rate, rotation_cutoff))
+    return positions, rotations
+
+
+def stream_rate(timestamps: np.ndarray) -> float:
+    """Sample rate of a recorded stream from the median timestamp step"""
+    steps = np.diff(timestamps)
+    steps = steps[steps > 0]
+    return 1.0 / float(np.median(steps)) if len(steps) else 0.0
+
+
+def filter_take(path: str, output_path: str, position_cutoff: float = 6.0,
+                rotation_cutoff: float = 8.0, spike_threshold: Optional[float] = 0.1,
+                block_frames: int = 65536) -> int:
+    """Write a zero-phase filtered copy of a take; returns the frames filtered.
+
+    Every (character, datagram type) stream is filtered separately, in
+    blocks of block_frames with enough overlap that block edges match a
+    single pass over the whole stream. Euler streams have only their
+    positions filtered. A compressed take is decoded to a temporary raw
+    take first; the filtered copy is always raw.
+    """
+    if is_compressed(path):
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_path))) as tmp:
+            raw = os.path.join(tmp, os.path.basename(path))
+            decompress_take(path, raw)
+            return filter_take(raw, output_path, position_cutoff, rotation_cutoff,
+                               spike_threshold, block_frames)
+    reader = TakeReader(path)
+    try:
+        data_offset = reader.data_offset
+        dtype, frame_count = reader.dtype, len(reader)
+        records = reader.records
+        streams = {}
+        for start in range(0, frame_count, block_frames):
+            block = records[start:start + block_frames]
+            keys = block["character_id"].astype(np.int64) << 16 | block["datagram_type"]
+            for key in np.unique(keys):
+                streams.setdefault(int(key), []).append(start + np.flatnonzero(keys == key))
+        streams = {key: np.concatenate(rows) for key, rows in streams.items()}
+        shutil.copyfile(path, output_path)
+        if os.path.exists(index_path(path)):
+            shutil.copyfile(index_path(path), index_path(output_path))
+        output = np.memmap(output_path, dtype=dtype, mode="r+", offset=data_offset,
+                           shape=(frame_count,))
+        filtered = 0
+        for key, rows in streams.items():
+            rate = stream_rate(records["timestamp"][rows])
+            if len(rows) < 3 or rate <= 2.0 * max(position_cutoff, rotation_cutoff):
+                continue
+            quaternion = (key & 0xFFFF) in (0, POSE_QUATERNION)
+            margin = int(math.ceil(6.0 * rate / min(position_cutoff, rotation_cutoff)))
+            for start in range(0, len(rows), block_frames):
+                stop = min(start + block_frames, len(rows))
+                lo, hi = max(0, start - margin), min(len(rows), stop + margin)
+                context = records[rows[lo:hi]]
+                positions, rotations = smooth_recording(
+                    context["positions"], context["rotations"] if quaternion else None, rate,
+                    position_cutoff, rotation_cutoff, spike_threshold)
+                inner = slice(start - lo, stop - lo)
+                output["positions"][rows[start:stop]] = positions[inner]
+                if quaternion:
+                    output["rotations"][rows[start:stop]] = rotations[inner]
+                filtered += stop - start
+        output.flush()
+        del output
+        return filtered
+    finally:
+        reader.close()
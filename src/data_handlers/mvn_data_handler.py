@@ -1,12 +1,19 @@
 # src/data_handlers/mvn_data_handler.py
+import selectors
 import socket
-import struct
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Tuple, Callable
+from typing import Optional, Dict, Tuple
 import threading
 import time
 import json
 
+from .frame_buffer import DROP_OLDEST
+from .frame_source import FrameSource
+from .mvn_protocol import MVNFrame, decode_datagram
+from .receive_ring import DatagramRing
+from .sequence_tracker import SequenceTracker
+from .stream_framer import MVNStreamFramer
+
 @dataclass
 class XSensConfig:
     """Configuration class for XSens MVN connection settings"""
@@ -15,34 +22,39 @@ class XSensConfig:
     protocol: str = "UDP"       # Connection protocol (UDP/TCP)
     buffer_size: int = 4096     # Size of receive buffer
     timeout: float = 1.0        # Socket timeout in seconds
+    receive_buffer_size: int = 0  # Kernel SO_RCVBUF in bytes (0 keeps the OS default)
+    batch_receive: bool = True  # Drain all pending UDP datagrams per wakeup
+    receive_slots: int = 64     # Preallocated receive slots for batched UDP ingest
+    stream_buffer_size: int = 65536  # Reassembly buffer for TCP message framing
+    frame_buffer_size: int = 256  # Frames kept between the network thread and consumers
+    consumer_policy: str = DROP_OLDEST  # Default overflow policy (drop_oldest/block)
+    instrumentation: bool = False  # Per-stage latency histograms in get_status()
+    reorder_window: int = 4     # Samples held to put reordered datagrams back in order
+    reorder_timeout: float = 0.05  # Seconds to wait for a missing sample before skipping it
 
-class MVNDataHandler:
+class MVNDataHandler(FrameSource):
     """Handles communication with XSens MVN software"""
     def __init__(self, config: XSensConfig = None):
         self.config = config or XSensConfig()
+        super().__init__(self.config.frame_buffer_size, self.config.consumer_policy,
+                         self.config.timeout)
+        self.metrics.enabled = self.config.instrumentation
+        self.sequencer = SequenceTracker(self.config.reorder_window, self.config.reorder_timeout)
         self.socket: Optional[socket.socket] = None
         self.is_connected = False
-        self.is_streaming = False
         self._stop_streaming = False
         self.stream_thread: Optional[threading.Thread] = None
-        self.data_callbacks: List[Callable] = []
-        self._latest_data = None
-        self.connection_status_callback: Optional[Callable] = None
-
-    def set_connection_callback(self, callback: Callable[[bool, str], None]):
-        self.connection_status_callback = callback
-
-    def add_data_callback(self, callback: Callable):
-        self.data_callbacks.append(callback)
 
     def connect(self) -> Tuple[bool, str]:
         try:
             if self.config.protocol == "UDP":
                 self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._apply_receive_buffer_size()
                 self.socket.settimeout(self.config.timeout)
                 self.socket.bind((self.config.host, self.config.port))
             else:
                 self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self._apply_receive_buffer_size()
                 self.socket.settimeout(self.config.timeout)
                 self.socket.connect((self.config.host, self.config.port))
             
@@ -56,6 +68,11 @@ class MVNDataHandler:
                 self.connection_status_callback(False, error_msg)
             return False, error_msg
 
+    def _apply_receive_buffer_size(self):
+        if self.config.receive_buffer_size > 0:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                                   self.config.receive_buffer_size)
+
     def disconnect(self) -> Tuple[bool, str]:
         try:
             self.stop_streaming()
@@ -79,6 +96,7 @@ class MVNDataHandler:
             
         self.is_streaming = True
         self._stop_streaming = False
+        self._start_dispatchers()
         self.stream_thread = threading.Thread(target=self._stream_data)
         self.stream_thread.daemon = True
         self.stream_thread.start()
@@ -87,67 +105,129 @@ class MVNDataHandler:
     def stop_streaming(self):
         self._stop_streaming = True
         self.is_streaming = False
+        self._close_dispatchers()
         if self.stream_thread:
             self.stream_thread.join(timeout=2.0)
             self.stream_thread = None
+        self._join_dispatchers()
 
     def _stream_data(self):
+        if self.config.protocol != "UDP":
+            self._stream_messages()
+            return
+        if self.config.batch_receive:
+            self._stream_datagrams()
+            return
+
         while not self._stop_streaming and self.socket:
             try:
                 data = self._receive_packet()
                 if data:
-                    self._latest_data = data
-                    for callback in self.data_callbacks:
-                        callback(data)
+                    self._deliver(data)
+                elif self.sequencer.holding:
+                    self._expire()
             except socket.timeout:
                 continue
             except Exception as e:
                 print(f"Error in data stream: {e}")
                 break
 
-    def _receive_packet(self) -> Optional[Dict]:
+    def _stream_datagrams(self):
+        """Selector-driven UDP ingest draining every pending datagram per wakeup"""
+        ring = DatagramRing(self.config.receive_slots, self.config.buffer_size)
+        self.socket.setblocking(False)
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.socket, selectors.EVENT_READ)
+            while not self._stop_streaming and self.socket:
+                try:
+                    if not selector.select(self.config.timeout):
+                        self._expire()
+                        continue
+                    metrics = self.metrics
+                    if metrics.enabled:
+                        start = time.perf_counter()
+                    count = ring.drain(self.socket)
+                    received = time.monotonic()
+                    if metrics.enabled:
+                        metrics.record("receive", time.perf_counter() - start)
+                    for view in ring.batch(count):
+                        data = self._parse_mvn_packet(view, received)
+                        if data:
+                            self._deliver(data)
+                    if self.sequencer.holding:
+                        self._expire()
+                except Exception as e:
+                    print(f"Error in data stream: {e}")
+                    break
+
+    def _stream_messages(self):
+        """TCP ingest reassembling MVN messages from the byte stream"""
+        framer = MVNStreamFramer(self.config.stream_buffer_size)
+        while not self._stop_streaming and self.socket:
+            try:
+                metrics = self.metrics
+                if metrics.enabled:
+                    start = time.perf_counter()
+                if framer.recv_into(self.socket) == 0:
+                    print("Error in data stream: connection closed by peer")
+                    break
+                received = time.monotonic()
+                if metrics.enabled:
+                    metrics.record("receive", time.perf_counter() - start)
+                for view in framer.frames():
+                    data = self._parse_mvn_packet(view, received)
+                    if data:
+                        self._deliver(data)
+                if self.sequencer.holding:
+                    self._expire()
+            except socket.timeout:
+                self._expire()
+                continue
+            except Exception as e:
+                print(f"Error in data stream: {e}")
+                break
+
+    def _deliver(self, frame: MVNFrame):
+        """Pass a decoded datagram through sequence tracking to the frame ring"""
+        for ready in self.sequencer.push(frame):
+            self._dispatch(ready)
+
+    def _expire(self):
+        for ready in self.sequencer.expire():
+            self._dispatch(ready)
+
+    def _receive_packet(self) -> Optional[MVNFrame]:
         try:
-            if self.config.protocol == "UDP":
-                data, _ = self.socket.recvfrom(self.config.buffer_size)
-            else:
-                data = self.socket.recv(self.config.buffer_size)
-                
+            metrics = self.metrics
+            if metrics.enabled:
+                start = time.perf_counter()
+            data, _ = self.socket.recvfrom(self.config.buffer_size)
             if not data:
                 return None
+            received = time.monotonic()
+            if metrics.enabled:
+                metrics.record("receive", time.perf_counter() - start)
                 
-            return self._parse_mvn_packet(data)
+            return self._parse_mvn_packet(data, received)
         except socket.timeout:
             return None
         except Exception as e:
             print(f"Error receiving packet: {e}")
             return None
 
-    def _parse_mvn_packet(self, data: bytes) -> Optional[Dict]:
+    def _parse_mvn_packet(self, data, receive_time: Optional[float] = None) -> Optional[MVNFrame]:
+        metrics = self.metrics
+        if metrics.enabled:
+            start = time.perf_counter()
         try:
-            if len(data) < 4:
-                return None
-                
-            header = struct.unpack("!I", data[:4])[0]
-            payload = data[4:]
-            
-            return {
-                "header": header,
-                "timestamp": time.time(),
-                "data_size": len(payload),
-                "payload": self._parse_payload(payload)
-            }
+            frame = decode_datagram(data, receive_time=receive_time)
         except Exception as e:
+            metrics.count("parse_errors")
             print(f"Error parsing packet: {e}")
             return None
-
-    def _parse_payload(self, payload: bytes) -> Dict:
-        return {
-            "raw_size": len(payload),
-            "raw_data": payload
-        }
-
-    def get_latest_data(self) -> Optional[Dict]:
-        return self._latest_data
+        if metrics.enabled:
+            metrics.record("parse", time.perf_counter() - start)
+        return frame
 
     def get_status(self) -> Dict:
         return {
@@ -157,5 +237,8 @@ class MVNDataHandler:
                 "host": self.config.host,
                 "port": self.config.port,
                 "protocol": self.config.protocol
-            }
+            },
+            "frame_buffer": self.frame_buffer.get_stats(),
+            "sequence": self.sequencer.get_status(),
+            "metrics": self.metrics.get_status()
         }
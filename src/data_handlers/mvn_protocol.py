@@ -0,0 +1,234 @@
+# src/data_handlers/mvn_protocol.py
+import struct
+import time
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+# Every MVN datagram starts with a 24 byte big-endian header:
+# ID string ("MXTP" + 2 digit type), sample counter, datagram counter,
+# item count, time code (ms), character ID, body segment count,
+# prop count, finger segment count, 2 reserved bytes, payload size.
+HEADER = struct.Struct("!6sIBBIBBBB2sH")
+HEADER_SIZE = HEADER.size
+ID_PREFIX = b"MXTP"
+
+# Datagram types (the two digits following "MXTP")
+POSE_EULER = 1
+POSE_QUATERNION = 2
+POSITION_POINTS = 3
+JOINT_ANGLES = 20
+CENTER_OF_MASS = 24
+TIME_CODE = 25
+
+# Record layouts, big-endian as sent on the wire. Decoding a datagram is a
+# single np.frombuffer over the payload, no per-segment Python loop.
+EULER_POSE_DTYPE = np.dtype([
+    ("segment_id", ">i4"),
+    ("position", ">f4", (3,)),
+    ("rotation", ">f4", (3,)),     # x, y, z in degrees
+])
+QUATERNION_POSE_DTYPE = np.dtype([
+    ("segment_id", ">i4"),
+    ("position", ">f4", (3,)),
+    ("rotation", ">f4", (4,)),     # w, x, y, z
+])
+POSITION_POINT_DTYPE = np.dtype([
+    ("point_id", ">i4"),
+    ("position", ">f4", (3,)),
+])
+JOINT_ANGLE_DTYPE = np.dtype([
+    ("parent", ">i4"),             # segment_id * 256 + point_id
+    ("child", ">i4"),
+    ("rotation", ">f4", (3,)),
+])
+CENTER_OF_MASS_DTYPE = np.dtype(">f4")
+TIME_CODE_SIZE = 12                # "HH:MM:SS.mmm"
+
+# Last-datagram flag in the datagram counter byte
+LAST_DATAGRAM_FLAG = 0x80
+
+# The 23 segments of the MVN body model, in segment ID order (ID = index + 1)
+SEGMENT_NAMES = (
+    "Pelvis", "L5", "L3", "T12", "T8", "Neck", "Head",
+    "RightShoulder", "RightUpperArm", "RightForeArm", "RightHand",
+    "LeftShoulder", "LeftUpperArm", "LeftForeArm", "LeftHand",
+    "RightUpperLeg", "RightLowerLeg", "RightFoot", "RightToe",
+    "LeftUpperLeg", "LeftLowerLeg", "LeftFoot", "LeftToe",
+)
+SEGMENT_COUNT = len(SEGMENT_NAMES)
+
+# Parent segment index for each entry of SEGMENT_NAMES, -1 for the root.
+# Listed in topological order: every parent precedes its children.
+SEGMENT_PARENTS = (
+    -1, 0, 1, 2, 3, 4, 5,
+    4, 7, 8, 9,
+    4, 11, 12, 13,
+    0, 15, 16, 17,
+    0, 19, 20, 21,
+)
+
+# MVN is Z-up with X forward; exporters and Y-up rigs index positions and
+# quaternions with these to get Y-up. The cyclic permutation
+# (x, y, z) <- (y, z, x) keeps the frame right-handed, so quaternion vector
+# parts are permuted the same way.
+POSITION_AXES = [1, 2, 0]
+ROTATION_AXES = [0, 2, 3, 1]
+
+BufferLike = Union[bytes, bytearray, memoryview]
+
+
+@dataclass
+class MVNFrame:
+    """Decoded MVN datagram backed by NumPy arrays"""
+    datagram_type: int
+    sample_counter: int
+    datagram_counter: int          # Index of this datagram within the sample
+    is_last_datagram: bool
+    time_code: int                 # Sender time in ms since start of recording
+    character_id: int
+    timestamp: float               # Local time.time() when decoded
+    body_segment_count: int = 0
+    prop_count: int = 0
+    finger_segment_count: int = 0
+    segment_ids: Optional[np.ndarray] = None   # (N,) int32 segment/point IDs
+    positions: Optional[np.ndarray] = None     # (N, 3) float32
+    rotations: Optional[np.ndarray] = None     # (N, 4) quaternions or (N, 3) Euler degrees
+    joint_ids: Optional[np.ndarray] = None     # (N, 2) int32 parent/child connection IDs
+    timecode: Optional[str] = None
+    source_id: Optional[str] = None            # Set by IngestHub to the receiving source
+    receive_time: Optional[float] = None       # time.monotonic() when the datagram was received
+
+    @property
+    def segment_count(self) -> int:
+        return 0 if self.segment_ids is None else len(self.segment_ids)
+
+    @property
+    def is_pose(self) -> bool:
+        return self.datagram_type in (POSE_EULER, POSE_QUATERNION)
+
+
+def decode_header(data: BufferLike) -> tuple:
+    """Unpack the 24 byte header, raising ValueError for non-MVN data"""
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"Datagram too short: {len(data)} bytes")
+    header = HEADER.unpack_from(data)
+    ident = header[0]
+    if ident[:4] != ID_PREFIX or not ident[4:].isdigit():
+        raise ValueError(f"Not an MVN datagram: {bytes(ident)!r}")
+    return header
+
+
+def datagram_length(data: BufferLike) -> int:
+    """Total length (header + payload) announced by an MVN header"""
+    return HEADER_SIZE + decode_header(data)[10]
+
+
+def decode_datagram(data: BufferLike, timestamp: Optional[float] = None,
+                    receive_time: Optional[float] = None) -> MVNFrame:
+    """Decode one MVN datagram into an MVNFrame.
+
+    receive_time should be taken right after the socket read, so that it
+    excludes parsing and queueing delays; it defaults to the decode time.
+    The payload is viewed in place through a memoryview; each field is then
+    converted to native-endian arrays in one vectorized copy, so the frame
+    does not keep the receive buffer alive. Datagrams announcing more
+    payload than they hold, or none at all, raise ValueError.
+    """
+    view = memoryview(data)
+    (ident, sample_counter, datagram_counter, _, time_code, character_id,
+     body_segments, props, fingers, _, payload_size) = decode_header(view)
+
+    available = len(view) - HEADER_SIZE
+    if payload_size > available:
+        raise ValueError(f"Truncated datagram: {available} of {payload_size} payload bytes")
+    if payload_size == 0:
+        # Bytes after an empty payload are not part of the datagram
+        raise ValueError("Datagram announces an empty payload")
+
+    frame = MVNFrame(
+        datagram_type=int(ident[4:]),
+        sample_counter=sample_counter,
+        datagram_counter=datagram_counter & ~LAST_DATAGRAM_FLAG,
+        is_last_datagram=bool(datagram_counter & LAST_DATAGRAM_FLAG),
+        time_code=time_code,
+        character_id=character_id,
+        timestamp=time.time() if timestamp is None else timestamp,
+        body_segment_count=body_segments,
+        prop_count=props,
+        finger_segment_count=fingers,
+        receive_time=time.monotonic() if receive_time is None else receive_time,
+    )
+
+    kind = frame.datagram_type
+    if kind in (POSE_EULER, POSE_QUATERNION):
+        dtype = EULER_POSE_DTYPE if kind == POSE_EULER else QUATERNION_POSE_DTYPE
+        records = _records(view, dtype, payload_size)
+        frame.segment_ids = records["segment_id"].astype(np.int32)
+        frame.positions = records["position"].astype(np.float32)
+        frame.rotations = records["rotation"].astype(np.float32)
+    elif kind == POSITION_POINTS:
+        records = _records(view, POSITION_POINT_DTYPE, payload_size)
+        frame.segment_ids = records["point_id"].astype(np.int32)
+        frame.positions = records["position"].astype(np.float32)
+    elif kind == JOINT_ANGLES:
+        records = _records(view, JOINT_ANGLE_DTYPE, payload_size)
+        frame.joint_ids = np.stack((records["parent"], records["child"]), axis=1).astype(np.int32)
+        frame.rotations = records["rotation"].astype(np.float32)
+    elif kind == CENTER_OF_MASS:
+        # Position, optionally followed by velocity and acceleration
+        values = _records(view, CENTER_OF_MASS_DTYPE, payload_size - payload_size % 12)
+        frame.positions = values.astype(np.float32).reshape(-1, 3)
+    elif kind == TIME_CODE:
+        raw = view[HEADER_SIZE:HEADER_SIZE + min(payload_size, TIME_CODE_SIZE)]
+        frame.timecode = bytes(raw).decode("ascii", errors="replace")
+    return frame
+
+
+def _records(view: memoryview, dtype: np.dtype, payload_size: int) -> np.ndarray:
+    return np.frombuffer(view, dtype=dtype, count=payload_size // dtype.itemsize,
+                         offset=HEADER_SIZE)
+
+
+def encode_frame(frame: MVNFrame) -> bytes:
+    """Encode an MVNFrame back into its wire format"""
+    kind = frame.datagram_type
+    if kind in (POSE_EULER, POSE_QUATERNION):
+        dtype = EULER_POSE_DTYPE if kind == POSE_EULER else QUATERNION_POSE_DTYPE
+        records = np.empty(frame.segment_count, dtype=dtype)
+        records["segment_id"] = frame.segment_ids
+        records["position"] = frame.positions
+        records["rotation"] = frame.rotations
+        payload = records.tobytes()
+    elif kind == POSITION_POINTS:
+        records = np.empty(frame.segment_count, dtype=POSITION_POINT_DTYPE)
+        records["point_id"] = frame.segment_ids
+        records["position"] = frame.positions
+        payload = records.tobytes()
+    elif kind == JOINT_ANGLES:
+        records = np.empty(len(frame.joint_ids), dtype=JOINT_ANGLE_DTYPE)
+        records["parent"] = frame.joint_ids[:, 0]
+        records["child"] = frame.joint_ids[:, 1]
+        records["rotation"] = frame.rotations
+        payload = records.tobytes()
+    elif kind == CENTER_OF_MASS:
+        payload = np.asarray(frame.positions, dtype=CENTER_OF_MASS_DTYPE).tobytes()
+    elif kind == TIME_CODE:
+        payload = (frame.timecode or "").encode("ascii")[:TIME_CODE_SIZE].ljust(TIME_CODE_SIZE, b"\0")
+    else:
+        raise ValueError(f"Unsupported datagram type: {kind}")
+
+    if frame.segment_ids is not None:
+        items = frame.segment_count
+    elif frame.joint_ids is not None:
+        items = len(frame.joint_ids)
+    else:
+        items = 1
+    datagram_counter = frame.datagram_counter | (LAST_DATAGRAM_FLAG if frame.is_last_datagram else 0)
+    header = HEADER.pack(
+        ID_PREFIX + b"%02d" % kind, frame.sample_counter, datagram_counter,
+        min(items, 255), frame.time_code, frame.character_id,
+        frame.body_segment_count, frame.prop_count, frame.finger_segment_count,
+        b"\0\0", len(payload))
+    return header + payload
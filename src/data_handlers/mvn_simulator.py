@@ -0,0 +1,216 @@
+# src/data_handlers/mvn_simulator.py
+import socket
+import threading
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import quaternions
+from .kinematics import ForwardKinematics
+from .mvn_protocol import (POSE_EULER, POSE_QUATERNION, POSITION_POINTS, SEGMENT_COUNT,
+                           SEGMENT_PARENTS, TIME_CODE, MVNFrame, encode_frame)
+from .take_codec import open_take
+
+SIMULATED_TYPES = (POSE_QUATERNION, POSE_EULER, POSITION_POINTS, TIME_CODE)
+
+# Bone vectors from each segment's parent in the rest pose, metres, Z-up
+REST_OFFSETS = np.array([
+    [0.0, 0.0, 0.95],                                                   # Pelvis
+    [0.0, 0.0, 0.10], [0.0, 0.0, 0.10], [0.0, 0.0, 0.10],               # L5 L3 T12
+    [0.0, 0.0, 0.10], [0.0, 0.0, 0.20], [0.0, 0.0, 0.10],               # T8 Neck Head
+    [0.0, -0.05, 0.15], [0.0, -0.15, 0.0], [0.0, -0.28, 0.0], [0.0, -0.25, 0.0],
+    [0.0, 0.05, 0.15], [0.0, 0.15, 0.0], [0.0, 0.28, 0.0], [0.0, 0.25, 0.0],
+    [0.0, -0.09, 0.0], [0.0, 0.0, -0.42], [0.0, 0.0, -0.42], [0.08, 0.0, -0.06],
+    [0.0, 0.09, 0.0], [0.0, 0.0, -0.42], [0.0, 0.0, -0.42], [0.08, 0.0, -0.06],
+])
+
+# Segments swinging about the Y axis while walking, and their phase
+SWING_SEGMENTS = np.array([8, 12, 15, 19, 16, 20])
+SWING_PHASES = np.array([0.0, np.pi, np.pi, 0.0, np.pi / 2, 3 * np.pi / 2])
+SWING_AMPLITUDES = np.radians([30.0, 30.0, 25.0, 25.0, 20.0, 20.0])
+
+
+class SkeletonGenerator:
+    """Procedural walking MVN skeletons for any number of actors"""
+    def __init__(self, actors: int = 1, cadence: float = 1.0, speed: float = 1.2):
+        self.actors = actors
+        self.cadence = cadence      # Strides per second
+        self.speed = speed          # Forward speed in metres per second
+        self.kinematics = ForwardKinematics(SEGMENT_PARENTS, REST_OFFSETS)
+
+    def poses(self, seconds: np.ndarray, actor: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Walking-in-place positions (T, S, 3) and rotations (T, S, 4) at several times"""
+        seconds = np.asarray(seconds, dtype=np.float64)
+        phase = 2 * np.pi * self.cadence * seconds + actor * 0.7
+        angles = np.zeros((len(seconds), SEGMENT_COUNT))
+        angles[:, SWING_SEGMENTS] = SWING_AMPLITUDES * np.sin(phase[:, None] + SWING_PHASES)
+        local = np.zeros(angles.shape + (4,))
+        local[..., 0] = np.cos(angles / 2)
+        local[..., 2] = np.sin(angles / 2)
+
+        root = REST_OFFSETS[0] + (0.0, 1.5 * actor, 0.0)
+        positions, rotations = self.kinematics.solve(local, np.broadcast_to(root, (len(seconds), 3)))
+        return positions.astype(np.float32), rotations.astype(np.float32)
+
+    def pose(self, seconds: float, actor: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Global segment positions (S, 3) and rotations (S, 4) at a time"""
+        positions, rotations = self.poses([seconds], actor)
+        return positions[0] + self.travel(seconds), rotations[0]
+
+    def travel(self, seconds: float) -> np.ndarray:
+        return np.array([self.speed * seconds, 0.0, 0.0], dtype=np.float32)
+
+
+class MVNSimulator:
+    """Sends realistic MVN traffic for tests and benchmarks.
+
+    Each sample produces one datagram per actor and datagram type, either
+    from SkeletonGenerator or replayed from a recorded take. UDP datagrams
+    go to host:port, where an MVNDataHandler listens; for TCP the simulator
+    plays the MVN side and listens on host:port for one client. Sending is
+    paced at `rate` samples per second on the monotonic clock, or as fast as
+    possible with paced=False.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 9763, protocol: str = "UDP",
+                 actors: int = 1, rate: float = 240.0,
+                 datagram_types: Sequence[int] = (POSE_QUATERNION,),
+                 take_path: Optional[str] = None):
+        unsupported = set(datagram_types) - set(SIMULATED_TYPES)
+        if unsupported:
+            raise ValueError(f"Unsupported datagram types: {sorted(unsupported)}")
+        self.host = host
+        self.port = port
+        self.protocol = protocol
+        self.actors = actors
+        self.rate = rate
+        self.datagram_types = tuple(datagram_types)
+        self.generator = SkeletonGenerator(actors)
+        self.reader = open_take(take_path) if take_path else None
+        self._cycles = {}
+        self.samples_sent = 0
+        self.datagrams_sent = 0
+        self.bytes_sent = 0
+        self._socket: Optional[socket.socket] = None
+        self._server: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Listening address for TCP, target address for UDP"""
+        return self._server.getsockname() if self._server else (self.host, self.port)
+
+    def listen(self):
+        """TCP only: start listening so a handler can connect"""
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((self.host, self.port))
+        self._server.listen(1)
+
+    def open(self, timeout: float = 5.0):
+        if self.protocol == "UDP":
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        else:
+            if self._server is None:
+                self.listen()
+            self._server.settimeout(timeout)
+            self._socket, _ = self._server.accept()
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self):
+        self.stop()
+        for sock in (self._socket, self._server):
+            if sock is not None:
+                sock.close()
+        self._socket = self._server = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def frames(self, sample: int) -> Iterator[MVNFrame]:
+        """Every frame of one sample: one per actor and datagram type"""
+        seconds = sample / self.rate
+        time_code = int(round(seconds * 1000))
+        for actor in range(self.actors):
+            if self.reader is not None and len(self.reader):
+                recorded = self.reader.read_frame((sample * self.actors + actor) % len(self.reader))
+                positions, rotations = recorded.positions, recorded.rotations
+                if rotations.shape[1] == 3:
+                    rotations = quaternions.from_euler(rotations, "XYZ").astype(np.float32)
+                segment_ids = recorded.segment_ids
+            else:
+                positions, rotations = self._generated_pose(sample, actor)
+                segment_ids = np.arange(1, SEGMENT_COUNT + 1, dtype=np.int32)
+            for kind in self.datagram_types:
+                frame = MVNFrame(
+                    datagram_type=kind, sample_counter=sample, datagram_counter=0,
+                    is_last_datagram=True, time_code=time_code, character_id=actor,
+                    timestamp=0.0, body_segment_count=len(segment_ids))
+                if kind == POSE_QUATERNION:
+                    frame.segment_ids, frame.positions, frame.rotations = segment_ids, positions, rotations
+                elif kind == POSE_EULER:
+                    frame.segment_ids, frame.positions = segment_ids, positions
+                    frame.rotations = quaternions.to_euler(rotations, "XYZ").astype(np.float32)
+                elif kind == POSITION_POINTS:
+                    frame.segment_ids, frame.positions = segment_ids, positions
+                else:
+                    frame.timecode = time.strftime("%H:%M:%S", time.gmtime(seconds)) + \
+                        f".{time_code % 1000:03d}"
+                yield frame
+
+    def _generated_pose(self, sample: int, actor: int) -> Tuple[np.ndarray, np.ndarray]:
+        # One stride is computed per actor in a single batch and then looped,
+        # so generating traffic costs far less than the handler under test
+        cycle = self._cycles.get(actor)
+        if cycle is None:
+            length = max(1, int(round(self.rate / self.generator.cadence)))
+            cycle = self._cycles[actor] = self.generator.poses(np.arange(length) / self.rate, actor)
+        positions, rotations = cycle
+        index = sample % len(positions)
+        return positions[index] + self.generator.travel(sample / self.rate), rotations[index]
+
+    def datagrams(self, sample: int) -> List[bytes]:
+        return [encode_frame(frame) for frame in self.frames(sample)]
+
+    def send(self, samples: int, start: int = 0, paced: bool = True) -> int:
+        """Send `samples` samples starting at sample `start`; returns datagrams sent"""
+        if self._socket is None:
+            self.open()
+        sent = 0
+        begin = time.monotonic()
+        for index in range(samples):
+            if self._stop.is_set():
+                break
+            if paced:
+                delay = begin + index / self.rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            sent += self.send_datagrams(self.datagrams(start + index))
+            self.samples_sent += 1
+        return sent
+
+    def send_datagrams(self, datagrams: Sequence[bytes]) -> int:
+        for data in datagrams:
+            if self.protocol == "UDP":
+                self._socket.sendto(data, (self.host, self.port))
+            else:
+                self._socket.sendall(data)
+            self.bytes_sent += len(data)
+        self.datagrams_sent += len(datagrams)
+        return len(datagrams)
+
+    def start(self, duration: Optional[float] = None):
+        """Send paced traffic on a background thread until stop() or duration"""
+        self._stop.clear()
+        samples = int(duration * self.rate) if duration else 1 << 62
+        self.thread = threading.Thread(target=self.send, args=(samples,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+        self.thread = None
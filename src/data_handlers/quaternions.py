@@ -0,0 +1,181 @@
+# src/data_handlers/quaternions.py
+from typing import Optional
+
+import numpy as np
+
+# Vectorized quaternion helpers. Quaternions are stored as (..., 4) arrays in
+# (w, x, y, z) order, matching the MVN wire format; every function broadcasts
+# over leading dimensions so whole frame blocks are processed in one call.
+
+
+def normalize(q: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(q, axis=-1, keepdims=True)
+    return q / np.where(norm == 0.0, 1.0, norm)
+
+
+def conjugate(q: np.ndarray) -> np.ndarray:
+    return q * np.array([1.0, -1.0, -1.0, -1.0], dtype=q.dtype)
+
+
+def multiply(a: np.ndarray, b: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Hamilton product a * b (apply b, then a), optionally into `out`.
+
+    `out` must not share memory with a or b.
+    """
+    aw, ax, ay, az = np.moveaxis(a, -1, 0)
+    bw, bx, by, bz = np.moveaxis(b, -1, 0)
+    if out is None:
+        out = np.empty(np.broadcast_shapes(a.shape, b.shape), dtype=np.result_type(a, b))
+    out[..., 0] = aw * bw - ax * bx - ay * by - az * bz
+    out[..., 1] = aw * bx + ax * bw + ay * bz - az * by
+    out[..., 2] = aw * by - ax * bz + ay * bw + az * bx
+    out[..., 3] = aw * bz + ax * by - ay * bx + az * bw
+    return out
+
+
+def rotate(q: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Rotate vectors v (..., 3) by unit quaternions q (..., 4)"""
+    w = q[..., :1]
+    u = q[..., 1:]
+    t = 2.0 * np.cross(u, v)
+    return v + w * t + np.cross(u, t)
+
+
+def _product_basis() -> np.ndarray:
+    """(16, 9) map from the products q_i * q_j to rotation matrix entries"""
+    basis = np.zeros((4, 4, 3, 3))
+    w, x, y, z = range(4)
+    for (i, j), terms in {
+        (0, 0): ((w, w, 1), (x, x, 1), (y, y, -1), (z, z, -1)),
+        (1, 1): ((w, w, 1), (x, x, -1), (y, y, 1), (z, z, -1)),
+        (2, 2): ((w, w, 1), (x, x, -1), (y, y, -1), (z, z, 1)),
+        (0, 1): ((x, y, 2), (w, z, -2)), (1, 0): ((x, y, 2), (w, z, 2)),
+        (0, 2): ((x, z, 2), (w, y, 2)), (2, 0): ((x, z, 2), (w, y, -2)),
+        (1, 2): ((y, z, 2), (w, x, -2)), (2, 1): ((y, z, 2), (w, x, 2)),
+    }.items():
+        for a, b, factor in terms:
+            basis[a, b, i, j] += factor
+    return basis.reshape(16, 9)
+
+
+_PRODUCT_BASIS = _product_basis()
+
+
+def to_matrix(q: np.ndarray) -> np.ndarray:
+    """Rotation matrices (..., 3, 3) from unit quaternions.
+
+    Every entry is linear in the pairwise products of the components, so the
+    conversion is one outer product and one small matmul.
+    """
+    products = (q[..., :, None] * q[..., None, :]).reshape(q.shape[:-1] + (16,))
+    return (products @ _PRODUCT_BASIS.astype(q.dtype, copy=False)).reshape(q.shape[:-1] + (3, 3))
+
+
+def _shepperd_basis() -> np.ndarray:
+    """(10, 16) map from [m00 .. m22, 1] to the rows of 4 q q^T used by from_matrix"""
+    basis = np.zeros((4, 4, 10))
+    m = lambda i, j: 3 * i + j
+    for k, signs in enumerate([(1, 1, 1), (1, -1, -1), (-1, 1, -1), (-1, -1, 1)]):
+        basis[k, k, 9] = 1.0
+        for axis, sign in enumerate(signs):
+            basis[k, k, m(axis, axis)] = sign
+    # 4 w x, 4 w y, 4 w z from differences, 4 x y, 4 x z, 4 y z from sums
+    for (a, b), (i, j), sign in [((0, 1), (2, 1), -1), ((0, 2), (0, 2), -1),
+                                 ((0, 3), (1, 0), -1), ((1, 2), (0, 1), 1),
+                                 ((1, 3), (0, 2), 1), ((2, 3), (1, 2), 1)]:
+        for row, column in ((a, b), (b, a)):
+            basis[row, column, m(i, j)] += 1.0
+            basis[row, column, m(j, i)] += sign
+    return basis.reshape(16, 10).T
+
+
+_SHEPPERD_BASIS = _shepperd_basis()
+
+
+def from_matrix(m: np.ndarray) -> np.ndarray:
+    """Unit quaternions with w >= 0 from rotation matrices (..., 3, 3).
+
+    Shepperd's method: row k of 4 q q^T is the quaternion scaled by 4 q_k,
+    and all of 4 q q^T is linear in the matrix entries. The row with the
+    largest diagonal term (largest of trace, m00, m11, m22) is used, so the
+    scale is never small and 180 degree turns come out right as well.
+    """
+    shape = m.shape[:-2]
+    entries = np.empty(shape + (10,), dtype=m.dtype)
+    entries[..., :9] = m.reshape(shape + (9,))
+    entries[..., 9] = 1.0
+    rows = (entries @ _SHEPPERD_BASIS.astype(m.dtype, copy=False)).reshape(-1, 4, 4)
+    best = np.argmax(np.diagonal(rows, axis1=-2, axis2=-1), axis=-1)
+    q = rows[np.arange(len(rows)), best]
+    # One scale both normalizes and makes w non-negative
+    scale = np.sqrt(np.einsum("...i,...i->...", q, q))
+    np.negative(scale, out=scale, where=q[:, 0] < 0.0)
+    q /= scale[:, None]
+    return q.reshape(shape + (4,))
+
+
+def to_euler(q: np.ndarray, order: str = "ZXY") -> np.ndarray:
+    """Euler angles in degrees, (..., 3) in the given order.
+
+    The order names the axes from outermost to innermost, i.e. "ZXY" means
+    R = Rz @ Rx @ Ry, which is how BVH channel lists are interpreted.
+    """
+    m = to_matrix(q)
+    if order == "ZXY":
+        b = np.arcsin(np.clip(m[..., 2, 1], -1.0, 1.0))
+        a = np.arctan2(-m[..., 0, 1], m[..., 1, 1])
+        c = np.arctan2(-m[..., 2, 0], m[..., 2, 2])
+    elif order == "ZYX":
+        b = np.arcsin(np.clip(-m[..., 2, 0], -1.0, 1.0))
+        a = np.arctan2(m[..., 1, 0], m[..., 0, 0])
+        c = np.arctan2(m[..., 2, 1], m[..., 2, 2])
+    elif order == "XYZ":
+        b = np.arcsin(np.clip(m[..., 0, 2], -1.0, 1.0))
+        a = np.arctan2(-m[..., 1, 2], m[..., 2, 2])
+        c = np.arctan2(-m[..., 0, 1], m[..., 0, 0])
+    else:
+        raise ValueError(f"Unsupported Euler order: {order}")
+    return np.degrees(np.stack((a, b, c), axis=-1))
+
+
+def from_euler(angles: np.ndarray, order: str = "ZXY") -> np.ndarray:
+    """Unit quaternions from Euler angles in degrees, inverse of to_euler()"""
+    half = np.radians(angles) / 2.0
+    axes = {"X": 1, "Y": 2, "Z": 3}
+    result = None
+    for i, axis in enumerate(order):
+        q = np.zeros(angles.shape[:-1] + (4,), dtype=np.float64)
+        q[..., 0] = np.cos(half[..., i])
+        q[..., axes[axis]] = np.sin(half[..., i])
+        result = q if result is None else multiply(result, q)
+    return result
+
+
+def slerp(a: np.ndarray, b: np.ndarray, t) -> np.ndarray:
+    """Spherical interpolation from a to b; t broadcasts against (...,)"""
+    t = np.asarray(t, dtype=np.float64)[..., None]
+    dot = np.sum(a * b, axis=-1, keepdims=True)
+    # Take the short way round: q and -q are the same rotation
+    b = np.where(dot < 0.0, -b, b)
+    dot = np.abs(dot)
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_theta = np.sin(theta)
+    # Nearly parallel quaternions fall back to normalized lerp
+    close = sin_theta < 1e-6
+    safe = np.where(close, 1.0, sin_theta)
+    wa = np.where(close, 1.0 - t, np.sin((1.0 - t) * theta) / safe)
+    wb = np.where(close, t, np.sin(t * theta) / safe)
+    return normalize(wa * a + wb * b)
+
+
+def local_rotations(global_rotations: np.ndarray, parents) -> np.ndarray:
+    """Parent-relative rotations for (..., S, 4) global rotations.
+
+    parents[s] is the index of segment s's parent, -1 for roots.
+    """
+    parents = np.asarray(parents)
+    parent_rotations = global_rotations[..., np.where(parents < 0, 0, parents), :]
+    local = multiply(conjugate(parent_rotations), global_rotations)
+    roots = parents < 0
+    local[..., roots, :] = global_rotations[..., roots, :]
+    return local
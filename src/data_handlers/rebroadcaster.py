@@ -0,0 +1,308 @@
+# src/data_handlers/rebroadcaster.py
+import ipaddress
+import selectors
+import socket
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from .frame_buffer import DROP_OLDEST
+from .mvn_protocol import MVNFrame, encode_frame
+
+# Per-subscriber overflow policies. Nothing here may block the publisher,
+# so the frame ring's "block" policy has no counterpart.
+DROP_NEWEST = "drop_newest"
+DISCONNECT = "disconnect"
+SUBSCRIBER_POLICIES = (DROP_OLDEST, DROP_NEWEST, DISCONNECT)
+
+
+class Subscriber:
+    """One TCP subscriber with its own bounded queue of encoded frames"""
+    def __init__(self, sock: socket.socket, address, policy: str, max_pending: int):
+        self.sock = sock
+        self.address = address
+        self.policy = policy
+        self.max_pending = max_pending
+        self.pending: Deque[bytes] = deque()
+        self.current: Optional[memoryview] = None     # Partially sent message
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+
+    def enqueue(self, data: bytes) -> bool:
+        """Queue a shared encoded frame; False if the subscriber must be dropped"""
+        if len(self.pending) >= self.max_pending:
+            if self.policy == DISCONNECT:
+                return False
+            self.dropped += 1
+            if self.policy == DROP_NEWEST:
+                return True
+            self.pending.popleft()
+        self.pending.append(data)
+        return True
+
+    def flush(self) -> bool:
+        """Send as much as the socket takes without blocking; False on error"""
+        try:
+            while True:
+                if self.current is None:
+                    if not self.pending:
+                        return True
+                    self.current = memoryview(self.pending.popleft())
+                sent = self.sock.send(self.current)
+                self.current = self.current[sent:]
+                if not len(self.current):
+                    self.current = None
+                    self.sent += 1
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError:
+            return False
+
+    @property
+    def has_pending(self) -> bool:
+        return self.current is not None or bool(self.pending)
+
+
+class Rebroadcaster:
+    """Fans the decoded live stream out to downstream tools.
+
+    Every frame is encoded once with encode_frame() into a bytes object that
+    is shared by all outputs: it is sent as-is to each UDP target (unicast
+    or multicast) and referenced from every TCP subscriber's queue. The
+    output is plain MVN, so downstream tools can read it with
+    MVNDataHandler (UDP, or TCP via MVNStreamFramer).
+
+    TCP subscribers are served by one non-blocking selector thread. A
+    subscriber that falls behind fills only its own bounded queue and is
+    handled by its policy (drop_oldest, drop_newest or disconnect);
+    publish() never waits on the network.
+    """
+    def __init__(self, udp_targets: Sequence[Tuple[str, int]] = (),
+                 tcp_address: Optional[Tuple[str, int]] = None,
+                 subscriber_policy: str = DROP_OLDEST, max_pending: int = 256,
+                 multicast_ttl: int = 1):
+        if subscriber_policy not in SUBSCRIBER_POLICIES:
+            raise ValueError(f"Unknown subscriber policy: {subscriber_policy}")
+        self.udp_targets = list(udp_targets)
+        self.tcp_address = tcp_address
+        self.subscriber_policy = subscriber_policy
+        self.max_pending = max_pending
+        self.multicast_ttl = multicast_ttl
+        self.frames_published = 0
+        self.encode_errors = 0
+        self.udp_sent = 0
+        self.udp_dropped = 0
+        self.subscribers: List[Subscriber] = []
+        self.udp_socket: Optional[socket.socket] = None
+        self.server_socket: Optional[socket.socket] = None
+        self.is_running = False
+        self.server_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._wake_receive: Optional[socket.socket] = None
+        self._wake_send: Optional[socket.socket] = None
+        self._sources = []
+
+    @property
+    def server_address(self) -> Optional[Tuple[str, int]]:
+        return self.server_socket.getsockname() if self.server_socket else None
+
+    def start(self) -> Tuple[bool, str]:
+        if self.is_running:
+            return False, "Already running"
+        try:
+            if self.udp_targets:
+                self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                if any(_is_multicast(host) for host, _ in self.udp_targets):
+                    self.udp_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL,
+                                               self.multicast_ttl)
+                self.udp_socket.setblocking(False)
+            if self.tcp_address is not None:
+                self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                self.server_socket.bind(self.tcp_address)
+                self.server_socket.listen()
+                self.server_socket.setblocking(False)
+        except OSError as e:
+            self._close_sockets()
+            return False, f"Failed to start rebroadcast: {str(e)}"
+
+        self.is_running = True
+        if self.server_socket is not None:
+            self._wake_receive, self._wake_send = socket.socketpair()
+            self._wake_receive.setblocking(False)
+            self._wake_send.setblocking(False)
+            self.server_thread = threading.Thread(target=self._serve)
+            self.server_thread.daemon = True
+            self.server_thread.start()
+        return True, "Rebroadcast started"
+
+    def stop(self):
+        self.detach()
+        self.is_running = False
+        self._wake()
+        if self.server_thread:
+            self.server_thread.join(timeout=2.0)
+            self.server_thread = None
+        self._close_sockets()
+
+    def attach(self, source):
+        """Subscribe to a FrameSource; publish() then runs on its own dispatcher thread"""
+        source.add_data_callback(self.publish)
+        self._sources.append(source)
+
+    def detach(self):
+        for source in self._sources:
+            source.remove_data_callback(self.publish)
+        self._sources = []
+
+    def publish(self, frame: MVNFrame):
+        if not self.is_running:
+            return
+        try:
+            data = encode_frame(frame)
+        except (ValueError, TypeError) as e:
+            self.encode_errors += 1
+            print(f"Error encoding frame for rebroadcast: {e}")
+            return
+        self.frames_published += 1
+
+        if self.udp_socket is not None:
+            for target in self.udp_targets:
+                try:
+                    self.udp_socket.sendto(data, target)
+                    self.udp_sent += 1
+                except OSError:
+                    # Includes a full send buffer: UDP output is best effort
+                    self.udp_dropped += 1
+
+        if self.subscribers:
+            with self._lock:
+                for subscriber in self.subscribers:
+                    if not subscriber.enqueue(data):
+                        subscriber.closed = True
+            self._wake()
+
+    def _wake(self):
+        if self._wake_send is None:
+            return
+        try:
+            self._wake_send.send(b"\0")
+        except OSError:
+            pass    # Wakeup already pending
+
+    def _serve(self):
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.server_socket, selectors.EVENT_READ, "accept")
+            selector.register(self._wake_receive, selectors.EVENT_READ, "wake")
+            while self.is_running:
+                self._update_interest(selector)
+                for key, events in selector.select(1.0):
+                    if key.data == "accept":
+                        self._accept(selector)
+                    elif key.data == "wake":
+                        _drain(self._wake_receive)
+                    else:
+                        self._service(selector, key.data, events)
+            for subscriber in list(self.subscribers):
+                self._drop(selector, subscriber)
+
+    def _accept(self, selector: selectors.BaseSelector):
+        try:
+            sock, address = self.server_socket.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        subscriber = Subscriber(sock, address, self.subscriber_policy, self.max_pending)
+        with self._lock:
+            self.subscribers.append(subscriber)
+        selector.register(sock, selectors.EVENT_READ, subscriber)
+
+    def _update_interest(self, selector: selectors.BaseSelector):
+        with self._lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            if subscriber.closed:
+                self._drop(selector, subscriber)
+                continue
+            with self._lock:
+                ok = subscriber.flush()
+                pending = subscriber.has_pending
+            if not ok:
+                self._drop(selector, subscriber)
+                continue
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if pending else 0)
+            if selector.get_key(subscriber.sock).events != events:
+                selector.modify(subscriber.sock, events, subscriber)
+
+    def _service(self, selector: selectors.BaseSelector, subscriber: Subscriber, events: int):
+        if events & selectors.EVENT_READ:
+            # Subscribers only listen; readable means closed (or stray input)
+            try:
+                if not subscriber.sock.recv(4096):
+                    self._drop(selector, subscriber)
+                    return
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                self._drop(selector, subscriber)
+                return
+        if events & selectors.EVENT_WRITE:
+            with self._lock:
+                ok = subscriber.flush()
+            if not ok:
+                self._drop(selector, subscriber)
+
+    def _drop(self, selector: selectors.BaseSelector, subscriber: Subscriber):
+        with self._lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+        try:
+            selector.unregister(subscriber.sock)
+        except (KeyError, ValueError):
+            pass
+        subscriber.sock.close()
+        subscriber.closed = True
+
+    def _close_sockets(self):
+        for sock in (self.udp_socket, self.server_socket, self._wake_receive, self._wake_send):
+            if sock is not None:
+                sock.close()
+        self.udp_socket = self.server_socket = None
+        self._wake_receive = self._wake_send = None
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            subscribers = [{
+                "address": f"{subscriber.address[0]}:{subscriber.address[1]}",
+                "pending": len(subscriber.pending),
+                "sent": subscriber.sent,
+                "dropped": subscriber.dropped,
+            } for subscriber in self.subscribers]
+        return {
+            "running": self.is_running,
+            "frames_published": self.frames_published,
+            "encode_errors": self.encode_errors,
+            "udp_targets": [f"{host}:{port}" for host, port in self.udp_targets],
+            "udp_sent": self.udp_sent,
+            "udp_dropped": self.udp_dropped,
+            "tcp_address": self.server_address,
+            "subscriber_policy": self.subscriber_policy,
+            "subscribers": subscribers,
+        }
+
+
+def _is_multicast(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_multicast
+    except ValueError:
+        return False
+
+
+def _drain(sock: socket.socket):
+    try:
+        while sock.recv(4096):
+            pass
+    except (BlockingIOError, InterruptedError):
+        pass
@@ -0,0 +1,48 @@
+# src/data_handlers/receive_ring.py
+import socket
+from typing import Iterator
+
+
+class DatagramRing:
+    """Preallocated ring of receive slots filled with recvfrom_into.
+
+    drain() empties the socket's pending queue without blocking, writing each
+    datagram into the next bytearray slot, so the receive path allocates no
+    per-packet bytes objects. The views returned by batch() stay valid until
+    the ring wraps around, i.e. for the next slot_count datagrams.
+    """
+    def __init__(self, slot_count: int = 64, slot_size: int = 4096):
+        if slot_count < 1 or slot_size < 1:
+            raise ValueError("slot_count and slot_size must be positive")
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self._buffers = [bytearray(slot_size) for _ in range(slot_count)]
+        self._views = [memoryview(buffer) for buffer in self._buffers]
+        self._lengths = [0] * slot_count
+        self._next_slot = 0
+        self.received = 0
+        self.truncated = 0      # Datagrams that filled a whole slot
+
+    def drain(self, sock: socket.socket) -> int:
+        """Receive up to slot_count pending datagrams from a non-blocking socket"""
+        count = 0
+        while count < self.slot_count:
+            slot = self._next_slot
+            try:
+                nbytes, _ = sock.recvfrom_into(self._views[slot])
+            except (BlockingIOError, InterruptedError):
+                break
+            self._lengths[slot] = nbytes
+            if nbytes == self.slot_size:
+                self.truncated += 1
+            self._next_slot = (slot + 1) % self.slot_count
+            count += 1
+        self.received += count
+        return count
+
+    def batch(self, count: int) -> Iterator[memoryview]:
+        """Views of the last `count` drained datagrams, oldest first"""
+        start = self._next_slot - count
+        for i in range(start, self._next_slot):
+            slot = i % self.slot_count
+            yield self._views[slot][:self._lengths[slot]]
@@ -0,0 +1,366 @@
+# src/data_handlers/retarget.py
+import json
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import quaternions
+from .frame_source import FrameSource
+from .kinematics import hierarchy_levels
+from .mvn_protocol import (POSE_QUATERNION, POSITION_AXES, ROTATION_AXES, SEGMENT_COUNT,
+                           SEGMENT_NAMES, MVNFrame)
+from .take_codec import open_take
+
+# MVN is Z-up; Y-up rigs get the same axis permutation as the exporters
+UP_AXES = {
+    "z": ([0, 1, 2], [0, 1, 2, 3]),
+    "y": (POSITION_AXES, ROTATION_AXES),
+}
+UP_INDEX = {"z": 2, "y": 1}
+PELVIS_ID = 1
+
+
+@dataclass
+class RigDefinition:
+    """A target character rig: bone hierarchy, rest pose and bone mapping.
+
+    rest_rotations are parent-relative (w, x, y, z) and rest_offsets each
+    bone's origin in its parent's frame, in rig units; a root's offset is
+    its rest position. mapping names the MVN segment driving each bone;
+    unmapped bones follow their nearest mapped ancestor rigidly.
+    """
+    name: str
+    bones: List[str]
+    parents: np.ndarray            # (B,) parent bone index, -1 for roots
+    rest_rotations: np.ndarray     # (B, 4)
+    rest_offsets: np.ndarray       # (B, 3)
+    mapping: Dict[str, str]        # Bone name -> MVN segment name
+    up: str = "y"
+    scale: float = 1.0             # Rig units per metre
+
+    @classmethod
+    def from_dict(cls, data: Dict, mapping: Optional[Dict[str, str]] = None) -> "RigDefinition":
+        """Rig from a parsed definition; `mapping` entries override the definition's"""
+        entries = data.get("bones", [])
+        bones = [entry["name"] for entry in entries]
+        if len(set(bones)) != len(bones):
+            raise ValueError("Rig bone names must be unique")
+        index = {name: i for i, name in enumerate(bones)}
+        parents = []
+        for entry in entries:
+            parent = entry.get("parent")
+            if parent is not None and parent not in index:
+                raise ValueError(f"Unknown parent bone {parent!r} of {entry['name']!r}")
+            parents.append(-1 if parent is None else index[parent])
+        parents = np.array(parents, dtype=np.intp)
+        hierarchy_levels(parents)      # Rejects cycles
+        rest_rotations = quaternions.normalize(np.array(
+            [entry.get("rotation", [1.0, 0.0, 0.0, 0.0]) for entry in entries], dtype=np.float64
+        ).reshape(-1, 4))
+        rest_offsets = np.array([entry.get("offset", [0.0, 0.0, 0.0]) for entry in entries],
+                                dtype=np.float64).reshape(-1, 3)
+
+        bone_mapping = dict(data.get("mapping", {}))
+        bone_mapping.update(mapping or {})
+        for bone, segment in bone_mapping.items():
+            if bone not in index:
+                raise ValueError(f"Mapping names unknown bone {bone!r}")
+            if segment not in SEGMENT_NAMES:
+                raise ValueError(f"Mapping names unknown MVN segment {segment!r}")
+        up = str(data.get("up", "y")).lower()
+        if up not in UP_AXES:
+            raise ValueError(f"Rig up axis must be one of {', '.join(UP_AXES)}")
+        return cls(data.get("name", "rig"), bones, parents, rest_rotations, rest_offsets,
+                   bone_mapping, up, float(data.get("scale", 1.0)))
+
+    @classmethod
+    def load(cls, path: str, mapping_path: Optional[str] = None) -> "RigDefinition":
+        """Rig from a JSON definition file, with an optional JSON bone mapping file.
+
+            {"name": "Hero", "up": "y", "scale": 100.0,
+             "bones": [{"name": "hips", "parent": null, "offset": [0, 95, 0],
+                        "rotation": [1, 0, 0, 0]}, ...],
+             "mapping": {"hips": "Pelvis", ...}}
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        mapping = None
+        if mapping_path:
+            with open(mapping_path, "r", encoding="utf-8") as f:
+                mapping = json.load(f)
+        return cls.from_dict(data, mapping)
+
+    def rest_world_rotations(self) -> np.ndarray:
+        """(B, 4) rest rotations in the rig's world frame"""
+        world = self.rest_rotations.copy()
+        for level in hierarchy_levels(self.parents):
+            world[level] = quaternions.multiply(world[self.parents[level]], self.rest_rotations[level])
+        return world
+
+
+@dataclass
+class RetargetedPose:
+    """One rig's pose driven by one actor's frame, in the rig's units and axes"""
+    rig: str
+    character_id: int
+    sample_counter: int
+    timestamp: float
+    root_position: np.ndarray      # (3,)
+    local_rotations: np.ndarray    # (B, 4) parent-relative, w, x, y, z
+    source_id: Hashable = None
+
+
+@dataclass
+class RetargetedTake:
+    """One rig's animation driven by one actor of a take, in the rig's units and axes"""
+    rig: str
+    character_id: int
+    timestamps: np.ndarray         # (N,)
+    sample_counters: np.ndarray    # (N,)
+    root_positions: np.ndarray     # (N, 3)
+    local_rotations: np.ndarray    # (N, B, 4) parent-relative, w, x, y, z
+
+
+class Retargeter:
+    """Maps MVN segment rotations onto one rig with batched quaternion products.
+
+    Everything rig specific is worked out once: every bone is driven by the
+    MVN segment of its nearest mapped ancestor (or itself), with the rest
+    pose correction conj(source_rest) * rest_world. Per frame, a bone's
+    world rotation is then its driver's rotation times that correction,
+    which carries the actor's rotation away from the source rest pose onto
+    the bone's rest pose. Bones with no mapped ancestor keep their rest
+    pose. retarget() accepts any leading batch shape.
+
+    The source rest pose is identity, MVN's segment frames in its
+    calibration pose, until calibrate() takes it from a frame of the actor
+    standing in the rig's rest pose.
+    """
+    def __init__(self, rig: RigDefinition, segment_ids: Optional[Sequence[int]] = None):
+        self.rig = rig
+        self.bone_count = len(rig.bones)
+        if segment_ids is None:
+            segment_ids = range(1, SEGMENT_COUNT + 1)
+        columns = {int(segment_id): column for column, segment_id in enumerate(segment_ids)}
+        missing = [segment for segment in set(rig.mapping.values())
+                   if SEGMENT_NAMES.index(segment) + 1 not in columns]
+        if missing:
+            raise ValueError(f"Frames lack mapped segments: {', '.join(sorted(missing))}")
+        self.segment_count = len(columns)
+        self.pelvis_column = columns.get(PELVIS_ID, 0)
+        self.position_axes, self.rotation_axes = UP_AXES[rig.up]
+        self.rest_world = rig.rest_world_rotations()
+
+        # Driving MVN column of every bone, -1 where no ancestor is mapped
+        drivers = np.full(self.bone_count, -1, dtype=np.intp)
+        for bone, name in enumerate(rig.bones):
+            if name in rig.mapping:
+                drivers[bone] = columns[SEGMENT_NAMES.index(rig.mapping[name]) + 1]
+        for level in hierarchy_levels(rig.parents):
+            unmapped = level[drivers[level] < 0]
+            drivers[unmapped] = drivers[rig.parents[unmapped]]
+        self.fixed = np.flatnonzero(drivers < 0)
+        self.drivers = np.where(drivers < 0, 0, drivers)
+        self.root = int(np.flatnonzero(rig.parents < 0)[0]) if self.bone_count else 0
+        self.height_ratio = 1.0
+        self.set_source_rest(None)
+
+    def set_source_rest(self, rotations: Optional[np.ndarray]):
+        """Source rest pose, (S, 4) MVN global rotations; None for identity"""
+        if rotations is None:
+            source_rest = np.zeros((self.segment_count, 4))
+            source_rest[:, 0] = 1.0
+        else:
+            source_rest = self._source_rotations(rotations)
+        self.correction = quaternions.multiply(quaternions.conjugate(source_rest[self.drivers]),
+                                               self.rest_world)
+
+    def calibrate(self, rotations: np.ndarray, positions: Optional[np.ndarray] = None):
+        """Take the source rest pose and, from the pelvis height, the size ratio from one frame"""
+        self.set_source_rest(rotations)
+        if positions is None:
+            return
+        up = UP_INDEX[self.rig.up]
+        source = float(np.asarray(positions)[self.pelvis_column, 2]) * self.rig.scale
+        target = float(self.rig.rest_offsets[self.root, up])
+        if source > 0.0 and target > 0.0:
+            self.height_ratio = target / source
+
+    def _source_rotations(self, rotations: np.ndarray) -> np.ndarray:
+        rotations = np.asarray(rotations, dtype=np.float64)[..., self.rotation_axes]
+        return quaternions.normalize(rotations)
+
+    def retarget(self, rotations: np.ndarray,
+                 positions: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Root positions (..., 3) and local rotations (..., B, 4) from MVN global
+        rotations (..., S, 4) and positions (..., S, 3)"""
+        source = self._source_rotations(np.asarray(rotations)[..., self.drivers, :])
+        world = quaternions.multiply(source, self.correction)
+        if len(self.fixed):
+            world[..., self.fixed, :] = self.rest_world[self.fixed]
+        local = quaternions.local_rotations(world, self.rig.parents)
+        if positions is None:
+            root = np.broadcast_to(self.rig.rest_offsets[self.root], local.shape[:-2] + (3,))
+        else:
+            pelvis = np.asarray(positions, dtype=np.float64)[..., self.pelvis_column, :]
+            root = pelvis[..., self.position_axes] * (self.rig.scale * self.height_ratio)
+        return root, local
+
+    def retarget_frame(self, frame: MVNFrame) -> RetargetedPose:
+        root, local = self.retarget(frame.rotations, frame.positions)
+        return RetargetedPose(self.rig.name, frame.character_id, frame.sample_counter,
+                              frame.timestamp, root, local, frame.source_id)
+
+
+def _retarget_block(retargeters: Sequence[Retargeter], path: str, start: int, stop: int,
+                    character_id: int) -> Tuple[np.ndarray, np.ndarray, List[Tuple]]:
+    """Timestamps, sample counters and (root, local) per rig of one actor's frames in [start, stop)"""
+    reader = open_take(path)
+    try:
+        records = reader.read_records(start, stop)
+        # Type 0 marks quaternion records of takes written before types were stored
+        rows = np.flatnonzero((records["character_id"] == character_id)
+                              & np.isin(records["datagram_type"], (0, POSE_QUATERNION)))
+        rotations, positions = records["rotations"][rows], records["positions"][rows]
+        timestamps, samples = records["timestamp"][rows], records["sample_counter"][rows]
+    finally:
+        reader.close()
+    return timestamps, samples, [retargeter.retarget(rotations, positions)
+                                 for retargeter in retargeters]
+
+
+# Retargeters of a pool worker process, copied in once by its initializer
+_worker_retargeters: List[Retargeter] = []
+
+
+def _init_worker(retargeters: List[Retargeter]):
+    global _worker_retargeters
+    _worker_retargeters = retargeters
+
+
+def _retarget_in_worker(path: str, start: int, stop: int, character_id: int):
+    return _retarget_block(_worker_retargeters, path, start, stop, character_id)
+
+
+def retarget_take(path: str, retargeters: Sequence[Retargeter], character_id: int = 0,
+                  workers: int = 0, block_frames: int = 8192) -> List[RetargetedTake]:
+    """Retarget one actor's quaternion frames of a take onto each rig.
+
+    The take, raw or compressed, is read in blocks of block_frames and each
+    block is solved for every rig as one batch. With workers > 0 the blocks
+    are solved in a process pool whose workers hold their own copies of the
+    retargeters and open the take themselves, so only block bounds and
+    results cross the process boundary. Build the retargeters with the
+    take's segment_ids when it does not hold all MVN segments.
+    """
+    reader = open_take(path)
+    frame_count = len(reader)
+    reader.close()
+    # An empty take still yields one empty block, so the arrays get their shapes
+    starts = range(0, frame_count, block_frames) or [0]
+    stops = [min(start + block_frames, frame_count) for start in starts]
+    if workers > 0:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(list(retargeters),)) as pool:
+            blocks = list(pool.map(_retarget_in_worker, repeat(path), starts, stops,
+                                   repeat(character_id)))
+    else:
+        blocks = [_retarget_block(retargeters, path, start, stop, character_id)
+                  for start, stop in zip(starts, stops)]
+    timestamps = np.concatenate([block[0] for block in blocks])
+    samples = np.concatenate([block[1] for block in blocks])
+    return [RetargetedTake(retargeter.rig.name, character_id, timestamps, samples,
+                           np.concatenate([block[2][i][0] for block in blocks]),
+                           np.concatenate([block[2][i][1] for block in blocks]))
+            for i, retargeter in enumerate(retargeters)]
+
+
+class RetargetStage(FrameSource):
+    """Pipeline stage retargeting actors' quaternion pose frames onto rigs.
+
+    add_rig() assigns a Retargeter to one character, or to every character.
+    Each pose frame then yields one RetargetedPose per assigned rig,
+    dispatched to the stage's consumers in assignment order; other frames
+    are dropped. Rigs are solved in-process on the source's dispatcher
+    thread, where a frame costs a few batched products; a round trip to a
+    process pool would cost more than the solve. retarget_take() spreads
+    recorded takes over a pool instead.
+    """
+    def __init__(self, frame_buffer_size: int = 256):
+        super().__init__(frame_buffer_size)
+        self.frames_retargeted = 0
+        self.poses_produced = 0
+        self._assignments: List[Tuple[Optional[int], Retargeter]] = []
+        self._lock = threading.Lock()
+        self._sources = []
+
+    def add_rig(self, retargeter: Retargeter, character_id: Optional[int] = None):
+        with self._lock:
+            self._assignments.append((character_id, retargeter))
+
+    def calibrate(self, frame: MVNFrame):
+        """Calibrate the rigs of the frame's character from its current pose"""
+        with self._lock:
+            for character_id, retargeter in self._assignments:
+                if character_id in (None, frame.character_id):
+                    retargeter.calibrate(frame.rotations, frame.positions)
+
+    def attach(self, source):
+        source.add_data_callback(self.push)
+        self._sources.append(source)
+
+    def detach(self):
+        for source in self._sources:
+            source.remove_data_callback(self.push)
+        self._sources = []
+
+    def push(self, frame: MVNFrame):
+        if frame.datagram_type != POSE_QUATERNION:
+            return
+        if self.metrics.enabled:
+            start = time.perf_counter()
+        with self._lock:
+            matching = [i for i, (character_id, _) in enumerate(self._assignments)
+                        if character_id in (None, frame.character_id)]
+            if not matching:
+                return
+            results = [self._assignments[i][1].retarget(frame.rotations, frame.positions)
+                       for i in matching]
+            names = [self._assignments[i][1].rig.name for i in matching]
+        if self.metrics.enabled:
+            self.metrics.record("retarget", time.perf_counter() - start)
+        self.frames_retargeted += 1
+        for name, (root, local) in zip(names, results):
+            self.poses_produced += 1
+            self._dispatch(RetargetedPose(name, frame.character_id, frame.sample_counter,
+                                          frame.timestamp, root, local, frame.source_id))
+
+    def start_streaming(self) -> bool:
+        if self.is_streaming:
+            return False
+        self.is_streaming = True
+        self._start_dispatchers()
+        return True
+
+    def stop_streaming(self):
+        self.is_streaming = False
+        self._close_dispatchers()
+        self._join_dispatchers()
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            rigs = [{"rig": retargeter.rig.name, "character_id": character_id}
+                    for character_id, retargeter in self._assignments]
+        return {
+            "streaming": self.is_streaming,
+            "rigs": rigs,
+            "frames_retargeted": self.frames_retargeted,
+            "poses_produced": self.poses_produced,
+            "frame_buffer": self.frame_buffer.get_stats(),
+            "metrics": self.metrics.get_status(),
+        }
@@ -0,0 +1,203 @@
+# src/data_handlers/sequence_tracker.py
+import dataclasses
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .mvn_protocol import MVNFrame
+
+StreamKey = Tuple[int, int]     # (character_id, datagram_type)
+
+COUNTERS = ("datagrams", "frames", "lost", "duplicated", "out_of_order", "late",
+            "incomplete", "reassembled", "resyncs")
+
+
+def merge_parts(parts: List[MVNFrame]) -> MVNFrame:
+    """Join the datagrams of one split sample into a single frame"""
+    first = parts[0]
+    if len(parts) == 1:
+        return first
+    joined = {}
+    for name in ("segment_ids", "positions", "rotations", "joint_ids"):
+        arrays = [getattr(part, name) for part in parts]
+        if all(array is not None for array in arrays):
+            joined[name] = np.concatenate(arrays)
+    return dataclasses.replace(first, datagram_counter=0, is_last_datagram=True, **joined)
+
+
+class _Stream:
+    """Reorder window of one datagram stream, indexed by sample_counter % window"""
+    def __init__(self, window: int, history: int):
+        self.window = window
+        self.history = history
+        self.slot_samples = [-1] * window          # Sample held in each slot
+        self.slot_parts: List[Optional[Dict[int, MVNFrame]]] = [None] * window
+        self.slot_total = [0] * window             # Datagrams in the sample, once the last is seen
+        self.slot_arrival = [0.0] * window
+        self.emitted = [-1] * history              # Recently delivered samples, for duplicates
+        self.held = 0
+        self.next: Optional[int] = None            # Next sample to deliver
+        self.highest = -1
+        self.counts = dict.fromkeys(COUNTERS, 0)
+
+    def push(self, frame: MVNFrame, arrival: float, ready: List[MVNFrame]):
+        counts = self.counts
+        counts["datagrams"] += 1
+        sample = frame.sample_counter
+        if self.next is None or abs(sample - self.next) > self.history:
+            # First frame, or the sender restarted its counter
+            if self.next is not None:
+                counts["resyncs"] += 1
+                self._advance(self.next + self.window, ready)
+            self.next = sample
+            self.highest = sample - 1
+        if sample < self.next:
+            if self.emitted[sample % self.history] == sample:
+                counts["duplicated"] += 1
+            else:
+                counts["late"] += 1
+            return
+        if sample >= self.next + self.window:
+            self._advance(sample - self.window + 1, ready)
+
+        slot = sample % self.window
+        parts = self.slot_parts[slot]
+        if self.slot_samples[slot] != sample:
+            parts = self.slot_parts[slot] = {}
+            self.slot_samples[slot] = sample
+            self.slot_total[slot] = 0
+            self.slot_arrival[slot] = arrival
+            self.held += 1
+        if frame.datagram_counter in parts:
+            counts["duplicated"] += 1
+            return
+        parts[frame.datagram_counter] = frame
+        if frame.is_last_datagram:
+            self.slot_total[slot] = frame.datagram_counter + 1
+        if sample < self.highest:
+            counts["out_of_order"] += 1
+        else:
+            self.highest = sample
+        self._drain(ready)
+
+    def _complete(self, slot: int) -> bool:
+        total = self.slot_total[slot]
+        return total > 0 and len(self.slot_parts[slot]) == total
+
+    def _take(self, slot: int, ready: List[MVNFrame]):
+        """Deliver the sample in a slot if complete, and free the slot"""
+        parts = self.slot_parts[slot]
+        indices = sorted(parts) if self._complete(slot) else None
+        # Whole only when the datagram counters run 0..total-1; a stray
+        # counter past the last datagram leaves a gap below it
+        if indices is not None and indices[-1] == len(indices) - 1:
+            if len(parts) > 1:
+                self.counts["reassembled"] += 1
+            ready.append(merge_parts([parts[index] for index in indices]))
+            self.counts["frames"] += 1
+            sample = self.slot_samples[slot]
+            self.emitted[sample % self.history] = sample
+        else:
+            self.counts["incomplete"] += 1
+            self.counts["lost"] += 1
+        self.slot_samples[slot] = -1
+        self.slot_parts[slot] = None
+        self.held -= 1
+
+    def _drain(self, ready: List[MVNFrame]):
+        """Deliver contiguous complete samples from the head of the window"""
+        while True:
+            slot = self.next % self.window
+            if self.slot_samples[slot] != self.next or not self._complete(slot):
+                return
+            self._take(slot, ready)
+            self.next += 1
+
+    def _advance(self, target: int, ready: List[MVNFrame]):
+        """Give up on every sample before target, delivering what is complete"""
+        while self.next < target:
+            if not self.held:
+                # Nothing left in the window: count the rest of the gap at once
+                self.counts["lost"] += target - self.next
+                self.next = target
+                break
+            slot = self.next % self.window
+            if self.slot_samples[slot] == self.next:
+                self._take(slot, ready)
+            else:
+                self.counts["lost"] += 1
+            self.next += 1
+        self._drain(ready)
+
+    def expire(self, now: float, timeout: float, ready: List[MVNFrame]):
+        """Stop waiting for a missing sample once a later one is held too long"""
+        if not self.held:
+            return
+        oldest = None
+        for slot in range(self.window):
+            if self.slot_samples[slot] >= 0 and (oldest is None or
+                                                 self.slot_samples[slot] < self.slot_samples[oldest]):
+                oldest = slot
+        if now - self.slot_arrival[oldest] >= timeout:
+            self._advance(self.slot_samples[oldest] + 1, ready)
+
+
+class SequenceTracker:
+    """Loss, duplicate and reordering detection from MVN sample counters.
+
+    Every (character_id, datagram_type) stream of one source keeps a small
+    reorder window of `window` samples in preallocated slots indexed by
+    sample_counter % window. Samples are delivered in counter order as soon
+    as they are complete; datagrams of a sample split across several
+    datagrams (datagram_counter, last-datagram flag) are reassembled into
+    one frame first. A gap holds later samples until the window is full or
+    the oldest held sample has waited `timeout` seconds; the missing sample
+    is then counted as lost. Samples arriving after their turn are counted
+    as late and dropped, repeats as duplicated. All bookkeeping is O(1) per
+    datagram, except expire() which scans one window.
+
+    Used from a single receive thread; get_status() may be called from any.
+    """
+    def __init__(self, window: int = 4, timeout: float = 0.05, history: int = 1024):
+        self.window = max(1, window)
+        self.timeout = timeout
+        self.history = max(history, 2 * self.window)
+        self.streams: Dict[StreamKey, _Stream] = {}
+
+    def push(self, frame: MVNFrame) -> List[MVNFrame]:
+        """Track one decoded datagram; returns the frames now ready, in order"""
+        key = (frame.character_id, frame.datagram_type)
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = _Stream(self.window, self.history)
+        arrival = frame.receive_time if frame.receive_time is not None else time.monotonic()
+        ready: List[MVNFrame] = []
+        stream.push(frame, arrival, ready)
+        return ready
+
+    def expire(self, now: Optional[float] = None) -> List[MVNFrame]:
+        """Release samples held behind a gap for longer than the timeout"""
+        now = time.monotonic() if now is None else now
+        ready: List[MVNFrame] = []
+        for stream in self.streams.values():
+            stream.expire(now, self.timeout, ready)
+        return ready
+
+    @property
+    def holding(self) -> bool:
+        return any(stream.held for stream in self.streams.values())
+
+    def totals(self) -> Dict[str, int]:
+        totals = dict.fromkeys(COUNTERS, 0)
+        for stream in list(self.streams.values()):
+            for counter, value in stream.counts.items():
+                totals[counter] += value
+        return totals
+
+    def get_status(self) -> Dict:
+        status = self.totals()
+        status["window"] = self.window
+        status["streams"] = {f"{character_id}/{datagram_type}": dict(stream.counts)
+                             for (character_id, datagram_type), stream in list(self.streams.items())}
+        return status
@@ -0,0 +1,157 @@
+# src/data_handlers/session_config.py
+import dataclasses
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .mvn_data_handler import XSensConfig
+
+CONFIG_VERSION = 1
+CONFIG_PATH_VARIABLE = "MOCAP_TOOL_CONFIG"
+DEFAULT_PROFILE = "default"
+DEFAULT_DEVICES = ("XSens", "StretchSense", "Live Link")
+XSENS_FIELDS = frozenset(f.name for f in dataclasses.fields(XSensConfig))
+
+def default_config_path() -> str:
+    """$MOCAP_TOOL_CONFIG, else mocap_tool/config.json in the per-user config directory"""
+    path = os.environ.get(CONFIG_PATH_VARIABLE)
+    if path:
+        return path
+    base = (os.environ.get("APPDATA") or os.environ.get("XDG_CONFIG_HOME")
+            or os.path.join(os.path.expanduser("~"), ".config"))
+    return os.path.join(base, "mocap_tool", "config.json")
+
+@dataclass
+class DeviceSettings:
+    """One capture device of a profile.
+
+    config holds only the XSensConfig fields that differ from its defaults,
+    so new defaults reach saved profiles. Devices are XSens sources when
+    their name starts with "XSens", as in the device panel.
+    """
+    name: str
+    config: Dict = field(default_factory=dict)
+
+    @property
+    def is_xsens(self) -> bool:
+        return self.name.startswith("XSens")
+
+    def xsens_config(self) -> XSensConfig:
+        return XSensConfig(**self.config)
+
+    def update(self, config: XSensConfig):
+        """Store config, keeping only the fields that differ from the defaults"""
+        defaults = XSensConfig()
+        self.config = {name: value for name, value in dataclasses.asdict(config).items()
+                       if value != getattr(defaults, name)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DeviceSettings":
+        if "name" not in data:
+            raise ValueError("Every device needs a name")
+        config = dict(data.get("config", {}))
+        unknown = sorted(set(config) - XSENS_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown setting(s) {', '.join(unknown)} of device {data['name']!r}")
+        return cls(data["name"], config)
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "config": self.config}
+
+@dataclass
+class SessionProfile:
+    """Devices and capture settings of one capture setup"""
+    name: str
+    devices: List[DeviceSettings] = field(default_factory=list)
+    takes_directory: str = "takes"
+    take_codec: Optional[str] = None   # Block compressor for recorded takes, None for raw
+    performance_hud: bool = False
+
+    @classmethod
+    def default(cls, name: str = DEFAULT_PROFILE) -> "SessionProfile":
+        return cls(name, [DeviceSettings(device) for device in DEFAULT_DEVICES])
+
+    def device(self, name: str) -> Optional[DeviceSettings]:
+        return next((device for device in self.devices if device.name == name), None)
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict) -> "SessionProfile":
+        devices = [DeviceSettings.from_dict(entry) for entry in data.get("devices", [])]
+        names = [device.name for device in devices]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Device names of profile {name!r} must be unique")
+        return cls(name, devices, data.get("takes_directory", "takes"),
+                   data.get("take_codec"), bool(data.get("performance_hud", False)))
+
+    def to_dict(self) -> Dict:
+        return {"devices": [device.to_dict() for device in self.devices],
+                "takes_directory": self.takes_directory,
+                "take_codec": self.take_codec,
+                "performance_hud": self.performance_hud}
+
+class ConfigStore:
+    """Named session profiles persisted in one JSON file.
+
+        {"version": 1, "active": "stage_a",
+         "profiles": {"stage_a": {"devices": [{"name": "XSens",
+                                               "config": {"port": 9763}}, ...],
+                                  "takes_directory": "takes", ...}}}
+
+    A missing file reads as a single default profile. save() writes a
+    temporary file and renames it over the old one, so a crash while saving
+    keeps the previous configuration.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_config_path()
+        self.profiles: Dict[str, SessionProfile] = {}
+        self.active = DEFAULT_PROFILE
+        self.load()
+
+    def load(self) -> bool:
+        """Read the file, returning whether it existed"""
+        self.profiles = {}
+        self.active = DEFAULT_PROFILE
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            return False
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid configuration file {self.path}: {e}") from e
+        if data.get("version", CONFIG_VERSION) > CONFIG_VERSION:
+            raise ValueError(f"Configuration file {self.path} is from a newer version")
+        self.profiles = {name: SessionProfile.from_dict(name, entry)
+                         for name, entry in data.get("profiles", {}).items()}
+        self.active = data.get("active", DEFAULT_PROFILE)
+        return True
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        text = json.dumps({"version": CONFIG_VERSION, "active": self.active,
+                           "profiles": {name: profile.to_dict()
+                                        for name, profile in self.profiles.items()}},
+                          indent=2)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(temporary, self.path)
+
+    def profile(self, name: Optional[str] = None) -> SessionProfile:
+        """Profile `name`, the active one by default, created with default devices if missing"""
+        name = name or self.active
+        if name not in self.profiles:
+            self.profiles[name] = SessionProfile.default(name)
+        return self.profiles[name]
+
+    def activate(self, name: str) -> SessionProfile:
+        self.active = name
+        return self.profile(name)
+
+    def remove_profile(self, name: str) -> bool:
+        if self.profiles.pop(name, None) is None:
+            return False
+        if self.active == name:
+            self.active = DEFAULT_PROFILE
+        return True
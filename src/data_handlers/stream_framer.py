@@ -0,0 +1,94 @@
+# src/data_handlers/stream_framer.py
+import socket
+from typing import Iterator
+
+from .mvn_protocol import HEADER_SIZE, ID_PREFIX, datagram_length
+
+
+class MVNStreamFramer:
+    """Incremental reassembly of MVN messages from a TCP byte stream.
+
+    Bytes are received straight into a reusable bytearray and complete
+    messages are yielded as memoryview slices using the payload size from
+    each MVN header. The unconsumed tail is only moved to the front when
+    the write space runs out, so a partial message is copied at most once
+    per buffer fill instead of on every read. Views are valid until the
+    next recv_into() or feed().
+    """
+    def __init__(self, capacity: int = 1 << 16):
+        if capacity < HEADER_SIZE:
+            raise ValueError(f"capacity must be at least {HEADER_SIZE} bytes")
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0         # First unconsumed byte
+        self._end = 0           # End of received data
+        self.messages = 0
+        self.resyncs = 0        # Times garbage was skipped to find the next header
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def pending(self) -> int:
+        return self._end - self._start
+
+    def recv_into(self, sock: socket.socket) -> int:
+        """Receive directly into the free tail of the buffer; 0 means EOF"""
+        self._reserve(1)
+        nbytes = sock.recv_into(self._view[self._end:])
+        self._end += nbytes
+        return nbytes
+
+    def feed(self, data) -> None:
+        """Append bytes obtained elsewhere (e.g. from an asyncio transport)"""
+        size = len(data)
+        self._reserve(size)
+        self._view[self._end:self._end + size] = data
+        self._end += size
+
+    def frames(self) -> Iterator[memoryview]:
+        """Yield every complete message currently buffered"""
+        view = self._view
+        while self._end - self._start >= HEADER_SIZE:
+            start = self._start
+            try:
+                length = datagram_length(view[start:self._end])
+            except ValueError:
+                self._resync()
+                continue
+            if self._end - start < length:
+                # Make sure the rest of this message will fit on the next read
+                self._reserve(length - (self._end - start))
+                break
+            self._start = start + length
+            self.messages += 1
+            yield view[start:start + length]
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def _resync(self):
+        self.resyncs += 1
+        index = self._buffer.find(ID_PREFIX, self._start + 1, self._end)
+        if index < 0:
+            # Keep a possible partial prefix at the very end
+            self._start = max(self._start + 1, self._end - len(ID_PREFIX) + 1)
+        else:
+            self._start = index
+
+    def _reserve(self, size: int):
+        if self._end + size <= len(self._buffer):
+            return
+        pending = self._end - self._start
+        if pending + size > len(self._buffer):
+            capacity = len(self._buffer)
+            while pending + size > capacity:
+                capacity *= 2
+            buffer = bytearray(capacity)
+            buffer[:pending] = self._view[self._start:self._end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+        else:
+            self._view[:pending] = self._view[self._start:self._end]
+        self._start = 0
+        self._end = pending
@@ -0,0 +1,445 @@
+# src/data_handlers/take_codec.py
+import json
+import lzma
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from . import quaternions
+from .mvn_protocol import POSE_EULER, MVNFrame
+from .take_file import TakeReader, TakeWriter, frame_from_record, frame_record_dtype
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+# Compressed takes hold the same layout as raw takes, then frames in blocks
+# of up to block_frames records: a fixed block header followed by one
+# compressed payload. Every block decodes on its own, and blocks are
+# self-delimiting with no footer, so a crash loses at most the block being
+# written and opening a take only walks the block headers.
+#
+# Inside a block, rows are grouped by (character, datagram type) stream and
+# each column is delta coded along its stream: timestamps exactly, as their
+# IEEE bit patterns; positions quantized to position_step metres;
+# quaternions as their smallest three components at 16 bits, plus the index
+# of the dropped one. Columns are stored as byte planes, so the mostly zero
+# high bytes of the deltas compress well.
+CODEC_MAGIC = b"MOCAPTZ\0"
+CODEC_VERSION = 1
+CODEC_HEADER = struct.Struct("<8sHHdI")     # magic, version, segments, created, layout size
+BLOCK_HEADER = struct.Struct("<4sIIdd")     # marker, frames, payload size,
+                                            # first and last timestamp
+BLOCK_MARKER = b"BLK\0"
+DEFAULT_BLOCK_FRAMES = 4096
+DEFAULT_POSITION_STEP = 1e-5                # Metres; worst case error is half a step
+ROTATION_SCALE = 32767.0 / np.sqrt(0.5)     # The smallest three lie within +-1/sqrt(2)
+KEPT_COMPONENTS = np.array([[1, 2, 3], [0, 2, 3], [0, 1, 3], [0, 1, 2]])
+
+# name: (compress, decompress); zstd and lz4 are used when installed
+COMPRESSORS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = (lambda data: zstandard.ZstdCompressor(level=6).compress(data),
+                           lambda data: zstandard.ZstdDecompressor().decompress(data))
+if lz4 is not None:
+    COMPRESSORS["lz4"] = (lz4.frame.compress, lz4.frame.decompress)
+DEFAULT_COMPRESSOR = "zstd" if "zstd" in COMPRESSORS else "zlib"
+
+AnyTakeReader = Union[TakeReader, "CompressedTakeReader"]
+
+
+def is_compressed(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(CODEC_MAGIC)) == CODEC_MAGIC
+
+
+def open_take(path: str) -> AnyTakeReader:
+    """TakeReader or CompressedTakeReader, whichever the file needs"""
+    return CompressedTakeReader(path) if is_compressed(path) else TakeReader(path)
+
+
+def _stream_order(character_ids: np.ndarray, datagram_types: np.ndarray) -> np.ndarray:
+    keys = character_ids.astype(np.int64) << 16 | datagram_types
+    return np.argsort(keys, kind="stable")
+
+
+def _delta(values: np.ndarray) -> np.ndarray:
+    """Differences along axis 0, wrapping in the values' own integer type"""
+    return np.diff(values, axis=0, prepend=np.zeros_like(values[:1]))
+
+
+def _planes(values: np.ndarray) -> bytes:
+    """Byte planes of (n, ...) values, every channel's series contiguous within a plane"""
+    if not values.size:
+        return b""
+    values = np.ascontiguousarray(values)
+    count = len(values)
+    return values.reshape(count, -1).view(np.uint8).reshape(count, -1, values.itemsize) \
+        .transpose(2, 1, 0).tobytes()
+
+
+class _Columns:
+    """Reads the byte plane columns of a decompressed payload in order"""
+    def __init__(self, payload: bytes):
+        self.payload = payload
+        self.offset = 0
+
+    def take(self, dtype: str, shape: Tuple[int, ...]) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * dtype.itemsize
+        if not size:
+            return np.empty(shape, dtype=dtype)
+        if self.offset + size > len(self.payload):
+            raise ValueError("Truncated block payload")
+        planes = np.frombuffer(self.payload, np.uint8, size, self.offset)
+        self.offset += size
+        return planes.reshape(dtype.itemsize, -1, shape[0]).transpose(2, 1, 0).copy() \
+            .view(dtype).reshape(shape)
+
+
+def encode_block(records: np.ndarray, position_step: float = DEFAULT_POSITION_STEP) -> bytes:
+    """Uncompressed payload of a block of take records"""
+    order = _stream_order(records["character_id"], records["datagram_type"])
+    rows = records[order]
+    quaternion = rows["datagram_type"] != POSE_EULER
+    positions = np.round(rows["positions"].astype(np.float64) / position_step).astype("<i4")
+
+    rotations = quaternions.normalize(rows["rotations"][quaternion])
+    dropped = np.argmax(np.abs(rotations), axis=-1)
+    sign = np.where(np.take_along_axis(rotations, dropped[..., None], -1) < 0.0, -1.0, 1.0)
+    kept = np.take_along_axis(rotations, KEPT_COMPONENTS[dropped], -1) * sign
+    kept = np.clip(np.round(kept * ROTATION_SCALE), -32767, 32767).astype("<i2")
+
+    return b"".join((
+        _planes(records["character_id"]),
+        _planes(records["datagram_type"]),
+        _planes(_delta(rows["timestamp"].view("<i8"))),
+        _planes(_delta(rows["sample_counter"])),
+        _planes(_delta(rows["time_code"])),
+        _planes(_delta(positions)),
+        _planes(dropped.astype(np.uint8)),
+        _planes(_delta(kept)),
+        _planes(rows["rotations"][~quaternion]),
+    ))
+
+
+def decode_block(payload: bytes, count: int, segment_count: int,
+                 position_step: float = DEFAULT_POSITION_STEP) -> np.ndarray:
+    """Take records from an uncompressed block payload, in one vectorized pass per column"""
+    columns = _Columns(payload)
+    character_ids = columns.take("<u2", (count,))
+    datagram_types = columns.take("<u2", (count,))
+    order = _stream_order(character_ids, datagram_types)
+
+    rows = np.empty(count, dtype=frame_record_dtype(segment_count))
+    rows["character_id"] = character_ids[order]
+    rows["datagram_type"] = datagram_types[order]
+    rows["timestamp"] = np.cumsum(columns.take("<i8", (count,))).view("<f8")
+    rows["sample_counter"] = np.cumsum(columns.take("<u4", (count,)), dtype=np.uint32)
+    rows["time_code"] = np.cumsum(columns.take("<u4", (count,)), dtype=np.uint32)
+    positions = np.cumsum(columns.take("<i4", (count, segment_count, 3)), axis=0, dtype=np.int32)
+    rows["positions"] = positions * position_step
+
+    quaternion = rows["datagram_type"] != POSE_EULER
+    shape = (int(np.count_nonzero(quaternion)), segment_count)
+    dropped = columns.take("u1", shape).astype(np.intp)
+    kept = np.cumsum(columns.take("<i2", shape + (3,)), axis=0, dtype=np.int16) \
+        * np.float32(1.0 / ROTATION_SCALE)
+    largest = np.sqrt(np.maximum(0.0, 1.0 - (kept * kept).sum(axis=-1, keepdims=True)))
+    rotations = np.empty(shape + (4,), dtype=np.float32)
+    np.put_along_axis(rotations, KEPT_COMPONENTS[dropped], kept, -1)
+    np.put_along_axis(rotations, dropped[..., None], largest, -1)
+    rows["rotations"][quaternion] = rotations
+    rows["rotations"][~quaternion] = columns.take("<f4", (count - shape[0], segment_count, 4))
+
+    records = np.empty_like(rows)
+    records[order] = rows
+    return records
+
+
+def _compressor(name: str):
+    if name not in COMPRESSORS:
+        raise ValueError(f"Compressor {name!r} is not available; "
+                         f"installed: {', '.join(sorted(COMPRESSORS))}")
+    return COMPRESSORS[name]
+
+
+class CompressedTakeWriter:
+    """Append-only writer for compressed takes, with TakeWriter's write_records().
+
+    Records are buffered until a block is full, then encoded, compressed and
+    written with one call; close() writes the final partial block.
+    frames_written counts the frames already on disk.
+    """
+    def __init__(self, path: str, segment_ids: List[int], segment_names: Optional[List[str]] = None,
+                 block_frames: int = DEFAULT_BLOCK_FRAMES, compressor: str = DEFAULT_COMPRESSOR,
+                 position_step: float = DEFAULT_POSITION_STEP, fsync: bool = True,
+                 metadata: Optional[Dict] = None):
+        self._compress = _compressor(compressor)[0]
+        self.path = path
+        self.segment_count = len(segment_ids)
+        self.dtype = frame_record_dtype(self.segment_count)
+        self.block_frames = max(1, block_frames)
+        self.position_step = position_step
+        self.fsync = fsync
+        self.frames_written = 0
+        self.bytes_written = 0
+        self._pending = np.zeros(self.block_frames, dtype=self.dtype)
+        self._fill = 0
+
+        layout = {
+            "segment_ids": [int(i) for i in segment_ids],
+            "segment_names": list(segment_names or []),
+            "metadata": metadata or {},
+            "codec": {"compressor": compressor, "block_frames": self.block_frames,
+                      "position_step": position_step},
+        }
+        layout_bytes = json.dumps(layout).encode("utf-8")
+        self._data = open(path, "wb")
+        self._write(CODEC_HEADER.pack(CODEC_MAGIC, CODEC_VERSION, self.segment_count,
+                                      time.time(), len(layout_bytes)) + layout_bytes)
+
+    def write_records(self, records: np.ndarray):
+        """Buffer records, writing every block that fills up"""
+        done = 0
+        while done < len(records):
+            count = min(len(records) - done, self.block_frames - self._fill)
+            self._pending[self._fill:self._fill + count] = records[done:done + count]
+            self._fill += count
+            done += count
+            if self._fill == self.block_frames:
+                self._write_block()
+
+    def _write_block(self):
+        if not self._fill:
+            return
+        records = self._pending[:self._fill]
+        payload = self._compress(encode_block(records, self.position_step))
+        timestamps = records["timestamp"]
+        self._write(BLOCK_HEADER.pack(BLOCK_MARKER, len(records), len(payload),
+                                      timestamps[0], timestamps[-1]) + payload)
+        self.frames_written += self._fill
+        self._fill = 0
+
+    def _write(self, data: bytes):
+        self._data.write(data)
+        self._data.flush()
+        if self.fsync:
+            os.fsync(self._data.fileno())
+        self.bytes_written += len(data)
+
+    def close(self):
+        if not self._data.closed:
+            self._write_block()
+            self._data.close()
+
+
+class TimestampColumn:
+    """Timestamps of a compressed take; indexing decodes only the blocks involved"""
+    def __init__(self, reader: "CompressedTakeReader"):
+        self._reader = reader
+
+    def __len__(self) -> int:
+        return len(self._reader)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[np.float64, np.ndarray]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self._reader))
+            if step < 0:
+                return np.array([self[i] for i in range(start, stop, step)])
+            return self._reader.read_records(start, stop)["timestamp"][::step]
+        block, row = self._reader.locate(key)
+        return self._reader.read_block(block)["timestamp"][row]
+
+
+class CompressedTakeReader:
+    """Random access to a compressed take, one decoded block at a time.
+
+    Opening walks the block headers through an mmap and decodes nothing;
+    decoded blocks are kept in a small LRU cache, so sequential playback
+    decodes every block once. Offers TakeReader's interface, except that
+    there is no `records` view: read_records() returns decoded copies and
+    `timestamps` decodes on indexing. A truncated final block is ignored.
+    """
+    def __init__(self, path: str, cache_blocks: int = 4):
+        self.path = path
+        self.cache_blocks = max(1, cache_blocks)
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty take file: {path}")
+
+        if len(self._mmap) < CODEC_HEADER.size:
+            self.close()
+            raise ValueError(f"Truncated take header: {path}")
+        magic, version, segment_count, created, layout_size = CODEC_HEADER.unpack_from(self._mmap)
+        if magic != CODEC_MAGIC or version != CODEC_VERSION:
+            self.close()
+            raise ValueError(f"Not a compressed take file: {path}")
+
+        layout = json.loads(bytes(self._mmap[CODEC_HEADER.size:CODEC_HEADER.size + layout_size]))
+        self.segment_ids = np.array(layout["segment_ids"], dtype=np.int32)
+        self.segment_names: List[str] = layout["segment_names"]
+        self.metadata: Dict = layout.get("metadata", {})
+        self.codec: Dict = layout["codec"]
+        self.created = created
+        self.dtype = frame_record_dtype(segment_count)
+        self.position_step = float(self.codec["position_step"])
+        try:
+            self._decompress = _compressor(self.codec["compressor"])[1]
+        except ValueError:
+            self.close()
+            raise
+
+        self._scan_blocks(CODEC_HEADER.size + layout_size)
+        self.timestamps = TimestampColumn(self)
+        self._cache: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _scan_blocks(self, offset: int):
+        offsets, sizes, counts, first, last = [], [], [], [], []
+        size = len(self._mmap)
+        while offset + BLOCK_HEADER.size <= size:
+            marker, count, payload_size, start, stop = BLOCK_HEADER.unpack_from(self._mmap, offset)
+            if marker != BLOCK_MARKER or offset + BLOCK_HEADER.size + payload_size > size:
+                break
+            offsets.append(offset + BLOCK_HEADER.size)
+            sizes.append(payload_size)
+            counts.append(count)
+            first.append(start)
+            last.append(stop)
+            offset += BLOCK_HEADER.size + payload_size
+        self.block_offsets = np.array(offsets, dtype=np.int64)
+        self.block_sizes = np.array(sizes, dtype=np.int64)
+        self.block_starts = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        self.block_timestamps = np.array(first, dtype=np.float64)
+        self._last_timestamp = last[-1] if last else 0.0
+        self.frame_count = int(self.block_starts[-1])
+        self.compressed_size = offset
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    @property
+    def block_count(self) -> int:
+        return len(self.block_offsets)
+
+    @property
+    def start_time(self) -> float:
+        return float(self.block_timestamps[0]) if self.frame_count else 0.0
+
+    @property
+    def duration(self) -> float:
+        return self._last_timestamp - self.start_time if self.frame_count else 0.0
+
+    def locate(self, index: int) -> Tuple[int, int]:
+        """(block, row) of a frame index; negative indices count from the end"""
+        index = range(self.frame_count)[index]
+        block = int(np.searchsorted(self.block_starts, index, side="right")) - 1
+        return block, index - int(self.block_starts[block])
+
+    def read_block(self, block: int) -> np.ndarray:
+        """Decoded records of one block, read-only and shared through the cache"""
+        with self._lock:
+            records = self._cache.get(block)
+            if records is not None:
+                self._cache.move_to_end(block)
+                return records
+        offset = int(self.block_offsets[block])
+        payload = self._decompress(self._mmap[offset:offset + int(self.block_sizes[block])])
+        count = int(self.block_starts[block + 1] - self.block_starts[block])
+        records = decode_block(payload, count, len(self.segment_ids), self.position_step)
+        records.flags.writeable = False
+        with self._lock:
+            self._cache[block] = records
+            while len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+        return records
+
+    def read_records(self, start: int, stop: int) -> np.ndarray:
+        """Decoded records [start, stop), clipped like a slice"""
+        start, stop, _ = slice(start, stop).indices(self.frame_count)
+        if stop <= start:
+            return np.empty(0, dtype=self.dtype)
+        first = int(np.searchsorted(self.block_starts, start, side="right")) - 1
+        last = int(np.searchsorted(self.block_starts, stop - 1, side="right")) - 1
+        parts = []
+        for block in range(first, last + 1):
+            base = int(self.block_starts[block])
+            parts.append(self.read_block(block)[max(start, base) - base:stop - base])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def frame_at_time(self, timestamp: float) -> int:
+        """Last frame recorded at or before timestamp, decoding a single block"""
+        if not self.frame_count:
+            return 0
+        block = int(np.searchsorted(self.block_timestamps, timestamp, side="right")) - 1
+        if block < 0:
+            return 0
+        timestamps = self.read_block(block)["timestamp"]
+        offset = int(np.searchsorted(timestamps, timestamp, side="right")) - 1
+        return max(0, int(self.block_starts[block]) + offset)
+
+    def read_frame(self, index: int) -> MVNFrame:
+        """Frame at index; arrays are copied so the frame outlives the reader"""
+        block, row = self.locate(index)
+        return frame_from_record(self.read_block(block)[row], self.segment_ids)
+
+    def close(self):
+        self._cache = OrderedDict()
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+
+def compress_take(path: str, output_path: str, compressor: str = DEFAULT_COMPRESSOR,
+                  block_frames: int = DEFAULT_BLOCK_FRAMES,
+                  position_step: float = DEFAULT_POSITION_STEP) -> Tuple[int, int]:
+    """Write a compressed copy of a take; returns (frames, compressed bytes)"""
+    reader = open_take(path)
+    try:
+        writer = CompressedTakeWriter(output_path, reader.segment_ids.tolist(), reader.segment_names,
+                                      block_frames, compressor, position_step, fsync=False,
+                                      metadata=reader.metadata)
+        try:
+            for start in range(0, len(reader), writer.block_frames):
+                writer.write_records(reader.read_records(start, start + writer.block_frames))
+        finally:
+            writer.close()
+        return writer.frames_written, writer.bytes_written
+    finally:
+        reader.close()
+
+
+def decompress_take(path: str, output_path: str, index_interval: int = 240) -> int:
+    """Write a raw take, with its index, from a compressed one; returns the frames written"""
+    reader = CompressedTakeReader(path, cache_blocks=1)
+    try:
+        writer = TakeWriter(output_path, reader.segment_ids.tolist(), reader.segment_names,
+                            index_interval, fsync=False, metadata=reader.metadata)
+        try:
+            for block in range(reader.block_count):
+                writer.write_records(reader.read_block(block))
+        finally:
+            writer.close()
+        return writer.frames_written
+    finally:
+        reader.close()
@@ -0,0 +1,437 @@
+# src/data_handlers/take_export.py
+import csv
+import glob
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from . import quaternions
+from .kinematics import bone_offsets
+from .motion_filter import filter_take
+from .mvn_protocol import (POSE_EULER, POSITION_AXES, ROTATION_AXES, SEGMENT_COUNT,
+                           SEGMENT_NAMES, SEGMENT_PARENTS)
+from .take_codec import AnyTakeReader, open_take
+from .take_file import TAKE_SUFFIX
+
+EXPORT_FORMATS = ("bvh", "csv", "fbx")
+BVH_ROTATION_ORDER = "ZXY"         # Zrotation Xrotation Yrotation
+FBX_ROTATION_ORDER = "ZYX"         # FBX eEulerXYZ: X applied first
+FBX_TICKS_PER_SECOND = 46186158000
+EXPORT_SCALE = 100.0               # Meters to centimeters
+
+
+@dataclass
+class ExportResult:
+    """Outcome of exporting one take"""
+    take: str
+    outputs: List[str] = field(default_factory=list)
+    frames: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class SkeletonBlock:
+    """Export-space data for a block of frames of one character"""
+    timestamps: np.ndarray          # (F,)
+    time_codes: np.ndarray          # (F,)
+    root_positions: np.ndarray      # (F, 3) scaled, Y-up
+    local_rotations: np.ndarray     # (F, S, 4) parent-relative, Y-up
+    records: np.ndarray             # Raw take records of the block
+
+
+def body_indices(reader: AnyTakeReader) -> np.ndarray:
+    """Take columns holding the 23 MVN body segments, in SEGMENT_NAMES order"""
+    columns = {int(segment_id): i for i, segment_id in enumerate(reader.segment_ids)}
+    missing = [SEGMENT_NAMES[i] for i in range(SEGMENT_COUNT) if i + 1 not in columns]
+    if missing:
+        raise ValueError(f"Take is missing body segments: {', '.join(missing)}")
+    return np.array([columns[i + 1] for i in range(SEGMENT_COUNT)], dtype=np.intp)
+
+
+def character_frame_counts(reader: AnyTakeReader, chunk_frames: int) -> Dict[int, int]:
+    counts = np.zeros(65536, dtype=np.int64)
+    for start in range(0, len(reader), chunk_frames):
+        ids = reader.read_records(start, start + chunk_frames)["character_id"]
+        counts += np.bincount(ids, minlength=65536)
+    return {int(c): int(counts[c]) for c in np.flatnonzero(counts)}
+
+
+def iter_character_records(reader: AnyTakeReader, character_id: int,
+                           chunk_frames: int) -> Iterator[np.ndarray]:
+    for start in range(0, len(reader), chunk_frames):
+        block = reader.read_records(start, start + chunk_frames)
+        mask = block["character_id"] == character_id
+        if mask.all():
+            yield block
+        elif mask.any():
+            yield block[mask]
+
+
+def convert_block(records: np.ndarray, body: np.ndarray) -> SkeletonBlock:
+    """Vectorized conversion of a record block to parent-relative Y-up rotations"""
+    rotations = records["rotations"][:, body].astype(np.float64)
+    rotations = quaternions.normalize(rotations[..., ROTATION_AXES])
+    root = records["positions"][:, body[0]].astype(np.float64)[:, POSITION_AXES]
+    return SkeletonBlock(
+        timestamps=records["timestamp"],
+        time_codes=records["time_code"],
+        root_positions=root * EXPORT_SCALE,
+        local_rotations=quaternions.local_rotations(rotations, SEGMENT_PARENTS),
+        records=records,
+    )
+
+
+def rest_offsets(record: np.ndarray, body: np.ndarray) -> np.ndarray:
+    """Bone offsets in each parent's frame, taken from one recorded frame"""
+    positions = record["positions"][body].astype(np.float64)[:, POSITION_AXES]
+    rotations = quaternions.normalize(record["rotations"][body].astype(np.float64)[:, ROTATION_AXES])
+    return bone_offsets(positions, rotations, SEGMENT_PARENTS) * EXPORT_SCALE
+
+
+def last_character_record(reader: AnyTakeReader, character_id: int, chunk_frames: int) -> np.ndarray:
+    """Last record of a character, scanning backwards from the end of the take"""
+    for stop in range(len(reader), 0, -chunk_frames):
+        records = reader.read_records(max(0, stop - chunk_frames), stop)
+        matches = np.flatnonzero(records["character_id"] == character_id)
+        if len(matches):
+            return records[int(matches[-1])]
+    raise ValueError(f"No frames for character {character_id}")
+
+
+def frame_time(first: np.ndarray, last: np.ndarray, frame_count: int) -> float:
+    """Frame period from sender time codes over the whole take, else receive timestamps.
+
+    Time codes are whole milliseconds, so consecutive differences alternate
+    (4, 4, 4, 5 ms at 240 Hz); only the mean over the full span is exact.
+    """
+    if frame_count < 2:
+        return 1.0 / 240.0
+    span = float(last["time_code"]) - float(first["time_code"])
+    if span > 0:
+        return span / 1000.0 / (frame_count - 1)
+    span = float(last["timestamp"]) - float(first["timestamp"])
+    return span / (frame_count - 1) if span > 0 else 1.0 / 240.0
+
+
+def children_of(parents: Sequence[int]) -> List[List[int]]:
+    children: List[List[int]] = [[] for _ in parents]
+    for index, parent in enumerate(parents):
+        if parent >= 0:
+            children[parent].append(index)
+    return children
+
+
+class BVHWriter:
+    """Streams frame blocks into a BVH file"""
+    def __init__(self, path: str, offsets: np.ndarray, frame_count: int, period: float):
+        self.path = path
+        self._file = open(path, "w", newline="\n")
+        self._children = children_of(SEGMENT_PARENTS)
+        self._order: List[int] = []
+        self._file.write("HIERARCHY\n")
+        self._write_joint(0, offsets, 0)
+        self._file.write(f"MOTION\nFrames: {frame_count}\nFrame Time: {period:.6f}\n")
+        self._order_array = np.array(self._order, dtype=np.intp)
+
+    def _write_joint(self, index: int, offsets: np.ndarray, depth: int):
+        indent = "\t" * depth
+        name = SEGMENT_NAMES[index]
+        keyword = "ROOT" if depth == 0 else "JOINT"
+        x, y, z = offsets[index]
+        self._order.append(index)
+        lines = [f"{indent}{keyword} {name}", f"{indent}{{",
+                 f"{indent}\tOFFSET {x:.4f} {y:.4f} {z:.4f}"]
+        if depth == 0:
+            lines.append(f"{indent}\tCHANNELS 6 Xposition Yposition Zposition "
+                         "Zrotation Xrotation Yrotation")
+        else:
+            lines.append(f"{indent}\tCHANNELS 3 Zrotation Xrotation Yrotation")
+        self._file.write("\n".join(lines) + "\n")
+        if self._children[index]:
+            for child in self._children[index]:
+                self._write_joint(child, offsets, depth + 1)
+        else:
+            self._file.write(f"{indent}\tEnd Site\n{indent}\t{{\n"
+                             f"{indent}\t\tOFFSET 0.0000 5.0000 0.0000\n{indent}\t}}\n")
+        self._file.write(f"{indent}}}\n")
+
+    def write_block(self, block: SkeletonBlock):
+        euler = quaternions.to_euler(block.local_rotations[:, self._order_array], BVH_ROTATION_ORDER)
+        data = np.concatenate((block.root_positions, euler.reshape(len(euler), -1)), axis=1)
+        np.savetxt(self._file, data, fmt="%.4f")
+
+    def close(self):
+        self._file.close()
+
+
+class CSVWriter:
+    """Streams raw global segment data (MVN axes, meters) into a CSV file.
+
+    Rotations are quaternions (qw, qx, qy, qz), or for Euler takes the
+    recorded angles (rx, ry, rz) in degrees.
+    """
+    def __init__(self, path: str, segment_names: Sequence[str], euler: bool = False):
+        self.path = path
+        self._file = open(path, "w", newline="")
+        # Euler records keep x, y, z in the first three rotation fields
+        self._rotation_fields = 3 if euler else 4
+        rotation_columns = ("rx", "ry", "rz") if euler else ("qw", "qx", "qy", "qz")
+        columns = ["frame", "timestamp", "time_code", "character_id"]
+        for name in segment_names:
+            columns += [f"{name}_{c}" for c in ("px", "py", "pz") + rotation_columns]
+        csv.writer(self._file).writerow(columns)
+        self._frame = 0
+
+    def write_block(self, block: SkeletonBlock):
+        records = block.records
+        count = len(records)
+        data = np.concatenate((
+            np.arange(self._frame, self._frame + count)[:, None],
+            records["timestamp"][:, None],
+            records["time_code"][:, None],
+            records["character_id"][:, None],
+            np.concatenate((records["positions"], records["rotations"][..., :self._rotation_fields]),
+                           axis=2).reshape(count, -1),
+        ), axis=1)
+        np.savetxt(self._file, data, delimiter=",",
+                   fmt=["%d", "%.6f", "%d", "%d"] + ["%.6f"] * (data.shape[1] - 4))
+        self._frame += count
+
+    def close(self):
+        self._file.close()
+
+
+class FBXAsciiWriter:
+    """Writes an FBX 7.4 ASCII skeleton with one rotation curve per joint axis.
+
+    FBX stores animation channel by channel, so blocks are first spooled
+    frame by frame into a temporary memory-mapped channel file and then
+    written out one column at a time, keeping memory flat for long takes.
+    """
+    def __init__(self, path: str, offsets: np.ndarray, frame_count: int, period: float):
+        self.path = path
+        self.offsets = offsets
+        self.frame_count = frame_count
+        self.period = period
+        self._channels = 3 + SEGMENT_COUNT * 3 + 1     # root translation, rotations, time
+        self._spool_file = tempfile.NamedTemporaryFile(
+            suffix=".spool", dir=os.path.dirname(path) or ".", delete=False)
+        self._spool_file.close()
+        self._spool = np.memmap(self._spool_file.name, dtype=np.float64, mode="w+",
+                                shape=(max(frame_count, 1), self._channels))
+        self._frame = 0
+
+    def write_block(self, block: SkeletonBlock):
+        count = len(block.timestamps)
+        # (z, y, x) from the ZYX decomposition, reordered to (x, y, z)
+        euler = quaternions.to_euler(block.local_rotations, FBX_ROTATION_ORDER)[..., ::-1]
+        rows = self._spool[self._frame:self._frame + count]
+        rows[:, 0:3] = block.root_positions
+        rows[:, 3:-1] = euler.reshape(count, -1)
+        # Keys on the same uniform timeline as the BVH frame time
+        rows[:, -1] = np.arange(self._frame, self._frame + count) * self.period
+        self._frame += count
+
+    def close(self):
+        try:
+            with open(self.path, "w", newline="\n") as f:
+                self._write_document(f)
+        finally:
+            del self._spool
+            os.remove(self._spool_file.name)
+
+    def _write_document(self, f):
+        count = self._frame
+        stop = int(self._spool[count - 1, -1] * FBX_TICKS_PER_SECOND) if count else 0
+        f.write("; FBX 7.4.0 project file\n"
+                "FBXHeaderExtension:  {\n\tFBXHeaderVersion: 1003\n\tFBXVersion: 7400\n"
+                "\tCreator: \"mocap_tool\"\n}\n"
+                "GlobalSettings:  {\n\tVersion: 1000\n\tProperties70:  {\n"
+                "\t\tP: \"UpAxis\", \"int\", \"Integer\", \"\",1\n"
+                "\t\tP: \"UpAxisSign\", \"int\", \"Integer\", \"\",1\n"
+                "\t\tP: \"FrontAxis\", \"int\", \"Integer\", \"\",2\n"
+                "\t\tP: \"FrontAxisSign\", \"int\", \"Integer\", \"\",1\n"
+                "\t\tP: \"CoordAxis\", \"int\", \"Integer\", \"\",0\n"
+                "\t\tP: \"CoordAxisSign\", \"int\", \"Integer\", \"\",1\n"
+                "\t\tP: \"UnitScaleFactor\", \"double\", \"Number\", \"\",1\n"
+                "\t}\n}\n")
+
+        ids = iter(range(1000000, 10000000))
+        models = [next(ids) for _ in range(SEGMENT_COUNT)]
+        attributes = [next(ids) for _ in range(SEGMENT_COUNT)]
+        stack, layer = next(ids), next(ids)
+        connections = [(layer, stack, None)]
+
+        f.write("Objects:  {\n")
+        for i, name in enumerate(SEGMENT_NAMES):
+            x, y, z = self.offsets[i]
+            f.write(f"\tNodeAttribute: {attributes[i]}, \"NodeAttribute::{name}\", \"LimbNode\" {{\n"
+                    "\t\tTypeFlags: \"Skeleton\"\n\t}\n"
+                    f"\tModel: {models[i]}, \"Model::{name}\", \"LimbNode\" {{\n"
+                    "\t\tVersion: 232\n\t\tProperties70:  {\n"
+                    "\t\t\tP: \"RotationOrder\", \"enum\", \"\", \"\",0\n"
+                    f"\t\t\tP: \"Lcl Translation\", \"Lcl Translation\", \"\", \"A\",{x:.6f},{y:.6f},{z:.6f}\n"
+                    "\t\t}\n\t}\n")
+            parent = SEGMENT_PARENTS[i]
+            connections.append((models[i], models[parent] if parent >= 0 else 0, None))
+            connections.append((attributes[i], models[i], None))
+
+        f.write(f"\tAnimationStack: {stack}, \"AnimStack::Take\", \"\" {{\n\t\tProperties70:  {{\n"
+                f"\t\t\tP: \"LocalStop\", \"KTime\", \"Time\", \"\",{stop}\n"
+                f"\t\t\tP: \"ReferenceStop\", \"KTime\", \"Time\", \"\",{stop}\n\t\t}}\n\t}}\n"
+                f"\tAnimationLayer: {layer}, \"AnimLayer::BaseLayer\", \"\" {{\n\t}}\n")
+
+        curves = [(0, "T", "Lcl Translation", 0)]
+        curves += [(i, "R", "Lcl Rotation", 3 + i * 3) for i in range(SEGMENT_COUNT)]
+        for segment, short, prop, column in curves:
+            node = next(ids)
+            f.write(f"\tAnimationCurveNode: {node}, \"AnimCurveNode::{short}\", \"\" {{\n"
+                    "\t\tProperties70:  {\n")
+            for axis in "XYZ":
+                f.write(f"\t\t\tP: \"d|{axis}\", \"Number\", \"\", \"A\",0\n")
+            f.write("\t\t}\n\t}\n")
+            connections.append((node, layer, None))
+            connections.append((node, models[segment], prop))
+            for offset, axis in enumerate("XYZ"):
+                curve = next(ids)
+                self._write_curve(f, curve, column + offset, count)
+                connections.append((curve, node, f"d|{axis}"))
+        f.write("}\n")
+
+        f.write("Connections:  {\n")
+        for child, parent, prop in connections:
+            if prop is None:
+                f.write(f"\tC: \"OO\",{child},{parent}\n")
+            else:
+                f.write(f"\tC: \"OP\",{child},{parent}, \"{prop}\"\n")
+        f.write("}\n")
+
+    def _write_curve(self, f, curve_id: int, column: int, count: int, chunk: int = 65536):
+        f.write(f"\tAnimationCurve: {curve_id}, \"AnimCurve::\", \"\" {{\n"
+                "\t\tDefault: 0\n\t\tKeyVer: 4009\n")
+        f.write(f"\t\tKeyTime: *{count} {{\n\t\t\ta: ")
+        self._write_column(f, -1, count, chunk, lambda v: (v * FBX_TICKS_PER_SECOND).astype(np.int64), "%d")
+        f.write(f"\n\t\t}}\n\t\tKeyValueFloat: *{count} {{\n\t\t\ta: ")
+        self._write_column(f, column, count, chunk, lambda v: v, "%.6f")
+        f.write("\n\t\t}\n\t\tKeyAttrFlags: *1 {\n\t\t\ta: 24836\n\t\t}\n"
+                "\t\tKeyAttrDataFloat: *4 {\n\t\t\ta: 0,0,255790911,0\n\t\t}\n"
+                f"\t\tKeyAttrRefCount: *1 {{\n\t\t\ta: {count}\n\t\t}}\n\t}}\n")
+
+    def _write_column(self, f, column: int, count: int, chunk: int,
+                      transform: Callable, fmt: str):
+        for start in range(0, count, chunk):
+            values = transform(np.array(self._spool[start:start + chunk, column]))
+            if start:
+                f.write(",")
+            np.savetxt(f, values[None, :], fmt=fmt, delimiter=",", newline="")
+
+
+def export_take(path: str, output_dir: str, formats: Sequence[str] = ("bvh", "csv"),
+                chunk_frames: int = 4096, smoothing: Optional[float] = None) -> ExportResult:
+    """Convert one take, streaming it block by block; safe to run in a worker process.
+
+    With `smoothing` set, the take is first cleaned by filter_take() into a
+    temporary copy, low-passed at that cutoff in Hz without phase lag.
+    """
+    if smoothing:
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            tmp = tempfile.TemporaryDirectory(dir=output_dir)
+        except OSError as e:
+            return ExportResult(take=path, error=str(e))
+        with tmp:
+            filtered = os.path.join(tmp.name, os.path.basename(path))
+            try:
+                filter_take(path, filtered, position_cutoff=smoothing, rotation_cutoff=smoothing)
+            except (OSError, ValueError) as e:
+                return ExportResult(take=path, error=str(e))
+            result = export_take(filtered, output_dir, formats, chunk_frames)
+            result.take = path
+            return result
+
+    result = ExportResult(take=path)
+    try:
+        reader = open_take(path)
+    except (OSError, ValueError) as e:
+        result.error = str(e)
+        return result
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        body = body_indices(reader) if {"bvh", "fbx"} & set(formats) else None
+        counts = character_frame_counts(reader, chunk_frames)
+        base = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0])
+
+        for character_id, frame_count in counts.items():
+            stem = base if len(counts) == 1 else f"{base}_char{character_id}"
+            blocks = iter_character_records(reader, character_id, chunk_frames)
+            first = next(blocks)
+            euler = first[0]["datagram_type"] == POSE_EULER
+            if body is not None and euler:
+                # The skeleton writers need quaternions; Euler takes export to CSV only
+                raise ValueError("Euler pose takes can only be exported to CSV")
+
+            writers = []
+            if "csv" in formats:
+                writers.append(CSVWriter(stem + ".csv", reader.segment_names, euler))
+            if body is not None:
+                offsets = rest_offsets(first[0], body)
+                last = last_character_record(reader, character_id, chunk_frames)
+                period = frame_time(first[0], last, frame_count)
+                if "bvh" in formats:
+                    writers.append(BVHWriter(stem + ".bvh", offsets, frame_count, period))
+                if "fbx" in formats:
+                    writers.append(FBXAsciiWriter(stem + ".fbx", offsets, frame_count, period))
+
+            try:
+                for records in _chain(first, blocks):
+                    if body is not None:
+                        block = convert_block(records, body)
+                    else:
+                        block = SkeletonBlock(records["timestamp"], records["time_code"],
+                                              None, None, records)
+                    for writer in writers:
+                        writer.write_block(block)
+            finally:
+                for writer in writers:
+                    writer.close()
+            result.outputs += [writer.path for writer in writers]
+            result.frames += frame_count
+    except Exception as e:
+        result.error = str(e)
+    finally:
+        reader.close()
+    return result
+
+
+def _chain(first: np.ndarray, rest: Iterator[np.ndarray]) -> Iterator[np.ndarray]:
+    yield first
+    yield from rest
+
+
+def export_directory(input_dir: str, output_dir: str, formats: Sequence[str] = ("bvh", "csv"),
+                     workers: Optional[int] = None, chunk_frames: int = 4096,
+                     progress: Optional[Callable[[ExportResult], None]] = None,
+                     smoothing: Optional[float] = None) -> List[ExportResult]:
+    """Export every take in input_dir across a process pool"""
+    unknown = set(formats) - set(EXPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown export formats: {', '.join(sorted(unknown))}")
+    takes = sorted(glob.glob(os.path.join(input_dir, "*" + TAKE_SUFFIX)))
+    results = []
+    if not takes:
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(export_take, take, output_dir, tuple(formats), chunk_frames,
+                               smoothing)
+                   for take in takes]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if progress:
+                progress(result)
+    return sorted(results, key=lambda r: r.take)
@@ -0,0 +1,224 @@
+# src/data_handlers/take_file.py
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .mvn_protocol import POSE_EULER, POSE_QUATERNION, MVNFrame
+
+# Take files are append-only: a fixed header with the skeleton layout,
+# followed by fixed-size little-endian frame records. A sidecar ".idx" file
+# holds (frame, timestamp) pairs every index_interval frames. Neither file
+# has a footer, so a crash loses at most the batch being written.
+MAGIC = b"MOCAPTK\0"
+VERSION = 1
+FILE_HEADER = struct.Struct("<8sHHIIdII")  # magic, version, segments, record size,
+                                           # index interval, created, layout size, data offset
+DATA_ALIGNMENT = 64
+INDEX_SUFFIX = ".idx"
+TAKE_SUFFIX = ".mtk"
+
+INDEX_DTYPE = np.dtype([("frame", "<u8"), ("timestamp", "<f8")])
+
+
+def frame_record_dtype(segment_count: int) -> np.dtype:
+    """Fixed-size on-disk record for one pose frame"""
+    return np.dtype([
+        ("timestamp", "<f8"),           # Local receive time in seconds
+        ("sample_counter", "<u4"),
+        ("time_code", "<u4"),           # Sender time in ms
+        ("character_id", "<u2"),
+        ("datagram_type", "<u2"),
+        ("positions", "<f4", (segment_count, 3)),
+        ("rotations", "<f4", (segment_count, 4)),  # w, x, y, z; Euler x, y, z, 0
+    ])
+
+
+def index_path(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
+class TakeWriter:
+    """Low-level append-only writer for take files"""
+    def __init__(self, path: str, segment_ids: List[int], segment_names: Optional[List[str]] = None,
+                 index_interval: int = 240, fsync: bool = True, metadata: Optional[Dict] = None):
+        self.path = path
+        self.segment_count = len(segment_ids)
+        self.dtype = frame_record_dtype(self.segment_count)
+        self.index_interval = max(1, index_interval)
+        self.fsync = fsync
+        self.frames_written = 0
+
+        layout = {
+            "segment_ids": [int(i) for i in segment_ids],
+            "segment_names": list(segment_names or []),
+            "metadata": metadata or {},
+        }
+        layout_bytes = json.dumps(layout).encode("utf-8")
+        data_offset = _align(FILE_HEADER.size + len(layout_bytes), DATA_ALIGNMENT)
+        header = FILE_HEADER.pack(MAGIC, VERSION, self.segment_count, self.dtype.itemsize,
+                                  self.index_interval, time.time(), len(layout_bytes), data_offset)
+
+        self._data = open(path, "wb")
+        self._index = open(index_path(path), "wb")
+        self._data.write(header + layout_bytes)
+        self._data.write(bytes(data_offset - FILE_HEADER.size - len(layout_bytes)))
+        self._sync(self._data)
+
+    def write_records(self, records: np.ndarray):
+        """Append a batch of records and its index entries, then flush both files"""
+        if not len(records):
+            return
+        self._data.write(memoryview(records).cast("B"))
+        first = self.frames_written
+        self.frames_written += len(records)
+
+        # Index every index_interval-th frame that falls inside this batch
+        start = first + (-first) % self.index_interval
+        frames = np.arange(start, self.frames_written, self.index_interval, dtype=np.uint64)
+        if len(frames):
+            entries = np.empty(len(frames), dtype=INDEX_DTYPE)
+            entries["frame"] = frames
+            entries["timestamp"] = records["timestamp"][(frames - first).astype(np.intp)]
+            self._index.write(entries.tobytes())
+
+        self._sync(self._data)
+        self._sync(self._index)
+
+    def _sync(self, handle):
+        handle.flush()
+        if self.fsync:
+            os.fsync(handle.fileno())
+
+    def close(self):
+        for handle in (self._data, self._index):
+            if not handle.closed:
+                handle.close()
+
+
+class TakeReader:
+    """Random access to a take file through mmap and NumPy views.
+
+    Nothing is loaded up front: `records` is a structured array view over
+    the mapping and pages are faulted in as they are touched. A trailing
+    partial record left by a crash is ignored.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty take file: {path}")
+
+        if len(self._mmap) < FILE_HEADER.size:
+            self.close()
+            raise ValueError(f"Truncated take header: {path}")
+        (magic, version, segment_count, record_size, index_interval, created,
+         layout_size, data_offset) = FILE_HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a take file: {path}")
+
+        layout = json.loads(bytes(self._mmap[FILE_HEADER.size:FILE_HEADER.size + layout_size]))
+        self.segment_ids = np.array(layout["segment_ids"], dtype=np.int32)
+        self.segment_names: List[str] = layout["segment_names"]
+        self.metadata: Dict = layout.get("metadata", {})
+        self.created = created
+        self.index_interval = index_interval
+        self.dtype = frame_record_dtype(segment_count)
+        if self.dtype.itemsize != record_size:
+            self.close()
+            raise ValueError(f"Record size mismatch in {path}")
+
+        self.data_offset = data_offset
+        self.frame_count = max(0, (len(self._mmap) - data_offset) // record_size)
+        self.records = np.frombuffer(self._mmap, dtype=self.dtype, count=self.frame_count,
+                                     offset=data_offset)
+        self.timestamps = self.records["timestamp"]
+        self._load_index()
+
+    def _load_index(self):
+        entries = np.empty(0, dtype=INDEX_DTYPE)
+        if os.path.exists(index_path(self.path)):
+            entries = np.fromfile(index_path(self.path), dtype=INDEX_DTYPE)
+            entries = entries[entries["frame"] < self.frame_count]
+        if not len(entries) and self.frame_count:
+            # Rebuild a sparse index, touching one record per interval
+            frames = np.arange(0, self.frame_count, self.index_interval, dtype=np.uint64)
+            entries = np.empty(len(frames), dtype=INDEX_DTYPE)
+            entries["frame"] = frames
+            entries["timestamp"] = self.timestamps[frames.astype(np.intp)]
+        self.index_frames = entries["frame"].astype(np.intp)
+        self.index_timestamps = entries["timestamp"]
+
+    def __len__(self) -> int:
+        return self.frame_count
+
+    @property
+    def start_time(self) -> float:
+        return float(self.timestamps[0]) if self.frame_count else 0.0
+
+    @property
+    def duration(self) -> float:
+        return float(self.timestamps[-1]) - self.start_time if self.frame_count else 0.0
+
+    def frame_at_time(self, timestamp: float) -> int:
+        """Last frame recorded at or before timestamp, in O(log n)"""
+        if not self.frame_count:
+            return 0
+        block = int(np.searchsorted(self.index_timestamps, timestamp, side="right")) - 1
+        if block < 0:
+            return 0
+        lo = self.index_frames[block]
+        hi = self.index_frames[block + 1] if block + 1 < len(self.index_frames) else self.frame_count
+        offset = int(np.searchsorted(self.timestamps[lo:hi], timestamp, side="right")) - 1
+        return max(0, int(lo) + offset)
+
+    def read_records(self, start: int, stop: int) -> np.ndarray:
+        """Records [start, stop) as a view over the mapping"""
+        return self.records[start:stop]
+
+    def read_frame(self, index: int) -> MVNFrame:
+        """Frame at index; arrays are copied so the frame outlives the reader"""
+        return frame_from_record(self.records[index], self.segment_ids)
+
+    def close(self):
+        self.records = None
+        self.timestamps = None
+        if getattr(self, "_mmap", None) is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Views are still exported; the mapping is released with them
+                pass
+            self._mmap = None
+        self._file.close()
+
+
+def frame_from_record(record: np.void, segment_ids: np.ndarray) -> MVNFrame:
+    """MVNFrame holding copies of one take record's arrays"""
+    datagram_type = int(record["datagram_type"]) or POSE_QUATERNION
+    rotations = record["rotations"][:, :3] if datagram_type == POSE_EULER else record["rotations"]
+    return MVNFrame(
+        datagram_type=datagram_type,
+        sample_counter=int(record["sample_counter"]),
+        datagram_counter=0,
+        is_last_datagram=True,
+        time_code=int(record["time_code"]),
+        character_id=int(record["character_id"]),
+        timestamp=float(record["timestamp"]),
+        body_segment_count=len(segment_ids),
+        segment_ids=segment_ids,
+        positions=np.array(record["positions"]),
+        rotations=np.array(rotations),
+    )
+
+
+def _align(value: int, alignment: int) -> int:
+    return (value + alignment - 1) // alignment * alignment
@@ -0,0 +1,260 @@
+# src/data_handlers/take_loader.py
+import queue
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Union
+
+import numpy as np
+
+from .mvn_protocol import POSE_EULER, POSE_QUATERNION, MVNFrame
+from .take_codec import AnyTakeReader, open_take
+
+COLUMNS = ("timestamp", "sample_counter", "time_code", "character_id", "datagram_type",
+           "positions", "rotations")
+
+
+@dataclass
+class FrameChunk:
+    """Decoded frames [start, start + len) of a take, one array per column"""
+    start: int
+    columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.columns["timestamp"])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.columns.values())
+
+
+class ChunkCache:
+    """Bounded LRU cache of decoded chunks, shared by a take's sequences.
+
+    Chunks are decoded on demand by the caller's thread or, ahead of a
+    sequential reader, by a background thread. A chunk being decoded is
+    never decoded twice: other threads wait for it.
+    """
+    def __init__(self, reader: AnyTakeReader, chunk_frames: int = 4096, max_chunks: int = 16,
+                 read_ahead: int = 0):
+        self.reader = reader
+        self.chunk_frames = max(1, chunk_frames)
+        self.max_chunks = max(1, max_chunks)
+        self.read_ahead = read_ahead
+        self.chunk_count = -(-len(reader) // self.chunk_frames)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefetched = 0
+        self._chunks: "OrderedDict[int, FrameChunk]" = OrderedDict()
+        self._pending: Dict[int, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._last_chunk = -1
+        self._requests: "queue.Queue[Optional[int]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        if read_ahead > 0:
+            self._thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+            self._thread.start()
+
+    def chunk(self, index: int) -> FrameChunk:
+        """Decoded chunk `index`, from the cache when possible"""
+        while True:
+            with self._lock:
+                chunk = self._chunks.get(index)
+                if chunk is not None:
+                    self._chunks.move_to_end(index)
+                    self.hits += 1
+                    break
+                pending = self._pending.get(index)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._pending[index] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+            if owner:
+                chunk = self._load(index, pending)
+                break
+            pending.wait()
+        self._schedule(index)
+        return chunk
+
+    def _load(self, index: int, pending: threading.Event) -> FrameChunk:
+        try:
+            chunk = self._decode(index)
+            with self._lock:
+                self._chunks[index] = chunk
+                while len(self._chunks) > self.max_chunks:
+                    self._chunks.popitem(last=False)
+                    self.evictions += 1
+            return chunk
+        finally:
+            with self._lock:
+                del self._pending[index]
+            pending.set()
+
+    def _decode(self, index: int) -> FrameChunk:
+        """Copy one chunk of records into contiguous column arrays"""
+        start = index * self.chunk_frames
+        records = self.reader.read_records(start, start + self.chunk_frames)
+        return FrameChunk(start, {name: np.array(records[name]) for name in COLUMNS})
+
+    def _schedule(self, index: int):
+        """Queue read-ahead when chunks are being visited in order"""
+        sequential = index == self._last_chunk + 1
+        self._last_chunk = index
+        if self._thread is None or not sequential:
+            return
+        for ahead in range(index + 1, min(index + 1 + self.read_ahead, self.chunk_count)):
+            self._requests.put(ahead)
+
+    def _prefetch_loop(self):
+        while True:
+            index = self._requests.get()
+            if index is None:
+                return
+            with self._lock:
+                if index in self._chunks or index in self._pending:
+                    continue
+                pending = self._pending[index] = threading.Event()
+            self._load(index, pending)
+            self.prefetched += 1
+
+    def close(self):
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        with self._lock:
+            self._chunks.clear()
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            cached = len(self._chunks)
+            cached_bytes = sum(chunk.nbytes for chunk in self._chunks.values())
+        return {
+            "chunk_frames": self.chunk_frames,
+            "cached_chunks": cached,
+            "cached_bytes": cached_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "prefetched": self.prefetched,
+        }
+
+
+class TakeSequence:
+    """Lazy frame sequence over a recorded take.
+
+    Supports len(), indexing (an MVNFrame, as MVNDataHandler produces),
+    slicing (another lazy sequence sharing the same cache) and iteration.
+    column() gathers one field, optionally of one segment, across the
+    sequence as a single array. Only the chunks touched are decoded, and
+    at most `cache_chunks` are kept; with read_ahead > 0, a background
+    thread decodes the next chunks while the sequence is read in order.
+
+        with TakeSequence.open("session.mtk", read_ahead=2) as take:
+            hand = take[60000:120000].column("positions", "RightHand")
+    """
+    def __init__(self, cache: ChunkCache, frames: range, owner: bool = False):
+        self.cache = cache
+        self.frames = frames
+        self._owner = owner
+
+    @classmethod
+    def open(cls, path: str, chunk_frames: int = 4096, cache_chunks: int = 16,
+             read_ahead: int = 0) -> "TakeSequence":
+        reader = open_take(path)
+        cache = ChunkCache(reader, chunk_frames, cache_chunks, read_ahead)
+        return cls(cache, range(len(reader)), owner=True)
+
+    @property
+    def reader(self) -> AnyTakeReader:
+        return self.cache.reader
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[MVNFrame, "TakeSequence"]:
+        if isinstance(key, slice):
+            return TakeSequence(self.cache, self.frames[key])
+        return self._frame(self.frames[key])
+
+    def __iter__(self) -> Iterator[MVNFrame]:
+        for index in self.frames:
+            yield self._frame(index)
+
+    def _frame(self, index: int) -> MVNFrame:
+        chunk_frames = self.cache.chunk_frames
+        chunk = self.cache.chunk(index // chunk_frames)
+        row = index % chunk_frames
+        columns = chunk.columns
+        datagram_type = int(columns["datagram_type"][row]) or POSE_QUATERNION
+        rotations = columns["rotations"][row]
+        segment_ids = self.reader.segment_ids
+        return MVNFrame(
+            datagram_type=datagram_type,
+            sample_counter=int(columns["sample_counter"][row]),
+            datagram_counter=0,
+            is_last_datagram=True,
+            time_code=int(columns["time_code"][row]),
+            character_id=int(columns["character_id"][row]),
+            timestamp=float(columns["timestamp"][row]),
+            body_segment_count=len(segment_ids),
+            segment_ids=segment_ids,
+            positions=columns["positions"][row].copy(),
+            rotations=(rotations[:, :3] if datagram_type == POSE_EULER else rotations).copy(),
+        )
+
+    def segment_index(self, segment: Union[int, str]) -> int:
+        """Take column of a segment given by name or MVN segment ID"""
+        if isinstance(segment, str):
+            try:
+                return self.reader.segment_names.index(segment)
+            except ValueError:
+                raise KeyError(f"Unknown segment: {segment}") from None
+        matches = np.flatnonzero(self.reader.segment_ids == segment)
+        if not len(matches):
+            raise KeyError(f"Unknown segment ID: {segment}")
+        return int(matches[0])
+
+    def column(self, name: str, segment: Union[int, str, None] = None) -> np.ndarray:
+        """One field for every frame of the sequence, e.g. (len, 3) positions of a segment"""
+        if name not in COLUMNS:
+            raise KeyError(f"Unknown column: {name}")
+        column = None if segment is None else self.segment_index(segment)
+        frames = self.frames if self.frames.step > 0 else self.frames[::-1]
+        chunk_frames = self.cache.chunk_frames
+        parts = []
+        done = 0
+        while done < len(frames):
+            # Every remaining frame that falls in the chunk of the next one
+            first = frames[done]
+            chunk = self.cache.chunk(first // chunk_frames)
+            count = min(len(frames) - done, -(-(chunk.start + len(chunk) - first) // frames.step))
+            data = chunk.columns[name][first - chunk.start::frames.step][:count]
+            parts.append(data if column is None else data[:, column])
+            done += count
+        if not parts:
+            field = self.reader.dtype[name]
+            shape = field.shape[1:] if column is not None else field.shape
+            return np.empty((0,) + shape, dtype=field.base)
+        result = np.concatenate(parts)
+        return result if self.frames.step > 0 else result[::-1]
+
+    def close(self):
+        """Release the cache and the take; only the sequence returned by open() owns them"""
+        if self._owner:
+            self.cache.close()
+            self.cache.reader.close()
+
+    def __enter__(self) -> "TakeSequence":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_status(self) -> Dict:
+        status = self.cache.get_status()
+        status["frames"] = len(self)
+        return status
@@ -0,0 +1,172 @@
+# src/data_handlers/take_player.py
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .frame_source import FrameSource
+from .take_codec import AnyTakeReader, open_take
+
+SAMPLE_WINDOW = 0.001              # Seconds; datagrams of one sample arrive within this
+
+
+class TakePlayer(FrameSource):
+    """Plays a recorded take through the same callback API as MVNDataHandler.
+
+    The take is opened with open_take(), so only the frames actually played
+    are paged in, or for compressed takes decoded. Frames are paced by their
+    recorded timestamps scaled by `speed`. Every due frame is dispatched, so
+    timer overshoot and frames of several actors sharing a sample never lose
+    data; only when playback falls more than `max_lag` seconds behind (high
+    speeds, slow machine) does it jump ahead to the current sample instead
+    of queueing the backlog.
+    """
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False,
+                 frame_buffer_size: int = 256, max_lag: float = 0.1):
+        super().__init__(frame_buffer_size)
+        self.path = path
+        self.loop = loop
+        self.max_lag = max_lag
+        self.reader: Optional[AnyTakeReader] = None
+        self.is_connected = False
+        self.skipped_frames = 0
+        self._speed = speed
+        self._position = 0
+        self._seek_to: Optional[int] = None
+        self._stop_streaming = False
+        self._wake = threading.Event()
+        self.stream_thread: Optional[threading.Thread] = None
+
+    def connect(self) -> Tuple[bool, str]:
+        try:
+            self.reader = open_take(self.path)
+        except (OSError, ValueError) as e:
+            error_msg = f"Failed to open take: {str(e)}"
+            self._notify_connection(False, error_msg)
+            return False, error_msg
+        self.is_connected = True
+        self._notify_connection(True, "Take opened")
+        return True, "Take opened"
+
+    def disconnect(self) -> Tuple[bool, str]:
+        self.stop_streaming()
+        if self.reader:
+            self.reader.close()
+            self.reader = None
+        self.is_connected = False
+        self._notify_connection(False, "Take closed")
+        return True, "Take closed"
+
+    def start_streaming(self) -> bool:
+        if not self.is_connected or self.is_streaming:
+            return False
+        self.is_streaming = True
+        self._stop_streaming = False
+        self._start_dispatchers()
+        self.stream_thread = threading.Thread(target=self._play)
+        self.stream_thread.daemon = True
+        self.stream_thread.start()
+        return True
+
+    def stop_streaming(self):
+        self._stop_streaming = True
+        self.is_streaming = False
+        self._wake.set()
+        self._close_dispatchers()
+        if self.stream_thread and self.stream_thread is not threading.current_thread():
+            self.stream_thread.join(timeout=2.0)
+        self.stream_thread = None
+        self._join_dispatchers()
+
+    @property
+    def speed(self) -> float:
+        return self._speed
+
+    @speed.setter
+    def speed(self, value: float):
+        if value <= 0:
+            raise ValueError("speed must be positive")
+        self._speed = value
+        self._seek_to = self._position    # Re-anchor the clock at the current frame
+        self._wake.set()
+
+    @property
+    def position(self) -> int:
+        return self._position
+
+    def seek_frame(self, frame: int):
+        if self.reader is None:
+            return
+        self._position = min(max(0, frame), max(0, len(self.reader) - 1))
+        self._seek_to = self._position
+        self._wake.set()
+
+    def seek_time(self, seconds: float):
+        """Seek to a time in seconds from the start of the take"""
+        if self.reader is None:
+            return
+        self.seek_frame(self.reader.frame_at_time(self.reader.start_time + seconds))
+
+    def _play(self):
+        reader = self.reader
+        count = len(reader)
+        timestamps = reader.timestamps
+        frame = self._position
+        anchor_wall = anchor_take = 0.0
+        self._seek_to = frame
+
+        while not self._stop_streaming and count:
+            if self._seek_to is not None:
+                frame, self._seek_to = self._seek_to, None
+                anchor_wall, anchor_take = time.monotonic(), float(timestamps[frame])
+            if frame >= count:
+                if not self.loop:
+                    break
+                self._seek_to = 0
+                continue
+
+            take_now = anchor_take + (time.monotonic() - anchor_wall) * self._speed
+            due = float(timestamps[frame])
+            if due > take_now:
+                self._wake.clear()
+                self._wake.wait(min((due - take_now) / self._speed, 0.1))
+                continue
+
+            if (take_now - due) / self._speed > self.max_lag:
+                resume = self._current_sample(take_now)
+                if resume > frame:
+                    self.skipped_frames += resume - frame
+                    frame = resume
+
+            self._dispatch(reader.read_frame(frame))
+            frame += 1
+            self._position = min(frame, count - 1)
+
+        self.is_streaming = False
+
+    def _current_sample(self, take_now: float) -> int:
+        """First frame of the latest sample due at take_now.
+
+        Frames recorded within SAMPLE_WINDOW of each other (one datagram per
+        actor) belong to the same sample and are all played.
+        """
+        reader = self.reader
+        latest = reader.frame_at_time(take_now)
+        start = reader.frame_at_time(float(reader.timestamps[latest]) - SAMPLE_WINDOW)
+        if float(reader.timestamps[start]) <= float(reader.timestamps[latest]) - SAMPLE_WINDOW:
+            start += 1
+        return min(start, latest)
+
+    def get_status(self) -> Dict:
+        reader = self.reader
+        return {
+            "connected": self.is_connected,
+            "streaming": self.is_streaming,
+            "path": self.path,
+            "frames": len(reader) if reader else 0,
+            "duration": reader.duration if reader else 0.0,
+            "position": self._position,
+            "speed": self._speed,
+            "loop": self.loop,
+            "skipped_frames": self.skipped_frames,
+            "frame_buffer": self.frame_buffer.get_stats(),
+        }
@@ -0,0 +1,202 @@
+# src/data_handlers/take_recorder.py
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from .instrumentation import Instrumentation
+from .mvn_protocol import POSE_EULER, POSE_QUATERNION, SEGMENT_NAMES, MVNFrame
+from .take_codec import CompressedTakeWriter
+from .take_file import TakeWriter, frame_record_dtype
+
+
+class TakeRecorder:
+    """Records pose frames to a take file on a background writer thread.
+
+    Frames are copied into one of a fixed pool of preallocated record
+    batches; full batches are handed to the writer thread, which appends them
+    with a single write call and returns them to the pool. Memory therefore
+    stays bounded for sessions of any length. When the disk falls behind and
+    the pool runs dry, frames are dropped and counted instead of blocking.
+
+    A crash loses the batch being filled plus the full batches still queued
+    for the writer. The writer keeps up with capture, so that queue is empty
+    and the loss at most one batch (batch_frames frames, half a second at
+    240 Hz by default). Only while the disk stalls can up to max_batches
+    batches be queued and lost.
+
+    Quaternion and Euler pose streams are both recorded; the first pose
+    frame fixes the take's datagram type and segment layout. Euler angles
+    are stored in the first three rotation components. Other datagram types
+    and frames split across several datagrams are not recorded but counted;
+    MVNDataHandler and IngestHub reassemble split samples before delivery.
+    Gaps in each character's sample counters are counted in missing_samples,
+    so an incomplete take is visible when recording stops.
+
+    With `codec` set to one of take_codec.COMPRESSORS, the take is written
+    compressed. Frames then reach the disk one codec block at a time, so a
+    crash also loses the unfinished block, up to
+    take_codec.DEFAULT_BLOCK_FRAMES frames (about 17 s at 240 Hz).
+    """
+    def __init__(self, path: str, batch_frames: int = 120, max_batches: int = 8,
+                 index_interval: int = 240, fsync: bool = True, codec: Optional[str] = None):
+        self.path = path
+        self.batch_frames = batch_frames
+        self.max_batches = max_batches
+        self.index_interval = index_interval
+        self.fsync = fsync
+        self.codec = codec
+        self.is_recording = False
+        self.frames_recorded = 0
+        self.frames_written = 0
+        self.dropped_frames = 0       # Pool exhausted or segment layout mismatch
+        self.layout_mismatches = 0    # Segment count or pose type differs from the take
+        self.split_frames = 0         # Pose split over several datagrams, not reassembled
+        self.ignored_frames = 0       # Non-pose datagrams
+        self.missing_samples = 0      # Gaps in each character's sample counters
+        self.error: Optional[str] = None
+        self.metrics = Instrumentation()    # "record" stage: copy into the batch
+
+        self._writer: Optional[TakeWriter] = None
+        self._writer_thread: Optional[threading.Thread] = None
+        self._free: "queue.Queue[np.ndarray]" = queue.Queue()
+        self._full: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._batch: Optional[np.ndarray] = None
+        self._fill = 0
+        self._handler = None
+        self._datagram_type: Optional[int] = None
+        self._last_samples: Dict[int, int] = {}
+
+    def attach(self, handler):
+        """Subscribe to an MVNDataHandler (or any source with the same callback API)"""
+        self._handler = handler
+        handler.add_data_callback(self.write_frame)
+
+    def detach(self):
+        if self._handler is not None:
+            self._handler.remove_data_callback(self.write_frame)
+            self._handler = None
+
+    def start(self):
+        self.is_recording = True
+
+    def write_frame(self, frame: MVNFrame):
+        if not self.metrics.enabled:
+            self._write_frame(frame)
+            return
+        start = time.perf_counter()
+        self._write_frame(frame)
+        self.metrics.record("record", time.perf_counter() - start)
+
+    def _write_frame(self, frame: MVNFrame):
+        if not self.is_recording:
+            return
+        if frame.datagram_type not in (POSE_QUATERNION, POSE_EULER):
+            self.ignored_frames += 1
+            return
+        if frame.datagram_counter or not frame.is_last_datagram:
+            self.split_frames += 1
+            self.dropped_frames += 1
+            return
+        if self._writer is None:
+            self._open(frame)
+        if (frame.segment_count != self._writer.segment_count
+                or frame.datagram_type != self._datagram_type):
+            self.layout_mismatches += 1
+            self.dropped_frames += 1
+            return
+        if self._batch is None:
+            try:
+                self._batch = self._free.get_nowait()
+            except queue.Empty:
+                self.dropped_frames += 1
+                return
+
+        last = self._last_samples.get(frame.character_id)
+        if last is not None and frame.sample_counter > last + 1:
+            self.missing_samples += frame.sample_counter - last - 1
+        self._last_samples[frame.character_id] = frame.sample_counter
+
+        record = self._batch[self._fill]
+        record["timestamp"] = frame.timestamp
+        record["sample_counter"] = frame.sample_counter
+        record["time_code"] = frame.time_code
+        record["character_id"] = frame.character_id
+        record["datagram_type"] = frame.datagram_type
+        record["positions"] = frame.positions
+        if frame.datagram_type == POSE_EULER:
+            record["rotations"][:, :3] = frame.rotations
+            record["rotations"][:, 3] = 0.0
+        else:
+            record["rotations"] = frame.rotations
+        self._fill += 1
+        self.frames_recorded += 1
+        if self._fill == self.batch_frames:
+            self._submit()
+
+    def stop(self):
+        """Flush the partial batch, stop the writer thread and close the take"""
+        self.is_recording = False
+        self.detach()
+        if self._writer_thread is None:
+            return
+        self._submit()
+        self._full.put(None)
+        self._writer_thread.join()
+        self._writer_thread = None
+        self._writer.close()
+        self.frames_written = self._writer.frames_written
+
+    def _open(self, frame: MVNFrame):
+        self._datagram_type = frame.datagram_type
+        ids = frame.segment_ids.tolist()
+        names = [SEGMENT_NAMES[i - 1] if 0 < i <= len(SEGMENT_NAMES) else f"Segment{i}" for i in ids]
+        if self.codec:
+            self._writer = CompressedTakeWriter(self.path, ids, names, compressor=self.codec,
+                                                fsync=self.fsync)
+        else:
+            self._writer = TakeWriter(self.path, ids, names, self.index_interval, self.fsync)
+        dtype = frame_record_dtype(len(ids))
+        for _ in range(self.max_batches):
+            self._free.put(np.zeros(self.batch_frames, dtype=dtype))
+        self._writer_thread = threading.Thread(target=self._write_batches)
+        self._writer_thread.daemon = True
+        self._writer_thread.start()
+
+    def _submit(self):
+        if self._batch is not None and self._fill:
+            self._full.put((self._batch, self._fill))
+            self._batch = None
+            self._fill = 0
+
+    def _write_batches(self):
+        while True:
+            item = self._full.get()
+            if item is None:
+                break
+            batch, count = item
+            try:
+                self._writer.write_records(batch[:count])
+                self.frames_written = self._writer.frames_written
+            except Exception as e:
+                self.error = str(e)
+                print(f"Error writing take: {e}")
+            self._free.put(batch)
+
+    def get_status(self) -> Dict:
+        return {
+            "recording": self.is_recording,
+            "path": self.path,
+            "codec": self.codec,
+            "frames_recorded": self.frames_recorded,
+            "frames_written": self.frames_written,
+            "dropped_frames": self.dropped_frames,
+            "layout_mismatches": self.layout_mismatches,
+            "split_frames": self.split_frames,
+            "ignored_frames": self.ignored_frames,
+            "missing_samples": self.missing_samples,
+            "error": self.error,
+            "metrics": self.metrics.get_status(),
+        }
@@ -0,0 +1,284 @@
+# src/data_handlers/time_sync.py
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import quaternions
+from .frame_source import FrameSource
+from .mvn_protocol import POSE_QUATERNION, MVNFrame
+
+SourceKey = Tuple[Optional[str], int]      # (source_id, character_id)
+
+
+class ClockEstimator:
+    """Online estimate of a sender clock against the local monotonic clock.
+
+    Transport and scheduling delays only ever add to the observed receive
+    time, so of every `window` samples only the one with the smallest
+    receive_time - sender_time is kept: it is the closest to the true clock
+    offset. A line is fitted through these window minima with exponential
+    forgetting; its intercept is the offset and its slope the drift of the
+    sender clock. Each update is O(1).
+    """
+    def __init__(self, window: int = 60, forgetting: float = 0.99):
+        self.window = max(1, window)
+        self.forgetting = forgetting
+        self.samples = 0
+        self.points = 0
+        self.offset = 0.0      # Local minus sender time at the first sample, seconds
+        self.drift = 0.0       # Sender clock rate error, seconds per second
+        self._origin: Optional[float] = None
+        self._window_min = np.inf
+        self._window_x = 0.0
+        self._window_count = 0
+        self._sums = np.zeros(5)   # weight, x, y, xx, xy
+
+    def update(self, sender_time: float, receive_time: float):
+        if self._origin is None:
+            self._origin = sender_time
+        x = sender_time - self._origin
+        y = receive_time - sender_time
+        if y < self._window_min:
+            self._window_min, self._window_x = y, x
+        self._window_count += 1
+        self.samples += 1
+        if not self.points:
+            self.offset = self._window_min
+        if self._window_count >= self.window:
+            self._add_point(self._window_x, self._window_min)
+            self._window_min = np.inf
+            self._window_count = 0
+
+    def _add_point(self, x: float, y: float):
+        self._sums *= self.forgetting
+        self._sums += (1.0, x, y, x * x, x * y)
+        self.points += 1
+        weight, sx, sy, sxx, sxy = self._sums
+        denominator = weight * sxx - sx * sx
+        if self.points >= 2 and denominator > 1e-12 * weight * sxx:
+            self.drift = (weight * sxy - sx * sy) / denominator
+            self.offset = (sy - self.drift * sx) / weight
+        else:
+            self.offset = sy / weight
+
+    def to_local(self, sender_time: float) -> float:
+        """Local monotonic time corresponding to a sender time"""
+        if self._origin is None:
+            return sender_time
+        return sender_time + self.offset + self.drift * (sender_time - self._origin)
+
+
+class PoseHistory:
+    """Small ring of recent poses of one source, in local time order"""
+    def __init__(self, capacity: int, segment_ids: np.ndarray):
+        self.capacity = capacity
+        self.segment_ids = segment_ids
+        count = len(segment_ids)
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.positions = np.empty((capacity, count, 3), dtype=np.float32)
+        self.rotations = np.empty((capacity, count, 4), dtype=np.float64)
+        self.head = 0
+        self.count = 0
+
+    @property
+    def last_time(self) -> float:
+        return self.times[(self.head - 1) % self.capacity] if self.count else -np.inf
+
+    def append(self, local_time: float, positions: np.ndarray, rotations: np.ndarray):
+        slot = self.head
+        self.times[slot] = local_time
+        self.positions[slot] = positions
+        self.rotations[slot] = rotations
+        self.head = (slot + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def sample(self, local_time: float) -> Tuple[np.ndarray, np.ndarray, bool]:
+        """Pose at local_time; outside the buffered span the nearest pose is held"""
+        order = (self.head - self.count + np.arange(self.count)) % self.capacity
+        times = self.times[order]
+        k = int(np.searchsorted(times, local_time, side="right"))
+        if k == 0 or k == self.count:
+            slot = order[0] if k == 0 else order[-1]
+            return self.positions[slot].copy(), self.rotations[slot].copy(), True
+        before, after = order[k - 1], order[k]
+        alpha = (local_time - times[k - 1]) / (times[k] - times[k - 1])
+        positions = self.positions[before] + (self.positions[after] - self.positions[before]) * alpha
+        rotations = quaternions.slerp(self.rotations[before], self.rotations[after], alpha)
+        return positions, rotations, False
+
+
+@dataclass
+class AlignedPose:
+    segment_ids: np.ndarray
+    positions: np.ndarray          # (S, 3)
+    rotations: np.ndarray          # (S, 4) w, x, y, z
+    held: bool = False             # Output time outside the buffered span
+
+
+@dataclass
+class AlignedFrame:
+    """Poses of every source resampled to one output instant"""
+    time: float                    # Local time.monotonic() of the output instant
+    sequence: int
+    poses: Dict[SourceKey, AlignedPose] = field(default_factory=dict)
+
+
+class FrameSynchronizer(FrameSource):
+    """Aligns pose streams from several sources to one output clock.
+
+    Every pushed quaternion pose is placed on the local monotonic clock via
+    its source's ClockEstimator, using the sender time code rather than the
+    jittery arrival time, and buffered in a small per-source PoseHistory.
+    Output frames are produced at `rate` Hz, `latency` seconds behind real
+    time so that each source has samples on both sides of the output
+    instant; positions are interpolated linearly and rotations by slerp,
+    vectorized over segments. Sources are keyed by (source_id, character_id).
+    """
+    def __init__(self, rate: float = 60.0, latency: float = 0.05, history: int = 32,
+                 frame_buffer_size: int = 64, max_backlog: int = 4,
+                 estimator_factory: Callable[[], ClockEstimator] = ClockEstimator):
+        super().__init__(frame_buffer_size)
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.period = 1.0 / rate
+        self.latency = latency
+        self.history = history
+        self.estimator_factory = estimator_factory
+        self.estimators: Dict[SourceKey, ClockEstimator] = {}
+        self.histories: Dict[SourceKey, PoseHistory] = {}
+        self.frames_emitted = 0
+        self.skipped_outputs = 0
+        self.late_frames = 0        # Out of order or duplicate after alignment
+        self.ignored_frames = 0     # Not quaternion poses
+        self.max_backlog = max_backlog
+        self._start_time: Optional[float] = None
+        self._next_index = 0
+        self._lock = threading.Lock()
+        self._stop_streaming = False
+        self._wake = threading.Event()
+        self.stream_thread: Optional[threading.Thread] = None
+        self._sources = []
+
+    def attach(self, source):
+        """Subscribe to a FrameSource (handler, hub or player)"""
+        source.add_data_callback(self.push)
+        self._sources.append(source)
+
+    def detach(self):
+        for source in self._sources:
+            source.remove_data_callback(self.push)
+        self._sources = []
+
+    def push(self, frame: MVNFrame):
+        if frame.datagram_type != POSE_QUATERNION or frame.segment_ids is None:
+            self.ignored_frames += 1
+            return
+        key = (frame.source_id, frame.character_id)
+        receive_time = frame.receive_time if frame.receive_time is not None else time.monotonic()
+        sender_time = frame.time_code / 1000.0
+        with self._lock:
+            estimator = self.estimators.get(key)
+            if estimator is None:
+                estimator = self.estimators[key] = self.estimator_factory()
+            estimator.update(sender_time, receive_time)
+            local_time = estimator.to_local(sender_time)
+
+            history = self.histories.get(key)
+            if history is None or len(history.segment_ids) != frame.segment_count:
+                history = self.histories[key] = PoseHistory(self.history, frame.segment_ids)
+            if local_time <= history.last_time:
+                self.late_frames += 1
+                return
+            history.append(local_time, frame.positions, frame.rotations)
+
+    def align(self, local_time: float) -> AlignedFrame:
+        """Resample every source at local_time"""
+        aligned = AlignedFrame(time=local_time, sequence=self.frames_emitted)
+        with self._lock:
+            for key, history in self.histories.items():
+                if history.count:
+                    positions, rotations, held = history.sample(local_time)
+                    aligned.poses[key] = AlignedPose(history.segment_ids, positions, rotations, held)
+        self.frames_emitted += 1
+        return aligned
+
+    def poll(self, now: Optional[float] = None) -> List[AlignedFrame]:
+        """Aligned frames for every output instant due by now"""
+        now = time.monotonic() if now is None else now
+        target = now - self.latency
+        if self._start_time is None:
+            self._start_time = target
+        # Output instants are start + n * period, computed without accumulating error
+        due = int(np.floor((target - self._start_time) / self.period + 1e-9))
+        if due - self._next_index > self.max_backlog:
+            # Never build a backlog: resume at the newest due instant
+            self.skipped_outputs += due - self._next_index
+            self._next_index = due
+        frames = []
+        while self._next_index <= due:
+            frames.append(self.align(self._start_time + self._next_index * self.period))
+            self._next_index += 1
+        return frames
+
+    @property
+    def next_output_time(self) -> Optional[float]:
+        if self._start_time is None:
+            return None
+        return self._start_time + self._next_index * self.period + self.latency
+
+    def start_streaming(self) -> bool:
+        if self.is_streaming:
+            return False
+        self.is_streaming = True
+        self._stop_streaming = False
+        self._start_dispatchers()
+        self.stream_thread = threading.Thread(target=self._emit)
+        self.stream_thread.daemon = True
+        self.stream_thread.start()
+        return True
+
+    def stop_streaming(self):
+        self._stop_streaming = True
+        self.is_streaming = False
+        self._wake.set()
+        self._close_dispatchers()
+        if self.stream_thread:
+            self.stream_thread.join(timeout=2.0)
+            self.stream_thread = None
+        self._join_dispatchers()
+
+    def _emit(self):
+        while not self._stop_streaming:
+            for frame in self.poll():
+                self._dispatch(frame)
+            delay = self.next_output_time - time.monotonic()
+            if delay > 0:
+                self._wake.clear()
+                self._wake.wait(delay)
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            sources = {
+                f"{source_id}/{character_id}": {
+                    "offset": estimator.offset,
+                    "drift_ppm": estimator.drift * 1e6,
+                    "samples": estimator.samples,
+                    "buffered": self.histories[(source_id, character_id)].count
+                    if (source_id, character_id) in self.histories else 0,
+                }
+                for (source_id, character_id), estimator in self.estimators.items()
+            }
+        return {
+            "streaming": self.is_streaming,
+            "rate": 1.0 / self.period,
+            "latency": self.latency,
+            "frames_emitted": self.frames_emitted,
+            "skipped_outputs": self.skipped_outputs,
+            "late_frames": self.late_frames,
+            "ignored_frames": self.ignored_frames,
+            "sources": sources,
+            "frame_buffer": self.frame_buffer.get_stats(),
+        }
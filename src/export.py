@@ -0,0 +1,43 @@
+# src/export.py
+import argparse
+import sys
+from typing import List, Optional
+
+from data_handlers.take_export import EXPORT_FORMATS, ExportResult, export_directory
+
+def main(argv: Optional[List[str]] = None) -> int:
+   parser = argparse.ArgumentParser(
+       description="Convert a directory of recorded takes to BVH, CSV or FBX ASCII")
+   parser.add_argument("input", help="Directory containing recorded takes")
+   parser.add_argument("-o", "--output", help="Output directory (default: the input directory)")
+   parser.add_argument("-f", "--formats", default="bvh,csv",
+                       help=f"Comma separated formats out of {', '.join(EXPORT_FORMATS)}")
+   parser.add_argument("-j", "--workers", type=int, default=None,
+                       help="Worker processes (default: one per CPU)")
+   parser.add_argument("--chunk-frames", type=int, default=4096,
+                       help="Frames converted per block in each worker")
+   parser.add_argument("--smooth", type=float, default=None, metavar="HZ",
+                       help="Remove spikes and low-pass positions and rotations at this "
+                            "cutoff, without phase lag, before exporting")
+   args = parser.parse_args(argv)
+   
+   formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+   unknown = [f for f in formats if f not in EXPORT_FORMATS]
+   if unknown:
+       parser.error(f"unknown format(s): {', '.join(unknown)}")
+       
+   def report(result: ExportResult):
+       if result.error:
+           print(f"FAILED {result.take}: {result.error}")
+       else:
+           print(f"{result.take}: {result.frames} frames -> {', '.join(result.outputs)}")
+           
+   results = export_directory(args.input, args.output or args.input, formats,
+                              args.workers, args.chunk_frames, progress=report,
+                              smoothing=args.smooth)
+   failed = sum(1 for result in results if result.error)
+   print(f"Exported {len(results) - failed}/{len(results)} takes")
+   return 1 if failed else 0
+
+if __name__ == "__main__":
+   sys.exit(main())
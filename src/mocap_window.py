@@ -0,0 +1,405 @@
+# src/mocap_window.py
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
+                          QTabWidget, QLabel, QPushButton, QHBoxLayout,
+                          QStatusBar, QLineEdit, QFormLayout, QMessageBox,
+                          QFileDialog, QCheckBox)
+from PyQt6.QtCore import Qt, pyqtSlot, pyqtSignal, QTimer
+from data_handlers.capture_session import new_take_path
+from data_handlers.ingest_hub import HubSource, IngestHub
+from data_handlers.instrumentation import MetricsDumper
+from data_handlers.mvn_data_handler import XSensConfig
+from data_handlers.mvn_protocol import SEGMENT_PARENTS
+from data_handlers.session_config import ConfigStore, DeviceSettings
+from data_handlers.take_file import TAKE_SUFFIX
+from data_handlers.take_recorder import TakeRecorder
+import sys
+from typing import Callable, Dict, List, Optional
+
+class DeviceConfigWidget(QWidget):
+   """Widget for configuring device connection settings"""
+   def __init__(self, config: Dict, parent=None):
+       super().__init__(parent)
+       layout = QFormLayout()
+       defaults = XSensConfig()
+       self.config = config
+
+       self.host_input = QLineEdit(config.get('host', defaults.host))
+       self.port_input = QLineEdit(str(config.get('port', defaults.port)))
+       self.protocol_input = QLineEdit(config.get('protocol', defaults.protocol))
+
+       layout.addRow("Host:", self.host_input)
+       layout.addRow("Port:", self.port_input)
+       layout.addRow("Protocol:", self.protocol_input)
+
+       self.setLayout(layout)
+
+   def get_config(self) -> XSensConfig:
+       # Settings without an input here keep their stored values
+       return XSensConfig(**dict(
+           self.config,
+           host=self.host_input.text(),
+           port=int(self.port_input.text()),
+           protocol=self.protocol_input.text()
+       ))
+
+class DeviceWidget(QWidget):
+   """Widget for controlling and displaying device status"""
+   def __init__(self, settings: DeviceSettings, hub: IngestHub, parent=None):
+       super().__init__(parent)
+       self.settings = settings
+       self.device_name = settings.name
+       self.hub = hub
+       self.is_connected = False
+       self.handler: Optional[HubSource] = None
+       self.visualizer = None
+
+       # Create main layout
+       main_layout = QVBoxLayout()
+
+       # Status and connect button layout
+       control_layout = QHBoxLayout()
+       self.status_label = QLabel(f"{self.device_name}: Disconnected")
+       self.connect_button = QPushButton("Connect")
+       self.connect_button.clicked.connect(self.toggle_connection)
+
+       control_layout.addWidget(self.status_label)
+       control_layout.addWidget(self.connect_button)
+
+       # Add configuration widget if it's XSens
+       if settings.is_xsens:
+           self.config_widget = DeviceConfigWidget(settings.config)
+           main_layout.addWidget(self.config_widget)
+       else:
+           self.config_widget = None
+
+       main_layout.addLayout(control_layout)
+       self.setLayout(main_layout)
+
+   def set_visualizer(self, visualizer):
+       self.visualizer = visualizer
+
+   def store_settings(self):
+       """Copy the edited connection settings into the profile, unless they are invalid"""
+       if self.config_widget is not None:
+           try:
+               self.settings.update(self.config_widget.get_config())
+           except ValueError:
+               pass
+
+   def connection_status_callback(self, connected: bool, message: str):
+       self.is_connected = connected
+       status = "Connected" if connected else "Disconnected"
+       self.status_label.setText(f"{self.device_name}: {status}")
+       self.connect_button.setText("Disconnect" if connected else "Connect")
+
+       if message:
+           QMessageBox.information(self, "Connection Status", message)
+
+   def data_callback(self, data: Dict):
+       if self.visualizer:
+           self.visualizer.update_data(data)
+
+   @pyqtSlot()
+   def toggle_connection(self):
+       # Every device is one source of the shared ingest hub, received on the
+       # hub's single selector thread
+       if self.config_widget is not None:
+           if not self.is_connected:
+               success, message = self.hub.add_source(self.device_name,
+                                                      self.config_widget.get_config())
+               if success:
+                   self.store_settings()
+                   self.handler = self.hub.source(self.device_name)
+                   self.handler.add_data_callback(self.data_callback)
+                   if not self.hub.is_streaming:
+                       self.hub.start_streaming()
+           else:
+               if self.handler:
+                   self.handler.remove_data_callback(self.data_callback)
+                   self.hub.remove_source(self.device_name)
+                   self.handler = None
+
+class LazyTabWidget(QTabWidget):
+   """Tab widget that builds a tab's content the first time the tab is shown.
+
+   add_lazy_tab() adds an empty page and keeps the factory creating its
+   content, so the modules behind a tab are imported and its widgets built
+   only once somebody looks at it, or when build() asks for them.
+   """
+   def __init__(self, parent=None):
+       super().__init__(parent)
+       self._factories: Dict[int, Callable[[], QWidget]] = {}
+       self.currentChanged.connect(self.build)
+
+   def add_lazy_tab(self, factory: Callable[[], QWidget], title: str) -> int:
+       page = QWidget()
+       QVBoxLayout(page).setContentsMargins(0, 0, 0, 0)
+       # Registered first: adding the first tab makes it current right away
+       self._factories[self.count()] = factory
+       return self.addTab(page, title)
+
+   def is_built(self, index: int) -> bool:
+       return index not in self._factories
+
+   @pyqtSlot(int)
+   def build(self, index: int):
+       factory = self._factories.pop(index, None)
+       if factory is not None:
+           self.widget(index).layout().addWidget(factory())
+
+class MocapToolWindow(QMainWindow):
+   """Main window for the Motion Capture Tool"""
+   # Hub connection events arrive on its receive thread
+   source_status = pyqtSignal(bool, str)
+
+   def __init__(self, store: ConfigStore, metrics_file: Optional[str] = None,
+                metrics_format: str = "json", metrics_interval: float = 1.0):
+       super().__init__(None, Qt.WindowType.Window)
+       self.setWindowTitle(f"Mocap Tool - {store.active}")
+       self.store = store
+       self.profile = store.profile()
+
+       self.hub = IngestHub()
+       self.source_status.connect(self.on_source_status)
+       self.hub.set_connection_callback(self.source_status.emit)
+
+       # Built with their tabs
+       self.visualizer = None
+       self.viewport = None
+       self.hud_checkbox: Optional[QCheckBox] = None
+
+       # Create main widget and layout
+       main_widget = QWidget()
+       self.setCentralWidget(main_widget)
+       layout = QVBoxLayout(main_widget)
+
+       # Create tabs; only the devices and recording controls are built up front
+       self.tabs = LazyTabWidget()
+
+       # Devices tab
+       devices_tab = QWidget()
+       devices_layout = QVBoxLayout(devices_tab)
+       devices_layout.addWidget(QLabel("Device Control"))
+
+       self.device_widgets = {}
+       self.devices_layout = devices_layout
+       for settings in self.profile.devices:
+           self.add_device_widget(settings)
+
+       add_suit_button = QPushButton("Add XSens Suit")
+       add_suit_button.clicked.connect(self.add_xsens_suit)
+       devices_layout.addWidget(add_suit_button)
+       devices_layout.addStretch()
+       self.tabs.addTab(devices_tab, "Devices")
+
+       self.visualization_tab = self.tabs.add_lazy_tab(self.create_visualization_tab,
+                                                       "Visualization")
+       self.viewport_tab = self.tabs.add_lazy_tab(self.create_viewport_tab, "3D View")
+
+       # Recording tab
+       recording_tab = QWidget()
+       recording_layout = QVBoxLayout(recording_tab)
+       recording_layout.addWidget(QLabel("Recording Controls"))
+
+       self.record_button = QPushButton("Start Recording")
+       self.record_button.clicked.connect(self.toggle_recording)
+       recording_layout.addWidget(self.record_button)
+
+       self.recording_status = QLabel("Status: Ready")
+       recording_layout.addWidget(self.recording_status)
+
+       self.play_button = QPushButton("Play Take...")
+       self.play_button.clicked.connect(self.toggle_playback)
+       recording_layout.addWidget(self.play_button)
+
+       recording_layout.addStretch()
+       self.tabs.addTab(recording_tab, "Recording")
+
+       # Add tabs to main layout
+       layout.addWidget(self.tabs)
+
+       # Create status bar
+       self.status_bar = QStatusBar()
+       self.setStatusBar(self.status_bar)
+       self.status_bar.showMessage("Ready")
+
+       # Set window properties
+       self.setMinimumSize(800, 600)
+       self.is_recording = False
+       self.recorder: Optional[TakeRecorder] = None
+       self.player = None
+
+       self.metrics_dumper: Optional[MetricsDumper] = None
+       if metrics_file:
+           self.metrics_dumper = MetricsDumper(metrics_file, {
+               "hub": lambda: self.hub.metrics,
+               "visualizer": lambda: self.visualizer.metrics if self.visualizer else None,
+               "recorder": lambda: self.recorder.metrics if self.recorder else None,
+           }, metrics_interval, metrics_format)
+           self.set_instrumentation(True)
+           self.metrics_dumper.start()
+
+   def create_visualization_tab(self) -> QWidget:
+       from visualization.motion_visualizer import MotionVisualizer
+       visualization_tab = QWidget()
+       visualization_layout = QVBoxLayout(visualization_tab)
+       visualizer = MotionVisualizer()
+       visualizer.set_skeleton(SEGMENT_PARENTS)
+       visualizer.hud.add_source("hub", self.hub.get_status)
+       visualizer.hud.add_source("record", self.recorder_status)
+       visualization_layout.addWidget(visualizer)
+       self.hud_checkbox = QCheckBox("Performance HUD")
+       self.hud_checkbox.setChecked(self.profile.performance_hud)
+       self.hud_checkbox.toggled.connect(self.set_instrumentation)
+       visualization_layout.addWidget(self.hud_checkbox)
+
+       # Connect visualizer to the XSens devices
+       self.visualizer = visualizer
+       for widget in self.device_widgets.values():
+           if widget.settings.is_xsens:
+               widget.set_visualizer(visualizer)
+       self.set_instrumentation(self.hud_checkbox.isChecked())
+       return visualization_tab
+
+   def create_viewport_tab(self) -> QWidget:
+       # 3D view, only where an OpenGL 4.1 context is available
+       from visualization.gl_viewport import create_viewport
+       viewport = create_viewport(SEGMENT_PARENTS)
+       if viewport is None:
+           return QLabel("The 3D view needs OpenGL 4.1")
+       self.viewport = viewport
+       self.hub.add_data_callback(viewport.update_data)
+       return viewport
+
+   def add_device_widget(self, settings: DeviceSettings) -> DeviceWidget:
+       widget = DeviceWidget(settings, self.hub)
+       if settings.is_xsens:
+           widget.set_visualizer(self.visualizer)
+       self.device_widgets[settings.name] = widget
+       # Keep new widgets above the add button and stretch
+       self.devices_layout.insertWidget(len(self.device_widgets), widget)
+       return widget
+
+   @pyqtSlot()
+   def add_xsens_suit(self):
+       suits = sum(1 for settings in self.profile.devices if settings.is_xsens)
+       settings = DeviceSettings(f"XSens {suits + 1}", {"port": XSensConfig().port + suits})
+       self.profile.devices.append(settings)
+       self.add_device_widget(settings)
+
+   @pyqtSlot(bool, str)
+   def on_source_status(self, connected: bool, message: str):
+       source_id, _, text = message.partition(": ")
+       widget = self.device_widgets.get(source_id)
+       if widget is not None:
+           widget.connection_status_callback(connected, text)
+
+   @pyqtSlot(bool)
+   def set_instrumentation(self, enabled: bool):
+       # A metrics file keeps instrumentation on whether or not the HUD is shown
+       enabled = enabled or self.metrics_dumper is not None
+       self.hub.metrics.enabled = enabled
+       if self.recorder is not None:
+           self.recorder.metrics.enabled = enabled
+       if self.visualizer is not None:
+           self.visualizer.set_hud_visible(self.hud_checkbox.isChecked())
+           self.visualizer.metrics.enabled = enabled
+
+   def recorder_status(self) -> Optional[Dict]:
+       return self.recorder.get_status() if self.is_recording else None
+
+   def save_session(self):
+       """Write device settings and view options back to the active profile"""
+       for widget in self.device_widgets.values():
+           widget.store_settings()
+       if self.hud_checkbox is not None:
+           self.profile.performance_hud = self.hud_checkbox.isChecked()
+       try:
+           self.store.save()
+       except OSError as e:
+           print(f"Error saving configuration: {e}")
+
+   def closeEvent(self, event):
+       self.save_session()
+       self.hub.close()
+       if self.metrics_dumper is not None:
+           self.metrics_dumper.stop()
+       super().closeEvent(event)
+
+   def showEvent(self, event):
+       """Handle window show event"""
+       super().showEvent(event)
+       QTimer.singleShot(100, self.activateWindow)
+       QTimer.singleShot(100, self.raise_)
+
+   def show_frame(self, frame):
+       """Hand a played back frame to whichever views have been built"""
+       if self.visualizer is not None:
+           self.visualizer.update_data(frame)
+       if self.viewport is not None:
+           self.viewport.update_data(frame)
+
+   @pyqtSlot()
+   def toggle_recording(self):
+       if not self.is_recording:
+           handler = next((widget.handler for widget in self.device_widgets.values()
+                           if widget.handler is not None and widget.handler.is_connected), None)
+           if handler is None:
+               self.status_bar.showMessage("Connect XSens before recording")
+               return
+           self.recorder = TakeRecorder(new_take_path(self.profile.takes_directory),
+                                        codec=self.profile.take_codec)
+           self.recorder.metrics.enabled = self.hub.metrics.enabled
+           self.recorder.attach(handler)
+           self.recorder.start()
+       else:
+           self.recorder.stop()
+
+       self.is_recording = not self.is_recording
+       if self.is_recording:
+           self.record_button.setText("Stop Recording")
+           self.recording_status.setText(f"Status: Recording to {self.recorder.path}")
+           self.status_bar.showMessage("Recording in progress...")
+       else:
+           status = self.recorder.get_status()
+           saved = (f"Saved {status['frames_written']} frames" if status['frames_written']
+                    else "Nothing recorded")
+           self.record_button.setText("Start Recording")
+           self.recording_status.setText(
+               f"Status: {saved} "
+               f"({status['dropped_frames']} dropped, {status['missing_samples']} missing, "
+               f"{status['ignored_frames']} non-pose ignored)")
+           self.status_bar.showMessage("Recording stopped")
+
+   @pyqtSlot()
+   def toggle_playback(self):
+       if self.player is None:
+           path, _ = QFileDialog.getOpenFileName(self, "Open Take", self.profile.takes_directory,
+                                                 f"Takes (*{TAKE_SUFFIX})")
+           if not path:
+               return
+           from data_handlers.take_player import TakePlayer
+           player = TakePlayer(path, loop=True)
+           player.add_data_callback(self.show_frame)
+           success, message = player.connect()
+           if not success:
+               self.status_bar.showMessage(message)
+               return
+           self.player = player
+           self.player.start_streaming()
+           self.play_button.setText("Stop Playback")
+           self.status_bar.showMessage(f"Playing {path}")
+       else:
+           self.player.disconnect()
+           self.player = None
+           self.play_button.setText("Play Take...")
+           self.status_bar.showMessage("Playback stopped")
+
+def run_window(store: ConfigStore, qt_args: List[str], metrics_file: Optional[str] = None,
+               metrics_format: str = "json", metrics_interval: float = 1.0) -> int:
+   app = QApplication(sys.argv[:1] + qt_args)
+   window = MocapToolWindow(store, metrics_file, metrics_format, metrics_interval)
+   window.show()
+   window.raise_()
+   window.activateWindow()
+   return app.exec()
@@ -0,0 +1,56 @@
+# src/simulate.py
+import argparse
+import sys
+from typing import List, Optional
+
+from data_handlers.mvn_protocol import POSE_EULER, POSE_QUATERNION, POSITION_POINTS, TIME_CODE
+from data_handlers.mvn_simulator import MVNSimulator
+
+DATAGRAM_TYPES = {
+   "quaternion": POSE_QUATERNION,
+   "euler": POSE_EULER,
+   "points": POSITION_POINTS,
+   "timecode": TIME_CODE,
+}
+
+def main(argv: Optional[List[str]] = None) -> int:
+   parser = argparse.ArgumentParser(
+       description="Send synthetic or recorded MVN traffic for testing and benchmarks")
+   parser.add_argument("--host", default="127.0.0.1",
+                       help="UDP target, or TCP listen address (default: 127.0.0.1)")
+   parser.add_argument("--port", type=int, default=9763)
+   parser.add_argument("--protocol", choices=("UDP", "TCP"), default="UDP")
+   parser.add_argument("--actors", type=int, default=1)
+   parser.add_argument("--rate", type=float, default=240.0, help="Samples per second")
+   parser.add_argument("--types", default="quaternion",
+                       help=f"Comma separated datagram types out of {', '.join(DATAGRAM_TYPES)}")
+   parser.add_argument("--take", help="Replay a recorded take instead of generated skeletons")
+   parser.add_argument("--duration", type=float, default=10.0, help="Seconds to send")
+   args = parser.parse_args(argv)
+
+   types = [t.strip().lower() for t in args.types.split(",") if t.strip()]
+   unknown = [t for t in types if t not in DATAGRAM_TYPES]
+   if unknown:
+       parser.error(f"unknown datagram type(s): {', '.join(unknown)}")
+
+   simulator = MVNSimulator(args.host, args.port, args.protocol, args.actors, args.rate,
+                            [DATAGRAM_TYPES[t] for t in types], args.take)
+   try:
+       if args.protocol == "TCP":
+           simulator.listen()
+           print(f"Waiting for a client on {args.host}:{args.port}")
+           simulator.open(timeout=None)
+       simulator.send(int(args.duration * args.rate))
+   except KeyboardInterrupt:
+       pass
+   except OSError as e:
+       print(f"Simulation failed: {e}")
+       return 1
+   finally:
+       simulator.close()
+   print(f"Sent {simulator.samples_sent} samples, {simulator.datagrams_sent} datagrams, "
+         f"{simulator.bytes_sent} bytes")
+   return 0
+
+if __name__ == "__main__":
+   sys.exit(main())
@@ -0,0 +1,69 @@
+# src/visualization/frame_bridge.py
+
+import threading
+from typing import Dict, Hashable, Optional
+
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt6.QtGui import QGuiApplication
+
+DEFAULT_REFRESH_RATE = 60.0
+
+class FrameBridge(QObject):
+   """Hands frames from handler threads to the GUI thread at display rate.
+
+   publish() may be called from any thread for every received frame; it only
+   replaces the pending frame of its key, so each actor keeps a slot of its
+   own. A timer on the GUI thread delivers at most one frame per key and
+   display refresh through frame_ready, so rendering work stays bounded
+   however fast frames arrive. Frames replaced before delivery are counted
+   as coalesced.
+   """
+   frame_ready = pyqtSignal(object)
+
+   def __init__(self, parent=None, refresh_rate: Optional[float] = None):
+       super().__init__(parent)
+       self._lock = threading.Lock()
+       self._pending: Dict[Hashable, object] = {}
+       self.published = 0
+       self.delivered = 0
+       self.coalesced = 0
+
+       if refresh_rate is None:
+           screen = QGuiApplication.primaryScreen()
+           refresh_rate = screen.refreshRate() if screen else 0.0
+       self.refresh_rate = refresh_rate if refresh_rate > 0 else DEFAULT_REFRESH_RATE
+       self.timer = QTimer(self)
+       self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+       self.timer.setInterval(max(1, int(1000.0 / self.refresh_rate)))
+       self.timer.timeout.connect(self.deliver)
+       self.timer.start()
+
+   def publish(self, frame, key: Hashable = None):
+       """Offer the latest frame of `key`; safe to call from any thread"""
+       with self._lock:
+           if key in self._pending:
+               self.coalesced += 1
+           self._pending[key] = frame
+           self.published += 1
+
+   def deliver(self) -> bool:
+       """Emit the pending frames, if any, in publish order; runs on the GUI thread"""
+       with self._lock:
+           frames, self._pending = self._pending, {}
+       if not frames:
+           return False
+       self.delivered += len(frames)
+       for frame in frames.values():
+           self.frame_ready.emit(frame)
+       return True
+
+   def stop(self):
+       self.timer.stop()
+
+   def get_stats(self) -> Dict:
+       return {
+           "refresh_rate": self.refresh_rate,
+           "published": self.published,
+           "delivered": self.delivered,
+           "coalesced": self.coalesced,
+       }
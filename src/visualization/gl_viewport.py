@@ -0,0 +1,365 @@
+# src/visualization/gl_viewport.py
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from PyQt6.QtCore import QTimer, Qt
+from PyQt6.QtGui import (QGuiApplication, QMatrix4x4, QOffscreenSurface, QOpenGLContext,
+                         QSurfaceFormat, QVector3D)
+
+from .skeleton_buffer import OrbitCamera, SkeletonBuffer
+
+# QtOpenGL ships as a separate package on some distributions
+try:
+   from PyQt6.QtOpenGL import (QOpenGLBuffer, QOpenGLShader, QOpenGLShaderProgram,
+                               QOpenGLVersionFunctionsFactory, QOpenGLVersionProfile,
+                               QOpenGLVertexArrayObject)
+   from PyQt6.QtOpenGLWidgets import QOpenGLWidget
+   HAS_OPENGL = True
+except ImportError:
+   HAS_OPENGL = False
+
+GL_LINES = 0x0001
+GL_TRIANGLES = 0x0004
+GL_FLOAT = 0x1406
+GL_DEPTH_TEST = 0x0B71
+GL_DEPTH_BUFFER_BIT = 0x0100
+GL_COLOR_BUFFER_BIT = 0x4000
+
+DEFAULT_REFRESH_RATE = 60.0
+
+PALETTE = [QVector3D(0.0, 1.0, 0.0), QVector3D(0.3, 0.7, 1.0), QVector3D(1.0, 0.6, 0.2),
+           QVector3D(1.0, 0.3, 0.6), QVector3D(0.9, 0.9, 0.3), QVector3D(0.6, 0.4, 1.0),
+           QVector3D(0.3, 1.0, 0.8), QVector3D(1.0, 1.0, 1.0)]
+
+JOINT_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec3 vertex;
+layout(location = 1) in vec3 joint;
+uniform mat4 view_projection;
+uniform float joint_size;
+uniform int segments;
+uniform vec3 palette[8];
+out vec3 color;
+void main() {
+   gl_Position = view_projection * vec4(joint + vertex * joint_size, 1.0);
+   color = palette[(gl_InstanceID / segments) % 8] * (0.8 + 0.2 * vertex.z);
+}
+"""
+
+BONE_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in float along;
+layout(location = 1) in vec3 start;
+layout(location = 2) in vec3 end;
+uniform mat4 view_projection;
+uniform int bones;
+uniform vec3 palette[8];
+out vec3 color;
+void main() {
+   gl_Position = view_projection * vec4(mix(start, end, along), 1.0);
+   color = palette[(gl_InstanceID / bones) % 8];
+}
+"""
+
+GRID_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec3 vertex;
+uniform mat4 view_projection;
+out vec3 color;
+void main() {
+   gl_Position = view_projection * vec4(vertex, 1.0);
+   color = vec3(0.25);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330 core
+in vec3 color;
+out vec4 fragment;
+void main() {
+   fragment = vec4(color, 1.0);
+}
+"""
+
+def octahedron() -> np.ndarray:
+   """Unit octahedron as 8 triangles, the joint marker mesh"""
+   axes = np.array([[1, 0, 0], [0, 1, 0], [-1, 0, 0], [0, -1, 0]], dtype=np.float32)
+   top, bottom = np.array([0, 0, 1], np.float32), np.array([0, 0, -1], np.float32)
+   triangles = []
+   for i in range(4):
+       a, b = axes[i], axes[(i + 1) % 4]
+       triangles += [a, b, top, b, a, bottom]
+   return np.array(triangles, dtype=np.float32)
+
+def grid_lines(half_size: float = 5.0, step: float = 0.5) -> np.ndarray:
+   """Floor grid on the Z = 0 plane as line segments"""
+   ticks = np.arange(-half_size, half_size + step / 2, step)
+   lines = []
+   for t in ticks:
+       lines += [(t, -half_size, 0), (t, half_size, 0), (-half_size, t, 0), (half_size, t, 0)]
+   return np.array(lines, dtype=np.float32)
+
+def default_format() -> QSurfaceFormat:
+   """OpenGL 4.1 core with depth: the level QOpenGLFunctions_4_1_Core needs,
+   available from Mesa llvmpipe for headless use"""
+   surface = QSurfaceFormat()
+   surface.setVersion(4, 1)
+   surface.setProfile(QSurfaceFormat.OpenGLContextProfile.CoreProfile)
+   surface.setDepthBufferSize(24)
+   surface.setSamples(4)
+   return surface
+
+if HAS_OPENGL:
+   class SkeletonViewport(QOpenGLWidget):
+       """3D view of every actor's skeleton, drawn with instanced OpenGL.
+
+       update_data() may be called from any thread for every frame; it only
+       copies the positions into the SkeletonBuffer. A timer at the display
+       refresh rate repaints when poses changed. Each repaint uploads the
+       whole buffer with one write and issues one instanced draw for all
+       joints and one for all bones, whatever the number of actors. Orbit
+       (left drag) and zoom (wheel) change only the view-projection uniform.
+       """
+       def __init__(self, parents: Sequence[int], parent=None,
+                    refresh_rate: Optional[float] = None):
+           super().__init__(parent)
+           self.setFormat(default_format())
+           self.buffer = SkeletonBuffer(parents)
+           self.camera = OrbitCamera()
+           self.joint_size = 0.03
+           self.frames_received = 0
+           self.frames_rendered = 0
+           self.uploads = 0
+           self.error: Optional[str] = None
+           self._uploaded_version = -1
+           self._allocated_floats = 0
+           self._drag_position = None
+           self._gl = None
+
+           if refresh_rate is None:
+               screen = QGuiApplication.primaryScreen()
+               refresh_rate = screen.refreshRate() if screen else 0.0
+           refresh_rate = refresh_rate if refresh_rate > 0 else DEFAULT_REFRESH_RATE
+           self.timer = QTimer(self)
+           self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+           self.timer.setInterval(max(1, int(1000.0 / refresh_rate)))
+           self.timer.timeout.connect(self._refresh)
+           self.timer.start()
+
+       def update_data(self, frame):
+           """Thread-safe entry point for data callbacks"""
+           if frame.positions is None or not frame.is_pose:
+               return
+           if self.buffer.update((frame.source_id, frame.character_id), frame.positions):
+               self.frames_received += 1
+
+       def _refresh(self):
+           if self.buffer.version != self._uploaded_version:
+               self.update()
+
+       def initializeGL(self):
+           profile = QOpenGLVersionProfile()
+           profile.setVersion(4, 1)
+           profile.setProfile(QSurfaceFormat.OpenGLContextProfile.CoreProfile)
+           self._gl = QOpenGLVersionFunctionsFactory.get(profile, self.context())
+           if self._gl is None:
+               self.error = "OpenGL 4.1 core functions unavailable"
+               return
+           self._gl.initializeOpenGLFunctions()
+           self._gl.glEnable(GL_DEPTH_TEST)
+           self._gl.glClearColor(30 / 255, 30 / 255, 30 / 255, 1.0)
+
+           self.joint_program = self._program(JOINT_VERTEX_SHADER)
+           self.bone_program = self._program(BONE_VERTEX_SHADER)
+           self.grid_program = self._program(GRID_VERTEX_SHADER)
+
+           # Static meshes, uploaded once
+           self.joint_mesh = octahedron()
+           self.joint_mesh_buffer = self._static_buffer(self.joint_mesh)
+           self.bone_mesh_buffer = self._static_buffer(np.array([0.0, 1.0], dtype=np.float32))
+           grid = grid_lines()
+           self.grid_vertices = len(grid)
+           self.grid_buffer = self._static_buffer(grid)
+
+           # The per-frame pose buffer shared by both instanced draws
+           self.pose_buffer = QOpenGLBuffer(QOpenGLBuffer.Type.VertexBuffer)
+           self.pose_buffer.setUsagePattern(QOpenGLBuffer.UsagePattern.StreamDraw)
+           self.pose_buffer.create()
+
+           self.joint_vao = QOpenGLVertexArrayObject(self)
+           self.joint_vao.create()
+           self.bone_vao = QOpenGLVertexArrayObject(self)
+           self.bone_vao.create()
+           self.grid_vao = QOpenGLVertexArrayObject(self)
+           self.grid_vao.create()
+           self.grid_vao.bind()
+           self.grid_buffer.bind()
+           self.grid_program.enableAttributeArray(0)
+           self.grid_program.setAttributeBuffer(0, GL_FLOAT, 0, 3)
+           self.grid_vao.release()
+
+       def _program(self, vertex_source: str) -> "QOpenGLShaderProgram":
+           program = QOpenGLShaderProgram(self)
+           program.addShaderFromSourceCode(QOpenGLShader.ShaderTypeBit.Vertex, vertex_source)
+           program.addShaderFromSourceCode(QOpenGLShader.ShaderTypeBit.Fragment, FRAGMENT_SHADER)
+           if not program.link():
+               self.error = program.log()
+           return program
+
+       def _static_buffer(self, data: np.ndarray) -> "QOpenGLBuffer":
+           buffer = QOpenGLBuffer(QOpenGLBuffer.Type.VertexBuffer)
+           buffer.create()
+           buffer.bind()
+           buffer.allocate(data, data.nbytes)
+           buffer.release()
+           return buffer
+
+       def _bind_pose_attributes(self):
+           """Point the instanced attributes into the pose buffer; after each reallocation"""
+           gl = self._gl
+           joints_offset = 0
+           bones_offset = self.buffer.joint_floats * 4
+           self.joint_vao.bind()
+           self.joint_mesh_buffer.bind()
+           self.joint_program.enableAttributeArray(0)
+           self.joint_program.setAttributeBuffer(0, GL_FLOAT, 0, 3)
+           self.pose_buffer.bind()
+           self.joint_program.enableAttributeArray(1)
+           self.joint_program.setAttributeBuffer(1, GL_FLOAT, joints_offset, 3)
+           gl.glVertexAttribDivisor(1, 1)
+           self.joint_vao.release()
+
+           self.bone_vao.bind()
+           self.bone_mesh_buffer.bind()
+           self.bone_program.enableAttributeArray(0)
+           self.bone_program.setAttributeBuffer(0, GL_FLOAT, 0, 1)
+           self.pose_buffer.bind()
+           for location, offset in ((1, bones_offset), (2, bones_offset + 12)):
+               self.bone_program.enableAttributeArray(location)
+               self.bone_program.setAttributeBuffer(location, GL_FLOAT, offset, 3, 24)
+               gl.glVertexAttribDivisor(location, 1)
+           self.bone_vao.release()
+
+       def _upload(self) -> int:
+           """Write the whole pose array to the GPU; returns the actor count"""
+           buffer = self.buffer
+           with buffer.lock:
+               actors = buffer.actor_count
+               if not actors:
+                   return 0
+               data = buffer.pack()
+               self.pose_buffer.bind()
+               if data.size != self._allocated_floats:
+                   self.pose_buffer.allocate(data.nbytes)
+                   self._allocated_floats = data.size
+                   self._bind_pose_attributes()
+                   self.pose_buffer.bind()
+               self.pose_buffer.write(0, data, data.nbytes)
+               self._uploaded_version = buffer.version
+           self.uploads += 1
+           return actors
+
+       def resizeGL(self, width: int, height: int):
+           if self._gl is not None:
+               ratio = self.devicePixelRatio()
+               self._gl.glViewport(0, 0, int(width * ratio), int(height * ratio))
+
+       def paintGL(self):
+           gl = self._gl
+           if gl is None or self.error:
+               return
+           gl.glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+           matrix = QMatrix4x4(*self.camera.view_projection(
+               self.width() / max(1, self.height())).flatten().tolist())
+
+           self.grid_program.bind()
+           self.grid_program.setUniformValue("view_projection", matrix)
+           self.grid_vao.bind()
+           gl.glDrawArrays(GL_LINES, 0, self.grid_vertices)
+           self.grid_vao.release()
+
+           if self.buffer.version != self._uploaded_version:
+               actors = self._upload()
+           else:
+               actors = self.buffer.actor_count
+           if not actors:
+               return
+
+           self.joint_program.bind()
+           self.joint_program.setUniformValue("view_projection", matrix)
+           self.joint_program.setUniformValue("joint_size", self.joint_size)
+           self.joint_program.setUniformValue("segments", self.buffer.segment_count)
+           self.joint_program.setUniformValueArray("palette", PALETTE)
+           self.joint_vao.bind()
+           gl.glDrawArraysInstanced(GL_TRIANGLES, 0, len(self.joint_mesh),
+                                    actors * self.buffer.segment_count)
+           self.joint_vao.release()
+
+           self.bone_program.bind()
+           self.bone_program.setUniformValue("view_projection", matrix)
+           self.bone_program.setUniformValue("bones", self.buffer.bone_count)
+           self.bone_program.setUniformValueArray("palette", PALETTE)
+           self.bone_vao.bind()
+           gl.glDrawArraysInstanced(GL_LINES, 0, 2, actors * self.buffer.bone_count)
+           self.bone_vao.release()
+           self.frames_rendered += 1
+
+       def mousePressEvent(self, event):
+           self._drag_position = event.position()
+
+       def mouseMoveEvent(self, event):
+           if self._drag_position is None:
+               return
+           delta = event.position() - self._drag_position
+           self._drag_position = event.position()
+           self.camera.orbit(-delta.x() * 0.4, delta.y() * 0.4)
+           self.update()
+
+       def mouseReleaseEvent(self, event):
+           self._drag_position = None
+
+       def wheelEvent(self, event):
+           self.camera.zoom(0.9 ** (event.angleDelta().y() / 120.0))
+           self.update()
+
+       def frame_actors(self):
+           """Aim the camera at the middle of all actors"""
+           bounds = self.buffer.bounds()
+           if bounds is not None:
+               self.camera.target = bounds.mean(axis=0)
+               self.camera.distance = max(3.0, 1.5 * float(np.linalg.norm(bounds[1] - bounds[0])))
+               self.update()
+
+       def get_status(self) -> Dict:
+           return {
+               "actors": self.buffer.actor_count,
+               "frames_received": self.frames_received,
+               "frames_rendered": self.frames_rendered,
+               "uploads": self.uploads,
+               "error": self.error,
+           }
+
+def opengl_available() -> bool:
+   """Whether an OpenGL 4.1 core context can be created on this platform"""
+   if not HAS_OPENGL:
+       return False
+   context = QOpenGLContext()
+   context.setFormat(default_format())
+   if not context.create():
+       return False
+   surface = QOffscreenSurface()
+   surface.setFormat(context.format())
+   surface.create()
+   current = context.makeCurrent(surface)
+   if current:
+       context.doneCurrent()
+   surface.destroy()
+   version = (context.format().majorVersion(), context.format().minorVersion())
+   return current and version >= (4, 1)
+
+def create_viewport(parents: Sequence[int], parent=None) -> Optional["SkeletonViewport"]:
+   """SkeletonViewport, or None when OpenGL is not installed or has no context"""
+   if not opengl_available():
+       return None
+   return SkeletonViewport(parents, parent)
@@ -1,88 +1,248 @@
 # src/visualization/motion_visualizer.py
 
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QGraphicsView, QGraphicsScene,
-                          QLabel, QHBoxLayout)
-from PyQt6.QtCore import Qt, QRectF, QPointF
-from PyQt6.QtGui import QPainter, QPen, QColor, QBrush
-from typing import Dict, List, Optional
-import math
+                          QLabel, QHBoxLayout, QGraphicsItem, QGraphicsPathItem)
+from PyQt6.QtCore import Qt, QRectF, QPointF, QLineF
+from PyQt6.QtGui import (QPainter, QPen, QColor, QBrush, QPainterPath, QPolygonF,
+                         QPixmap, QTransform)
+import time
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+import numpy as np
+try:
+   from ..data_handlers import quaternions
+   from ..data_handlers.instrumentation import Instrumentation
+   from ..data_handlers.kinematics import ForwardKinematics, bone_offsets
+except ImportError:     # Run as the application, with src/ as the import root
+   from data_handlers import quaternions
+   from data_handlers.instrumentation import Instrumentation
+   from data_handlers.kinematics import ForwardKinematics, bone_offsets
+from .frame_bridge import FrameBridge
+from .performance_hud import PerformanceHUD
+from .trail_buffer import TrailBuffer
+
+def polygon_from_array(points: np.ndarray) -> QPolygonF:
+   """QPolygonF of (n, 2) points, written through its memory without per-point objects"""
+   polygon = QPolygonF()
+   polygon.resize(len(points))
+   if len(points):
+       data = polygon.data()
+       data.setsize(len(points) * 2 * 8)
+       np.frombuffer(data, dtype=np.float64).reshape(-1, 2)[:] = points
+   return polygon
+
+class TrailItem(QGraphicsItem):
+   """Motion trails drawn from a TrailBuffer, one batch of lines per age group.
+
+   Older groups are drawn with more transparent pens, so the trail fades
+   out by age.
+   """
+   def __init__(self, pen: QPen, fade_steps: int = 8):
+       super().__init__()
+       self.pen = pen
+       self.batches: List[Tuple[QPen, QPolygonF]] = []
+       self._bounds = QRectF()
+       self.set_fade_steps(fade_steps)
+       
+   def set_fade_steps(self, fade_steps: int):
+       self.fade_steps = max(1, fade_steps)
+       self._pens = []
+       for step in range(self.fade_steps):
+           pen = QPen(self.pen)
+           color = pen.color()
+           color.setAlphaF(color.alphaF() * (step + 1) / self.fade_steps)
+           pen.setColor(color)
+           self._pens.append(pen)
+       
+   def set_trail(self, trail: TrailBuffer):
+       samples = trail.ordered().reshape(-1, 2)
+       bounds = QRectF()
+       if len(samples):
+           (left, top), (right, bottom) = samples.min(axis=0), samples.max(axis=0)
+           bounds = QRectF(left, top, right - left, bottom - top)
+       batches = [(pen, polygon_from_array(pairs))
+                  for pen, pairs in zip(self._pens, trail.segments(self.fade_steps)) if len(pairs)]
+       self.prepareGeometryChange()
+       self.batches = batches
+       self._bounds = bounds
+       self.update()
+       
+   def boundingRect(self) -> QRectF:
+       margin = self.pen.widthF()
+       return self._bounds.adjusted(-margin, -margin, margin, margin)
+       
+   def paint(self, painter: QPainter, option, widget=None):
+       for pen, pairs in self.batches:
+           painter.setPen(pen)
+           painter.drawLines(pairs)
+
+class SkeletonItems:
+   """Retained items and trail of one actor's skeleton"""
+   def __init__(self, scene: QGraphicsScene, skeleton_pen: QPen, trail_pen: QPen,
+                fade_steps: int):
+       self.points = np.empty((0, 2))
+       self.trail: Optional[TrailBuffer] = None
+       self.trail_item = TrailItem(trail_pen, fade_steps)
+       self.bone_item = QGraphicsPathItem()
+       self.bone_item.setPen(skeleton_pen)
+       self.joint_item = QGraphicsPathItem()
+       self.joint_item.setPen(skeleton_pen)
+       for item in (self.trail_item, self.bone_item, self.joint_item):
+           scene.addItem(item)
 
 class MotionScene(QGraphicsScene):
-   """Custom graphics scene for rendering motion data"""
+   """Custom graphics scene for rendering motion data.
+
+   Each actor passed to update_skeleton() gets its own retained skeleton
+   and trail; the first actor's items exist from the start and are the
+   ones the trail_item, bone_item and joint_item attributes refer to.
+   """
    def __init__(self):
        super().__init__()
-       self.skeleton_points = []
-       self.motion_trail = []
        self.max_trail_length = 50
+       self.trail_joints: Optional[Sequence[int]] = None     # All joints
+       self.fade_steps = 8
        
        # Set up visual styles
        self.skeleton_pen = QPen(QColor(0, 255, 0))  # Green for skeleton
        self.skeleton_pen.setWidth(2)
        self.trail_pen = QPen(QColor(0, 150, 255))   # Blue for motion trail
        self.trail_pen.setWidth(1)
+       self.grid_pen = QPen(QColor(50, 50, 50))    # Dark grey
+       self.grid_size = 50                          # Grid cell size
        
-   def update_skeleton(self, points: List[QPointF]):
-       self.skeleton_points = points
-       if points:
-           self.motion_trail.append(points)
-           if len(self.motion_trail) > self.max_trail_length:
-               self.motion_trail.pop(0)
-       self.update()
+       # Prerendered grids keyed on view size and transform, one per viewport
+       self._grid_cache: Dict[Tuple, QPixmap] = {}
+       self.max_grid_caches = 4
+       
+       # Retained items, updated in place every frame
+       self.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+       self.bones: Optional[List[Tuple[int, int]]] = None
+       self.skeletons: Dict[Hashable, SkeletonItems] = {}
+       self._first = SkeletonItems(self, self.skeleton_pen, self.trail_pen, self.fade_steps)
+       self.trail_item = self._first.trail_item
+       self.bone_item = self._first.bone_item
+       self.joint_item = self._first.joint_item
+       
+   @property
+   def skeleton_points(self) -> np.ndarray:
+       return self._first.points
+       
+   @property
+   def trail(self) -> Optional[TrailBuffer]:
+       return self._first.trail
+       
+   def set_bones(self, parents: Sequence[int]):
+       """Connect joints by parent index (-1 for roots) instead of a simple chain"""
+       self.bones = [(parent, child) for child, parent in enumerate(parents) if parent >= 0]
+       
+   def set_trail(self, length: int, joints: Optional[Sequence[int]] = None, fade_steps: int = 8):
+       """Keep `length` samples of trail for the given joints (all by default)"""
+       self.max_trail_length = length
+       self.trail_joints = joints
+       self.fade_steps = fade_steps
+       for skeleton in self.skeletons.values() or [self._first]:
+           skeleton.trail_item.set_fade_steps(fade_steps)
+           skeleton.trail = None
+       
+   def update_skeleton(self, points, actor: Hashable = None):
+       """Draw the pose of `actor` from QPointF joints or an (S, 2) array of scene coordinates"""
+       if not isinstance(points, np.ndarray):
+           points = np.array([(point.x(), point.y()) for point in points], dtype=np.float64)
+       points = points.reshape(-1, 2)
+       skeleton = self.skeletons.get(actor)
+       if skeleton is None:
+           skeleton = self.skeletons[actor] = (
+               self._first if not self.skeletons else
+               SkeletonItems(self, self.skeleton_pen, self.trail_pen, self.fade_steps))
+       skeleton.points = points
+       if len(points):
+           self._update_trail(skeleton, points)
+       self._update_pose(skeleton, [QPointF(x, y) for x, y in points.tolist()])
+       
+   def _update_pose(self, skeleton: SkeletonItems, points: List[QPointF]):
+       bones = self.bones
+       if bones is None:
+           bones = [(i, i + 1) for i in range(len(points) - 1)]
+       bone_path = QPainterPath()
+       for parent, child in bones:
+           if child < len(points):
+               bone_path.moveTo(points[parent])
+               bone_path.lineTo(points[child])
+       joint_path = QPainterPath()
+       for point in points:
+           joint_path.addEllipse(point, 3, 3)
+       skeleton.bone_item.setPath(bone_path)
+       skeleton.joint_item.setPath(joint_path)
+       
+   def _update_trail(self, skeleton: SkeletonItems, points: np.ndarray):
+       trail = skeleton.trail
+       if trail is None or trail.joint_count != len(points):
+           joints = self.trail_joints
+           if joints is not None:
+               joints = [joint for joint in joints if joint < len(points)]
+           trail = skeleton.trail = TrailBuffer(self.max_trail_length, len(points), 2, joints)
+       trail.push(points)
+       skeleton.trail_item.set_trail(trail)
        
    def drawBackground(self, painter: QPainter, rect: QRectF):
        super().drawBackground(painter, rect)
        
-       # Draw grid
-       grid_pen = QPen(QColor(50, 50, 50))  # Dark grey
-       grid_size = 50  # Grid cell size
+       # Blit the prerendered grid for this view size and transform; it is
+       # only rebuilt when a view is resized or zoomed.
+       device = painter.device()
+       t = painter.worldTransform()
+       key = (device.width(), device.height(), device.devicePixelRatioF(),
+              t.m11(), t.m12(), t.m21(), t.m22(), t.dx(), t.dy())
+       grid = self._grid_cache.get(key)
+       if grid is None:
+           grid = self._render_grid(key, t)
+           if len(self._grid_cache) >= self.max_grid_caches:
+               self._grid_cache.pop(next(iter(self._grid_cache)))
+           self._grid_cache[key] = grid
+       painter.save()
+       painter.resetTransform()
+       painter.drawPixmap(0, 0, grid)
+       painter.restore()
        
-       left = int(rect.left() - (rect.left() % grid_size))
-       top = int(rect.top() - (rect.top() % grid_size))
+   def _render_grid(self, key: Tuple, transform: QTransform) -> QPixmap:
+       width, height, ratio = key[:3]
+       grid = QPixmap(max(1, round(width * ratio)), max(1, round(height * ratio)))
+       grid.setDevicePixelRatio(ratio)
+       grid.fill(Qt.GlobalColor.transparent)
        
-       # Draw vertical lines
-       for x in range(left, int(rect.right()), grid_size):
-           painter.setPen(grid_pen)
-           painter.drawLine(x, rect.top(), x, rect.bottom())
-           
-       # Draw horizontal lines
-       for y in range(top, int(rect.bottom()), grid_size):
-           painter.setPen(grid_pen)
-           painter.drawLine(rect.left(), y, rect.right(), y)
-           
-   def drawForeground(self, painter: QPainter, rect: QRectF):
-       super().drawForeground(painter, rect)
+       inverse, _ = transform.inverted()
+       area = inverse.mapRect(QRectF(0, 0, width, height))
+       left = area.left() - (area.left() % self.grid_size)
+       top = area.top() - (area.top() % self.grid_size)
+       lines = []
+       x = left
+       while x <= area.right():
+           lines.append(QLineF(x, area.top(), x, area.bottom()))
+           x += self.grid_size
+       y = top
+       while y <= area.bottom():
+           lines.append(QLineF(area.left(), y, area.right(), y))
+           y += self.grid_size
        
-       # Draw motion trail
-       for trail_points in self.motion_trail:
-           painter.setPen(self.trail_pen)
-           self._draw_skeleton(painter, trail_points, is_trail=True)
-           
-       # Draw current skeleton
-       if self.skeleton_points:
-           painter.setPen(self.skeleton_pen)
-           self._draw_skeleton(painter, self.skeleton_points, is_trail=False)
+       painter = QPainter(grid)
+       painter.setTransform(transform)
+       painter.setPen(self.grid_pen)
+       painter.drawLines(lines)
+       painter.end()
+       return grid
            
-   def _draw_skeleton(self, painter: QPainter, points: List[QPointF], is_trail: bool):
-       if not points:
-           return
-           
-       # Draw joints
-       for point in points:
-           if is_trail:
-               painter.drawPoint(point)
-           else:
-               painter.drawEllipse(point, 3, 3)
-               
-       # Draw connections between joints
-       if len(points) > 1:
-           for i in range(len(points) - 1):
-               painter.drawLine(points[i], points[i + 1])
-
 class MotionVisualizer(QWidget):
    """Widget for visualizing motion capture data"""
    def __init__(self, parent=None):
        super().__init__(parent)
        
+       # Frames arrive on handler threads at capture rate; the bridge hands
+       # the latest one to the GUI thread once per display refresh.
+       self.bridge = FrameBridge(self)
+       self.bridge.frame_ready.connect(self._apply_frame)
+       # "render" times the scene update, "render_lag" receive to display
+       self.metrics = Instrumentation()
+       
        layout = QVBoxLayout()
        
        self.info_label = QLabel("No data")
@@ -92,36 +252,109 @@ class MotionVisualizer(QWidget):
        self.scene = MotionScene()
        self.view = QGraphicsView(self.scene)
        self.view.setRenderHint(QPainter.RenderHint.Antialiasing)
-       self.view.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+       self.view.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.SmartViewportUpdate)
        self.view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
        self.view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-       self.view.setBackgroundBrush(QBrush(QColor(30, 30, 30)))  # Dark background
+       # The background belongs to the scene: a view background brush would
+       # bypass MotionScene.drawBackground and hide the grid
+       self.scene.setBackgroundBrush(QBrush(QColor(30, 30, 30)))  # Dark background
        
        # Set up view transforms
        self.view.scale(1, -1)  # Flip Y axis to match 3D coordinate system
        layout.addWidget(self.view)
        
        self.setLayout(layout)
+       self.pixels_per_meter = 100.0
+       
+       # Forward kinematics per actor, see set_skeleton()
+       self.parents: Optional[Sequence[int]] = None
+       self.offsets: Optional[np.ndarray] = None
+       self._kinematics: Dict[Hashable, ForwardKinematics] = {}
        
-   def update_data(self, data: Dict):
-       points = self._extract_points(data)
-       if points:
-           self.scene.update_skeleton(points)
-           self.info_label.setText(f"Frame: {data.get('header', 'N/A')}")
+       self.hud = PerformanceHUD(self.view)
+       self.hud.add_source("render", self.get_status)
+       
+   def set_skeleton(self, parents: Sequence[int], offsets: Optional[np.ndarray] = None):
+       """Draw bones by parent index and place joints by forward kinematics.
+       
+       Quaternion pose frames are then drawn from their rotations and root
+       position with rigid bones. The bone offsets, (S, 3) in each parent's
+       frame, are given or calibrated from each actor's first frame.
+       """
+       self.parents = parents
+       self.offsets = offsets
+       self._kinematics.clear()
+       self.scene.set_bones(parents)
+       
+   def set_trail(self, seconds: float, joints: Optional[Sequence[int]] = None,
+                 fade_steps: int = 8):
+       """Trail the given joints (all by default) for `seconds` of displayed frames"""
+       length = max(2, round(seconds * self.bridge.refresh_rate))
+       self.scene.set_trail(length, joints, fade_steps)
+       
+   def set_hud_visible(self, visible: bool):
+       """Show the performance overlay; instrumentation runs while it is shown"""
+       self.metrics.enabled = visible
+       self.hud.setVisible(visible)
+       
+   def update_data(self, frame):
+       """Thread-safe entry point for data callbacks.
+
+       Only pose frames are drawn, so other datagram types are dropped here
+       instead of replacing a pending pose; each actor has its own slot.
+       """
+       if frame.is_pose:
+           self.bridge.publish(frame, (frame.source_id, frame.character_id))
+       
+   def _apply_frame(self, frame):
+       metrics = self.metrics
+       if metrics.enabled:
+           start = time.perf_counter()
+       points = self._extract_points(frame)
+       if len(points):
+           self.scene.update_skeleton(points, (frame.source_id, frame.character_id))
+           coalesced = self.bridge.coalesced
+           suffix = f" ({coalesced} coalesced)" if coalesced else ""
+           self.info_label.setText(f"Frame: {frame.sample_counter}{suffix}")
+       if metrics.enabled:
+           metrics.record("render", time.perf_counter() - start)
+           if frame.receive_time is not None:
+               metrics.record("render_lag", time.monotonic() - frame.receive_time)
            
-   def _extract_points(self, data: Dict) -> List[QPointF]:
-       # Placeholder implementation - update with actual MVN data processing
-       points = []
-       if 'payload' in data:
-           raw_data = data['payload'].get('raw_data', b'')
-           if raw_data:
-               t = data.get('timestamp', 0)
-               points = [
-                   QPointF(100 * math.sin(t), 100 * math.cos(t)),
-                   QPointF(100 * math.sin(t + 0.5), 100 * math.cos(t + 0.5)),
-                   QPointF(100 * math.sin(t + 1.0), 100 * math.cos(t + 1.0))
-               ]
-       return points
+   def get_status(self) -> Dict:
+       status = self.bridge.get_stats()
+       status["metrics"] = self.metrics.get_status()
+       return status
+           
+   def _joint_positions(self, frame) -> Optional[np.ndarray]:
+       """Segment positions of a pose frame, by forward kinematics when possible"""
+       positions, rotations, parents = frame.positions, frame.rotations, self.parents
+       if (parents is None or rotations is None or rotations.shape[-1] != 4
+               or len(rotations) < len(parents)):
+           return positions
+       count = len(parents)
+       key = (frame.source_id, frame.character_id)
+       kinematics = self._kinematics.get(key)
+       global_rotations = quaternions.normalize(rotations[:count].astype(np.float64))
+       if kinematics is None:
+           offsets = self.offsets
+           if offsets is None:
+               if positions is None or len(positions) < count:
+                   return positions
+               offsets = bone_offsets(positions[:count].astype(np.float64), global_rotations, parents)
+           kinematics = self._kinematics[key] = ForwardKinematics(parents, offsets)
+       root = None if positions is None else positions[kinematics.order[0]]
+       joints, _ = kinematics.solve_frame(quaternions.local_rotations(global_rotations, parents), root)
+       return joints
+       
+   def _extract_points(self, frame) -> np.ndarray:
+       """(S, 2) scene coordinates; front view of the Z-up MVN frame, -Y right, Z up"""
+       if not frame.is_pose:
+           return np.empty((0, 2))
+       positions = self._joint_positions(frame)
+       if positions is None:
+           return np.empty((0, 2))
+       return np.asarray(positions)[:, 1:3] * [-self.pixels_per_meter, self.pixels_per_meter]
        
    def resizeEvent(self, event):
        super().resizeEvent(event)
@@ -0,0 +1,76 @@
+# src/visualization/performance_hud.py
+
+from typing import Callable, Dict, List, Tuple
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QLabel, QWidget
+
+class PerformanceHUD(QLabel):
+   """Live performance overlay drawn over the visualization.
+
+   Each source is a name and a get_status() callable whose result holds an
+   Instrumentation status under "metrics"; frame ring overflows and the
+   counters of sequence tracking are shown alongside the stage latencies
+   when present. The text is refreshed from a timer while visible, so a
+   hidden HUD costs nothing.
+   """
+   def __init__(self, parent: QWidget, interval_ms: int = 500):
+       super().__init__(parent)
+       self.sources: List[Tuple[str, Callable[[], Dict]]] = []
+       font = QFont("monospace")
+       font.setStyleHint(QFont.StyleHint.Monospace)
+       font.setPointSize(8)
+       self.setFont(font)
+       self.setStyleSheet("color: #d0ffd0; background-color: rgba(0, 0, 0, 160); padding: 4px;")
+       self.timer = QTimer(self)
+       self.timer.setInterval(interval_ms)
+       self.timer.timeout.connect(self.refresh)
+       self.hide()
+
+   def add_source(self, name: str, get_status: Callable[[], Dict]):
+       self.sources.append((name, get_status))
+
+   def setVisible(self, visible: bool):
+       super().setVisible(visible)
+       if visible:
+           self.refresh()
+           self.timer.start()
+       else:
+           self.timer.stop()
+
+   def refresh(self):
+       lines = []
+       for name, get_status in self.sources:
+           try:
+               status = get_status()
+           except Exception as e:
+               lines.append(f"{name}: {e}")
+               continue
+           if status:
+               lines.extend(format_status(name, status))
+       self.setText("\n".join(lines) or "No metrics")
+       self.adjustSize()
+       self.move(8, 8)
+
+def format_status(name: str, status: Dict) -> List[str]:
+   """HUD lines for one component's get_status() result"""
+   lines = []
+   metrics = status.get("metrics") or {}
+   for stage, stats in metrics.get("stages", {}).items():
+       lines.append(f"{name:<10}{stage:<11}p50 {stats['p50_ms']:7.3f}  p99 {stats['p99_ms']:7.3f}"
+                    f"  max {stats['max_ms']:7.2f} ms  n={stats['count']}")
+   counters = dict(metrics.get("counters", {}))
+   consumers = (status.get("frame_buffer") or {}).get("consumers", [])
+   overflows = sum(consumer["overflows"] for consumer in consumers)
+   if overflows:
+       counters["ring_overflows"] = overflows
+   sequence = status.get("sequence") or {}
+   for counter in ("lost", "late", "duplicated", "out_of_order", "incomplete"):
+       if sequence.get(counter):
+           counters[counter] = sequence[counter]
+   if status.get("coalesced"):
+       counters["coalesced"] = status["coalesced"]
+   if counters:
+       lines.append(f"{name:<10}" + "  ".join(f"{key} {value}" for key, value in sorted(counters.items())))
+   return lines
@@ -0,0 +1,123 @@
+# src/visualization/skeleton_buffer.py
+
+import math
+import threading
+from typing import Dict, Hashable, Optional, Sequence
+
+import numpy as np
+
+class SkeletonBuffer:
+   """Pose data of every actor in one contiguous float32 array.
+
+   The array holds the joint positions of all actors, (actors, S, 3),
+   followed by the bone endpoints, (actors, B, 2, 3), so a frame is
+   uploaded to the GPU with a single buffer write and drawn with one
+   instanced draw per primitive. Actors get a slot on their first frame;
+   the array grows by doubling, which is the only time it is reallocated.
+
+   update() may be called from any thread; pack() runs on the render thread.
+   """
+   def __init__(self, parents: Sequence[int], capacity: int = 4):
+       self.parents = np.asarray(parents)
+       self.segment_count = len(self.parents)
+       self.bone_children = np.flatnonzero(self.parents >= 0)
+       self.bone_parents = self.parents[self.bone_children]
+       self.bone_count = len(self.bone_children)
+       self.slots: Dict[Hashable, int] = {}
+       self.version = 0          # Bumped by every update, for dirty checks
+       self.lock = threading.Lock()
+       self._allocate(capacity)
+
+   def _allocate(self, capacity: int):
+       self.capacity = capacity
+       self.data = np.zeros(capacity * (self.segment_count * 3 + self.bone_count * 6),
+                            dtype=np.float32)
+       self.joint_floats = capacity * self.segment_count * 3
+       self.joints = self.data[:self.joint_floats].reshape(capacity, self.segment_count, 3)
+       self.bones = self.data[self.joint_floats:].reshape(capacity, self.bone_count, 2, 3)
+
+   @property
+   def actor_count(self) -> int:
+       return len(self.slots)
+
+   def update(self, key: Hashable, positions: np.ndarray) -> bool:
+       """Store one actor's global segment positions (at least S rows)"""
+       if positions is None or len(positions) < self.segment_count:
+           return False
+       with self.lock:
+           slot = self.slots.get(key)
+           if slot is None:
+               slot = len(self.slots)
+               if slot == self.capacity:
+                   joints = self.joints
+                   self._allocate(self.capacity * 2)
+                   self.joints[:slot] = joints
+               self.slots[key] = slot
+           self.joints[slot] = positions[:self.segment_count]
+           self.version += 1
+       return True
+
+   def pack(self) -> np.ndarray:
+       """Fill the bone endpoints from the joints; the caller holds `lock`"""
+       actors = self.actor_count
+       joints = self.joints[:actors]
+       np.take(joints, self.bone_parents, axis=1, out=self.bones[:actors, :, 0], mode="clip")
+       np.take(joints, self.bone_children, axis=1, out=self.bones[:actors, :, 1], mode="clip")
+       return self.data
+
+   def bounds(self) -> Optional[np.ndarray]:
+       """Min and max corner of all joints, (2, 3)"""
+       with self.lock:
+           if not self.slots:
+               return None
+           joints = self.joints[:self.actor_count].reshape(-1, 3)
+           return np.stack((joints.min(axis=0), joints.max(axis=0)))
+
+class OrbitCamera:
+   """Z-up orbit camera producing row-major view-projection matrices"""
+   def __init__(self, distance: float = 6.0, yaw: float = -60.0, pitch: float = 15.0,
+                fov: float = 45.0):
+       self.target = np.array([0.0, 0.0, 1.0])
+       self.distance = distance
+       self.yaw = yaw          # Degrees about Z, 0 looks along +X
+       self.pitch = pitch      # Degrees above the horizon
+       self.fov = fov
+
+   def orbit(self, d_yaw: float, d_pitch: float):
+       self.yaw = (self.yaw + d_yaw) % 360.0
+       self.pitch = min(89.0, max(-89.0, self.pitch + d_pitch))
+
+   def zoom(self, factor: float):
+       self.distance = min(100.0, max(0.2, self.distance * factor))
+
+   def eye(self) -> np.ndarray:
+       yaw, pitch = math.radians(self.yaw), math.radians(self.pitch)
+       direction = np.array([math.cos(pitch) * math.cos(yaw),
+                             math.cos(pitch) * math.sin(yaw),
+                             math.sin(pitch)])
+       return self.target - direction * self.distance
+
+   def view(self) -> np.ndarray:
+       eye = self.eye()
+       forward = self.target - eye
+       forward /= np.linalg.norm(forward)
+       right = np.cross(forward, (0.0, 0.0, 1.0))
+       right /= np.linalg.norm(right)
+       up = np.cross(right, forward)
+       view = np.identity(4)
+       view[0, :3], view[1, :3], view[2, :3] = right, up, -forward
+       view[:3, 3] = -view[:3, :3] @ eye
+       return view
+
+   def projection(self, aspect: float, near: float = 0.05, far: float = 200.0) -> np.ndarray:
+       f = 1.0 / math.tan(math.radians(self.fov) / 2.0)
+       projection = np.zeros((4, 4))
+       projection[0, 0] = f / max(aspect, 1e-6)
+       projection[1, 1] = f
+       projection[2, 2] = (far + near) / (near - far)
+       projection[2, 3] = 2.0 * far * near / (near - far)
+       projection[3, 2] = -1.0
+       return projection
+
+   def view_projection(self, aspect: float) -> np.ndarray:
+       return self.projection(aspect) @ self.view()
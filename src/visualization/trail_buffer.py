@@ -0,0 +1,67 @@
+# src/visualization/trail_buffer.py
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+class TrailBuffer:
+   """Motion trails of selected joints in a preallocated ring buffer.
+
+   samples is (capacity, joints, dims) and write_index the slot the next
+   sample goes to, so push() overwrites the oldest sample in place instead
+   of shifting or allocating. `joints` picks which of the joint_count
+   joints leave a trail, all by default. segments() cuts the trail into
+   line segments grouped by age, each group a flat array of point pairs
+   that is drawn as one batch.
+   """
+   def __init__(self, capacity: int, joint_count: int, dims: int = 2,
+                joints: Optional[Sequence[int]] = None):
+       self.capacity = max(2, capacity)
+       self.joint_count = joint_count
+       self.dims = dims
+       self.joints = (np.arange(joint_count) if joints is None
+                      else np.asarray(joints, dtype=np.intp).reshape(-1))
+       if len(self.joints) and (self.joints.min() < 0 or self.joints.max() >= joint_count):
+           raise ValueError(f"Trail joints must lie in [0, {joint_count})")
+       self.samples = np.zeros((self.capacity, len(self.joints), dims))
+       self.write_index = 0
+       self.count = 0
+
+   def push(self, points: np.ndarray):
+       """Append one sample from (joint_count, >= dims) joint positions"""
+       self.samples[self.write_index] = points[self.joints, :self.dims]
+       self.write_index = (self.write_index + 1) % self.capacity
+       self.count = min(self.count + 1, self.capacity)
+
+   def clear(self):
+       self.write_index = 0
+       self.count = 0
+
+   def ordered(self) -> np.ndarray:
+       """Samples oldest first, (count, joints, dims); a view until the buffer wraps"""
+       if self.count < self.capacity:
+           return self.samples[:self.count]
+       return np.concatenate((self.samples[self.write_index:], self.samples[:self.write_index]))
+
+   def ages(self) -> np.ndarray:
+       """Age in samples of each row of ordered(), 0 for the newest"""
+       return np.arange(self.count - 1, -1, -1)
+
+   def segments(self, fade_steps: int = 1) -> List[np.ndarray]:
+       """Trail segments as (2 * k, dims) point pairs in fade_steps age groups.
+
+       Group j, oldest first, holds the segments whose age falls in the
+       j-th from last of fade_steps equal parts of the full trail length,
+       so a segment keeps its shade as the trail fills up.
+       """
+       fade_steps = max(1, fade_steps)
+       samples = self.ordered()
+       empty = np.empty((0, self.dims))
+       if len(samples) < 2:
+           return [empty] * fade_steps
+       pairs = np.stack((samples[:-1], samples[1:]), axis=2)    # (n - 1, joints, 2, dims)
+       # Segment i joins samples i and i + 1; its age runs from n - 2 down to 0
+       steps = np.arange(len(pairs) - 1, -1, -1) * fade_steps // (self.capacity - 1)
+       bounds = np.searchsorted(-steps, -np.arange(fade_steps - 1, -2, -1), side="left")
+       return [pairs[lo:hi].reshape(-1, self.dims) if hi > lo else empty
+               for lo, hi in zip(bounds[:-1], bounds[1:])]
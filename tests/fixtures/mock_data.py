@@ -1,12 +1,39 @@
 import pytest
 from dataclasses import dataclass
 
+import numpy as np
+
+from src.data_handlers.mvn_protocol import (MVNFrame, POSE_QUATERNION, SEGMENT_COUNT,
+                                            encode_frame)
+
+
+def make_pose_frame(sample_counter: int = 1, segment_count: int = SEGMENT_COUNT,
+                    time_code: int = 0, character_id: int = 0) -> MVNFrame:
+    """Build a quaternion pose frame with a simple standing skeleton"""
+    positions = np.zeros((segment_count, 3), dtype=np.float32)
+    positions[:, 2] = np.linspace(0.0, 1.8, segment_count, dtype=np.float32)
+    rotations = np.zeros((segment_count, 4), dtype=np.float32)
+    rotations[:, 0] = 1.0
+    return MVNFrame(
+        datagram_type=POSE_QUATERNION,
+        sample_counter=sample_counter,
+        datagram_counter=0,
+        is_last_datagram=True,
+        time_code=time_code,
+        character_id=character_id,
+        timestamp=0.0,
+        body_segment_count=segment_count,
+        segment_ids=np.arange(1, segment_count + 1, dtype=np.int32),
+        positions=positions,
+        rotations=rotations,
+    )
+
+
+def make_pose_datagram(sample_counter: int = 1, **kwargs) -> bytes:
+    """Encoded quaternion pose datagram as sent by MVN"""
+    return encode_frame(make_pose_frame(sample_counter, **kwargs))
+
+
 @pytest.fixture
 def mock_mvn_data():
-    return {
-        'header': 1,
-        'timestamp': 0.0,
-        'payload': {
-            'raw_data': b'test'
-        }
-    }
+    return make_pose_frame()
@@ -5,6 +5,7 @@ from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
 from src.visualization.motion_visualizer import MotionVisualizer
 from src.data_handlers.mvn_data_handler import MVNDataHandler, XSensConfig
+from tests.fixtures.mock_data import make_pose_frame
 
 @pytest.fixture
 def app():
@@ -26,13 +27,7 @@ def test_visualizer_creation(visualizer):
 
 def test_data_update(visualizer):
     """Test visualizer handles data updates"""
-    test_data = {
-        'header': 1,
-        'timestamp': 0.0,
-        'payload': {
-            'raw_data': b'test'
-        }
-    }
+    test_data = make_pose_frame()
     visualizer.update_data(test_data)
     # Should not raise any exceptions
 
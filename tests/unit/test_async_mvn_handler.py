@@ -0,0 +1,106 @@
+# tests/unit/test_async_mvn_handler.py
+import asyncio
+import socket
+import time
+
+from src.data_handlers.async_mvn_handler import AsyncMVNDataHandler
+from src.data_handlers.mvn_data_handler import XSensConfig
+from tests.fixtures.mock_data import make_pose_datagram
+
+
+class TestAsyncMVNDataHandler:
+    """Unit tests for AsyncMVNDataHandler"""
+
+    def test_udp_frames(self):
+        """Test async iteration over UDP frames and immediate shutdown"""
+        async def run():
+            async with AsyncMVNDataHandler(XSensConfig(host="127.0.0.1", port=0)) as handler:
+                address = handler.transport.get_extra_info("sockname")
+                sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                for i in range(20):
+                    sender.sendto(make_pose_datagram(sample_counter=i), address)
+                sender.close()
+
+                received = []
+                async for frame in handler.frames():
+                    received.append(frame.sample_counter)
+                    if len(received) == 20:
+                        handler.close()
+                return received
+
+        assert asyncio.run(asyncio.wait_for(run(), 5.0)) == list(range(20))
+
+    def test_udp_overflow_drops_oldest(self):
+        """Test that a full UDP queue drops the oldest frames"""
+        async def run():
+            config = XSensConfig(host="127.0.0.1", port=0, frame_buffer_size=4)
+            handler = AsyncMVNDataHandler(config)
+            for i in range(10):
+                handler._deliver(make_pose_datagram(sample_counter=i), stream=False)
+            handler.close()
+            return handler
+
+        handler = asyncio.run(run())
+        assert handler.dropped_frames == 6
+
+    def test_tcp_backpressure(self):
+        """Test that TCP reading pauses while the consumer lags and resumes after"""
+        async def run():
+            received = []
+
+            async def serve(reader, writer):
+                writer.write(b"".join(make_pose_datagram(sample_counter=i) for i in range(50)))
+                await writer.drain()
+                writer.close()
+
+            server = await asyncio.start_server(serve, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            config = XSensConfig(host="127.0.0.1", port=port, protocol="TCP", frame_buffer_size=8)
+            async with AsyncMVNDataHandler(config) as handler:
+                async for frame in handler.frames():
+                    received.append(frame.sample_counter)
+                    await asyncio.sleep(0.001)
+            server.close()
+            return received, handler
+
+        received, handler = asyncio.run(asyncio.wait_for(run(), 5.0))
+        assert received == list(range(50))
+        assert handler.read_pauses >= 1
+        assert handler.dropped_frames == 0
+
+    def test_cancellation_is_immediate(self):
+        """Test that cancelling a waiting consumer does not wait for a timeout"""
+        async def run():
+            handler = AsyncMVNDataHandler(XSensConfig(host="127.0.0.1", port=0, timeout=5.0))
+            await handler.connect()
+
+            async def consume():
+                async for _ in handler.frames():
+                    pass
+
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            start = time.monotonic()
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            handler.close()
+            return time.monotonic() - start
+
+        assert asyncio.run(run()) < 0.5
+
+    def test_connect_failure(self):
+        """Test that a refused TCP connection is reported"""
+        async def run():
+            probe = socket.socket()
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+            probe.close()
+            handler = AsyncMVNDataHandler(XSensConfig(host="127.0.0.1", port=port, protocol="TCP"))
+            return await handler.connect()
+
+        success, message = asyncio.run(run())
+        assert not success
+        assert "Failed" in message
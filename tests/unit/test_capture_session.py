@@ -0,0 +1,77 @@
+# tests/unit/test_capture_session.py
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import closing
+
+from src.data_handlers.capture_session import CaptureSession, new_take_path
+from src.data_handlers.session_config import ConfigStore, DeviceSettings, SessionProfile
+from src.data_handlers.take_codec import open_take
+from tests.fixtures.mock_data import make_pose_datagram
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "src")
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class TestCaptureSession:
+    """Unit tests for headless capture"""
+
+    def test_take_path(self, tmp_path):
+        """Test that takes are tagged with a file name safe device name"""
+        path = new_take_path(str(tmp_path), "XSens 2")
+        assert os.path.dirname(path) == str(tmp_path)
+        assert os.path.basename(path).startswith("take_") and path.endswith("_XSens_2.mtk")
+
+    def test_records_each_xsens_device(self, tmp_path):
+        """Test that every XSens device gets its own take and other devices are skipped"""
+        profile = SessionProfile("stage", [
+            DeviceSettings("XSens", {"host": "127.0.0.1", "port": 0}),
+            DeviceSettings("XSens 2", {"host": "127.0.0.1", "port": 0}),
+            DeviceSettings("StretchSense"),
+        ], takes_directory=str(tmp_path / "takes"), take_codec="zlib")
+        session = CaptureSession(profile, fsync=False)
+        results = session.start()
+        try:
+            assert sorted(results) == ["XSens", "XSens 2"]
+            assert all(success for success, _ in results.values())
+            sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                for name, count in (("XSens", 30), ("XSens 2", 20)):
+                    address = session.hub._sources[name].sock.getsockname()
+                    for i in range(count):
+                        sender.sendto(make_pose_datagram(sample_counter=i), address)
+                wait_for(lambda: [status["frames_recorded"]
+                                  for status in session.get_status().values()] == [30, 20])
+            finally:
+                sender.close()
+        finally:
+            statuses = session.stop()
+        assert [status["frames_written"] for status in statuses.values()] == [30, 20]
+        with closing(open_take(statuses["XSens 2"]["path"])) as take:
+            assert len(take) == 20
+
+    def test_headless_main_does_not_load_qt(self, tmp_path):
+        """Test that --no-gui records and saves its profile without importing PyQt6"""
+        config = tmp_path / "config.json"
+        store = ConfigStore(str(config))
+        store.profile("rig").devices = [DeviceSettings("XSens", {"host": "127.0.0.1", "port": 0})]
+        store.save()
+        script = (
+            "import sys, main\n"
+            f"code = main.main(['--no-gui', '--duration', '0.2', '--config', {str(config)!r},"
+            f" '--profile', 'rig', '--takes-directory', {str(tmp_path / 'takes')!r}])\n"
+            "sys.exit(3 if 'PyQt6' in sys.modules else code)\n"
+        )
+        env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC_DIR))
+        result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env,
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert "XSens: Nothing recorded" in result.stdout
+        assert '"active": "rig"' in config.read_text()
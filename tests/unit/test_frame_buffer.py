@@ -0,0 +1,79 @@
+# tests/unit/test_frame_buffer.py
+import threading
+import time
+
+import pytest
+
+from src.data_handlers.frame_buffer import BLOCK, DROP_OLDEST, FrameRingBuffer
+
+
+class TestFrameRingBuffer:
+    """Unit tests for FrameRingBuffer and FrameConsumer"""
+
+    @pytest.fixture
+    def ring(self):
+        """Create a small ring for each test"""
+        return FrameRingBuffer(capacity=4)
+
+    def test_latest(self, ring):
+        """Test that latest() returns the last published frame"""
+        assert ring.latest() is None
+        for i in range(10):
+            ring.publish(i)
+        assert ring.latest() == 9
+
+    def test_consumers_have_independent_cursors(self, ring):
+        """Test that each consumer sees every frame once"""
+        first = ring.add_consumer()
+        second = ring.add_consumer()
+        for i in range(3):
+            ring.publish(i)
+        assert [first.poll() for _ in range(3)] == [0, 1, 2]
+        assert first.poll() is None
+        assert second.lag == 3
+        assert second.poll() == 0
+
+    def test_drop_oldest_counts_overflows(self, ring):
+        """Test that a lagging consumer skips to the oldest retained frame"""
+        consumer = ring.add_consumer(DROP_OLDEST)
+        for i in range(10):
+            ring.publish(i)
+        assert consumer.lag == 10
+        assert consumer.poll() == 6
+        assert consumer.overflows == 6
+        assert consumer.max_lag == 10
+
+    def test_block_policy_waits_for_consumer(self, ring):
+        """Test that the producer waits instead of overwriting unread frames"""
+        consumer = ring.add_consumer(BLOCK)
+        received = []
+
+        def slow_reader():
+            while len(received) < 20:
+                frame = consumer.get(timeout=2.0)
+                if frame is None:
+                    break
+                received.append(frame)
+                time.sleep(0.001)
+
+        reader = threading.Thread(target=slow_reader)
+        reader.start()
+        for i in range(20):
+            ring.publish(i)
+        reader.join(timeout=5.0)
+        assert received == list(range(20))
+        assert consumer.overflows == 0
+
+    def test_get_times_out_and_close_wakes(self, ring):
+        """Test blocking reads time out and are released by close()"""
+        consumer = ring.add_consumer()
+        assert consumer.get(timeout=0.01) is None
+        threading.Timer(0.05, consumer.close).start()
+        start = time.monotonic()
+        assert consumer.get(timeout=5.0) is None
+        assert time.monotonic() - start < 1.0
+
+    def test_unknown_policy(self, ring):
+        """Test that an invalid policy is rejected"""
+        with pytest.raises(ValueError):
+            ring.add_consumer("newest_only")
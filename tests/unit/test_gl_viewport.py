@@ -0,0 +1,73 @@
+# tests/unit/test_gl_viewport.py
+import numpy as np
+import pytest
+from PyQt6.QtWidgets import QApplication
+
+from src.data_handlers.mvn_protocol import SEGMENT_PARENTS
+from src.visualization.gl_viewport import create_viewport, opengl_available
+from src.visualization.skeleton_buffer import OrbitCamera, SkeletonBuffer
+from tests.fixtures.mock_data import make_pose_frame
+
+@pytest.fixture(scope="module")
+def qapp():
+    """Create QApplication instance for all tests"""
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+class TestSkeletonBuffer:
+    """Unit tests for SkeletonBuffer packing"""
+
+    def test_pack_bones(self):
+        """Test that joints and bone endpoints share one contiguous array"""
+        buffer = SkeletonBuffer(SEGMENT_PARENTS, capacity=2)
+        positions = make_pose_frame().positions
+        assert buffer.update(("a", 0), positions)
+        assert not buffer.update(("b", 0), positions[:3])
+        data = buffer.pack()
+        assert data.dtype == np.float32 and data.flags["C_CONTIGUOUS"]
+        assert np.shares_memory(data, buffer.joints) and np.shares_memory(data, buffer.bones)
+        child = buffer.bone_children[0]
+        np.testing.assert_array_equal(buffer.bones[0, 0, 0], positions[SEGMENT_PARENTS[child]])
+        np.testing.assert_array_equal(buffer.bones[0, 0, 1], positions[child])
+
+    def test_actor_slots_grow(self):
+        """Test that new actors get slots and earlier poses survive growth"""
+        buffer = SkeletonBuffer(SEGMENT_PARENTS, capacity=1)
+        for character_id in range(3):
+            positions = make_pose_frame(character_id=character_id).positions + character_id
+            buffer.update(("suit", character_id), positions)
+        assert buffer.actor_count == 3 and buffer.capacity == 4
+        assert buffer.slots[("suit", 2)] == 2
+        assert buffer.joints[1, 0, 0] == 1.0
+        assert buffer.version == 3
+        bounds = buffer.bounds()
+        assert bounds[0, 0] == 0.0 and bounds[1, 0] == 2.0
+
+class TestOrbitCamera:
+    """Unit tests for OrbitCamera"""
+
+    def test_target_projects_to_center(self):
+        """Test that the orbit target stays at the view center from any angle"""
+        camera = OrbitCamera()
+        camera.orbit(75.0, 100.0)
+        assert camera.pitch == 89.0
+        camera.zoom(0.5)
+        clip = camera.view_projection(16 / 9) @ np.append(camera.target, 1.0)
+        np.testing.assert_allclose(clip[:2] / clip[3], 0.0, atol=1e-9)
+        assert -1.0 < clip[2] / clip[3] < 1.0
+
+class TestSkeletonViewport:
+    """Rendering tests, skipped where no OpenGL 4.1 context can be created"""
+
+    def test_render(self, qapp):
+        """Test that a frame is uploaded once and drawn"""
+        if not opengl_available():
+            pytest.skip("OpenGL 4.1 context not available")
+        viewport = create_viewport(SEGMENT_PARENTS)
+        viewport.resize(320, 240)
+        viewport.update_data(make_pose_frame())
+        viewport.grabFramebuffer()
+        status = viewport.get_status()
+        assert status["error"] is None
+        assert status["actors"] == 1
+        assert status["uploads"] == 1 and status["frames_rendered"] >= 1
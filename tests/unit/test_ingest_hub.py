@@ -0,0 +1,136 @@
+# tests/unit/test_ingest_hub.py
+import socket
+import threading
+import time
+
+import pytest
+
+from src.data_handlers.ingest_hub import IngestHub
+from src.data_handlers.mvn_data_handler import XSensConfig
+from tests.fixtures.mock_data import make_pose_datagram
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class TestIngestHub:
+    """Unit tests for IngestHub"""
+
+    @pytest.fixture
+    def hub(self):
+        hub = IngestHub()
+        yield hub
+        hub.close()
+
+    def test_routes_many_udp_sources(self, hub):
+        """Test that a dozen sources share one receive thread and are routed by ID"""
+        threads_before = threading.active_count()
+        addresses = {}
+        for i in range(12):
+            source_id = f"suit{i}"
+            assert hub.add_source(source_id, XSensConfig(host="127.0.0.1", port=0))[0]
+            addresses[source_id] = hub._sources[source_id].sock.getsockname()
+
+        everything, suit3 = [], []
+        hub.add_data_callback(lambda frame: everything.append(frame.source_id))
+        hub.source("suit3").add_data_callback(lambda frame: suit3.append(frame.sample_counter))
+        hub.start_streaming()
+        # One receive thread plus one dispatcher per callback, none per source
+        assert threading.active_count() - threads_before == 3
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for i in range(5):
+                for source_id, address in addresses.items():
+                    sender.sendto(make_pose_datagram(sample_counter=i), address)
+            wait_for(lambda: len(everything) >= 60)
+        finally:
+            sender.close()
+
+        assert sorted(set(everything)) == sorted(addresses)
+        assert suit3 == list(range(5))
+        assert hub.get_latest_data("suit3").source_id == "suit3"
+        assert hub.get_status()["sources"]["suit7"]["frames"] == 5
+
+    def test_slow_source_consumer_ignores_other_sources(self):
+        """Test that a per-source consumer only buffers its own source's frames"""
+        hub = IngestHub(frame_buffer_size=8)
+        release = threading.Event()
+        slow = []
+
+        def consume_slowly(frame):
+            release.wait(5.0)
+            slow.append(frame.sample_counter)
+
+        try:
+            for source_id in ("a", "b"):
+                assert hub.add_source(source_id, XSensConfig(host="127.0.0.1", port=0))[0]
+            hub.source("a").add_data_callback(consume_slowly)
+            hub.start_streaming()
+            sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                for i in range(5):
+                    sender.sendto(make_pose_datagram(sample_counter=i),
+                                  hub._sources["a"].sock.getsockname())
+                # Many times the ring's capacity, in bursts the socket buffer keeps
+                for burst in range(10):
+                    for i in range(burst * 10, burst * 10 + 10):
+                        sender.sendto(make_pose_datagram(sample_counter=i),
+                                      hub._sources["b"].sock.getsockname())
+                    wait_for(lambda: hub.get_status()["sources"]["b"]["frames"] == burst * 10 + 10)
+            finally:
+                sender.close()
+            release.set()
+            wait_for(lambda: len(slow) == 5)
+            assert slow == list(range(5))
+            status = hub.source("a").get_status()["frame_buffer"]
+            assert status["published"] == 5 and status["consumers"][0]["overflows"] == 0
+            assert hub.get_status()["sources"]["b"]["frames"] == 100
+        finally:
+            hub.close()
+
+    def test_add_and_remove_while_streaming(self, hub):
+        """Test that sources can join and leave a running loop"""
+        received = []
+        hub.add_data_callback(lambda frame: received.append(frame.source_id))
+        hub.start_streaming()
+        assert hub.add_source("late", XSensConfig(host="127.0.0.1", port=0))[0]
+        address = hub._sources["late"].sock.getsockname()
+
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sender.sendto(make_pose_datagram(), address)
+            wait_for(lambda: received)
+            assert received == ["late"]
+            assert hub.remove_source("late")[0]
+            assert not hub.source("late").is_connected
+            assert not hub.remove_source("late")[0]
+        finally:
+            sender.close()
+
+    def test_tcp_peer_close(self, hub):
+        """Test that a closed TCP stream drops the source and reports it"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        messages = []
+        hub.set_connection_callback(lambda connected, message: messages.append((connected, message)))
+        received = []
+        hub.add_data_callback(lambda frame: received.append(frame.sample_counter))
+        try:
+            config = XSensConfig(host="127.0.0.1", port=server.getsockname()[1], protocol="TCP")
+            assert hub.add_source("glove", config)[0]
+            connection, _ = server.accept()
+            hub.start_streaming()
+            connection.sendall(make_pose_datagram(sample_counter=1) + make_pose_datagram(sample_counter=2))
+            wait_for(lambda: len(received) == 2)
+            connection.close()
+            wait_for(lambda: "glove" not in hub.source_ids)
+        finally:
+            server.close()
+
+        assert received == [1, 2]
+        assert messages[-1] == (False, "glove: Connection closed by peer")
@@ -0,0 +1,62 @@
+# tests/unit/test_instrumentation.py
+import json
+
+import pytest
+
+from src.data_handlers.instrumentation import (Instrumentation, LatencyHistogram, MetricsDumper,
+                                               to_prometheus)
+
+
+class TestLatencyHistogram:
+    """Unit tests for LatencyHistogram"""
+
+    def test_percentiles(self):
+        """Test that percentiles resolve to the upper bound of their bucket"""
+        histogram = LatencyHistogram()
+        for _ in range(98):
+            histogram.record(0.0001)
+        histogram.record(0.01)
+        histogram.record(0.5)
+        counts = list(histogram.counts)
+        assert histogram.count == 100
+        assert 0.0001 <= histogram.percentile(50) < 0.0002
+        assert 0.01 <= histogram.percentile(99) < 0.02
+        assert histogram.percentile(100) >= 0.5
+        assert histogram.max == 0.5
+        # Buckets are preallocated; recording only increments them
+        histogram.record(20.0)
+        assert len(histogram.counts) == len(counts) and histogram.counts[-1] == 1
+
+
+class TestInstrumentation:
+    """Unit tests for Instrumentation and its exports"""
+
+    def test_status_and_prometheus(self):
+        """Test that only stages with samples are reported, in both formats"""
+        metrics = Instrumentation(enabled=True)
+        metrics.record("parse", 0.00002)
+        metrics.record("parse", 0.00004)
+        metrics.count("parse_errors")
+        status = metrics.get_status()
+        assert list(status["stages"]) == ["parse"]
+        assert status["stages"]["parse"]["count"] == 2
+        assert status["counters"] == {"parse_errors": 1}
+
+        text = to_prometheus({"hub": metrics})
+        assert 'mocap_stage_seconds_count{component="hub",stage="parse"} 2' in text
+        assert 'mocap_stage_seconds_bucket{component="hub",stage="parse",le="+Inf"} 2' in text
+        assert 'mocap_events_total{component="hub",event="parse_errors"} 1' in text
+
+    def test_dumper(self, tmp_path):
+        """Test that the dumper writes every available component and skips missing ones"""
+        metrics = Instrumentation(enabled=True)
+        metrics.record("receive", 0.001)
+        path = str(tmp_path / "metrics.json")
+        dumper = MetricsDumper(path, {"hub": lambda: metrics, "recorder": lambda: None})
+        dumper.dump()
+        with open(path) as handle:
+            dump = json.load(handle)
+        assert list(dump["components"]) == ["hub"]
+        assert dump["components"]["hub"]["stages"]["receive"]["count"] == 1
+        with pytest.raises(ValueError):
+            MetricsDumper(path, {}, format="xml")
@@ -0,0 +1,91 @@
+# tests/unit/test_kinematics.py
+import numpy as np
+import pytest
+
+from src.data_handlers import quaternions
+from src.data_handlers.kinematics import ForwardKinematics, bone_offsets, hierarchy_levels
+from src.data_handlers.mvn_protocol import SEGMENT_PARENTS
+
+
+def random_pose(rng, frames, segments=len(SEGMENT_PARENTS)):
+    positions = rng.normal(size=(frames, segments, 3))
+    rotations = quaternions.normalize(rng.normal(size=(frames, segments, 4)))
+    return positions, rotations
+
+
+class TestHierarchy:
+    """Unit tests for hierarchy ordering"""
+
+    def test_levels(self):
+        """Test that levels follow depth whatever the listing order"""
+        assert [list(level) for level in hierarchy_levels([2, -1, 1, 1])] == [[2, 3], [0]]
+        with pytest.raises(ValueError):
+            hierarchy_levels([1, 0])
+        with pytest.raises(ValueError):
+            hierarchy_levels([-1, 5])
+
+
+class TestForwardKinematics:
+    """Unit tests for ForwardKinematics"""
+
+    def test_round_trip(self):
+        """Test that FK of local rotations and offsets rebuilds a rigid global pose"""
+        rng = np.random.default_rng(3)
+        _, rotations = random_pose(rng, 6)
+        offsets = rng.normal(size=(len(SEGMENT_PARENTS), 3))
+        offsets[0] = 0.0
+        root = rng.normal(size=(6, 3))
+        kinematics = ForwardKinematics(SEGMENT_PARENTS, offsets)
+        local = quaternions.local_rotations(rotations, SEGMENT_PARENTS)
+        positions, world = kinematics.solve(local, root)
+        assert positions.shape == (6, 23, 3) and world.shape == (6, 23, 4)
+        np.testing.assert_allclose(np.abs(np.sum(world * rotations, axis=-1)), 1.0, atol=1e-9)
+        np.testing.assert_allclose(positions[:, 0], root)
+        np.testing.assert_allclose(bone_offsets(positions, world, SEGMENT_PARENTS)[:, 1:],
+                                   np.broadcast_to(offsets[1:], (6, 22, 3)), atol=1e-9)
+
+    def test_single_frame_matches_batch(self):
+        """Test that the live path reuses its outputs and agrees with batch mode"""
+        rng = np.random.default_rng(4)
+        positions, rotations = random_pose(rng, 3)
+        kinematics = ForwardKinematics(SEGMENT_PARENTS, bone_offsets(positions[0], rotations[0],
+                                                                     SEGMENT_PARENTS))
+        local = quaternions.local_rotations(rotations, SEGMENT_PARENTS)
+        batch_positions, batch_rotations = kinematics.solve(local, positions[:, 0])
+        for i in range(3):
+            frame_positions, frame_rotations = kinematics.solve_frame(local[i].astype(np.float32),
+                                                                      positions[i, 0])
+            assert frame_positions is kinematics.positions
+            np.testing.assert_allclose(frame_positions, batch_positions[i], atol=1e-5)
+            np.testing.assert_allclose(frame_rotations, batch_rotations[i], atol=1e-5)
+        np.testing.assert_allclose(batch_positions[0], positions[0], atol=1e-9)
+
+    def test_rotation_chain(self):
+        """Test a two-bone arm against hand-computed positions"""
+        kinematics = ForwardKinematics([-1, 0, 1], [[0.0, 0.0, 1.0], [1.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
+        quarter = [np.cos(np.pi / 4), 0.0, 0.0, np.sin(np.pi / 4)]     # 90 degrees about Z
+        positions, rotations = kinematics.solve_frame(np.array([[1.0, 0, 0, 0], quarter, quarter]))
+        np.testing.assert_allclose(positions, [[0, 0, 1], [1, 0, 1], [1, 1, 1]], atol=1e-12)
+        np.testing.assert_allclose(rotations[2], [0.0, 0.0, 0.0, 1.0], atol=1e-12)
+        with pytest.raises(ValueError):
+            ForwardKinematics([-1, 0], np.zeros((3, 3)))
+
+    def test_half_turns(self):
+        """Test that 180 degree turns about mixed-sign axes survive the matrix round trip"""
+        axes = np.array([[1.0, -1.0, 0.0], [0.0, 1.0, -1.0], [-1.0, 0.0, 1.0], [1.0, -2.0, 3.0],
+                         [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+        half_turns = np.zeros((len(axes), 4))
+        half_turns[:, 1:] = axes / np.linalg.norm(axes, axis=1, keepdims=True)
+        matrices = quaternions.to_matrix(half_turns)
+        np.testing.assert_allclose(quaternions.to_matrix(quaternions.from_matrix(matrices)),
+                                   matrices, atol=1e-12)
+        rng = np.random.default_rng(5)
+        rotations = quaternions.normalize(rng.normal(size=(100, 4)))
+        rotations[rotations[:, 0] < 0] *= -1.0
+        np.testing.assert_allclose(quaternions.from_matrix(quaternions.to_matrix(rotations)),
+                                   rotations, atol=1e-12)
+
+        kinematics = ForwardKinematics([-1, 0], [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
+        local = np.array([[1.0, 0.0, 0.0, 0.0], half_turns[0]])
+        _, world = kinematics.solve_frame(local)
+        np.testing.assert_allclose(quaternions.to_matrix(world[1]), matrices[0], atol=1e-12)
@@ -0,0 +1,204 @@
+# tests/unit/test_motion_filter.py
+import threading
+
+import numpy as np
+import pytest
+
+from src.data_handlers import quaternions
+from src.data_handlers.motion_filter import (ButterworthLowPass, FilterChain, FilterStage,
+                                             HemisphereContinuity, OneEuroFilter, SpikeRejector,
+                                             default_chain, filter_take, smooth_recording,
+                                             zero_phase_lowpass)
+from src.data_handlers.take_file import TakeReader
+from src.data_handlers.take_recorder import TakeRecorder
+from tests.fixtures.mock_data import make_pose_frame
+
+RATE = 240.0
+
+
+def run(stage, values, channels=3):
+    """Feed (N, S, C) samples of one actor through a filter stage"""
+    stage.allocate((2, values.shape[1], channels))
+    slots = np.array([1])
+    dt = np.full((1, 1, 1), 1.0 / RATE)
+    return np.array([stage.apply(value[None], slots, dt, np.full((1, 1, 1), i == 0))[0]
+                     for i, value in enumerate(values)])
+
+
+class TestRealtimeFilters:
+    """Unit tests for the stateful real-time filters"""
+
+    def test_jitter_reduction(self):
+        """Test that One-Euro and Butterworth remove jitter from a still segment"""
+        rng = np.random.default_rng(0)
+        still = np.ones((960, 4, 3)) + rng.normal(0.0, 0.005, (960, 4, 3))
+        for stage in (OneEuroFilter(min_cutoff=1.0, beta=0.5), ButterworthLowPass(5.0, RATE)):
+            filtered = run(stage, still)
+            np.testing.assert_allclose(filtered[0], still[0])
+            assert filtered[240:].std(axis=0).mean() < still.std(axis=0).mean() / 3
+
+    def test_butterworth_steady_state(self):
+        """Test that a constant input passes unchanged from the first sample"""
+        constant = np.full((50, 2, 3), 0.7)
+        np.testing.assert_allclose(run(ButterworthLowPass(10.0, RATE), constant), constant)
+
+    def test_spike_rejection(self):
+        """Test that a one-sample spike is held but a lasting jump is followed"""
+        values = np.zeros((20, 1, 3))
+        values[5] = 1.0
+        values[10:] = 2.0
+        stage = SpikeRejector(max_speed=10.0, max_hold=3)
+        filtered = run(stage, values)
+        assert filtered[5, 0, 0] == 0.0 and stage.rejected == 1 + 3
+        assert filtered[12, 0, 0] == 0.0 and filtered[13, 0, 0] == 2.0
+
+    def test_hemisphere_continuity(self):
+        """Test that sign flips of equivalent quaternions are undone"""
+        rotations = np.tile([np.cos(0.1), np.sin(0.1), 0.0, 0.0], (6, 1, 1))
+        rotations[1::2] *= -1.0
+        filtered = run(HemisphereContinuity(), rotations, channels=4)
+        assert (filtered[:, 0, 0] > 0).all()
+
+
+class TestFilterChain:
+    """Unit tests for FilterChain and FilterStage"""
+
+    def test_actor_slots(self):
+        """Test per-actor state, stream restarts and the actor limit"""
+        chain = FilterChain([OneEuroFilter(min_cutoff=0.5)], rate=RATE, max_actors=2)
+        first = chain.filter(make_pose_frame(sample_counter=1, character_id=0))
+        np.testing.assert_array_equal(first.positions, make_pose_frame().positions)
+        moved = make_pose_frame(sample_counter=2, character_id=0)
+        moved.positions += 1.0
+        assert 0.0 < chain.filter(moved).positions[0, 0] < 1.0
+        # Another actor starts from its own first sample
+        other = make_pose_frame(sample_counter=2, character_id=1)
+        other.positions += 1.0
+        assert chain.filter(other).positions[0, 0] == 1.0
+        assert chain.filter(make_pose_frame(sample_counter=1, character_id=2)) is None
+        assert chain.get_status()["unfiltered"] == 1
+
+    def test_rotations_stay_normalized(self):
+        """Test that rotation filters return unit quaternions"""
+        chain = default_chain(RATE)
+        rng = np.random.default_rng(1)
+        for i in range(20):
+            frame = make_pose_frame(sample_counter=i)
+            frame.rotations[:] = quaternions.normalize(rng.normal(size=(23, 4)))
+            filtered = chain.filter(frame)
+        np.testing.assert_allclose(np.linalg.norm(filtered.rotations, axis=-1), 1.0, atol=1e-6)
+
+    def test_stage_republishes(self):
+        """Test that the stage passes filtered frames to its consumers"""
+        stage = FilterStage(default_chain(RATE))
+        received = []
+        done = threading.Event()
+
+        def consume(frame):
+            received.append(frame)
+            if len(received) == 3:
+                done.set()
+
+        stage.add_data_callback(consume)
+        stage.start_streaming()
+        try:
+            frames = [make_pose_frame(sample_counter=i) for i in range(3)]
+            for frame in frames:
+                stage.push(frame)
+            assert done.wait(2.0)
+        finally:
+            stage.stop_streaming()
+        assert [frame.sample_counter for frame in received] == [0, 1, 2]
+        assert received[1] is not frames[1]
+        assert stage.get_status()["frames_filtered"] == 3
+
+    def test_stage_batches_actors_of_a_sample(self):
+        """Test that the stage filters all actors of a sample in one block"""
+        stage = FilterStage(default_chain(RATE))
+        batches = []
+        filter_frames = stage.chain.filter_frames
+
+        def record_batch(frames):
+            batches.append([frame.character_id for frame in frames])
+            return filter_frames(frames)
+
+        stage.chain.filter_frames = record_batch
+        received = []
+        done = threading.Event()
+
+        def consume(frame):
+            received.append(frame)
+            if len(received) == 13:
+                done.set()
+
+        stage.add_data_callback(consume)
+        stage.start_streaming()
+        try:
+            for sample in range(4):
+                for character in range(3):
+                    stage.push(make_pose_frame(sample_counter=sample, character_id=character))
+            stage.push(make_pose_frame(sample_counter=4, character_id=0))
+            stage.detach()
+            assert done.wait(2.0)
+        finally:
+            stage.stop_streaming()
+        # The first sample teaches the stage how many actors to wait for
+        assert batches == [[0], [1], [2], [0, 1, 2], [0, 1, 2], [0, 1, 2], [0]]
+        assert [(frame.sample_counter, frame.character_id) for frame in received] == \
+            [(sample, character) for sample in range(4) for character in range(3)] + [(4, 0)]
+        assert stage.get_status()["frames_filtered"] == 13
+
+
+class TestOfflineFilters:
+    """Unit tests for zero-phase offline filtering"""
+
+    def test_zero_phase(self):
+        """Test that offline low-pass removes noise without delaying motion"""
+        t = np.arange(2400) / RATE
+        clean = np.sin(2 * np.pi * t)[:, None, None] * np.ones((1, 2, 3))
+        noisy = clean + np.random.default_rng(2).normal(0.0, 0.01, clean.shape)
+        filtered = zero_phase_lowpass(noisy, RATE, 6.0)
+        error = np.abs(filtered - clean)[100:-100]
+        assert error.max() < 0.01
+        # A causal filter at the same cutoff lags by several samples
+        causal = run(ButterworthLowPass(6.0, RATE), noisy)
+        assert np.abs(causal - clean)[100:-100].max() > 3 * error.max()
+
+    def test_smooth_recording(self):
+        """Test spike removal and continuity of the offline rotation path"""
+        positions = np.zeros((100, 2, 3))
+        positions[40, 1] = 1.0
+        rotations = np.tile([1.0, 0.0, 0.0, 0.0], (100, 2, 1))
+        rotations[50:] *= -1.0
+        positions, rotations = smooth_recording(positions, rotations, RATE, spike_threshold=0.1)
+        assert np.abs(positions).max() < 1e-6
+        np.testing.assert_allclose(np.abs(rotations[..., 0]), 1.0, atol=1e-9)
+
+    def test_filter_take(self, tmp_path):
+        """Test that a filtered copy keeps the layout and removes jitter per actor"""
+        rng = np.random.default_rng(3)
+        path = str(tmp_path / "take.mtk")
+        recorder = TakeRecorder(path, fsync=False)
+        recorder.start()
+        for i in range(480):
+            for character in (0, 1):
+                frame = make_pose_frame(sample_counter=i, character_id=character)
+                frame.timestamp = 1000.0 + i / RATE
+                frame.positions += character + rng.normal(0.0, 0.005, frame.positions.shape)
+                recorder.write_frame(frame)
+        recorder.stop()
+
+        output = str(tmp_path / "clean.mtk")
+        assert filter_take(path, output, block_frames=100) == 960
+        original, cleaned = TakeReader(path), TakeReader(output)
+        try:
+            assert len(cleaned) == len(original)
+            for character in (0, 1):
+                rows = cleaned.records["character_id"] == character
+                before = original.records["positions"][rows]
+                after = cleaned.records["positions"][rows]
+                assert np.abs(after.mean(axis=0) - before.mean(axis=0)).max() < 0.005
+                assert after[20:-20].std(axis=0).mean() < before.std(axis=0).mean() / 3
+        finally:
+            original.close()
+            cleaned.close()
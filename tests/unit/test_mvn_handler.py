@@ -1,10 +1,16 @@
 # tests/unit/test_mvn_handler.py
 
+# Importing the modules needed for the loopback streaming test
+import socket
+import threading
+import time
+
 # Importing the pytest module for writing test cases
 import pytest
 
 # Importing the MVNDataHandler and XSensConfig classes from the src.data_handlers.mvn_data_handler module
 from src.data_handlers.mvn_data_handler import MVNDataHandler, XSensConfig
+from tests.fixtures.mock_data import make_pose_datagram, make_pose_frame
 
 # Defining a test class for XSensConfig
 class TestXSensConfig:
@@ -86,8 +92,8 @@ class TestMVNDataHandler:
         # Asserting that the data_callbacks list is empty initially
         assert len(handler.data_callbacks) == 0
         
-        # Asserting that the _latest_data attribute is None initially
-        assert handler._latest_data is None
+        # Asserting that no frame has been published initially
+        assert handler.get_latest_data() is None
         
         # Asserting that the connection_status_callback attribute is None initially
         assert handler.connection_status_callback is None
@@ -113,30 +119,181 @@ class TestMVNDataHandler:
         
         # Asserting that the data_callbacks list contains the dummy callback
         assert handler.data_callbacks[0] == dummy_callback
+        
+        # Test data callback removal
+        handler.remove_data_callback(dummy_callback)
+        assert len(handler.data_callbacks) == 0
     
     # Test method to check the MVN packet parsing
     def test_packet_parsing(self, handler: MVNDataHandler):
         """Test MVN packet parsing"""
-        # Creating dummy packet data
-        dummy_data = b'\x00\x00\x00\x01test_payload'
+        # Creating an encoded quaternion pose datagram
+        datagram = make_pose_datagram(sample_counter=1)
         
-        # Parsing the dummy packet data
-        parsed = handler._parse_mvn_packet(dummy_data)
+        # Parsing the datagram
+        parsed = handler._parse_mvn_packet(datagram)
         
         # Asserting that the parsed data is not None
         assert parsed is not None
         
-        # Asserting that the header is parsed correctly
-        assert parsed['header'] == 1
+        # Asserting that the sample counter is parsed correctly
+        assert parsed.sample_counter == 1
         
         # Asserting that the timestamp is present in the parsed data
-        assert 'timestamp' in parsed
+        assert parsed.timestamp > 0
+        
+        # Asserting that all 23 segments are decoded in one frame
+        assert parsed.positions.shape == (23, 3)
+        assert parsed.rotations.shape == (23, 4)
+    
+    # Test method to check that non-MVN data is rejected
+    def test_invalid_packet(self, handler: MVNDataHandler):
+        """Test that data without an MVN header is rejected"""
+        assert handler._parse_mvn_packet(b'\x00\x00\x00\x01test_payload') is None
+    
+    # Test method to check batched UDP ingest over loopback
+    def test_batched_udp_streaming(self):
+        """Test that a burst of datagrams is drained and dispatched in order"""
+        # Binding to an ephemeral loopback port with a larger kernel buffer
+        handler = MVNDataHandler(XSensConfig(host="127.0.0.1", port=0,
+                                             receive_buffer_size=1 << 20,
+                                             receive_slots=8))
+        received = []
+        handler.add_data_callback(lambda frame: received.append(frame.sample_counter))
+        assert handler.connect()[0]
+        
+        # Sending a burst larger than the number of receive slots
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            handler.start_streaming()
+            for i in range(50):
+                sender.sendto(make_pose_datagram(sample_counter=i), handler.socket.getsockname())
+            deadline = time.time() + 5.0
+            while len(received) < 50 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            sender.close()
+            handler.disconnect()
         
-        # Asserting that the data_size is parsed correctly
-        assert parsed['data_size'] == len(b'test_payload')
+        # Asserting that every datagram reached the callback in order
+        assert received == list(range(50))
+
+    # Test method to check the hot-path instrumentation
+    def test_instrumentation(self):
+        """Test that enabled instrumentation fills the receive, parse and dispatch stages"""
+        handler = MVNDataHandler(XSensConfig(host="127.0.0.1", port=0, instrumentation=True))
+        assert handler.connect()[0]
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            handler.start_streaming()
+            for i in range(10):
+                sender.sendto(make_pose_datagram(sample_counter=i), handler.socket.getsockname())
+            sender.sendto(b"not mvn", handler.socket.getsockname())
+            deadline = time.time() + 5.0
+            while handler.metrics.counters.get("parse_errors", 0) < 1 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            sender.close()
+            handler.disconnect()
         
-        # Asserting that the raw_size of the payload is parsed correctly
-        assert parsed['payload']['raw_size'] == len(b'test_payload')
+        metrics = handler.get_status()["metrics"]
+        assert set(metrics["stages"]) == {"receive", "parse", "dispatch"}
+        assert metrics["stages"]["parse"]["count"] == 10
+        assert metrics["counters"] == {"parse_errors": 1}
+        
+        # Disabled instrumentation records nothing
+        assert MVNDataHandler().get_status()["metrics"]["stages"] == {}
+
+    # Test method to check sequence tracking on the live stream
+    def test_sequence_tracking(self):
+        """Test that reordered datagrams are delivered in order and a gap is counted"""
+        handler = MVNDataHandler(XSensConfig(host="127.0.0.1", port=0, reorder_window=4))
+        received = []
+        handler.add_data_callback(lambda frame: received.append(frame.sample_counter))
+        assert handler.connect()[0]
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            handler.start_streaming()
+            for i in (0, 2, 1, 3, 5, 6, 7, 8, 9):
+                sender.sendto(make_pose_datagram(sample_counter=i), handler.socket.getsockname())
+            deadline = time.time() + 5.0
+            while len(received) < 9 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            sender.close()
+            handler.disconnect()
+        
+        # Asserting that sample 4 was skipped and everything else arrived in order
+        assert received == [0, 1, 2, 3, 5, 6, 7, 8, 9]
+        sequence = handler.get_status()["sequence"]
+        assert sequence["lost"] == 1
+        assert sequence["out_of_order"] == 1
+
+    # Test method to check TCP streaming with split and merged messages
+    def test_tcp_streaming(self):
+        """Test that TCP messages are reassembled regardless of chunking"""
+        # Starting a loopback server standing in for MVN
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        handler = MVNDataHandler(XSensConfig(host="127.0.0.1", port=server.getsockname()[1],
+                                             protocol="TCP"))
+        received = []
+        handler.add_data_callback(lambda frame: received.append(frame.sample_counter))
+        try:
+            assert handler.connect()[0]
+            connection, _ = server.accept()
+            handler.start_streaming()
+            
+            # Sending 20 messages in chunks that do not line up with message boundaries
+            stream = b"".join(make_pose_datagram(sample_counter=i) for i in range(20))
+            for i in range(0, len(stream), 333):
+                connection.sendall(stream[i:i + 333])
+                time.sleep(0.001)
+            deadline = time.time() + 5.0
+            while len(received) < 20 and time.time() < deadline:
+                time.sleep(0.01)
+            connection.close()
+        finally:
+            handler.disconnect()
+            server.close()
+        
+        # Asserting that every message was decoded exactly once
+        assert received == list(range(20))
+    
+    # Test method to check that a slow consumer does not stall the others
+    def test_slow_consumer_is_isolated(self):
+        """Test that callbacks run on their own threads with their own cursors"""
+        handler = MVNDataHandler(XSensConfig(host="127.0.0.1", port=0))
+        fast, slow = [], []
+        release = threading.Event()
+        
+        def slow_callback(frame):
+            release.wait(2.0)
+            slow.append(frame)
+        
+        handler.add_data_callback(fast.append)
+        handler.add_data_callback(slow_callback)
+        assert handler.connect()[0]
+        handler.start_streaming()
+        try:
+            # Publishing frames directly, as the network thread would
+            for i in range(10):
+                handler._dispatch(make_pose_frame(sample_counter=i))
+            deadline = time.time() + 5.0
+            while len(fast) < 10 and time.time() < deadline:
+                time.sleep(0.01)
+            
+            # Asserting that the fast consumer finished while the slow one is stuck
+            assert len(fast) == 10
+            assert len(slow) == 0
+            assert handler.get_latest_data().sample_counter == 9
+            
+            consumers = handler.get_status()["frame_buffer"]["consumers"]
+            assert len(consumers) == 2
+        finally:
+            release.set()
+            handler.disconnect()
 
 # Running the tests if the script is executed directly
 if __name__ == "__main__":
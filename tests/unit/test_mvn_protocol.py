@@ -0,0 +1,86 @@
+# tests/unit/test_mvn_protocol.py
+import numpy as np
+import pytest
+
+from src.data_handlers.mvn_protocol import (
+    CENTER_OF_MASS, HEADER_SIZE, JOINT_ANGLES, POSE_EULER, TIME_CODE, MVNFrame,
+    datagram_length, decode_datagram, encode_frame
+)
+from tests.fixtures.mock_data import make_pose_datagram, make_pose_frame
+
+
+class TestDecodeDatagram:
+    """Unit tests for MVN datagram decoding"""
+
+    def test_quaternion_pose_round_trip(self):
+        """Test that a quaternion pose decodes back to the encoded arrays"""
+        frame = make_pose_frame(sample_counter=7, time_code=1234, character_id=2)
+        decoded = decode_datagram(encode_frame(frame))
+        assert decoded.sample_counter == 7
+        assert decoded.time_code == 1234
+        assert decoded.character_id == 2
+        assert decoded.is_last_datagram
+        assert decoded.is_pose
+        np.testing.assert_array_equal(decoded.segment_ids, frame.segment_ids)
+        np.testing.assert_allclose(decoded.positions, frame.positions)
+        np.testing.assert_allclose(decoded.rotations, frame.rotations)
+
+    def test_decode_from_memoryview(self):
+        """Test that decoding a memoryview detaches from the source buffer"""
+        buffer = bytearray(make_pose_datagram())
+        decoded = decode_datagram(memoryview(buffer))
+        expected = decoded.positions.copy()
+        buffer[HEADER_SIZE:] = bytes(len(buffer) - HEADER_SIZE)
+        np.testing.assert_array_equal(decoded.positions, expected)
+        assert decoded.positions.dtype == np.float32
+
+    def test_euler_pose(self):
+        """Test Euler pose datagrams keep three rotation components"""
+        frame = make_pose_frame()
+        frame.datagram_type = POSE_EULER
+        frame.rotations = np.full((frame.segment_count, 3), 45.0, dtype=np.float32)
+        decoded = decode_datagram(encode_frame(frame))
+        assert decoded.rotations.shape == (23, 3)
+        assert np.all(decoded.rotations == 45.0)
+
+    def test_joint_angles(self):
+        """Test joint angle datagrams decode connection IDs"""
+        joints = np.array([[257, 513], [513, 769]], dtype=np.int32)
+        frame = MVNFrame(JOINT_ANGLES, 1, 0, True, 0, 0, 0.0, joint_ids=joints,
+                         rotations=np.ones((2, 3), dtype=np.float32))
+        decoded = decode_datagram(encode_frame(frame))
+        np.testing.assert_array_equal(decoded.joint_ids, joints)
+
+    def test_center_of_mass_and_time_code(self):
+        """Test center of mass and time code datagrams"""
+        com = MVNFrame(CENTER_OF_MASS, 1, 0, True, 0, 0, 0.0,
+                       positions=np.array([[0.1, 0.2, 0.9]], dtype=np.float32))
+        assert decode_datagram(encode_frame(com)).positions.shape == (1, 3)
+
+        tc = MVNFrame(TIME_CODE, 1, 0, True, 0, 0, 0.0, timecode="01:02:03.456")
+        assert decode_datagram(encode_frame(tc)).timecode == "01:02:03.456"
+
+    def test_datagram_length(self):
+        """Test that the header announces the full datagram length"""
+        datagram = make_pose_datagram()
+        assert datagram_length(datagram) == len(datagram)
+
+    def test_rejects_non_mvn_data(self):
+        """Test that foreign data raises ValueError"""
+        with pytest.raises(ValueError):
+            decode_datagram(b"\x00" * 32)
+        with pytest.raises(ValueError):
+            decode_datagram(b"MXTP02")
+
+    def test_rejects_truncated_datagram(self):
+        """Test that a datagram shorter than its announced payload is rejected"""
+        datagram = make_pose_datagram()
+        with pytest.raises(ValueError):
+            decode_datagram(datagram[:-10])
+
+    def test_rejects_empty_payload(self):
+        """Test that a zero payload size is not read as the rest of the buffer"""
+        datagram = bytearray(make_pose_datagram())
+        datagram[HEADER_SIZE - 2:HEADER_SIZE] = b"\0\0"
+        with pytest.raises(ValueError):
+            decode_datagram(bytes(datagram))
@@ -0,0 +1,114 @@
+# tests/unit/test_rebroadcaster.py
+import socket
+import threading
+import time
+
+import pytest
+
+from src.data_handlers.mvn_protocol import decode_datagram
+from src.data_handlers.rebroadcaster import DISCONNECT, Rebroadcaster
+from src.data_handlers.stream_framer import MVNStreamFramer
+from tests.fixtures.mock_data import make_pose_frame
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def subscribe(rebroadcaster):
+    sock = socket.create_connection(rebroadcaster.server_address)
+    wait_for(lambda: len(rebroadcaster.subscribers) >= 1)
+    return sock
+
+
+class TestRebroadcaster:
+    """Unit tests for Rebroadcaster"""
+
+    def test_udp_fan_out(self):
+        """Test that every UDP target receives the same valid MVN datagrams"""
+        receivers = []
+        for _ in range(2):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(("127.0.0.1", 0))
+            sock.settimeout(2.0)
+            receivers.append(sock)
+        rebroadcaster = Rebroadcaster(udp_targets=[r.getsockname() for r in receivers])
+        assert rebroadcaster.start()[0]
+        try:
+            for i in range(5):
+                rebroadcaster.publish(make_pose_frame(sample_counter=i))
+            for receiver in receivers:
+                counters = [decode_datagram(receiver.recv(4096)).sample_counter for _ in range(5)]
+                assert counters == list(range(5))
+        finally:
+            rebroadcaster.stop()
+            for receiver in receivers:
+                receiver.close()
+        assert rebroadcaster.get_status()["udp_sent"] == 10
+
+    def test_tcp_subscribers(self):
+        """Test that a stalled subscriber drops frames without affecting a fast one"""
+        rebroadcaster = Rebroadcaster(tcp_address=("127.0.0.1", 0), max_pending=64)
+        assert rebroadcaster.start()[0]
+        fast = subscribe(rebroadcaster)
+        slow = socket.create_connection(rebroadcaster.server_address)
+        wait_for(lambda: len(rebroadcaster.subscribers) == 2)
+        # Keep the stalled subscriber's kernel buffers small so its queue fills
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        rebroadcaster.subscribers[1].sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+
+        received = []
+        framer = MVNStreamFramer()
+
+        def read_fast():
+            fast.settimeout(5.0)
+            while not received or received[-1] != 1999:
+                framer.feed(fast.recv(65536))
+                received.extend(decode_datagram(v).sample_counter for v in framer.frames())
+
+        reader = threading.Thread(target=read_fast)
+        reader.start()
+        try:
+            start = time.monotonic()
+            for i in range(2000):
+                rebroadcaster.publish(make_pose_frame(sample_counter=i))
+                if i % 20 == 0:
+                    time.sleep(0.002)
+            publish_time = time.monotonic() - start
+            reader.join(10.0)
+            status = rebroadcaster.get_status()
+        finally:
+            fast.close()
+            slow.close()
+            rebroadcaster.stop()
+
+        assert received == list(range(2000))
+        assert publish_time < 5.0
+        fast_status, slow_status = status["subscribers"]
+        assert fast_status["dropped"] == 0
+        assert slow_status["dropped"] > 0
+
+    def test_disconnect_policy(self):
+        """Test that a subscriber that falls behind is disconnected under that policy"""
+        rebroadcaster = Rebroadcaster(tcp_address=("127.0.0.1", 0), max_pending=2,
+                                      subscriber_policy=DISCONNECT)
+        assert rebroadcaster.start()[0]
+        slow = subscribe(rebroadcaster)
+        slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        try:
+            for i in range(5000):
+                rebroadcaster.publish(make_pose_frame(sample_counter=i))
+                if not rebroadcaster.subscribers:
+                    break
+            wait_for(lambda: not rebroadcaster.subscribers)
+            assert not rebroadcaster.subscribers
+        finally:
+            slow.close()
+            rebroadcaster.stop()
+
+    def test_rejects_unknown_policy(self):
+        """Test that only non-blocking subscriber policies are accepted"""
+        with pytest.raises(ValueError):
+            Rebroadcaster(subscriber_policy="block")
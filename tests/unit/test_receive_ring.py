@@ -0,0 +1,59 @@
+# tests/unit/test_receive_ring.py
+import socket
+
+import pytest
+
+from src.data_handlers.receive_ring import DatagramRing
+
+
+@pytest.fixture
+def udp_pair():
+    """Non-blocking receiver and a sender connected over loopback"""
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.setblocking(False)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.connect(receiver.getsockname())
+    yield receiver, sender
+    receiver.close()
+    sender.close()
+
+
+class TestDatagramRing:
+    """Unit tests for DatagramRing"""
+
+    def test_drain_empty_socket(self, udp_pair):
+        """Test that draining an idle socket returns immediately"""
+        receiver, _ = udp_pair
+        ring = DatagramRing(slot_count=4, slot_size=64)
+        assert ring.drain(receiver) == 0
+
+    def test_drain_pending_datagrams(self, udp_pair):
+        """Test that all pending datagrams are drained in order"""
+        receiver, sender = udp_pair
+        ring = DatagramRing(slot_count=8, slot_size=64)
+        for i in range(5):
+            sender.send(b"packet-%d" % i)
+        count = ring.drain(receiver)
+        assert count == 5
+        assert [bytes(view) for view in ring.batch(count)] == [b"packet-%d" % i for i in range(5)]
+
+    def test_drain_is_bounded_by_slot_count(self, udp_pair):
+        """Test that a drain never overwrites slots of the same batch"""
+        receiver, sender = udp_pair
+        ring = DatagramRing(slot_count=3, slot_size=64)
+        for i in range(5):
+            sender.send(b"%d" % i)
+        assert ring.drain(receiver) == 3
+        count = ring.drain(receiver)
+        assert count == 2
+        assert [bytes(view) for view in ring.batch(count)] == [b"3", b"4"]
+        assert ring.received == 5
+
+    def test_truncated_datagrams_are_counted(self, udp_pair):
+        """Test that datagrams larger than a slot are counted as truncated"""
+        receiver, sender = udp_pair
+        ring = DatagramRing(slot_count=2, slot_size=8)
+        sender.send(b"x" * 32)
+        assert ring.drain(receiver) == 1
+        assert ring.truncated == 1
@@ -0,0 +1,203 @@
+# tests/unit/test_retarget.py
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from src.data_handlers import quaternions
+from src.data_handlers.mvn_protocol import SEGMENT_NAMES, SEGMENT_PARENTS
+from src.data_handlers.retarget import RetargetStage, Retargeter, RigDefinition, retarget_take
+from src.data_handlers.take_recorder import TakeRecorder
+from tests.fixtures.mock_data import make_pose_frame
+
+
+def mvn_rig(up="z"):
+    """Rig definition with the MVN body hierarchy, identity rest pose and one-to-one mapping"""
+    frame = make_pose_frame()
+    bones = []
+    for i, name in enumerate(SEGMENT_NAMES):
+        parent = SEGMENT_PARENTS[i]
+        offset = frame.positions[i] - (frame.positions[parent] if parent >= 0 else 0.0)
+        bones.append({"name": name, "parent": SEGMENT_NAMES[parent] if parent >= 0 else None,
+                      "offset": offset.tolist()})
+    return {"name": "mvn", "up": up, "bones": bones,
+            "mapping": {name: name for name in SEGMENT_NAMES}}
+
+
+def quarter_turn(axis):
+    q = np.zeros(4)
+    q[0] = np.cos(np.pi / 4)
+    q[1 + "xyz".index(axis)] = np.sin(np.pi / 4)
+    return q
+
+
+def random_rotations(count, seed=0):
+    return quaternions.normalize(np.random.default_rng(seed).normal(size=(count, 23, 4)))
+
+
+def assert_same_rotations(actual, expected):
+    np.testing.assert_allclose(np.abs(np.sum(actual * expected, axis=-1)), 1.0, atol=1e-9)
+
+
+class TestRigDefinition:
+    """Unit tests for rig definition files"""
+
+    def test_load_with_mapping_file(self, tmp_path):
+        """Test that a separate mapping file overrides the rig's own mapping"""
+        rig_path, mapping_path = tmp_path / "rig.json", tmp_path / "mapping.json"
+        rig_path.write_text(json.dumps({
+            "name": "Hero", "scale": 100.0,
+            "bones": [{"name": "spine", "parent": "hips"}, {"name": "hips", "parent": None}],
+            "mapping": {"hips": "Pelvis"}}))
+        mapping_path.write_text(json.dumps({"spine": "T8"}))
+        rig = RigDefinition.load(str(rig_path), str(mapping_path))
+        assert rig.bones == ["spine", "hips"] and rig.parents.tolist() == [1, -1]
+        assert rig.mapping == {"hips": "Pelvis", "spine": "T8"}
+        assert rig.up == "y" and rig.scale == 100.0
+
+    @pytest.mark.parametrize("data, message", [
+        ({"bones": [{"name": "a", "parent": "b"}]}, "Unknown parent"),
+        ({"bones": [{"name": "a", "parent": "b"}, {"name": "b", "parent": "a"}]}, "cycle"),
+        ({"bones": [{"name": "a"}], "mapping": {"a": "Tail"}}, "unknown MVN segment"),
+        ({"bones": [{"name": "a"}], "mapping": {"b": "Pelvis"}}, "unknown bone"),
+    ])
+    def test_invalid_definitions(self, data, message):
+        """Test that broken rigs are rejected when loaded"""
+        with pytest.raises(ValueError, match=message):
+            RigDefinition.from_dict(data)
+
+
+class TestRetargeter:
+    """Unit tests for Retargeter"""
+
+    def test_identical_rig(self):
+        """Test that a copy of the MVN skeleton gets MVN's own local rotations"""
+        retargeter = Retargeter(RigDefinition.from_dict(mvn_rig()))
+        rotations = random_rotations(16)
+        positions = np.random.default_rng(1).normal(size=(16, 23, 3))
+        root, local = retargeter.retarget(rotations, positions)
+        assert local.shape == (16, 23, 4) and root.shape == (16, 3)
+        assert_same_rotations(local, quaternions.local_rotations(rotations, SEGMENT_PARENTS))
+        np.testing.assert_allclose(root, positions[:, 0])
+
+    def test_rest_correction_and_unmapped_bones(self):
+        """Test that rest offsets are kept and unmapped bones follow their mapped ancestor"""
+        twist = quarter_turn("z")
+        rig = RigDefinition.from_dict({"up": "z", "bones": [
+            {"name": "hips", "parent": None},
+            {"name": "chest", "parent": "hips", "rotation": twist.tolist()},
+            {"name": "head", "parent": "chest"},
+        ], "mapping": {"hips": "Pelvis", "chest": "T8"}})
+        retargeter = Retargeter(rig)
+        rotations = np.tile([1.0, 0.0, 0.0, 0.0], (23, 1))
+        _, local = retargeter.retarget(rotations)
+        assert_same_rotations(local, rig.rest_rotations)
+        # Bend T8 forward: the chest keeps its twist on top of the bend, the head rides along
+        bend = quarter_turn("y")
+        rotations[SEGMENT_NAMES.index("T8")] = bend
+        _, local = retargeter.retarget(rotations)
+        assert_same_rotations(local[1], quaternions.multiply(bend, twist))
+        assert_same_rotations(local[2], [1.0, 0.0, 0.0, 0.0])
+
+    def test_calibration(self):
+        """Test that the calibration pose maps to the rig's rest pose and scales the root"""
+        rig = RigDefinition.from_dict(mvn_rig(up="y"))
+        rig.scale = 100.0
+        rig.rest_offsets[0] = [0.0, 190.0, 0.0]
+        retargeter = Retargeter(rig)
+        frame = make_pose_frame()
+        frame.positions[0] = [0.0, 0.0, 0.95]
+        frame.rotations[:] = random_rotations(1, seed=2)[0]
+        retargeter.calibrate(frame.rotations, frame.positions)
+        pose = retargeter.retarget_frame(frame)
+        assert_same_rotations(pose.local_rotations, rig.rest_rotations)
+        np.testing.assert_allclose(pose.root_position, [0.0, 190.0, 0.0], atol=1e-4)
+
+    def test_y_up_axes(self):
+        """Test that a turn about MVN's vertical Z is a turn about a Y-up rig's Y"""
+        retargeter = Retargeter(RigDefinition.from_dict(mvn_rig(up="y")))
+        rotations = np.tile(quarter_turn("z"), (23, 1))
+        positions = make_pose_frame().positions
+        root, local = retargeter.retarget(rotations, positions)
+        assert_same_rotations(local[0], quarter_turn("y"))
+        np.testing.assert_allclose(root, positions[0, [1, 2, 0]], atol=1e-6)
+
+    def test_batch_matches_frames(self):
+        """Test that one batched call equals per-frame calls"""
+        retargeter = Retargeter(RigDefinition.from_dict(mvn_rig(up="y")))
+        rotations = random_rotations(8, seed=3)
+        _, batch = retargeter.retarget(rotations)
+        for i in range(8):
+            np.testing.assert_allclose(retargeter.retarget(rotations[i])[1], batch[i])
+
+
+class TestRetargetStage:
+    """Unit tests for RetargetStage"""
+
+    def run_stage(self, stage, frames, expected):
+        received = []
+        done = threading.Event()
+
+        def consume(pose):
+            received.append(pose)
+            if len(received) == expected:
+                done.set()
+
+        stage.add_data_callback(consume)
+        stage.start_streaming()
+        try:
+            for frame in frames:
+                stage.push(frame)
+            assert done.wait(5.0)
+        finally:
+            stage.stop_streaming()
+        return received
+
+    def test_rigs_per_character(self):
+        """Test that each actor drives its assigned rigs"""
+        stage = RetargetStage()
+        stage.add_rig(Retargeter(RigDefinition.from_dict(dict(mvn_rig(), name="hero"))))
+        stage.add_rig(Retargeter(RigDefinition.from_dict(dict(mvn_rig("y"), name="extra"))),
+                      character_id=1)
+        frames = []
+        for character_id in (0, 1):
+            frame = make_pose_frame(sample_counter=7, character_id=character_id)
+            frame.rotations[:] = random_rotations(1, seed=character_id)[0]
+            frames.append(frame)
+        poses = self.run_stage(stage, frames, expected=3)
+        assert [(pose.rig, pose.character_id) for pose in poses] == \
+            [("hero", 0), ("hero", 1), ("extra", 1)]
+        assert_same_rotations(poses[1].local_rotations,
+                              quaternions.local_rotations(frames[1].rotations.astype(np.float64),
+                                                          SEGMENT_PARENTS))
+        status = stage.get_status()
+        assert status["frames_retargeted"] == 2 and status["poses_produced"] == 3
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_retarget_take(self, tmp_path, workers):
+        """Test that a take's actor is retargeted block by block, in or out of process"""
+        path = str(tmp_path / "take.mtk")
+        rotations = random_rotations(50, seed=4)
+        recorder = TakeRecorder(path, fsync=False)
+        recorder.start()
+        for i in range(50):
+            for character_id in (0, 1):
+                frame = make_pose_frame(sample_counter=i, character_id=character_id)
+                frame.rotations[:] = rotations[i]
+                frame.timestamp = 100.0 + i
+                recorder.write_frame(frame)
+        recorder.stop()
+
+        retargeters = [Retargeter(RigDefinition.from_dict(dict(mvn_rig(), name="hero"))),
+                       Retargeter(RigDefinition.from_dict(dict(mvn_rig("y"), name="extra")))]
+        takes = retarget_take(path, retargeters, character_id=1, workers=workers,
+                              block_frames=16)
+        assert [take.rig for take in takes] == ["hero", "extra"]
+        np.testing.assert_array_equal(takes[0].sample_counters, np.arange(50))
+        np.testing.assert_array_equal(takes[1].timestamps, 100.0 + np.arange(50))
+        for take, retargeter in zip(takes, retargeters):
+            root, local = retargeter.retarget(rotations.astype(np.float32),
+                                              np.tile(make_pose_frame().positions, (50, 1, 1)))
+            np.testing.assert_allclose(take.root_positions, root, atol=1e-6)
+            np.testing.assert_allclose(take.local_rotations, local, atol=1e-6)
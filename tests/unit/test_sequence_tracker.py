@@ -0,0 +1,110 @@
+# tests/unit/test_sequence_tracker.py
+import numpy as np
+
+from src.data_handlers.sequence_tracker import SequenceTracker
+from tests.fixtures.mock_data import make_pose_frame
+
+
+def frame(sample, character_id=0, receive_time=0.0):
+    f = make_pose_frame(sample_counter=sample, character_id=character_id)
+    f.receive_time = receive_time
+    return f
+
+
+def split(sample, parts=2):
+    """One 23 segment sample split over several datagrams"""
+    whole = make_pose_frame(sample_counter=sample)
+    whole.positions[:, 0] = np.arange(23)
+    frames = []
+    for index, rows in enumerate(np.array_split(np.arange(23), parts)):
+        f = make_pose_frame(sample_counter=sample, segment_count=len(rows))
+        f.segment_ids, f.positions = whole.segment_ids[rows], whole.positions[rows]
+        f.rotations = whole.rotations[rows]
+        f.datagram_counter = index
+        f.is_last_datagram = index == parts - 1
+        f.receive_time = 0.0
+        frames.append(f)
+    return frames
+
+
+def delivered(tracker, frames):
+    return [f.sample_counter for x in frames for f in tracker.push(x)]
+
+
+class TestSequenceTracker:
+    """Unit tests for SequenceTracker"""
+
+    def test_in_order_stream_is_not_delayed(self):
+        """Test that contiguous samples are delivered on arrival"""
+        tracker = SequenceTracker(window=4)
+        for i in range(10):
+            assert [f.sample_counter for f in tracker.push(frame(i))] == [i]
+        assert not tracker.holding
+        status = tracker.get_status()
+        assert status["frames"] == 10 and status["lost"] == 0
+
+    def test_reorders_within_window(self):
+        """Test that swapped datagrams are put back in order"""
+        tracker = SequenceTracker(window=4)
+        order = [0, 2, 1, 3, 5, 4, 6]
+        assert delivered(tracker, [frame(i) for i in order]) == list(range(7))
+        status = tracker.get_status()
+        assert status["out_of_order"] == 2
+        assert status["lost"] == 0
+
+    def test_loss_duplicates_and_late(self):
+        """Test that a gap is skipped once the window fills and stragglers are counted"""
+        tracker = SequenceTracker(window=3)
+        out = delivered(tracker, [frame(i) for i in (0, 1, 3, 4, 5, 5, 2, 1)])
+        assert out == [0, 1, 3, 4, 5]
+        status = tracker.get_status()
+        assert status["lost"] == 1
+        assert status["duplicated"] == 2        # 5 while held, 1 after delivery
+        assert status["late"] == 1              # 2 arrived after it was skipped
+
+    def test_timeout_releases_held_samples(self):
+        """Test that a gap does not hold later samples past the timeout"""
+        tracker = SequenceTracker(window=8, timeout=0.05)
+        assert delivered(tracker, [frame(0, receive_time=1.0), frame(2, receive_time=1.01)]) == [0]
+        assert tracker.expire(now=1.03) == []
+        assert [f.sample_counter for f in tracker.expire(now=1.07)] == [2]
+        assert tracker.get_status()["lost"] == 1
+
+    def test_reassembles_split_samples(self):
+        """Test that split datagrams become one frame, even when reordered"""
+        tracker = SequenceTracker(window=4)
+        first, second = split(7), split(8)
+        out = [f for x in (first[1], second[1], second[0], first[0]) for f in tracker.push(x)]
+        assert [f.sample_counter for f in out] == [7, 8]
+        assert out[0].segment_count == 23 and out[0].is_last_datagram
+        assert out[0].positions[:, 0].tolist() == list(range(23))
+        assert tracker.get_status()["reassembled"] == 2
+
+    def test_incomplete_sample_is_lost(self):
+        """Test that a sample missing one of its datagrams is counted, not delivered"""
+        tracker = SequenceTracker(window=1)
+        parts = split(3)
+        assert delivered(tracker, [parts[0], frame(4)]) == [4]
+        status = tracker.get_status()
+        assert status["incomplete"] == 1 and status["lost"] == 1
+
+    def test_non_contiguous_parts_are_lost(self):
+        """Test that parts with a gap in their datagram counters are counted, not merged"""
+        tracker = SequenceTracker(window=1)
+        parts = split(3)
+        parts[0].datagram_counter = 5       # Counters 5 and 1 (last): two parts, no 0
+        assert delivered(tracker, [parts[0], parts[1]]) == []
+        assert delivered(tracker, [frame(4)]) == [4]
+        status = tracker.get_status()
+        assert status["frames"] == 1 and status["lost"] == 1 and status["reassembled"] == 0
+
+    def test_streams_and_resync(self):
+        """Test that characters are tracked separately and a counter restart resyncs"""
+        tracker = SequenceTracker(window=4, history=64)
+        assert delivered(tracker, [frame(100, 0), frame(5, 1), frame(101, 0), frame(6, 1)]) == \
+            [100, 5, 101, 6]
+        # A sender restart jumps far back; the stream restarts instead of dropping everything
+        assert delivered(tracker, [frame(0, 0), frame(1, 0)]) == [0, 1]
+        status = tracker.get_status()
+        assert status["resyncs"] == 1
+        assert set(status["streams"]) == {"0/2", "1/2"}
@@ -0,0 +1,63 @@
+# tests/unit/test_session_config.py
+import json
+
+import pytest
+
+from src.data_handlers.mvn_data_handler import XSensConfig
+from src.data_handlers.session_config import (DEFAULT_DEVICES, ConfigStore, DeviceSettings,
+                                              SessionProfile)
+
+
+class TestConfigStore:
+    """Unit tests for the persisted session configuration"""
+
+    def test_missing_file_gives_default_profile(self, tmp_path):
+        """Test that a first start gets the default devices without writing anything"""
+        store = ConfigStore(str(tmp_path / "config.json"))
+        profile = store.profile()
+        assert [device.name for device in profile.devices] == list(DEFAULT_DEVICES)
+        assert profile.device("XSens").xsens_config() == XSensConfig()
+        assert not (tmp_path / "config.json").exists()
+
+    def test_profiles_round_trip(self, tmp_path):
+        """Test that profiles, devices and the active profile survive a save and load"""
+        path = str(tmp_path / "nested" / "config.json")
+        store = ConfigStore(path)
+        store.profile()
+        stage = store.activate("stage_b")
+        stage.take_codec = "zlib"
+        stage.takes_directory = "D:/takes"
+        stage.devices.append(DeviceSettings("XSens 2", {"port": 9764}))
+        stage.device("XSens").update(XSensConfig(host="10.0.0.5", receive_buffer_size=1 << 20))
+        store.save()
+
+        loaded = ConfigStore(path)
+        assert sorted(loaded.profiles) == ["default", "stage_b"] and loaded.active == "stage_b"
+        profile = loaded.profile()
+        assert profile == stage
+        # Only settings that differ from the defaults are stored
+        assert profile.device("XSens").config == {"host": "10.0.0.5", "receive_buffer_size": 1 << 20}
+        assert profile.device("XSens 2").xsens_config().port == 9764
+        assert loaded.remove_profile("stage_b") and loaded.active == "default"
+
+    @pytest.mark.parametrize("text, message", [
+        ("{not json", "Invalid configuration"),
+        (json.dumps({"version": 99}), "newer version"),
+        (json.dumps({"profiles": {"a": {"devices": [{"name": "XSens", "config": {"baud": 1}}]}}}),
+         "Unknown setting"),
+        (json.dumps({"profiles": {"a": {"devices": [{"name": "XSens"}, {"name": "XSens"}]}}}),
+         "unique"),
+        (json.dumps({"profiles": {"a": {"devices": [{"config": {}}]}}}), "needs a name"),
+    ])
+    def test_invalid_files(self, tmp_path, text, message):
+        """Test that broken configuration files are rejected with a reason"""
+        path = tmp_path / "config.json"
+        path.write_text(text)
+        with pytest.raises(ValueError, match=message):
+            ConfigStore(str(path))
+
+    def test_default_profile_is_independent(self):
+        """Test that default profiles do not share device lists"""
+        first, second = SessionProfile.default(), SessionProfile.default("other")
+        first.devices.pop()
+        assert len(second.devices) == len(DEFAULT_DEVICES)
@@ -0,0 +1,74 @@
+# tests/unit/test_stream_framer.py
+import socket
+
+import pytest
+
+from src.data_handlers.mvn_protocol import decode_datagram
+from src.data_handlers.stream_framer import MVNStreamFramer
+from tests.fixtures.mock_data import make_pose_datagram
+
+
+def sample_counters(framer: MVNStreamFramer):
+    return [decode_datagram(view).sample_counter for view in framer.frames()]
+
+
+class TestMVNStreamFramer:
+    """Unit tests for MVNStreamFramer"""
+
+    def test_merged_messages(self):
+        """Test that several messages in one read are split apart"""
+        framer = MVNStreamFramer()
+        framer.feed(b"".join(make_pose_datagram(i) for i in range(3)))
+        assert sample_counters(framer) == [0, 1, 2]
+        assert framer.pending == 0
+
+    def test_split_messages(self):
+        """Test that a message arriving byte by byte is yielded once complete"""
+        framer = MVNStreamFramer()
+        datagram = make_pose_datagram(5)
+        seen = []
+        for i in range(len(datagram)):
+            framer.feed(datagram[i:i + 1])
+            seen.extend(sample_counters(framer))
+        assert seen == [5]
+
+    def test_compaction_and_growth(self):
+        """Test that a small buffer compacts and grows to fit messages"""
+        datagram = make_pose_datagram(1)
+        framer = MVNStreamFramer(capacity=64)
+        stream = b"".join(make_pose_datagram(i) for i in range(10))
+        seen = []
+        for i in range(0, len(stream), 100):
+            framer.feed(stream[i:i + 100])
+            seen.extend(sample_counters(framer))
+        assert seen == list(range(10))
+        assert framer.capacity >= len(datagram)
+
+    def test_resync_after_garbage(self):
+        """Test that garbage between messages is skipped"""
+        framer = MVNStreamFramer()
+        framer.feed(make_pose_datagram(1) + b"garbage-bytes-here-xxxxxxxxxx" + make_pose_datagram(2))
+        assert sample_counters(framer) == [1, 2]
+        assert framer.resyncs >= 1
+
+    def test_recv_into_socket(self):
+        """Test receiving directly from a stream socket"""
+        left, right = socket.socketpair()
+        try:
+            framer = MVNStreamFramer()
+            datagram = make_pose_datagram(3)
+            left.sendall(datagram[:10])
+            framer.recv_into(right)
+            assert sample_counters(framer) == []
+            left.sendall(datagram[10:] + make_pose_datagram(4))
+            while framer.pending < len(datagram) * 2:
+                framer.recv_into(right)
+            assert sample_counters(framer) == [3, 4]
+        finally:
+            left.close()
+            right.close()
+
+    def test_minimum_capacity(self):
+        """Test that a buffer smaller than a header is rejected"""
+        with pytest.raises(ValueError):
+            MVNStreamFramer(capacity=8)
@@ -0,0 +1,153 @@
+# tests/unit/test_take_codec.py
+import os
+from contextlib import closing
+
+import numpy as np
+import pytest
+
+from src.data_handlers import quaternions
+from src.data_handlers.mvn_protocol import POSE_EULER
+from src.data_handlers.take_codec import (CompressedTakeReader, CompressedTakeWriter,
+                                          compress_take, decompress_take, is_compressed, open_take)
+from src.data_handlers.take_export import export_take
+from src.data_handlers.take_file import TakeReader, TakeWriter, frame_record_dtype
+from src.data_handlers.take_loader import TakeSequence
+from src.data_handlers.take_recorder import TakeRecorder
+from tests.fixtures.mock_data import make_pose_frame
+
+
+def make_records(frames=1000, characters=2, seed=3):
+    """Interleaved multi-actor records with smooth motion and random rotations"""
+    rng = np.random.default_rng(seed)
+    records = np.zeros(frames * characters, dtype=frame_record_dtype(23))
+    sample = np.arange(len(records)) // characters
+    records["timestamp"] = 5000.0 + sample / 240.0
+    records["sample_counter"] = sample + 4294967000    # Wraps within the take
+    records["time_code"] = sample * 4
+    records["character_id"] = np.arange(len(records)) % characters
+    records["datagram_type"] = 2
+    phase = sample[:, None] / 240.0 + np.arange(23)
+    records["positions"] = np.stack([np.sin(phase), np.cos(phase), phase * 0.01], axis=-1)
+    records["rotations"] = quaternions.normalize(rng.normal(size=(len(records), 23, 4)))
+    return records
+
+
+def write_raw(path, records):
+    writer = TakeWriter(str(path), list(range(1, 24)), fsync=False, metadata={"scene": 4})
+    writer.write_records(records)
+    writer.close()
+
+
+class TestTakeCodec:
+    """Unit tests for compressed takes"""
+
+    def test_round_trip(self, tmp_path):
+        """Test exact scalar columns and bounded quantization error across blocks"""
+        records = make_records()
+        raw, packed = tmp_path / "raw.mtk", tmp_path / "packed.mtk"
+        write_raw(raw, records)
+        frames, size = compress_take(str(raw), str(packed), "zlib", block_frames=300)
+        assert frames == len(records) and size == os.path.getsize(packed)
+        assert is_compressed(str(packed)) and not is_compressed(str(raw))
+
+        reader = open_take(str(packed))
+        assert isinstance(reader, CompressedTakeReader)
+        assert len(reader) == len(records) and reader.block_count == 7
+        assert reader.metadata == {"scene": 4} and reader.segment_names == []
+        decoded = reader.read_records(0, len(reader))
+        for name in ("timestamp", "sample_counter", "time_code", "character_id", "datagram_type"):
+            np.testing.assert_array_equal(decoded[name], records[name])
+        assert np.abs(decoded["positions"] - records["positions"]).max() <= 5.1e-6
+        dot = np.abs(np.sum(decoded["rotations"] * records["rotations"], axis=-1))
+        np.testing.assert_allclose(dot, 1.0, atol=1e-6)
+        reader.close()
+
+    def test_euler_and_identity(self, tmp_path):
+        """Test that Euler rows are kept exactly and zero quaternions decode as identity"""
+        records = make_records(frames=50, characters=1)
+        records["datagram_type"][::2] = POSE_EULER
+        records["rotations"][::2, :, 3] = 0.0
+        records["rotations"][1, 5] = 0.0
+        path = tmp_path / "mixed.mtk"
+        writer = CompressedTakeWriter(str(path), list(range(1, 24)), compressor="lzma",
+                                      block_frames=16, fsync=False)
+        writer.write_records(records[:10])
+        assert writer.frames_written == 0
+        writer.write_records(records[10:])
+        assert writer.frames_written == 48
+        writer.close()
+        assert writer.frames_written == 50
+
+        with closing(CompressedTakeReader(str(path))) as reader:
+            decoded = reader.read_records(0, 50)
+            np.testing.assert_array_equal(decoded["rotations"][::2], records["rotations"][::2])
+            np.testing.assert_array_equal(decoded["rotations"][1, 5], [1.0, 0.0, 0.0, 0.0])
+
+    def test_random_access(self, tmp_path):
+        """Test frames, timestamps and time lookups decode only the blocks they need"""
+        records = make_records()
+        path = tmp_path / "packed.mtk"
+        writer = CompressedTakeWriter(str(path), list(range(1, 24)), block_frames=256, fsync=False)
+        writer.write_records(records)
+        writer.close()
+
+        with closing(CompressedTakeReader(str(path))) as reader:
+            frame = reader.read_frame(1234)
+            assert frame.sample_counter == records["sample_counter"][1234]
+            assert frame.character_id == 0 and frame.rotations.shape == (23, 4)
+            assert len(reader._cache) == 1
+            assert reader.timestamps[-1] == records["timestamp"][-1]
+            np.testing.assert_array_equal(reader.timestamps[250:520:7], records["timestamp"][250:520:7])
+            assert reader.frame_at_time(5000.0 + 300 / 240.0) == 601
+            assert reader.frame_at_time(0.0) == 0
+            assert reader.duration == pytest.approx(999 / 240.0)
+            assert len(reader.read_records(1990, 5000)) == 10
+            with pytest.raises(IndexError):
+                reader.read_frame(len(records))
+
+    def test_truncated_block_is_ignored(self, tmp_path):
+        """Test that a crash mid-block loses only that block"""
+        path = tmp_path / "packed.mtk"
+        writer = CompressedTakeWriter(str(path), list(range(1, 24)), block_frames=100, fsync=False)
+        writer.write_records(make_records(frames=150))
+        writer.close()
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 10)
+        with closing(CompressedTakeReader(str(path))) as reader:
+            assert len(reader) == 200 and reader.block_count == 2
+
+    def test_unknown_compressor(self, tmp_path):
+        """Test that an unavailable compressor is rejected up front"""
+        with pytest.raises(ValueError, match="not available"):
+            CompressedTakeWriter(str(tmp_path / "x.mtk"), [1], compressor="brotli")
+
+    def test_recorder_and_readers(self, tmp_path):
+        """Test recording compressed, then loading, exporting and restoring the take"""
+        path = str(tmp_path / "take.mtk")
+        recorder = TakeRecorder(path, batch_frames=50, fsync=False, codec="zlib")
+        recorder.start()
+        for i in range(500):
+            frame = make_pose_frame(sample_counter=i, time_code=round(i * 1000 / 240))
+            frame.timestamp = i / 240.0
+            frame.positions[:, 0] = i * 1e-3
+            recorder.write_frame(frame)
+        recorder.stop()
+        assert recorder.get_status()["frames_written"] == 500
+        assert os.path.getsize(path) * 10 < 500 * frame_record_dtype(23).itemsize
+
+        with TakeSequence.open(path, chunk_frames=64) as take:
+            np.testing.assert_allclose(take.column("positions", "Pelvis")[:, 0],
+                                       np.arange(500) * 1e-3, atol=5e-6)
+
+        result = export_take(path, str(tmp_path / "out"), ["bvh", "csv"])
+        assert result.error is None and result.frames == 500
+        smoothed = export_take(path, str(tmp_path / "smoothed"), ["csv"], smoothing=10.0)
+        assert smoothed.error is None and smoothed.frames == 500
+
+        restored = str(tmp_path / "restored.mtk")
+        assert decompress_take(path, restored) == 500
+        reader = TakeReader(restored)
+        assert len(reader) == 500 and reader.segment_names[0] == "Pelvis"
+        np.testing.assert_array_equal(reader.records["sample_counter"], np.arange(500))
+        reader.close()
+
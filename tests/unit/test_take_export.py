@@ -0,0 +1,137 @@
+# tests/unit/test_take_export.py
+import numpy as np
+import pytest
+
+from src.data_handlers import quaternions
+from src.data_handlers.mvn_protocol import POSE_EULER, SEGMENT_PARENTS
+from src.data_handlers.take_export import FBX_TICKS_PER_SECOND, export_directory, export_take
+from src.data_handlers.take_recorder import TakeRecorder
+from tests.fixtures.mock_data import make_pose_frame
+
+
+def record_take(path, frames=100, characters=(0,)):
+    recorder = TakeRecorder(str(path), batch_frames=32, fsync=False)
+    recorder.start()
+    for i in range(frames):
+        for character in characters:
+            frame = make_pose_frame(sample_counter=i, time_code=round(i * 1000 / 240),
+                                    character_id=character)
+            frame.timestamp = i / 240.0
+            angle = np.radians(i)
+            frame.rotations[1] = [np.cos(angle / 2), 0.0, 0.0, np.sin(angle / 2)]
+            recorder.write_frame(frame)
+    recorder.stop()
+
+
+class TestQuaternions:
+    """Unit tests for the vectorized quaternion helpers"""
+
+    @pytest.mark.parametrize("order", ["ZXY", "ZYX", "XYZ"])
+    def test_euler_round_trip(self, order):
+        """Test Euler conversion against its inverse over a block of frames"""
+        angles = np.random.default_rng(1).uniform(-80, 80, (64, 23, 3))
+        q = quaternions.from_euler(angles, order)
+        np.testing.assert_allclose(quaternions.to_euler(q, order), angles, atol=1e-9)
+
+    def test_local_rotations(self):
+        """Test that parent-relative rotations compose back to global ones"""
+        rng = np.random.default_rng(2)
+        global_rot = quaternions.normalize(rng.normal(size=(8, 23, 4)))
+        local = quaternions.local_rotations(global_rot, SEGMENT_PARENTS)
+        parents = np.array(SEGMENT_PARENTS)
+        rebuilt = quaternions.multiply(global_rot[:, parents[1:]], local[:, 1:])
+        np.testing.assert_allclose(np.abs(np.sum(rebuilt * global_rot[:, 1:], axis=-1)), 1.0, atol=1e-9)
+
+
+class TestTakeExport:
+    """Unit tests for take export"""
+
+    def test_export_bvh_csv_fbx(self, tmp_path):
+        """Test that every format is written with one row per frame"""
+        take = tmp_path / "take.mtk"
+        record_take(take)
+        result = export_take(str(take), str(tmp_path / "out"), ("bvh", "csv", "fbx"), chunk_frames=30)
+        assert result.error is None
+        assert result.frames == 100
+
+        bvh = (tmp_path / "out" / "take.bvh").read_text().splitlines()
+        assert bvh[0] == "HIERARCHY"
+        assert "Frames: 100" in bvh
+        period_line = bvh.index("MOTION") + 2
+        # Millisecond time codes at 240 Hz still give the 240 Hz period, not 4 ms
+        assert float(bvh[period_line].split(":")[1]) == pytest.approx(1 / 240, rel=2e-3)
+        motion = bvh[period_line + 1:]
+        assert len(motion) == 100
+        assert len(motion[0].split()) == 6 + 22 * 3
+        # L5 turns about MVN Z, the export Y axis (third channel), and L3 turns back
+        channels = [float(v) for v in motion[90].split()]
+        assert channels[6] == pytest.approx(0.0, abs=1e-3)
+        assert channels[8] == pytest.approx(90.0, abs=1e-2)
+        assert channels[11] == pytest.approx(-90.0, abs=1e-2)
+
+        rows = (tmp_path / "out" / "take.csv").read_text().splitlines()
+        assert len(rows) == 101
+        assert rows[0].startswith("frame,timestamp,time_code,character_id,Pelvis_px")
+
+        fbx = (tmp_path / "out" / "take.fbx").read_text()
+        assert fbx.startswith("; FBX 7.4.0 project file")
+        assert "KeyTime: *100" in fbx
+        # Keys follow the BVH timeline: the last one lands at 99 frame periods
+        keys = fbx[fbx.index("KeyTime: *100"):].split("a: ", 1)[1].split("\n", 1)[0]
+        last_key = int(keys.split(",")[-1]) / FBX_TICKS_PER_SECOND
+        assert last_key == pytest.approx(99 * float(bvh[period_line].split(":")[1]), rel=1e-4)
+        assert not list((tmp_path / "out").glob("*.spool"))
+
+    def test_export_euler_csv(self, tmp_path):
+        """Test that Euler takes export their angles under Euler column names"""
+        take = tmp_path / "take.mtk"
+        recorder = TakeRecorder(str(take), fsync=False)
+        recorder.start()
+        for i in range(5):
+            frame = make_pose_frame(sample_counter=i)
+            frame.datagram_type = POSE_EULER
+            frame.rotations = np.tile(np.float32([10.0, 20.0, 30.0 + i]), (23, 1))
+            recorder.write_frame(frame)
+        recorder.stop()
+        assert export_take(str(take), str(tmp_path / "out"), ("bvh",)).error is not None
+        result = export_take(str(take), str(tmp_path / "out"), ("csv",))
+        assert result.error is None
+
+        rows = (tmp_path / "out" / "take.csv").read_text().splitlines()
+        header = rows[0].split(",")
+        assert header[4:10] == ["Pelvis_px", "Pelvis_py", "Pelvis_pz",
+                                "Pelvis_rx", "Pelvis_ry", "Pelvis_rz"]
+        assert len(header) == 4 + 23 * 6
+        last = [float(v) for v in rows[-1].split(",")]
+        assert len(last) == len(header)
+        assert last[7:10] == [10.0, 20.0, 34.0]
+
+    def test_export_per_character(self, tmp_path):
+        """Test that multi-actor takes are split per character"""
+        take = tmp_path / "take.mtk"
+        record_take(take, frames=20, characters=(0, 1))
+        result = export_take(str(take), str(tmp_path), ("bvh",))
+        assert result.error is None
+        assert sorted(p.name for p in tmp_path.glob("*.bvh")) == ["take_char0.bvh", "take_char1.bvh"]
+
+    def test_export_smoothed(self, tmp_path):
+        """Test that smoothing exports from a filtered copy under the original name"""
+        take = tmp_path / "take.mtk"
+        record_take(take, frames=100)
+        result = export_take(str(take), str(tmp_path / "out"), ("bvh",), smoothing=6.0)
+        assert result.error is None and result.take == str(take)
+        assert [p.name for p in (tmp_path / "out").iterdir()] == ["take.bvh"]
+
+    def test_export_directory(self, tmp_path):
+        """Test the process pool over a directory of takes"""
+        for name in ("a", "b", "c"):
+            record_take(tmp_path / f"{name}.mtk", frames=10)
+        (tmp_path / "broken.mtk").write_bytes(b"not a take")
+        results = export_directory(str(tmp_path), str(tmp_path / "out"), ("csv",), workers=2)
+        assert [r.error is None for r in results] == [True, True, False, True]
+        assert len(list((tmp_path / "out").glob("*.csv"))) == 3
+
+    def test_unknown_format(self, tmp_path):
+        """Test that unknown formats are rejected"""
+        with pytest.raises(ValueError):
+            export_directory(str(tmp_path), str(tmp_path), ("obj",))
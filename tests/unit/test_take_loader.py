@@ -0,0 +1,92 @@
+# tests/unit/test_take_loader.py
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.data_handlers.mvn_protocol import POSE_QUATERNION
+from src.data_handlers.take_loader import TakeSequence
+from src.data_handlers.take_recorder import TakeRecorder
+from tests.fixtures.mock_data import make_pose_frame
+
+
+@pytest.fixture
+def take_path(tmp_path):
+    """Record 1000 frames whose pelvis X position is the frame number"""
+    path = str(tmp_path / "take.mtk")
+    recorder = TakeRecorder(path, batch_frames=100, fsync=False)
+    recorder.start()
+    for i in range(1000):
+        frame = make_pose_frame(sample_counter=i)
+        frame.timestamp = 1000.0 + i / 240.0
+        frame.positions[:, 0] = i
+        recorder.write_frame(frame)
+    recorder.stop()
+    return path
+
+
+class TestTakeSequence:
+    """Unit tests for TakeSequence and its chunk cache"""
+
+    def test_frames_and_slices(self, take_path):
+        """Test indexing and slicing against the recorded frames"""
+        with TakeSequence.open(take_path, chunk_frames=64, cache_chunks=4) as take:
+            assert len(take) == 1000
+            frame = take[-1]
+            assert frame.sample_counter == 999 and frame.datagram_type == POSE_QUATERNION
+            assert frame.positions.shape == (23, 3) and frame.rotations.shape == (23, 4)
+            window = take[100:400:3]
+            assert len(window) == 100
+            assert window[2].sample_counter == 106
+            assert window[10:20][0].sample_counter == 130
+            assert [f.sample_counter for f in take[5:0:-2]] == [5, 3, 1]
+
+    @pytest.mark.parametrize("key", [slice(None), slice(10, 700, 7), slice(900, 3, -5), slice(5, 5)])
+    def test_columns(self, take_path, key):
+        """Test per-segment columns across chunk boundaries"""
+        with TakeSequence.open(take_path, chunk_frames=64, cache_chunks=4) as take:
+            pelvis = take[key].column("positions", "Pelvis")
+            np.testing.assert_array_equal(pelvis[:, 0], np.arange(1000)[key])
+            assert take[key].column("rotations", 1).shape == (len(np.arange(1000)[key]), 4)
+            with pytest.raises(KeyError):
+                take.column("positions", "Tail")
+
+    def test_bounded_cache(self, take_path):
+        """Test that random access keeps at most cache_chunks decoded"""
+        with TakeSequence.open(take_path, chunk_frames=50, cache_chunks=3) as take:
+            for index in np.random.default_rng(5).integers(0, 1000, 200):
+                assert take[int(index)].sample_counter == index
+            status = take.get_status()
+            assert status["cached_chunks"] == 3
+            assert status["misses"] - status["evictions"] == 3
+            assert status["hits"] + status["misses"] == 200
+
+    def test_read_ahead(self, take_path):
+        """Test that sequential reads decode the following chunks in the background"""
+        with TakeSequence.open(take_path, chunk_frames=100, cache_chunks=8, read_ahead=2) as take:
+            take[0]
+            deadline = time.time() + 5.0
+            while take.get_status()["prefetched"] < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            assert take.get_status()["cached_chunks"] == 3
+            counters = [frame.sample_counter for frame in take]
+            assert counters == list(range(1000))
+            assert take.get_status()["misses"] < 10
+
+    def test_concurrent_readers(self, take_path):
+        """Test that threads sharing the cache see consistent frames"""
+        with TakeSequence.open(take_path, chunk_frames=32, cache_chunks=2) as take:
+            errors = []
+
+            def read(offset):
+                for index in range(offset, 1000, 7):
+                    if take[index].positions[0, 0] != index:
+                        errors.append(index)
+
+            threads = [threading.Thread(target=read, args=(i,)) for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert not errors
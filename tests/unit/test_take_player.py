@@ -0,0 +1,163 @@
+# tests/unit/test_take_player.py
+import os
+import time
+
+import numpy as np
+import pytest
+
+from src.data_handlers.take_codec import compress_take
+from src.data_handlers.take_file import TakeReader, index_path
+from src.data_handlers.take_player import TakePlayer
+from src.data_handlers.take_recorder import TakeRecorder
+from tests.fixtures.mock_data import make_pose_frame
+
+FRAME_RATE = 240.0
+
+
+@pytest.fixture
+def take_path(tmp_path):
+    """Record a one second take at 240 Hz"""
+    path = str(tmp_path / "take.mtk")
+    recorder = TakeRecorder(path, batch_frames=50, index_interval=24, fsync=False)
+    recorder.start()
+    for i in range(240):
+        frame = make_pose_frame(sample_counter=i)
+        frame.timestamp = 1000.0 + i / FRAME_RATE
+        frame.positions[:, 0] = i
+        recorder.write_frame(frame)
+    recorder.stop()
+    return path
+
+
+@pytest.fixture
+def actors_path(tmp_path):
+    """Record two actors for 120 samples, both frames of a sample sharing its timestamp"""
+    path = str(tmp_path / "actors.mtk")
+    recorder = TakeRecorder(path, fsync=False)
+    recorder.start()
+    for i in range(120):
+        for character in (0, 1):
+            frame = make_pose_frame(sample_counter=i, character_id=character)
+            frame.timestamp = 1000.0 + i / FRAME_RATE
+            recorder.write_frame(frame)
+    recorder.stop()
+    return path
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class TestTakeReader:
+    """Unit tests for TakeReader"""
+
+    def test_random_access(self, take_path):
+        """Test frame count, layout and random frame reads"""
+        reader = TakeReader(take_path)
+        assert len(reader) == 240
+        assert reader.segment_names[0] == "Pelvis"
+        frame = reader.read_frame(123)
+        assert frame.sample_counter == 123
+        assert np.all(frame.positions[:, 0] == 123)
+        reader.close()
+
+    def test_frame_at_time(self, take_path):
+        """Test timestamp seeks through the sparse index"""
+        reader = TakeReader(take_path)
+        assert reader.frame_at_time(0.0) == 0
+        assert reader.frame_at_time(1000.0 + 100.5 / FRAME_RATE) == 100
+        assert reader.frame_at_time(5000.0) == 239
+        reader.close()
+
+    def test_crash_truncated_take(self, take_path):
+        """Test that a partial trailing record and a missing index are tolerated"""
+        with open(take_path, "ab") as f:
+            f.write(b"\x01" * 17)
+        os.remove(index_path(take_path))
+        reader = TakeReader(take_path)
+        assert len(reader) == 240
+        assert reader.frame_at_time(1000.0 + 200 / FRAME_RATE) == 200
+        reader.close()
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file without the take header is rejected"""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"x" * 128)
+        with pytest.raises(ValueError):
+            TakeReader(str(path))
+
+
+class TestTakePlayer:
+    """Unit tests for TakePlayer"""
+
+    def test_plays_all_frames_in_order(self, take_path):
+        """Test playback through the MVNDataHandler callback API"""
+        player = TakePlayer(take_path, speed=4.0)
+        received = []
+        player.add_data_callback(lambda frame: received.append(frame.sample_counter))
+        assert player.connect()[0]
+        player.start_streaming()
+        wait_for(lambda: not player.is_streaming)
+        wait_for(lambda: len(received) + player.skipped_frames >= 240)
+        player.disconnect()
+        assert received == sorted(received)
+        assert received[-1] == 239
+        assert len(received) + player.skipped_frames == 240
+
+    def test_plays_compressed_take(self, take_path, tmp_path):
+        """Test that a compressed take seeks and plays like the raw one"""
+        packed = str(tmp_path / "packed.mtk")
+        compress_take(take_path, packed, "zlib", block_frames=64)
+        player = TakePlayer(packed, speed=4.0)
+        received = []
+        player.add_data_callback(lambda frame: received.append(frame.sample_counter))
+        assert player.connect()[0]
+        player.seek_time(0.5)
+        assert player.position == 120
+        player.start_streaming()
+        wait_for(lambda: not player.is_streaming)
+        player.disconnect()
+        assert received[0] == 120 and received[-1] == 239
+        assert len(received) + player.skipped_frames == 120
+
+    def test_seek_and_loop(self, take_path):
+        """Test that seeking and looping wrap playback around"""
+        player = TakePlayer(take_path, speed=8.0, loop=True)
+        received = []
+        player.add_data_callback(lambda frame: received.append(frame.sample_counter))
+        player.connect()
+        player.seek_time(0.9)
+        assert player.position == 216
+        player.start_streaming()
+        wait_for(lambda: 0 in received)
+        player.disconnect()
+        assert received[0] >= 216
+        assert 0 in received
+
+    def test_plays_every_actor(self, actors_path):
+        """Test that frames of several actors sharing a sample are all played"""
+        player = TakePlayer(actors_path)
+        received = []
+        player.add_data_callback(lambda frame: received.append(frame.character_id))
+        player.connect()
+        player.start_streaming()
+        wait_for(lambda: len(received) >= 240)
+        player.disconnect()
+        assert player.skipped_frames == 0
+        assert received.count(0) == received.count(1) == 120
+
+    def test_skip_resumes_at_first_actor(self, actors_path):
+        """Test that skipping ahead lands on the first frame of a sample"""
+        player = TakePlayer(actors_path)
+        player.connect()
+        assert player._current_sample(1000.0 + 50.5 / FRAME_RATE) == 100
+        player.disconnect()
+
+    def test_missing_take(self, tmp_path):
+        """Test that opening a missing take reports failure"""
+        player = TakePlayer(str(tmp_path / "missing.mtk"))
+        success, message = player.connect()
+        assert not success
+        assert "Failed" in message
@@ -0,0 +1,116 @@
+# tests/unit/test_take_recorder.py
+import json
+
+import numpy as np
+import pytest
+
+from src.data_handlers.mvn_protocol import POSE_EULER, POSITION_POINTS
+from src.data_handlers.take_file import (FILE_HEADER, INDEX_DTYPE, MAGIC, TakeReader,
+                                         frame_record_dtype, index_path)
+from src.data_handlers.take_recorder import TakeRecorder
+from tests.fixtures.mock_data import make_pose_frame
+
+
+def read_take(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, _, segments, record_size, _, _, layout_size, offset = FILE_HEADER.unpack_from(data)
+    layout = json.loads(data[FILE_HEADER.size:FILE_HEADER.size + layout_size])
+    records = np.frombuffer(data, dtype=frame_record_dtype(segments), offset=offset)
+    return magic, layout, records
+
+
+class TestTakeRecorder:
+    """Unit tests for TakeRecorder"""
+
+    @pytest.fixture
+    def take_path(self, tmp_path):
+        return str(tmp_path / "take.mtk")
+
+    def test_records_frames(self, take_path):
+        """Test that every frame reaches the file in order"""
+        recorder = TakeRecorder(take_path, batch_frames=16, index_interval=10, fsync=False)
+        recorder.start()
+        for i in range(50):
+            frame = make_pose_frame(sample_counter=i, time_code=i * 4)
+            frame.timestamp = 100.0 + i
+            recorder.write_frame(frame)
+        recorder.stop()
+
+        magic, layout, records = read_take(take_path)
+        assert magic == MAGIC
+        assert layout["segment_names"][0] == "Pelvis"
+        assert len(records) == 50
+        np.testing.assert_array_equal(records["sample_counter"], np.arange(50))
+        np.testing.assert_allclose(records["positions"][7], make_pose_frame().positions)
+        assert recorder.get_status()["frames_written"] == 50
+
+        index = np.fromfile(index_path(take_path), dtype=INDEX_DTYPE)
+        np.testing.assert_array_equal(index["frame"], [0, 10, 20, 30, 40])
+        np.testing.assert_allclose(index["timestamp"], [100.0, 110.0, 120.0, 130.0, 140.0])
+
+    def test_ignores_frames_when_not_recording(self, take_path):
+        """Test that frames are only written between start and stop"""
+        recorder = TakeRecorder(take_path, fsync=False)
+        recorder.write_frame(make_pose_frame())
+        recorder.stop()
+        assert recorder.frames_recorded == 0
+
+    def test_layout_mismatch_is_dropped(self, take_path):
+        """Test that frames with a different segment count are counted as dropped"""
+        recorder = TakeRecorder(take_path, fsync=False)
+        recorder.start()
+        recorder.write_frame(make_pose_frame())
+        recorder.write_frame(make_pose_frame(segment_count=10))
+        recorder.stop()
+        assert recorder.frames_recorded == 1
+        assert recorder.dropped_frames == 1
+        assert recorder.layout_mismatches == 1
+
+    def test_records_euler_frames(self, take_path):
+        """Test that Euler pose streams are recorded and read back as Euler"""
+        recorder = TakeRecorder(take_path, fsync=False)
+        recorder.start()
+        frame = make_pose_frame()
+        frame.datagram_type = POSE_EULER
+        frame.rotations = np.full((frame.segment_count, 3), 45.0, dtype=np.float32)
+        recorder.write_frame(frame)
+        recorder.stop()
+        assert recorder.frames_written == 1
+
+        reader = TakeReader(take_path)
+        try:
+            restored = reader.read_frame(0)
+            assert restored.datagram_type == POSE_EULER
+            np.testing.assert_allclose(restored.rotations, frame.rotations)
+        finally:
+            reader.close()
+
+    def test_unrecorded_frames_are_counted(self, take_path):
+        """Test that non-pose and split frames show up in the status"""
+        recorder = TakeRecorder(take_path, fsync=False)
+        recorder.start()
+        recorder.write_frame(make_pose_frame())
+        other = make_pose_frame()
+        other.datagram_type = POSITION_POINTS
+        recorder.write_frame(other)
+        split = make_pose_frame()
+        split.is_last_datagram = False
+        recorder.write_frame(split)
+        recorder.stop()
+
+        status = recorder.get_status()
+        assert status["frames_written"] == 1
+        assert status["ignored_frames"] == 1
+        assert status["split_frames"] == 1
+        assert status["layout_mismatches"] == 0
+
+    def test_missing_samples_are_counted(self, take_path):
+        """Test that gaps in each character's sample counters are reported"""
+        recorder = TakeRecorder(take_path, fsync=False)
+        recorder.start()
+        for character_id in (0, 1):
+            for i in (0, 1, 2, 5, 6, 9):
+                recorder.write_frame(make_pose_frame(sample_counter=i, character_id=character_id))
+        recorder.stop()
+        assert recorder.get_status()["missing_samples"] == 8
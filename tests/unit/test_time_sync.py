@@ -0,0 +1,75 @@
+# tests/unit/test_time_sync.py
+import numpy as np
+import pytest
+
+from src.data_handlers import quaternions
+from src.data_handlers.time_sync import ClockEstimator, FrameSynchronizer
+from tests.fixtures.mock_data import make_pose_frame
+
+
+def z_rotation(degrees):
+    angle = np.radians(degrees) / 2.0
+    return np.array([np.cos(angle), 0.0, 0.0, np.sin(angle)])
+
+
+class TestClockEstimator:
+    """Unit tests for ClockEstimator"""
+
+    def test_offset_and_drift(self):
+        """Test that offset and drift are recovered despite one-sided delay jitter"""
+        rng = np.random.default_rng(3)
+        estimator = ClockEstimator(window=20)
+        sender = np.arange(0, 60.0, 1 / 240.0)
+        receive = 500.0 + sender * (1 + 100e-6) + rng.exponential(0.002, len(sender))
+        for s, r in zip(np.round(sender * 1000) / 1000, receive):
+            estimator.update(s, r)
+        assert estimator.drift == pytest.approx(100e-6, abs=20e-6)
+        assert estimator.to_local(60.0) == pytest.approx(500.0 + 60.0 * (1 + 100e-6), abs=1e-3)
+
+
+class TestFrameSynchronizer:
+    """Unit tests for FrameSynchronizer"""
+
+    def push(self, sync, source_id, rate, clock_offset, duration=1.0):
+        # Both sources watch the same motion: 90 degrees per second about Z
+        for i in range(int(duration * rate)):
+            t = i / rate
+            # Sender clocks start at different points; arrival is 1 ms after capture
+            frame = make_pose_frame(sample_counter=i, time_code=int(round((t + clock_offset) * 1000)))
+            frame.source_id = source_id
+            frame.receive_time = 100.0 + t + 0.001
+            frame.rotations[:] = z_rotation(90.0 * t)
+            frame.positions[:, 0] = t
+            sync.push(frame)
+
+    def test_aligns_sources_with_different_clocks_and_rates(self):
+        """Test that a 240 Hz and a 60 Hz source are resampled to the same instant"""
+        sync = FrameSynchronizer(rate=100.0, latency=0.05)
+        self.push(sync, "body", 240.0, clock_offset=3.0)
+        self.push(sync, "glove", 60.0, clock_offset=2.5)
+
+        frame = sync.align(100.0 + 0.001 + 0.896)
+        assert set(frame.poses) == {("body", 0), ("glove", 0)}
+        expected = z_rotation(90.0 * 0.896)
+        for pose in frame.poses.values():
+            assert not pose.held
+            assert np.abs(pose.rotations @ expected) == pytest.approx(np.ones(23), abs=1e-4)
+            assert pose.positions[0, 0] == pytest.approx(0.896, abs=1e-3)
+
+    def test_poll_is_bounded(self):
+        """Test that polling emits at the target rate and never builds a backlog"""
+        sync = FrameSynchronizer(rate=100.0, latency=0.0)
+        self.push(sync, "body", 240.0, clock_offset=0.0)
+        assert len(sync.poll(now=100.0)) == 1
+        assert len(sync.poll(now=100.05)) == 5
+        assert len(sync.poll(now=110.0)) <= 3
+        assert sync.skipped_outputs > 0
+
+    def test_slerp(self):
+        """Test vectorized slerp against a known rotation"""
+        a = np.tile(z_rotation(0.0), (23, 1))
+        b = np.tile(z_rotation(170.0), (23, 1))
+        half = quaternions.slerp(a, b, 0.5)
+        np.testing.assert_allclose(half, np.tile(z_rotation(85.0), (23, 1)), atol=1e-12)
+        # Opposite-sign quaternions take the short way round
+        np.testing.assert_allclose(np.abs(quaternions.slerp(a, -a, 0.3)), np.abs(a), atol=1e-12)
@@ -1,8 +1,16 @@
 # tests/unit/test_visualizer.py
+import threading
+import time
+
+import numpy as np
 import pytest
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QPointF
+from src.data_handlers.mvn_protocol import SEGMENT_PARENTS, TIME_CODE
+from src.visualization.frame_bridge import FrameBridge
 from src.visualization.motion_visualizer import MotionScene, MotionVisualizer
+from src.visualization.trail_buffer import TrailBuffer
+from tests.fixtures.mock_data import make_pose_frame
 
 @pytest.fixture(scope="module")
 def qapp():
@@ -11,18 +19,47 @@ def qapp():
     yield app
     app.quit()
 
+class TestTrailBuffer:
+    """Unit tests for TrailBuffer"""
+    
+    def test_ring_wraps_in_place(self):
+        """Test that pushes overwrite the oldest sample without reallocating"""
+        trail = TrailBuffer(4, 3, dims=3, joints=[0, 2])
+        samples = trail.samples
+        for i in range(6):
+            trail.push(np.full((3, 3), float(i)))
+        assert trail.samples is samples and trail.count == 4 and trail.write_index == 2
+        np.testing.assert_array_equal(trail.ordered()[:, 0, 0], [2, 3, 4, 5])
+        np.testing.assert_array_equal(trail.ages(), [3, 2, 1, 0])
+        with pytest.raises(ValueError):
+            TrailBuffer(4, 3, joints=[3])
+        
+    def test_segments_by_age(self):
+        """Test that segments keep their age group while the trail fills"""
+        trail = TrailBuffer(9, 1)
+        for i in range(3):
+            trail.push(np.array([[i, 0.0]]))
+        groups = trail.segments(4)
+        assert [len(group) for group in groups] == [0, 0, 0, 4]
+        for i in range(3, 12):
+            trail.push(np.array([[i, 0.0]]))
+        groups = trail.segments(4)
+        assert [len(group) for group in groups] == [4, 4, 4, 4]
+        np.testing.assert_array_equal(groups[0][:, 0], [3, 4, 4, 5])
+        np.testing.assert_array_equal(groups[-1][:, 0], [9, 10, 10, 11])
+
 class TestMotionScene:
     """Unit tests for MotionScene class"""
     
     @pytest.fixture
-    def scene(self):
+    def scene(self, qapp):
         """Create fresh MotionScene for each test"""
         return MotionScene()
     
     def test_initial_state(self, scene):
         """Test initial state of MotionScene"""
         assert len(scene.skeleton_points) == 0
-        assert len(scene.motion_trail) == 0
+        assert scene.trail is None and len(scene.trail_item.batches) == 0
         assert scene.max_trail_length == 50
     
     def test_update_skeleton(self, scene):
@@ -35,12 +72,46 @@ class TestMotionScene:
         
         scene.update_skeleton(test_points)
         assert len(scene.skeleton_points) == 3
-        assert len(scene.motion_trail) == 1
+        assert scene.trail.samples.shape == (scene.max_trail_length, 3, 2)
+        assert scene.trail.count == 1
         
         # Test trail length limit
         for _ in range(60):  # More than max_trail_length
             scene.update_skeleton(test_points)
-        assert len(scene.motion_trail) == scene.max_trail_length
+        assert scene.trail.count == scene.max_trail_length
+
+    def test_retained_items(self, scene):
+        """Test that the pose and trail are kept in persistent items"""
+        items = set(scene.items())
+        for i in range(60):
+            scene.update_skeleton([QPointF(i, 0), QPointF(i, 10), QPointF(i, 20)])
+        assert set(scene.items()) == items
+        assert scene.trail.count == scene.max_trail_length
+        # 49 segments per joint, drawn as point pairs in 8 batches
+        assert sum(pairs.size() for _, pairs in scene.trail_item.batches) == 49 * 3 * 2
+        assert scene.trail_item.boundingRect().contains(QPointF(30, 10))
+        assert not scene.trail_item.boundingRect().contains(QPointF(5, 10))
+        assert scene.joint_item.path().boundingRect().contains(QPointF(59, 20))
+        
+    def test_trail_joints_and_fade(self, scene):
+        """Test per-joint trails drawn in batches that fade out by age"""
+        scene.set_trail(10, joints=[2, 7], fade_steps=3)
+        for i in range(20):
+            scene.update_skeleton(np.array([[i, 0.0], [i, 10.0], [i, 20.0]]))
+        assert scene.trail.samples.shape == (10, 1, 2)
+        batches = scene.trail_item.batches
+        assert len(batches) == 3
+        alphas = [pen.color().alphaF() for pen, _ in batches]
+        assert alphas == sorted(alphas) and alphas[-1] == 1.0
+        newest = batches[-1][1]
+        assert newest[newest.size() - 1] == QPointF(19, 20)
+        
+    def test_set_bones(self, scene):
+        """Test parent-index bone connections"""
+        scene.set_bones([-1, 0, 0])
+        scene.update_skeleton([QPointF(0, 0), QPointF(-10, 10), QPointF(10, 10)])
+        # Two bones, each a moveTo followed by a lineTo
+        assert scene.bone_item.path().elementCount() == 4
 
 class TestMotionVisualizer:
     """Unit tests for MotionVisualizer class"""
@@ -58,16 +129,132 @@ class TestMotionVisualizer:
     
     def test_data_update(self, visualizer):
         """Test data update handling"""
-        test_data = {
-            'header': 42,
-            'timestamp': 123.456,
-            'payload': {
-                'raw_data': b'test'
-            }
-        }
+        test_data = make_pose_frame(sample_counter=42)
         
         visualizer.update_data(test_data)
+        assert visualizer.bridge.deliver()
         assert visualizer.info_label.text() == "Frame: 42"
+        
+    def test_mixed_stream_and_actors(self, visualizer):
+        """Test that time code frames do not hide poses and every actor is drawn"""
+        for i in range(10):
+            for character_id in (0, 1):
+                visualizer.update_data(make_pose_frame(sample_counter=i, character_id=character_id))
+            time_code = make_pose_frame(sample_counter=i)
+            time_code.datagram_type = TIME_CODE
+            visualizer.update_data(time_code)
+        assert visualizer.bridge.deliver()
+        assert visualizer.info_label.text() == "Frame: 9 (18 coalesced)"
+        assert sorted(visualizer.scene.skeletons) == [(None, 0), (None, 1)]
+        for skeleton in visualizer.scene.skeletons.values():
+            assert len(skeleton.points) == 23 and skeleton.trail.count == 1
+        status = visualizer.get_status()
+        assert status["published"] == 20 and status["delivered"] == 2
+
+    def test_update_from_worker_thread(self, visualizer):
+        """Test that frames from a handler thread are applied on the GUI thread"""
+        worker = threading.Thread(target=visualizer.update_data, args=(make_pose_frame(sample_counter=7),))
+        worker.start()
+        worker.join()
+        assert visualizer.info_label.text() == "No data"
+        visualizer.bridge.deliver()
+        assert visualizer.info_label.text() == "Frame: 7"
+        
+    def test_render(self, visualizer):
+        """Test that the retained scene paints into the viewport"""
+        visualizer.resize(400, 300)
+        for i in range(5):
+            visualizer.update_data(make_pose_frame(sample_counter=i))
+            visualizer.bridge.deliver()
+        image = visualizer.view.viewport().grab().toImage()
+        assert not image.isNull()
+
+    def test_grid_cache(self, visualizer):
+        """Test that the grid is rendered once per view size and zoom"""
+        visualizer.resize(400, 300)
+        visualizer.view.viewport().grab()
+        visualizer.view.viewport().grab()
+        assert len(visualizer.scene._grid_cache) == 1
+        visualizer.view.scale(2, 2)
+        image = visualizer.view.viewport().grab().toImage()
+        assert len(visualizer.scene._grid_cache) == 2
+        # A vertical grid line runs through the scene origin
+        origin = visualizer.view.mapFromScene(QPointF(0, 0))
+        line = image.pixelColor(origin.x(), origin.y() + 10)
+        assert (line.red(), line.green(), line.blue()) == (50, 50, 50)
+        
+    def test_performance_hud(self, visualizer):
+        """Test that showing the HUD enables render metrics and lists them"""
+        assert not visualizer.metrics.enabled and visualizer.hud.isHidden()
+        visualizer.set_hud_visible(True)
+        frame = make_pose_frame(sample_counter=5)
+        frame.receive_time = time.monotonic()
+        visualizer.update_data(frame)
+        visualizer.bridge.deliver()
+        visualizer.hud.refresh()
+        text = visualizer.hud.text()
+        assert "render" in text and "render_lag" in text
+        visualizer.set_hud_visible(False)
+        assert not visualizer.metrics.enabled and not visualizer.hud.timer.isActive()
+        
+    def test_forward_kinematics(self, visualizer):
+        """Test that joints follow the rotations with calibrated rigid bones"""
+        visualizer.set_skeleton(SEGMENT_PARENTS)
+        frame = make_pose_frame()
+        points = visualizer._extract_points(frame)
+        assert points[6, 1] == pytest.approx(frame.positions[6, 2] * 100.0, abs=1e-3)
+        # A quarter turn about X swings the spine from +Z to -Y, right in the front view
+        turned = make_pose_frame()
+        turned.rotations[:] = [np.cos(np.pi / 4), np.sin(np.pi / 4), 0.0, 0.0]
+        turned.positions[1:] = 0.0
+        points = visualizer._extract_points(turned)
+        height = (frame.positions[6, 2] - frame.positions[0, 2]) * 100.0
+        assert points[6, 0] == pytest.approx(height, abs=1e-3)
+        assert points[6, 1] == pytest.approx(0.0, abs=1e-3)
+        
+class TestFrameBridge:
+    """Unit tests for FrameBridge"""
+    
+    def test_coalesces_to_latest_frame(self, qapp):
+        """Test that only the newest frame per refresh is delivered"""
+        bridge = FrameBridge(refresh_rate=60.0)
+        bridge.stop()
+        received = []
+        bridge.frame_ready.connect(received.append)
+        
+        worker = threading.Thread(target=lambda: [bridge.publish(i) for i in range(10)])
+        worker.start()
+        worker.join()
+        assert bridge.deliver()
+        assert not bridge.deliver()
+        assert received == [9]
+        assert bridge.get_stats() == {"refresh_rate": 60.0, "published": 10,
+                                      "delivered": 1, "coalesced": 9}
+        
+    def test_timer_delivers(self, qapp):
+        """Test that the refresh timer delivers pending frames"""
+        bridge = FrameBridge(refresh_rate=200.0)
+        received = []
+        bridge.frame_ready.connect(received.append)
+        bridge.publish("frame")
+        deadline = time.time() + 2.0
+        while not received and time.time() < deadline:
+            qapp.processEvents()
+            time.sleep(0.001)
+        bridge.stop()
+        assert received == ["frame"]
+
+    def test_one_slot_per_key(self, qapp):
+        """Test that frames of different keys do not replace each other"""
+        bridge = FrameBridge(refresh_rate=60.0)
+        bridge.stop()
+        received = []
+        bridge.frame_ready.connect(received.append)
+        for i in range(6):
+            bridge.publish(i, key=i % 2)
+        assert bridge.deliver()
+        assert received == [4, 5]
+        assert bridge.get_stats()["coalesced"] == 4
 
 if __name__ == "__main__":
     pytest.main(['-v', __file__])